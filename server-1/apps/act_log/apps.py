@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class ActLogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.act_log' 
\ No newline at end of file
+    name = 'apps.act_log'
+
+    def ready(self):
+        import apps.act_log.partitions 
\ No newline at end of file
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from utils.partitions import (
+    ARCHIVE_DIR, MONTHS_AHEAD, archive_partition, ensure_partitions, expired_partitions,
+    is_partitioned, registered_tables,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates the monthly partitions of the coming months for every partitioned table '
+        '(activity log, notifications, history) and archives the partitions past retention '
+        'as compressed CSV before dropping them. Run it daily, e.g. from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', action='append', help='Only manage this table (repeatable)')
+        parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD, help='Months of partitions to keep ready')
+        parser.add_argument('--archive-dir', default=ARCHIVE_DIR, help='Where archived partitions are written')
+        parser.add_argument('--detach-only', action='store_true', help='Detach expired partitions and keep them as tables')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the partitions that would be archived')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioned tables need PostgreSQL')
+
+        tables = registered_tables()
+        if options['table']:
+            unknown = set(options['table']) - {item.table for item in tables}
+            if unknown:
+                raise CommandError(f"Not a partitioned table: {', '.join(sorted(unknown))}")
+            tables = [item for item in tables if item.table in options['table']]
+
+        for item in tables:
+            with connection.cursor() as cursor:
+                partitioned = is_partitioned(cursor, item.table)
+            if not partitioned:
+                self.stdout.write(self.style.WARNING(f'{item.table} is not partitioned yet (run migrate); skipped'))
+                continue
+
+            expired = expired_partitions(item.table, item.retention_months)
+            if options['dry_run']:
+                self.stdout.write(f"{item.table}: would archive {', '.join(expired) or 'nothing'}")
+                continue
+
+            created = ensure_partitions(item.table, options['months_ahead'])
+            if created:
+                self.stdout.write(f"{item.table}: created {', '.join(created)}")
+            for name in expired:
+                path = archive_partition(item.table, name, options['archive_dir'], options['detach_only'])
+                if path:
+                    self.stdout.write(f'{item.table}: archived {name} to {path}')
+                else:
+                    self.stdout.write(f'{item.table}: detached {name}')
+            if expired and item.after_archive:
+                item.after_archive()
+
+        self.stdout.write(self.style.SUCCESS('Partitions up to date.'))
@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 17:10
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from utils.search import SearchIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('act_log', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitylog',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        SearchIndex(
+            table='activity_log',
+            weights={'A': ['act_type', 'act_module', 'act_action'], 'C': ['act_description']},
+            trigram=['act_type'],
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.2 on 2026-10-18 17:20
+
+from django.db import migrations
+
+from utils.partitions import PartitionByMonth
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('act_log', '0002_search_vector'),
+    ]
+
+    operations = [
+        PartitionByMonth(table='activity_log', column='act_timestamp', pk='act_id'),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from apps.administration.models import Staff
 
@@ -10,6 +11,7 @@ class ActivityLog(models.Model):
     act_action = models.CharField(max_length=50, help_text="Action performed (e.g., 'create', 'update', 'delete')")
     act_record_id = models.CharField(max_length=100, null=True, blank=True, help_text="ID of the affected record")
     staff = models.ForeignKey(Staff, on_delete=models.CASCADE)
+    search_vector = SearchVectorField(null=True, editable=False) # Filled by a trigger (utils.search)
 
     class Meta:
         db_table = 'activity_log'
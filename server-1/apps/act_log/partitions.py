@@ -0,0 +1,5 @@
+from django.conf import settings
+
+from utils.partitions import register
+
+register('activity_log', 'act_timestamp', getattr(settings, 'ACTIVITY_LOG_RETENTION_MONTHS', 24))
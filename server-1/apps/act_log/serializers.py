@@ -8,7 +8,7 @@ class ActivityLogSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = ActivityLog
-        fields = '__all__'
+        exclude = ['search_vector']
     
     def get_staff_name(self, obj):
         """Get the full name of the staff member"""
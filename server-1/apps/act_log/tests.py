@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.administration.models import Position, Staff
+from apps.profiling.models import Personal, ResidentProfile
+from utils.partitions import add_months, date_range, expired_months, partition_month, registered_tables
+from utils.search import parse_query, search, to_tsquery
+from .models import ActivityLog
+from .utils import ActivityLogMixin, create_activity_log, module_from_name
+from .views import ACTIVITY_LOG_SEARCH
+from .writer import activity_log_writer
+
+
+class ActivityLogWriterTest(TestCase):
+    def setUp(self):
+        activity_log_writer.flush()
+        per = Personal.objects.create(
+            per_lname='Cruz', per_fname='Ana', per_dob=date(1990, 1, 1),
+            per_sex='FEMALE', per_status='SINGLE', per_religion='CATHOLIC',
+        )
+        self.staff = Staff.objects.create(
+            staff_id='S0001',
+            rp=ResidentProfile.objects.create(rp_id='2401011', per=per),
+            pos=Position.objects.create(pos_title='Secretary', pos_category='BARANGAY POSITION'),
+        )
+
+    def test_batch_is_written_with_one_insert(self):
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic(), activity_log_writer.batch():
+                for record_id in range(100):
+                    create_activity_log('Plan Archived', 'Plan archived', self.staff, record_id=str(record_id))
+
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "activity_log"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(ActivityLog.objects.filter(act_action='archive', act_module='act_log').count(), 100)
+
+    def test_rolled_back_logs_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    create_activity_log('Plan Created', 'Plan created', self.staff)
+                    raise ValueError
+            except ValueError:
+                pass
+        activity_log_writer.flush()
+        self.assertFalse(ActivityLog.objects.exists())
+
+    def test_module_is_resolved_per_view_class(self):
+        class PlanView(ActivityLogMixin):
+            pass
+
+        class PinnedView(ActivityLogMixin):
+            activity_module = 'gad'
+
+        self.assertEqual(module_from_name('apps.clerk.summon.summonViews'), 'clerk')
+        self.assertEqual(module_from_name('utils.cache'), 'unknown')
+        self.assertEqual(PlanView.get_activity_module(), 'act_log')
+        self.assertEqual(PinnedView.get_activity_module(), 'gad')
+
+
+class ActivityLogSearchTest(TestCase):
+    setUp = ActivityLogWriterTest.setUp
+
+    def test_query_is_parsed_into_prefix_terms(self):
+        terms = parse_query('Cruz "plan archived" IR-0012 ;')
+        self.assertEqual(terms, [['cruz'], ['plan', 'archived'], ['ir'], ['0012']])
+        self.assertEqual(to_tsquery(terms), '(cruz:*) & (plan <-> archived:*) & (ir:*) & (0012:*)')
+        self.assertEqual(parse_query('  " " ;; '), [])
+
+    def test_search_matches_every_term_across_own_and_staff_columns(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_activity_log('Plan Archived', 'Budget plan archived', self.staff, module='gad')
+            create_activity_log('Payment Created', 'Receipt issued', self.staff, module='treasurer')
+        activity_log_writer.flush()
+
+        found = search(ActivityLog.objects.all(), 'cruz archived', ACTIVITY_LOG_SEARCH, ['-act_timestamp'])
+        self.assertEqual([log.act_module for log in found], ['gad'])
+        self.assertEqual(search(ActivityLog.objects.all(), 'ana', ACTIVITY_LOG_SEARCH).count(), 2)
+        self.assertFalse(search(ActivityLog.objects.all(), 'santos', ACTIVITY_LOG_SEARCH).exists())
+
+
+class PartitionRetentionTest(SimpleTestCase):
+    def test_months_past_retention_are_expired(self):
+        months = [date(2024, 10, 1), date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1)]
+        self.assertEqual(add_months(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(add_months(date(2025, 1, 1), -1), date(2024, 12, 1))
+        self.assertEqual(expired_months(months, 2, today=date(2025, 1, 20)), [date(2024, 10, 1)])
+        self.assertEqual(partition_month('activity_log', 'activity_log_p202410'), date(2024, 10, 1))
+        self.assertIsNone(partition_month('activity_log', 'activity_log_default'))
+
+    def test_date_range_covers_whole_local_days(self):
+        condition = date_range({'date_from': '2025-01-05', 'date_to': '2025-01-06'}, 'act_timestamp')
+        bounds = dict(condition.children)
+        self.assertEqual(bounds['act_timestamp__lt'] - bounds['act_timestamp__gte'], timedelta(days=2))
+        self.assertEqual(len(date_range({'date_from': 'yesterday'}, 'act_timestamp')), 0)
+
+    def test_command_manages_registered_tables_on_postgresql_only(self):
+        tables = {item.table for item in registered_tables()}
+        self.assertTrue({'activity_log', 'notification', 'recipient', 'personal_history'} <= tables)
+        if connection.vendor != 'postgresql':
+            with self.assertRaises(CommandError):
+                call_command('manage_partitions', '--dry-run')
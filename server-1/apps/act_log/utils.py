@@ -1,11 +1,26 @@
+from functools import lru_cache
+import sys
 from django.utils import timezone
 from .models import ActivityLog
+from .writer import activity_log_writer
 from apps.administration.models import Staff
-import inspect
-import os
 from rest_framework.response import Response
 
 
+@lru_cache(maxsize=None)
+def module_from_name(module_path):
+    """App of a dotted module path, e.g. 'apps.clerk.summon.summonViews' -> 'clerk'"""
+    parts = module_path.split('.')
+    if 'apps' in parts[:-1]:
+        return parts[parts.index('apps') + 1]
+    return "unknown"
+
+
+def _caller_module(depth):
+    # One frame lookup (no stack walk); the result per module path is cached
+    return module_from_name(sys._getframe(depth + 1).f_globals.get('__name__', ''))
+
+
 def resolve_staff_from_request(request):
     """
     Attempt to resolve a Staff instance associated with the incoming request.
@@ -62,8 +77,13 @@ def create_activity_log(
     act_description,
     staff,
     record_id=None,
+    module=None,
     **kwargs
 ):
+    """
+    Buffers an ActivityLog row (see writer.py) and returns it, unsaved.
+    module is the app the action belongs to; by default the app of the caller.
+    """
     # Check if staff is None or doesn't have a staff_id - don't log if no staff
     if staff is None:
         import logging
@@ -88,29 +108,7 @@ def create_activity_log(
     
     # If we get here, staff exists and has a valid staff_id - proceed with logging
     
-    frame = inspect.currentframe().f_back
-    module_name = "unknown"
-
-    # Walk back the stack until we find the actual Django app module
-    while frame:
-        filename = frame.f_code.co_filename
-        if filename:
-            path_parts = filename.replace('\\', '/').split('/')
-            candidate = None
-            for i, part in enumerate(path_parts):
-                if part == 'apps' and i + 1 < len(path_parts):
-                    candidate = path_parts[i + 1]
-                    break
-            if candidate:
-                module_name = candidate
-                # Skip helper modules such as act_log itself
-                if module_name != 'act_log':
-                    break
-                # Reset to unknown so we keep searching upwards
-                module_name = "unknown"
-        frame = frame.f_back
-        if module_name != "unknown":
-            break
+    module_name = module or kwargs.pop('act_module', None) or _caller_module(1)
     
     act_action = "custom"
     act_type_lower = act_type.lower()
@@ -149,7 +147,7 @@ def create_activity_log(
     filtered_kwargs = {k: v for k, v in kwargs.items() if k in allowed_fields}
     
     try:
-        activity_log = ActivityLog.objects.create(
+        activity_log = ActivityLog(
             act_timestamp=timezone.now(),
             act_type=act_type,
             act_description=act_description,
@@ -159,6 +157,7 @@ def create_activity_log(
             staff=staff,
             **filtered_kwargs
         )
+        activity_log_writer.add(activity_log)
         return activity_log
     except Exception as e:
         import logging
@@ -170,7 +169,7 @@ def format_model_name(model_name):
     """Format model name by replacing underscores with spaces."""
     return model_name.replace('_', ' ')
 
-def log_model_change(model_instance, action, staff, description=None, **kwargs):
+def log_model_change(model_instance, action, staff, description=None, module=None, **kwargs):
     # Check if staff is None - don't log if no staff
     if staff is None:
         import logging
@@ -214,12 +213,20 @@ def log_model_change(model_instance, action, staff, description=None, **kwargs):
         act_description=description,
         staff=staff,
         record_id=str(model_id) if model_id else None,
+        module=module or _caller_module(1),
         **kwargs
     )
 
 
 class ActivityLogMixin:
     """Reusable mixin to automatically log create/update/destroy actions."""
+    # App the logged actions belong to; defaults to the app of the view class
+    activity_module = None
+
+    @classmethod
+    def get_activity_module(cls):
+        return cls.activity_module or module_from_name(cls.__module__)
+
     def _resolve_logging_staff(self):
         staff, _ = resolve_staff_from_request(self.request)
         return staff
@@ -230,7 +237,7 @@ class ActivityLogMixin:
             staff = self._resolve_logging_staff()
             
             if staff is not None and hasattr(staff, 'staff_id') and staff.staff_id is not None:
-                log_model_change(instance, 'create', staff)
+                log_model_change(instance, 'create', staff, module=self.get_activity_module())
             else:
                 import logging
                 logger = logging.getLogger(__name__)
@@ -361,6 +368,7 @@ class ActivityLogMixin:
                     act_description=description,
                     staff=staff,
                     record_id=str(getattr(instance, 'pk', None)) if getattr(instance, 'pk', None) else None,
+                    module=self.get_activity_module(),
                 )
                 logger.info(f"Activity log created: {instance.__class__.__name__} {action_label}")
             else:
@@ -380,7 +388,7 @@ class ActivityLogMixin:
             staff = self._resolve_logging_staff()
             if staff is not None and hasattr(staff, 'staff_id') and staff.staff_id is not None:
                 # instance might be deleted; log with id only if accessible
-                log_model_change(instance, 'delete', staff)
+                log_model_change(instance, 'delete', staff, module=self.get_activity_module())
             else:
                 import logging
                 logger = logging.getLogger(__name__)
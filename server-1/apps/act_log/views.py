@@ -1,10 +1,17 @@
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from django.db.models import Q
 from .models import ActivityLog
 from .serializers import ActivityLogSerializer
 from apps.pagination import StandardResultsPagination
+from utils.partitions import date_range
+from utils.search import SearchSpec, search
+
+ACTIVITY_LOG_SEARCH = SearchSpec(
+    fields=['act_type', 'act_module', 'act_action', 'act_description'],
+    trigram=['act_type'],
+    related={'staff': ['rp__per__per_fname', 'rp__per__per_mname', 'rp__per__per_lname']},
+)
 
 
 class ActivityLogListView(generics.ListAPIView):
@@ -15,25 +22,18 @@ class ActivityLogListView(generics.ListAPIView):
     def get_queryset(self):
         queryset = ActivityLog.objects.select_related('staff__rp__per').all()
         
-        # Search functionality
-        search = self.request.query_params.get('search', '').strip()
-        if search:
-            queryset = queryset.filter(
-                Q(act_type__icontains=search) |
-                Q(act_description__icontains=search) |
-                Q(staff__rp__per__per_lname__icontains=search) |
-                Q(staff__rp__per__per_fname__icontains=search) |
-                Q(staff__rp__per__per_mname__icontains=search) |
-                Q(act_module__icontains=search) |
-                Q(act_action__icontains=search)
-            )
+        # Date range (?date_from=&date_to=), read from the matching monthly partitions only
+        queryset = queryset.filter(date_range(self.request.query_params, 'act_timestamp'))
         
         # Activity type filter
         act_type = self.request.query_params.get('act_type', '').strip()
         if act_type:
             queryset = queryset.filter(act_type__icontains=act_type)
         
-        return queryset.order_by('-act_timestamp')
+        # Search functionality (ranked, indexed)
+        return search(
+            queryset, self.request.query_params.get('search', ''), ACTIVITY_LOG_SEARCH, ['-act_timestamp']
+        )
     
     def list(self, request, *args, **kwargs):
         try:
@@ -0,0 +1,101 @@
+"""
+Buffered activity log writer.
+
+create_activity_log() hands unsaved ActivityLog rows to activity_log_writer
+instead of inserting them inside the request. Rows created inside a
+transaction join the buffer once it commits (and are dropped with it on
+rollback). The buffer is written with one bulk_create when it reaches
+ACTIVITY_LOG_BATCH_SIZE rows, ACTIVITY_LOG_FLUSH_SECONDS after its first row,
+at the end of a batch() block, and at interpreter exit. A
+ACTIVITY_LOG_FLUSH_SECONDS of 0 writes every row as soon as it is buffered.
+"""
+import atexit
+from contextlib import contextmanager
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+
+def _batch_size():
+    return getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 500)
+
+
+def _flush_seconds():
+    return getattr(settings, 'ACTIVITY_LOG_FLUSH_SECONDS', 2)
+
+
+class ActivityLogWriter:
+    def __init__(self):
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._timer = None
+        self._local = threading.local()
+
+    def add(self, log):
+        """Buffers an unsaved ActivityLog once the surrounding transaction (if any) commits"""
+        transaction.on_commit(lambda: self._enqueue(log))
+
+    def _enqueue(self, log):
+        with self._lock:
+            self._buffer.append(log)
+            pending = len(self._buffer)
+        if getattr(self._local, 'batching', 0):
+            # Written together when the batch() block ends
+            return
+        if pending >= _batch_size() or _flush_seconds() <= 0:
+            self.flush()
+        else:
+            self._arm_timer()
+
+    def _arm_timer(self):
+        with self._lock:
+            if self._timer is not None or not self._buffer:
+                return
+            self._timer = threading.Timer(_flush_seconds(), self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread's own connection is not reused
+            connections.close_all()
+
+    def flush(self):
+        """Writes every buffered row; returns the number written"""
+        with self._lock:
+            logs, self._buffer = self._buffer, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not logs:
+            return 0
+        try:
+            ActivityLog.objects.bulk_create(logs, batch_size=_batch_size())
+        except Exception as e:
+            logger.error(f"❌ Failed to write {len(logs)} activity log(s): {str(e)}")
+            return 0
+        return len(logs)
+
+    @contextmanager
+    def batch(self):
+        """Holds the rows logged in the block and writes them with one insert at its end (or commit)"""
+        self._local.batching = getattr(self._local, 'batching', 0) + 1
+        try:
+            yield
+        finally:
+            self._local.batching -= 1
+            if not self._local.batching:
+                # Registered after the rows' own callbacks, so it runs once they are buffered
+                transaction.on_commit(self.flush)
+
+
+activity_log_writer = ActivityLogWriter()
+atexit.register(activity_log_writer.flush)
@@ -1,28 +1,27 @@
-from decouple import config
-import requests
+from utils.peer_client import peer_client
 
 # ADD QUERIES
 class PostQueries:
   def __init__(self):
-    self.client = config("CLIENT", default="http://127.0.0.1:8001")
+    self.client = peer_client
   
   def staff(self, data):
-    response = requests.post(
-      f"{self.client}/administration/staff/",
+    response = self.client.post(
+      "/administration/staff/",
       json=data
     )
     return response
   
   def position(self, data):
-    response = requests.post(
-      f"{self.client}/administration/position/bulk/create/",
+    response = self.client.post(
+      "/administration/position/bulk/create/",
       json=data
     )
     return response
   
   def assignment(self, data):
-    response = requests.post(
-      f"{self.client}/administration/assignment/create/",
+    response = self.client.post(
+      "/administration/assignment/create/",
       json=data
     )
     return response
@@ -30,25 +29,25 @@ class PostQueries:
 # UPDATE QUERIES
 class UpdateQueries:
   def __init__(self):
-    self.client = config("CLIENT", default="http://127.0.0.1:8001")
+    self.client = peer_client
   
   def staff(self, data, staff_id):
-    response = requests.put(
-      f"{self.client}/administration/staff/{staff_id}/update/",
+    response = self.client.put(
+      f"/administration/staff/{staff_id}/update/",
       json=data
     )
     return response
   
   def position(self, data, pos_id):
-    response = requests.post(
-      f"{self.client}/administration/position/update/{pos_id}/",
+    response = self.client.post(
+      f"/administration/position/update/{pos_id}/",
       json=data
     )
     return response
   
   def group_position(self, data):
-    response = requests.patch(''
-      f"{self.client}/administration/position/update/group/",
+    response = self.client.patch(
+      "/administration/position/update/group/",
       json=data
     )
 
@@ -58,22 +57,22 @@ class UpdateQueries:
 # DELETE QUERIES
 class DeleteQueries:
   def __init__(self):
-    self.client = config("CLIENT", default="http://127.0.0.1:8001")
+    self.client = peer_client
   
   def staff(self, staff_id):
-    response = requests.delete(
-      f"{self.client}/administration/staff/{staff_id}/delete/"
+    response = self.client.delete(
+      f"/administration/staff/{staff_id}/delete/"
     )
     return response
   
   def assignment(self, feat_id, pos_id):
-    response = requests.delete(
-      f"{self.client}/administration/assignment/delete/{feat_id}/{pos_id}/"
+    response = self.client.delete(
+      f"/administration/assignment/delete/{feat_id}/{pos_id}/"
     )
     return response
 
   def position(self, pos_id):
-    response = requests.delete(
-      f"{self.client}/administration/position/delete/{pos_id}/"
+    response = self.client.delete(
+      f"/administration/position/delete/{pos_id}/"
     )
     return response
\ No newline at end of file
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_staff_rp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdCounter',
+            fields=[
+                ('ic_key', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('ic_value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'id_counter',
+            },
+        ),
+    ]
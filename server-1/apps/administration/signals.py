@@ -1,10 +1,14 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from apps.waste.models import WastePersonnel
-from .models import Staff
+from .models import Position, Staff
+from .views.position_views import POSITION_CACHE
+from utils.cache import invalidate_on_change
 
 @receiver(post_save, sender=Staff)
 def handle_waste_personnel(sender, instance, created, **kwargs):
     if hasattr(instance, 'pos') and instance.pos.pos_group and instance.pos.pos_group.lower() == "waste personnel":
         if created:
-            WastePersonnel.objects.create(staff=instance)
\ No newline at end of file
+            WastePersonnel.objects.create(staff=instance)
+
+invalidate_on_change(POSITION_CACHE, Position, Staff)
@@ -5,10 +5,14 @@ from django.db import transaction
 from ..models import Position, Staff
 from ..serializers.position_serializers import *
 from ..double_queries import *
+from utils.cache import CachedListMixin
 
+POSITION_CACHE = 'positions'
 
-class PositionView(generics.ListAPIView):
+
+class PositionView(CachedListMixin, generics.ListAPIView):
     serializer_class = PositionListSerializer
+    cache_namespace = POSITION_CACHE
 
     def get_queryset(self):
         staff_type = self.request.query_params.get('staff_type', None)
@@ -14,6 +14,8 @@ class AnnouncementConfig(AppConfig):
     name = 'apps.announcement'
 
     def ready(self):
+        from . import transitions
+
         if os.environ.get("SCHEDULER_AUTOSTART") != 'True':
             return
 
@@ -30,20 +32,10 @@ class AnnouncementConfig(AppConfig):
             logger.error("Scheduler already running in another worker. Skipping.")
 
     def start_scheduler(self, **kwargs):
-        """Initialize and start the background scheduler"""
+        """Start the scheduler of every registered state transition (announcements, waste events)"""
         try:
-            from .tasks import update_ann_status
-
-            scheduler = BackgroundScheduler()
-            scheduler.add_job(
-                update_ann_status,
-                'interval',
-                seconds=5,
-                next_run_time=timezone.now(),  # timezone-aware
-                misfire_grace_time=900,
-                id='announcement_status_update',
-            )
-            scheduler.start()
-            # logger.info("✅ Announcement scheduler started successfully")
+            from utils.transitions import transition_scheduler
+
+            transition_scheduler.start()
         except Exception as e:
             logger.error(f"Failed to start scheduler: {str(e)}")
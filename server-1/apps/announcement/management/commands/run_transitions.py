@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.transitions import POLL_SECONDS, run_due_transitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Applies the due state transitions (waste event archiving, announcement start and end). '
+        'Run it from cron with --once, or as a process, where no worker runs the transition scheduler.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=POLL_SECONDS, help='Seconds between runs')
+        parser.add_argument('--transition', action='append', help='Only apply this transition (repeatable)')
+        parser.add_argument('--once', action='store_true', help='Apply due transitions once and exit')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                applied = run_due_transitions(names=options['transition'])
+                changed = {name: count for name, count in applied.items() if count}
+                if changed:
+                    self.stdout.write(f"Applied transitions: {changed}")
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('Transitions up to date.'))
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 17:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0003_idcounter'),
+        ('announcement', '0002_alter_announcement_ann_status_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['ann_start_at'], name='announcemen_ann_sta_18df50_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['ann_end_at'], name='announcemen_ann_end_424bda_idx'),
+        ),
+    ]
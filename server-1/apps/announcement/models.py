@@ -19,6 +19,11 @@ class Announcement(AbstractModels):
     class Meta:
         db_table = 'announcement'
         ordering = ['-ann_created_at']
+        indexes = [
+            # Due scans of the announcement transitions
+            models.Index(fields=['ann_start_at']),
+            models.Index(fields=['ann_end_at']),
+        ]
 
 
 class AnnouncementFile(models.Model):
@@ -6,7 +6,8 @@ from apps.account.models import Account
 from apps.profiling.models import ResidentProfile
 from apps.administration.models import *
 from .models import Announcement, AnnouncementFile, AnnouncementRecipient
-from utils.supabase_client import upload_to_storage
+from utils.supabase_client import upload_many
+from utils.storage import request_files
 from apps.notification.utils import create_notification
 import logging
 
@@ -98,7 +99,8 @@ class AnnouncementCreateSerializer(serializers.ModelSerializer):
 
     @transaction.atomic
     def create(self, validated_data):
-        files = validated_data.pop('files', [])
+        # Multipart requests send the files as parts instead of base64 JSON
+        files = validated_data.pop('files', []) or request_files(self.context.get('request'))
         recipients_data = validated_data.pop('recipients', [])
 
         # Create the announcement
@@ -111,17 +113,18 @@ class AnnouncementCreateSerializer(serializers.ModelSerializer):
         return announcement
 
     def _upload_files(self, announcement_instance, files):
-        announcement_files = []
-        for file_data in files:
-            announcement_file = AnnouncementFile(
+        # Upload in parallel, then save the records in one query
+        urls = upload_many(files, 'announcement-bucket', "")
+        announcement_files = [
+            AnnouncementFile(
                 ann=announcement_instance,
                 af_name=file_data.get('name'),
                 af_type=file_data.get('type'),
                 af_path=file_data.get('name'),
+                af_url=url,
             )
-            url = upload_to_storage(file_data, 'announcement-bucket', "")
-            announcement_file.af_url = url
-            announcement_files.append(announcement_file)
+            for file_data, url in zip(files, urls)
+        ]
 
         if announcement_files:
             AnnouncementFile.objects.bulk_create(announcement_files)
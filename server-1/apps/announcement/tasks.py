@@ -6,32 +6,17 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def update_ann_status():
-    now = timezone.now() 
-    # logger.info("Checking announcements...")
+def notify_new_announcements(count):
+    create_notification(
+        title=f"New Announcement",
+        message=(
+            f"{count} new announcement{'s' if count > 1 else ''} has been added"
+        ),
 
-    announcements = Announcement.objects.filter(
-        ann_start_at__lte=now,
-        ann_end_at__gt=now,
-        ann_status__iexact="INACTIVE"
-    ).update(ann_status="ACTIVE")
-
-    if announcements > 0:
-        create_notification(
-            title=f"New Announcement",
-            message=(
-                f"{announcements} new announcement{'s' if announcements > 1 else ''} has been added"
-            ),
-
-            recipients=[res.rp_id for res in ResidentProfile.objects.all()],
-            notif_type="",
-            web_route="",
-            web_params={},
-            mobile_route="",
-            mobile_params={},
-        )
-    
-    Announcement.objects.filter(
-        ann_end_at__lte=now,
-        ann_status__iexact="ACTIVE"
-    ).delete()
+        recipients=ResidentProfile.objects.only('rp_id'),
+        notif_type="",
+        web_route="",
+        web_params={},
+        mobile_route="",
+        mobile_params={},
+    )
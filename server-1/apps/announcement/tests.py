@@ -1,3 +1,63 @@
+from datetime import date, timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.administration.models import Position, Staff
+from apps.profiling.models import Personal, ResidentProfile
+from utils import transitions
+from .models import Announcement
+
+
+class AnnouncementTransitionTest(TestCase):
+    def setUp(self):
+        per = Personal.objects.create(
+            per_lname='Cruz', per_fname='Ana', per_dob=date(1990, 1, 1),
+            per_sex='FEMALE', per_status='SINGLE', per_religion='CATHOLIC',
+        )
+        self.staff = Staff.objects.create(
+            staff_id='S0001',
+            rp=ResidentProfile.objects.create(rp_id='2401011', per=per),
+            pos=Position.objects.create(pos_title='Secretary', pos_category='BARANGAY POSITION'),
+        )
+
+    def _announcement(self, start, end, status):
+        now = timezone.now()
+        return Announcement.objects.create(
+            ann_title='Clean-up drive', ann_details='Details', ann_type='GENERAL', staff=self.staff,
+            ann_start_at=now + start, ann_end_at=now + end, ann_status=status,
+        )
+
+    @patch('apps.announcement.tasks.create_notification')
+    def test_due_announcements_are_activated_and_expired(self, create_notification):
+        live = self._announcement(timedelta(hours=-1), timedelta(days=1), 'INACTIVE')
+        ended = self._announcement(timedelta(days=-2), timedelta(hours=-1), 'ACTIVE')
+        missed = self._announcement(timedelta(days=-2), timedelta(hours=-1), 'INACTIVE')
+        upcoming = self._announcement(timedelta(hours=2), timedelta(days=1), 'INACTIVE')
+
+        applied = transitions.run_due_transitions()
+
+        self.assertEqual(applied['announcement_expire'], 1)
+        self.assertEqual(applied['announcement_activate'], 1)
+        self.assertEqual(Announcement.objects.get(pk=live.pk).ann_status, 'ACTIVE')
+        self.assertFalse(Announcement.objects.filter(pk=ended.pk).exists())
+        self.assertEqual(Announcement.objects.get(pk=missed.pk).ann_status, 'INACTIVE')
+        self.assertEqual(create_notification.call_args.kwargs['message'], '1 new announcement has been added')
+
+        # Nothing is due again until the upcoming announcement starts
+        self.assertEqual(transitions.run_due_transitions()['announcement_activate'], 0)
+        self.assertEqual(transitions.next_due_at(), upcoming.ann_start_at)
+
+    @patch('apps.announcement.tasks.create_notification')
+    def test_command_applies_transitions_without_scheduler(self, create_notification):
+        live = self._announcement(timedelta(hours=-1), timedelta(days=1), 'INACTIVE')
+        ended = self._announcement(timedelta(days=-2), timedelta(hours=-1), 'ACTIVE')
+
+        call_command('run_transitions', '--once', '--transition', 'announcement_activate', stdout=StringIO())
 
-# Create your tests here.
+        self.assertEqual(Announcement.objects.get(pk=live.pk).ann_status, 'ACTIVE')
+        # Only the named transition ran
+        self.assertTrue(Announcement.objects.filter(pk=ended.pk).exists())
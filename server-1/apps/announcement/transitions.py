@@ -0,0 +1,19 @@
+from django.db.models import Q
+from utils.transitions import delete_rows, register, set_fields
+from .models import Announcement
+from .tasks import notify_new_announcements
+
+# Ended announcements are removed; expired first so they are never activated
+register(
+    'announcement_expire', Announcement, 'ann_end_at',
+    Q(ann_status__iexact="ACTIVE"),
+    delete_rows,
+)
+
+# Announcements go live at their start, unless they have already ended
+register(
+    'announcement_activate', Announcement, 'ann_start_at',
+    lambda now: Q(ann_status__iexact="INACTIVE", ann_end_at__gt=now),
+    set_fields(ann_status="ACTIVE"),
+    on_applied=notify_new_announcements,
+)
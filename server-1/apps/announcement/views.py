@@ -114,17 +114,18 @@ class AnnouncementUpdateView(generics.UpdateAPIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     def _upload_files(self, announcement_instance, files):
-        announcement_files = []
-        for file_data in files:
-            announcement_file = AnnouncementFile(
+        # Upload in parallel, then save the records in one query
+        urls = upload_many(files, 'announcement-bucket', "")
+        announcement_files = [
+            AnnouncementFile(
                 ann=announcement_instance,
                 af_name=file_data.get('name'),
                 af_type=file_data.get('type'),
                 af_path=file_data.get('name'),
+                af_url=url,
             )
-            url = upload_to_storage(file_data, 'announcement-bucket', "")
-            announcement_file.af_url = url
-            announcement_files.append(announcement_file)
+            for file_data, url in zip(files, urls)
+        ]
 
         if announcement_files:
             AnnouncementFile.objects.bulk_create(announcement_files)
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 17:10
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from utils.search import SearchIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint', '0002_alter_complaint_options_complaint_history_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        SearchIndex(
+            table='complaint',
+            weights={'A': ['comp_incident_type'], 'B': ['comp_location'], 'C': ['comp_allegation']},
+            trigram=['comp_id'],
+        ),
+        SearchIndex(table='complainant', trigram=['cpnt_name']),
+        SearchIndex(table='accused', trigram=['acsd_name']),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils import timezone
 from django.db.models import Max
@@ -53,6 +54,7 @@ class Complaint(models.Model):
     complainant = models.ManyToManyField(Complainant, through='ComplaintComplainant', related_name='complaints')
     accused = models.ManyToManyField(Accused,through='ComplaintAccused',related_name='complaints')
     comp_updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False) # Filled by a trigger (utils.search)
     class Meta:
         db_table = 'complaint'
         ordering = ['comp_created_at']
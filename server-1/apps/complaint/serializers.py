@@ -10,7 +10,7 @@ from apps.profiling.models import ResidentProfile, Personal
 from .models import (Accused, Complainant, Complaint, ComplaintComplainant, ComplaintAccused, Complaint_File, Complaint_History)
 
 # utility
-from utils.supabase_client import upload_to_storage
+from utils.supabase_client import upload_many
 
 # python
 import json
@@ -99,32 +99,29 @@ class ComplaintFileSerializer(serializers.ModelSerializer):
         if not comp_instance:
             raise serializers.ValidationError({"error": "comp_instance is required"})
         
-        complaint_files = []
-        
+        valid_files = []
         for file_data in files:
-            # Validate file data
-            if not file_data.get('file') or not isinstance(file_data['file'], str) or not file_data['file'].startswith('data:'):
+            # Validate file data: a base64 data URL or a multipart upload
+            content = file_data.get('file')
+            if not content or (isinstance(content, str) and not content.startswith('data:')):
                 print(f"Skipping invalid file data: {file_data.get('name', 'unknown')}")
                 continue
+            valid_files.append(file_data)
+        
+        # Upload to storage first (in parallel) and get the URLs
+        file_urls = upload_many(valid_files, 'complaint-bucket', 'documents')
+        
+        complaint_files = []
+        for file_data, file_url in zip(valid_files, file_urls):
+            print(f"Successfully uploaded file: {file_data['name']} to {file_url}")
             
-            try:
-                # Upload to storage first and get the URL
-                file_url = upload_to_storage(file_data, 'complaint-bucket', 'documents')
-                print(f"Successfully uploaded file: {file_data['name']} to {file_url}")
-                
-                # Create the Complaint_File instance with ForeignKey reference
-                complaint_file = Complaint_File(
-                    comp_file_name=file_data['name'],
-                    comp_file_type=file_data['type'],
-                    comp_file_url=file_url,
-                    comp=comp_instance,
-                )
-                
-                complaint_files.append(complaint_file)
-                
-            except Exception as e:
-                print(f"Failed to process file {file_data['name']}: {e}")
-                continue
+            # Create the Complaint_File instance with ForeignKey reference
+            complaint_files.append(Complaint_File(
+                comp_file_name=file_data['name'],
+                comp_file_type=file_data['type'],
+                comp_file_url=file_url,
+                comp=comp_instance,
+            ))
         
         # Save all files at once using bulk_create
         if complaint_files:
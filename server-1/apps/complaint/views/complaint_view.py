@@ -10,6 +10,8 @@ from django.shortcuts import get_object_or_404
 # local
 from ..models import Complaint
 from ..serializers import ComplaintSerializer
+from .search_complaint import COMPLAINT_SEARCH
+from utils.search import search
 
 # python
 import logging
@@ -25,12 +27,14 @@ class ComplaintListView(generics.ListAPIView):
             'complaintaccused_set__acsd',
             'files',
             'staff'
-        ).order_by('-comp_created_at')
+        )
 
         status = self.request.query_params.get('status')
         if status:
             queryset = queryset.filter(comp_status=status)
-        return queryset
+        return search(
+            queryset, self.request.query_params.get('search', ''), COMPLAINT_SEARCH, ['-comp_created_at']
+        )
 
         
 class ResidentsComplaintListView(generics.ListAPIView):
@@ -21,6 +21,7 @@ from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.core.files.base import ContentFile
 # Utility
 from utils.supabase_client import upload_to_storage
+from utils.storage import request_files
 # Python
 import json
 import logging
@@ -168,7 +169,7 @@ class ComplaintCreateView(APIView):
                     ]
                     ComplaintAccused.objects.bulk_create(complaint_accused)
                 
-                files = request.data.get("files", [])
+                files = request_files(request)
                 uploaded_files = []
                 
                 if files:
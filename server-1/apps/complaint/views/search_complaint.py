@@ -0,0 +1,14 @@
+# Imports
+# local
+from utils.search import SearchSpec
+
+# Complaint search (utils.search): the complaint's own text is in its search
+# vector, complainant and accused names are matched in their own tables
+COMPLAINT_SEARCH = SearchSpec(
+    fields=['comp_incident_type', 'comp_location', 'comp_allegation'],
+    trigram=['comp_id'],
+    related={
+        'complainant': ['cpnt_name'],
+        'accused': ['acsd_name'],
+    },
+)
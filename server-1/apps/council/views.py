@@ -8,6 +8,8 @@ from rest_framework.permissions import AllowAny
 from apps.act_log.utils import ActivityLogMixin
 import logging
 from apps.treasurer.models import Purpose_And_Rates
+from apps.treasurer.views import PURPOSE_RATES_CACHE
+from utils.cache import CachedListMixin
 # from apps.gad.models import ProjectProposalLog
 from rest_framework.views import APIView
 from rest_framework.exceptions import NotFound
@@ -1107,9 +1109,10 @@ class GADProposalsView(generics.ListAPIView):
         return ProjectProposal.objects.all().select_related('dev')
 
 
-class PurposeRatesListView(generics.ListCreateAPIView):
+class PurposeRatesListView(CachedListMixin, generics.ListCreateAPIView):
     queryset = Purpose_And_Rates.objects.all()
     serializer_class = PurposeRatesListViewSerializer
+    cache_namespace = PURPOSE_RATES_CACHE
     
 # =================== MINUTES OF MEETING VIEWS ======================
 class MinutesOfMeetingActiveView(ActivityLogMixin, generics.ListCreateAPIView):
@@ -11,6 +11,7 @@ import logging
 from rest_framework.views import APIView
 from django.db import transaction
 from apps.act_log.utils import ActivityLogMixin, create_activity_log, resolve_staff_from_request
+from apps.act_log.writer import activity_log_writer
 from apps.pagination import StandardResultsPagination
 from django.db.models import Q
 from utils.supabase_client import remove_from_storage
@@ -1200,43 +1201,45 @@ class GADDevelopmentPlanBulkUpdate(APIView):
                 act_type = "GAD Development Plan Archived" if dev_archived else "GAD Development Plan Restored"
                 
                 logged_count = 0
-                for plan in plans:
-                    try:
-                        # Build comprehensive activity log description
-                        description_parts = []
+                # One insert for every plan, written when the block ends
+                with activity_log_writer.batch():
+                    for plan in plans:
+                        try:
+                            # Build comprehensive activity log description
+                            description_parts = []
                         
-                        # Project title
-                        project_title = plan.dev_project or 'N/A'
-                        description_parts.append(f"Project: {project_title}")
+                            # Project title
+                            project_title = plan.dev_project or 'N/A'
+                            description_parts.append(f"Project: {project_title}")
                         
-                        # Date
-                        if plan.dev_date:
-                            if isinstance(plan.dev_date, str):
-                                date_str = plan.dev_date
-                            else:
-                                date_str = plan.dev_date.strftime('%Y-%m-%d')
-                            description_parts.append(f"Date: {date_str}")
+                            # Date
+                            if plan.dev_date:
+                                if isinstance(plan.dev_date, str):
+                                    date_str = plan.dev_date
+                                else:
+                                    date_str = plan.dev_date.strftime('%Y-%m-%d')
+                                description_parts.append(f"Date: {date_str}")
                         
-                        # Client focused
-                        if plan.dev_client:
-                            description_parts.append(f"Client: {plan.dev_client}")
+                            # Client focused
+                            if plan.dev_client:
+                                description_parts.append(f"Client: {plan.dev_client}")
                         
-                        # Build final description
-                        description = f"GAD Development Plan {action}. {'. '.join(description_parts)}"
+                            # Build final description
+                            description = f"GAD Development Plan {action}. {'. '.join(description_parts)}"
                         
-                        result = create_activity_log(
-                            act_type=act_type,
-                            act_description=description,
-                            staff=staff,
-                            record_id=str(plan.dev_id)
-                        )
-                        if result:
-                            logged_count += 1
-                            logger.info(f"Activity logged for plan {plan.dev_id}: {description}")
-                        else:
-                            logger.warning(f"Activity log creation returned None for plan {plan.dev_id}")
-                    except Exception as e:
-                        logger.error(f"Failed to log activity for plan {plan.dev_id}: {str(e)}", exc_info=True)
+                            result = create_activity_log(
+                                act_type=act_type,
+                                act_description=description,
+                                staff=staff,
+                                record_id=str(plan.dev_id)
+                            )
+                            if result:
+                                logged_count += 1
+                                logger.info(f"Activity logged for plan {plan.dev_id}: {description}")
+                            else:
+                                logger.warning(f"Activity log creation returned None for plan {plan.dev_id}")
+                        except Exception as e:
+                            logger.error(f"Failed to log activity for plan {plan.dev_id}: {str(e)}", exc_info=True)
                 
                 logger.info(f"Successfully logged {logged_count} out of {len(plans)} GAD development plan(s) {action}")
             else:
@@ -0,0 +1,72 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .inbox import unread_counts
+from .realtime import account_group, missed_notifications
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    ws/notifications/?token=<access token>[&last_id=<notif_id>]
+
+    Server -> client:
+      {"type": "resume", "notifications": [...], "has_more": bool, "unread": n}
+      {"type": "notification", "notification": {...}, "unread": n}
+      {"type": "unread", "unread": n}
+    Client -> server:
+      {"type": "resume", "last_id": <notif_id>}   missed notifications since last_id
+      {"type": "ping"}                            answered with {"type": "pong"}
+    """
+    group = None
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.acc_id = user.pk
+        self.group = account_group(self.acc_id)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        await self.send_resume(query.get('last_id', [None])[0])
+
+    async def disconnect(self, code):
+        if self.group:
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        message_type = content.get('type')
+        if message_type == 'resume':
+            await self.send_resume(content.get('last_id'))
+        elif message_type == 'ping':
+            await self.send_json({'type': 'pong'})
+
+    async def send_resume(self, last_id):
+        try:
+            last_id = int(last_id)
+        except (TypeError, ValueError):
+            # First connect: the client loads its list once over HTTP
+            last_id = None
+
+        unread = (await database_sync_to_async(unread_counts)([self.acc_id]))[self.acc_id]
+        if last_id is None:
+            await self.send_json({'type': 'unread', 'unread': unread})
+            return
+        notifications, has_more = await database_sync_to_async(missed_notifications)(self.acc_id, last_id)
+        await self.send_json({
+            'type': 'resume', 'notifications': notifications, 'has_more': has_more, 'unread': unread,
+        })
+
+    # ===============================================================
+    #  GROUP EVENTS (realtime.py)
+    # ===============================================================
+    async def notification_new(self, event):
+        await self.send_json({'type': 'notification', 'notification': event['notification'], 'unread': event['unread']})
+
+    async def notification_unread(self, event):
+        await self.send_json({'type': 'unread', 'unread': event['unread']})
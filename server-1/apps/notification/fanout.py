@@ -0,0 +1,176 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import transaction
+from apps.notification.models import Recipient, FCMToken
+from apps.account.models import Account
+from apps.profiling.models import ResidentProfile
+from .inbox import add_unread
+from .notifications import send_multicast_notification, is_invalid_token_error
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+RECIPIENT_BATCH_SIZE = getattr(settings, 'NOTIFICATION_RECIPIENT_BATCH_SIZE', 1000)
+FCM_MULTICAST_LIMIT = 500
+FCM_BATCH_SIZE = min(getattr(settings, 'FCM_MULTICAST_BATCH_SIZE', FCM_MULTICAST_LIMIT), FCM_MULTICAST_LIMIT)
+FCM_SEND_WORKERS = getattr(settings, 'FCM_SEND_WORKERS', 4)
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# ===============================================================
+#  RESOLVE RECIPIENTS -> ACCOUNTS
+# ===============================================================
+def resolve_recipient_accounts(recipients):
+    """
+    Accepts Account and ResidentProfile instances. Resident profiles are
+    resolved to their accounts with a single query instead of one per row.
+    """
+    accounts = []
+    rp_ids = []
+
+    for recipient in recipients:
+        if isinstance(recipient, Account):
+            accounts.append(recipient)
+        elif isinstance(recipient, ResidentProfile):
+            rp_ids.append(recipient.rp_id)
+        else:
+            logger.error(f"❌ Invalid recipient type: {type(recipient)}")
+
+    if rp_ids:
+        resident_accounts = {
+            acc.rp_id: acc for acc in Account.objects.filter(rp_id__in=rp_ids)
+        }
+        for rp_id in rp_ids:
+            account = resident_accounts.get(rp_id)
+            if account:
+                accounts.append(account)
+            else:
+                logger.warning(f"⚠️ No Account found for ResidentProfile: {rp_id}")
+
+    # Drop duplicates while keeping order
+    seen = set()
+    unique_accounts = []
+    for acc in accounts:
+        if acc.pk not in seen:
+            seen.add(acc.pk)
+            unique_accounts.append(acc)
+
+    return unique_accounts
+
+
+# ===============================================================
+#  RECIPIENT ROWS
+# ===============================================================
+def bulk_create_recipients(notification, accounts, batch_size=None):
+    """Recipient rows of notification, and the accounts' unread counters, in batches"""
+    batch_size = batch_size or RECIPIENT_BATCH_SIZE
+    created = 0
+
+    with transaction.atomic(savepoint=False):
+        for chunk in _chunks(accounts, batch_size):
+            Recipient.objects.bulk_create(
+                [Recipient(notif=notification, acc=acc, rec_created_at=notification.notif_created_at) for acc in chunk],
+                batch_size=batch_size,
+            )
+            add_unread([acc.pk for acc in chunk])
+            created += len(chunk)
+
+    return created
+
+
+# ===============================================================
+#  DEVICE TOKENS
+# ===============================================================
+def collect_device_tokens(accounts):
+    """One token per device across all accounts, fetched with a single query"""
+    device_tokens = {}
+    tokens = FCMToken.objects.filter(
+        acc__in=[acc.pk for acc in accounts]
+    ).values_list('fcm_device_id', 'fcm_token').order_by('id')
+
+    for device_id, token in tokens:
+        if device_id and device_id not in device_tokens:
+            device_tokens[device_id] = token
+        else:
+            logger.warning(f"⚠️ Duplicate device ID skipped: {device_id}")
+
+    return list(dict.fromkeys(device_tokens.values()))
+
+
+# ===============================================================
+#  MULTICAST SEND
+# ===============================================================
+def _send_batch(batch_no, tokens, title, message, data):
+    try:
+        response = send_multicast_notification(tokens, title, message, data)
+    except Exception as e:
+        logger.error(f"💥 FCM batch {batch_no} failed: {str(e)}")
+        return {'batch': batch_no, 'sent': 0, 'failed': len(tokens), 'invalid_tokens': []}
+
+    invalid_tokens = [
+        token for token, result in zip(tokens, response.responses)
+        if not result.success and is_invalid_token_error(result.exception)
+    ]
+    return {
+        'batch': batch_no,
+        'sent': response.success_count,
+        'failed': response.failure_count,
+        'invalid_tokens': invalid_tokens,
+    }
+
+
+def send_push_batches(notification, tokens, batch_size=None, workers=None):
+    """
+    Sends the notification to every token in multicast batches from a worker
+    pool, then removes tokens FCM reported as invalid.
+    """
+    batch_size = min(batch_size or FCM_BATCH_SIZE, FCM_MULTICAST_LIMIT)
+    workers = workers or FCM_SEND_WORKERS
+
+    if not tokens:
+        logger.warning("❌ No FCM tokens found for any recipients")
+        return {'success': False, 'sent_count': 0, 'failed_count': 0, 'pruned_count': 0, 'batches': []}
+
+    fcm_payload = {
+        "notification_id": str(notification.notif_id),
+        "notif_type": notification.notif_type,
+        "web_route": notification.web_route or "",
+        "web_params": json.dumps(notification.web_params or {}),
+        "mobile_route": notification.mobile_route or "",
+        "mobile_params": json.dumps(notification.mobile_params or {}),
+    }
+
+    batches = list(_chunks(tokens, batch_size))
+    with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as executor:
+        results = list(executor.map(
+            lambda args: _send_batch(
+                args[0], args[1], notification.notif_title, notification.notif_message, fcm_payload
+            ),
+            enumerate(batches, start=1),
+        ))
+
+    invalid_tokens = [token for result in results for token in result.pop('invalid_tokens')]
+    pruned_count = 0
+    if invalid_tokens:
+        pruned_count, _ = FCMToken.objects.filter(fcm_token__in=invalid_tokens).delete()
+        logger.info(f"🧹 Pruned {pruned_count} invalid FCM token(s)")
+
+    for result in results:
+        logger.info(f"📦 FCM batch {result['batch']}: {result['sent']} sent, {result['failed']} failed")
+
+    total_sent = sum(result['sent'] for result in results)
+    total_failed = sum(result['failed'] for result in results)
+    logger.info(f"📊 FCM Final result: {total_sent} sent, {total_failed} failed")
+
+    return {
+        'success': total_sent > 0,
+        'sent_count': total_sent,
+        'failed_count': total_failed,
+        'pruned_count': pruned_count,
+        'batches': results,
+    }
@@ -0,0 +1,117 @@
+"""
+Notification inbox: keyset pages and unread counters.
+
+inbox_page() reads an account's notifications newest first, continuing after
+the (rec_created_at, rec_id) of the last row of the previous page, so every
+page costs the same however deep it is (recipient_inbox_idx). Rows are
+plain dicts in the websocket payload's shape (realtime.py).
+
+Each account's unread count is kept in its UnreadCounter row: fan-out adds
+one per new recipient row (add_unread) and mark_read() subtracts what it
+marked, in the same transaction as the recipient rows. Badges read that row.
+recount_unread() rebuilds the counters from the recipient rows, e.g. after
+old partitions were archived.
+"""
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Recipient, UnreadCounter
+
+PAGE_SIZE = getattr(settings, 'NOTIFICATION_INBOX_PAGE_SIZE', 20)
+MAX_PAGE_SIZE = 100
+
+INBOX_FIELDS = {
+    'notif_title': F('notif__notif_title'),
+    'notif_message': F('notif__notif_message'),
+    'notif_type': F('notif__notif_type'),
+    'notif_created_at': F('rec_created_at'),
+    'web_route': F('notif__web_route'),
+    'web_params': F('notif__web_params'),
+    'mobile_route': F('notif__mobile_route'),
+    'mobile_params': F('notif__mobile_params'),
+}
+
+
+# ===============================================================
+#  KEYSET PAGES
+# ===============================================================
+def encode_cursor(created_at, rec_id):
+    return base64.urlsafe_b64encode(f'{created_at.isoformat()}|{rec_id}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(rec_created_at, rec_id) of a cursor; ValueError if it is malformed"""
+    try:
+        created_at, rec_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(rec_id)
+    except (TypeError, UnicodeError, ValueError) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+
+
+def inbox_page(acc_id, cursor=None, limit=PAGE_SIZE):
+    """(rows newest first, cursor of the next page or None)"""
+    queryset = Recipient.objects.filter(acc_id=acc_id)
+    if cursor:
+        created_at, rec_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(rec_created_at__lt=created_at) | Q(rec_created_at=created_at, rec_id__lt=rec_id)
+        )
+
+    rows = list(
+        queryset.order_by('-rec_created_at', '-rec_id')
+        .values('rec_id', 'notif_id', 'is_read', **INBOX_FIELDS)[:limit + 1]
+    )
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]['notif_created_at'], rows[-1]['rec_id'])
+
+
+# ===============================================================
+#  UNREAD COUNTERS
+# ===============================================================
+def add_unread(acc_ids):
+    """One more unread notification for each of acc_ids (once per id)"""
+    acc_ids = sorted(set(acc_ids))  # Same lock order in concurrent fan-outs
+    if not acc_ids:
+        return
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(acc_id=acc_id) for acc_id in acc_ids], ignore_conflicts=True,
+    )
+    UnreadCounter.objects.filter(acc_id__in=acc_ids).update(unread_count=F('unread_count') + 1)
+
+
+def mark_read(acc_id, notif_ids):
+    """Marks the account's notif_ids read; returns how many were unread"""
+    with transaction.atomic():
+        updated = Recipient.objects.filter(
+            acc_id=acc_id, notif_id__in=notif_ids, is_read=False
+        ).update(is_read=True)
+        if updated:
+            UnreadCounter.objects.filter(acc_id=acc_id).update(
+                unread_count=Greatest(F('unread_count') - updated, Value(0))
+            )
+    return updated
+
+
+def unread_count(acc_id):
+    return UnreadCounter.objects.filter(acc_id=acc_id).values_list('unread_count', flat=True).first() or 0
+
+
+def unread_counts(acc_ids):
+    """{acc_id: unread notifications} for several accounts, in one query"""
+    counts = dict(UnreadCounter.objects.filter(acc_id__in=acc_ids).values_list('acc_id', 'unread_count'))
+    return {acc_id: counts.get(acc_id, 0) for acc_id in acc_ids}
+
+
+def recount_unread():
+    """Recomputes every counter from the recipient rows"""
+    UnreadCounter.objects.update(unread_count=Coalesce(Subquery(
+        Recipient.objects.filter(acc_id=OuterRef('acc_id'), is_read=False)
+        .order_by().values('acc_id').annotate(unread=Count('pk')).values('unread')
+    ), 0))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notification.reminders import dispatch_all_due_reminders, REMINDER_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Polls the scheduled notification queue and dispatches due reminders. Safe to run on several workers or nodes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=10, help='Seconds between polls')
+        parser.add_argument('--batch-size', type=int, default=REMINDER_BATCH_SIZE)
+        parser.add_argument('--once', action='store_true', help='Drain due reminders once and exit')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Dispatching due reminders...")
+
+        try:
+            while True:
+                result = dispatch_all_due_reminders(options['batch_size'])
+                if result['claimed']:
+                    self.stdout.write(
+                        f"Claimed {result['claimed']}: {result['sent']} sent, {result['failed']} failed"
+                    )
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('Reminder dispatcher stopped.'))
@@ -0,0 +1,49 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from channels.security.websocket import OriginValidator
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+
+@database_sync_to_async
+def _user_from_token(raw_token):
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        # Expired or invalid token, or its account no longer exists
+        return None
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Websocket authentication with the same access tokens as the REST API,
+    passed as ?token= (browsers cannot set headers on a websocket). Goes
+    inside AuthMiddlewareStack: without a token the session user is kept.
+    """
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get('query_string', b'').decode())
+        raw_token = query.get('token', [None])[0]
+        if raw_token:
+            user = await _user_from_token(raw_token)
+            scope = dict(scope, user=user or AnonymousUser())
+        return await super().__call__(scope, receive, send)
+
+
+class CorsOriginValidator(OriginValidator):
+    """
+    Browsers may only open sockets from the CORS allowed origins; native
+    clients send no Origin header and authenticate with their token.
+    """
+
+    def __init__(self, application):
+        allow_all = getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False)
+        super().__init__(application, ['*'] if allow_all else list(getattr(settings, 'CORS_ALLOWED_ORIGINS', [])))
+
+    def valid_origin(self, parsed_origin):
+        return parsed_origin is None or super().valid_origin(parsed_origin)
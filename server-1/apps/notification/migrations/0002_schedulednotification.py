@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 15:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledNotification',
+            fields=[
+                ('sn_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('sn_job_id', models.CharField(max_length=100, unique=True)),
+                ('sn_title', models.CharField(max_length=255)),
+                ('sn_message', models.TextField()),
+                ('sn_type', models.CharField(default='info', max_length=100)),
+                ('sn_recipients', models.JSONField(default=list)),
+                ('web_route', models.CharField(blank=True, max_length=255, null=True)),
+                ('web_params', models.JSONField(blank=True, null=True)),
+                ('mobile_route', models.CharField(blank=True, max_length=255, null=True)),
+                ('mobile_params', models.JSONField(blank=True, null=True)),
+                ('sn_send_at', models.DateTimeField()),
+                ('sn_status', models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('FAILED', 'Failed'), ('CANCELLED', 'Cancelled')], default='PENDING', max_length=20)),
+                ('sn_attempts', models.PositiveIntegerField(default=0)),
+                ('sn_last_error', models.TextField(blank=True, null=True)),
+                ('sn_created_at', models.DateTimeField(auto_now_add=True)),
+                ('sn_sent_at', models.DateTimeField(blank=True, null=True)),
+                ('notif', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scheduled', to='notification.notification')),
+            ],
+            options={
+                'db_table': 'scheduled_notification',
+                'indexes': [models.Index(fields=['sn_status', 'sn_send_at'], name='scheduled_n_sn_stat_212fc9_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-18 17:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_notification_time(apps, schema_editor):
+    Notification = apps.get_model('notification', 'Notification')
+    Recipient = apps.get_model('notification', 'Recipient')
+    Recipient.objects.update(rec_created_at=Subquery(
+        Notification.objects.filter(pk=OuterRef('notif_id')).values('notif_created_at')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0002_schedulednotification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipient',
+            name='rec_created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_notification_time, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='recipient',
+            name='notif',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipient', to='notification.notification'),
+        ),
+        migrations.AlterField(
+            model_name='schedulednotification',
+            name='notif',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scheduled', to='notification.notification'),
+        ),
+        migrations.AddIndex(
+            model_name='recipient',
+            index=models.Index(fields=['acc', '-rec_created_at'], name='recipient_acc_id_f44eea_idx'),
+        ),
+    ]
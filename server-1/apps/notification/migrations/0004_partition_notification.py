@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 17:20
+
+from django.db import migrations
+
+from utils.partitions import PartitionByMonth
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0003_recipient_created_at'),
+    ]
+
+    operations = [
+        PartitionByMonth(table='notification', column='notif_created_at', pk='notif_id'),
+        PartitionByMonth(table='recipient', column='rec_created_at', pk='rec_id'),
+    ]
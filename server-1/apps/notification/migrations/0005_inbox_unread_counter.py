@@ -0,0 +1,50 @@
+# Generated by Django 5.2 on 2026-10-18 17:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_unread(apps, schema_editor):
+    Recipient = apps.get_model('notification', 'Recipient')
+    UnreadCounter = apps.get_model('notification', 'UnreadCounter')
+    counts = (
+        Recipient.objects.filter(is_read=False, acc__isnull=False)
+        .order_by().values('acc_id').annotate(unread=Count('pk')).values_list('acc_id', 'unread')
+    )
+    UnreadCounter.objects.bulk_create(
+        (UnreadCounter(acc_id=acc_id, unread_count=unread) for acc_id, unread in counts.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0001_initial'),
+        ('notification', '0004_partition_notification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('acc', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_unread', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'notification_unread_counter',
+            },
+        ),
+        migrations.RunPython(count_unread, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='recipient',
+            name='recipient_acc_id_f44eea_idx',
+        ),
+        migrations.AddIndex(
+            model_name='recipient',
+            index=models.Index(fields=['acc', '-rec_created_at', '-rec_id'], include=('notif', 'is_read'), name='recipient_inbox_idx'),
+        ),
+    ]
@@ -43,18 +43,84 @@ class Recipient(models.Model):
     rec_id = models.BigAutoField(primary_key=True)
     is_read = models.BooleanField(default=False)
     acc = models.ForeignKey('account.Account', on_delete=models.CASCADE, null=True, blank=True)
-    notif = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='recipient')
+    # notification is partitioned by month, so no database constraint (utils.partitions)
+    notif = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='recipient', db_constraint=False)
+    rec_created_at = models.DateTimeField(default=timezone.now) # The notification's notif_created_at; partition key
     
     class Meta: 
         db_table = 'recipient'
         indexes = [
             models.Index(fields=['acc', 'notif']),
+            # Inbox keyset pages (inbox.py), answered from the index alone on PostgreSQL
+            models.Index(
+                fields=['acc', '-rec_created_at', '-rec_id'],
+                include=['notif', 'is_read'],
+                name='recipient_inbox_idx',
+            ),
         ]
         
     def mark_as_read(self):
+        # Through the inbox so the account's unread counter follows
+        from .inbox import mark_read
+        mark_read(self.acc_id, [self.notif_id])
         self.is_read = True
-        self.read_at = timezone.now()
-        self.save()
         
     def __str__(self):
-        return f"Recipient {self.rec_id} - {self.acc.username}"
\ No newline at end of file
+        return f"Recipient {self.rec_id} - {self.acc.username}"
+
+class UnreadCounter(models.Model):
+    """
+    Unread notifications of an account, kept by fan-out and mark-as-read
+    (inbox.py) so badges are read from one row instead of counted.
+    """
+    acc = models.OneToOneField('account.Account', on_delete=models.CASCADE, primary_key=True, related_name='notification_unread')
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'notification_unread_counter'
+
+    def __str__(self):
+        return f"Unread {self.unread_count} - {self.acc_id}"
+
+class ScheduledNotification(models.Model):
+    """
+    Database-backed reminder queue. Rows are claimed by dispatch_due_reminders()
+    with SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers can poll it.
+    """
+    PENDING = 'PENDING'
+    SENT = 'SENT'
+    FAILED = 'FAILED'
+    CANCELLED = 'CANCELLED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+
+    sn_id = models.BigAutoField(primary_key=True)
+    sn_job_id = models.CharField(max_length=100, unique=True)
+    sn_title = models.CharField(max_length=255)
+    sn_message = models.TextField()
+    sn_type = models.CharField(max_length=100, default='info')
+    sn_recipients = models.JSONField(default=list)  # Account IDs
+    web_route = models.CharField(max_length=255, null=True, blank=True)
+    web_params = models.JSONField(null=True, blank=True)
+    mobile_route = models.CharField(max_length=255, null=True, blank=True)
+    mobile_params = models.JSONField(null=True, blank=True)
+    sn_send_at = models.DateTimeField()
+    sn_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    sn_attempts = models.PositiveIntegerField(default=0)
+    sn_last_error = models.TextField(null=True, blank=True)
+    sn_created_at = models.DateTimeField(auto_now_add=True)
+    sn_sent_at = models.DateTimeField(null=True, blank=True)
+    notif = models.ForeignKey(Notification, on_delete=models.SET_NULL, null=True, blank=True, related_name='scheduled', db_constraint=False)
+
+    class Meta:
+        db_table = 'scheduled_notification'
+        indexes = [
+            models.Index(fields=['sn_status', 'sn_send_at']),
+        ]
+
+    def __str__(self):
+        return f"Scheduled {self.sn_title} - {self.sn_send_at} ({self.sn_status})"
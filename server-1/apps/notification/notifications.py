@@ -7,6 +7,28 @@ Handles sending push notifications using Firebase Cloud Messaging (FCM).
 This is called by create_notification() in utils.py.
 """
 
+def _android_config():
+    return messaging.AndroidConfig(
+        priority='high',
+        notification=messaging.AndroidNotification(
+            sound='default',
+            channel_id='default', 
+        ),
+    )
+
+
+def _apns_config():
+    return messaging.APNSConfig(
+        payload=messaging.APNSPayload(
+            aps=messaging.Aps(
+                sound='default',
+                badge=1,
+                content_available=True,
+            )
+        )
+    )
+
+
 def send_push_notification(token: str, title: str, message: str, data: dict = None):
     """
     Sends a push notification to a single device using Firebase Cloud Messaging (FCM).
@@ -26,22 +48,8 @@ def send_push_notification(token: str, title: str, message: str, data: dict = No
         ),
         data=formatted_data,
         token=token,
-        android=messaging.AndroidConfig(
-            priority='high',
-            notification=messaging.AndroidNotification(
-                sound='default',
-                channel_id='default', 
-            ),
-        ),
-        apns=messaging.APNSConfig(
-            payload=messaging.APNSPayload(
-                aps=messaging.Aps(
-                    sound='default',
-                    badge=1,
-                    content_available=True,
-                )
-            )
-        ),
+        android=_android_config(),
+        apns=_apns_config(),
     )
 
     # Try sending the message
@@ -62,3 +70,31 @@ def send_push_notification(token: str, title: str, message: str, data: dict = No
         print(f"❌ General error sending message: {e}")
         print(f"❌ Error type: {type(e).__name__}")
         return None
+
+
+def send_multicast_notification(tokens: list, title: str, message: str, data: dict = None):
+    """
+    Sends one push notification to up to 500 devices in a single FCM call.
+    Returns the BatchResponse; responses[i] corresponds to tokens[i].
+    """
+    formatted_data = {str(k): str(v) for k, v in (data or {}).items()}
+
+    fcm_message = messaging.MulticastMessage(
+        notification=messaging.Notification(
+            title=title,
+            body=message
+        ),
+        data=formatted_data,
+        tokens=tokens,
+        android=_android_config(),
+        apns=_apns_config(),
+    )
+
+    return messaging.send_each_for_multicast(fcm_message)
+
+
+def is_invalid_token_error(error):
+    """True when FCM rejected the token itself, so it should be removed"""
+    if isinstance(error, (messaging.UnregisteredError, messaging.SenderIdMismatchError)):
+        return True
+    return isinstance(error, exceptions.InvalidArgumentError) and 'registration token' in str(error).lower()
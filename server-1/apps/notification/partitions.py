@@ -0,0 +1,11 @@
+from django.conf import settings
+
+from utils.partitions import register
+from .inbox import recount_unread
+
+# Recipients keep their notification's time, so both are archived together
+RETENTION_MONTHS = getattr(settings, 'NOTIFICATION_RETENTION_MONTHS', 12)
+
+register('notification', 'notif_created_at', RETENTION_MONTHS)
+# Archived unread rows no longer count towards the badges
+register('recipient', 'rec_created_at', RETENTION_MONTHS, after_archive=recount_unread)
@@ -0,0 +1,93 @@
+"""
+Websocket delivery of in-app notifications (see consumers.py).
+
+Every connected socket joins the group of its account. create_notification()
+sends each new notification to the groups of its recipients once the rows are
+committed, with the recipient's unread count (inbox.py); marking notifications as read
+sends the new count. A reconnecting client passes the last notif_id it has and
+receives what it missed (missed_notifications), so nothing needs polling.
+"""
+import asyncio
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from .inbox import unread_counts
+from .models import Recipient
+
+logger = logging.getLogger(__name__)
+
+RESUME_LIMIT = getattr(settings, 'NOTIFICATION_RESUME_LIMIT', 50)
+
+
+def account_group(acc_id):
+    return f'notifications.acc.{acc_id}'
+
+
+def notification_payload(notification, is_read=False):
+    return {
+        'notif_id': notification.notif_id,
+        'notif_title': notification.notif_title,
+        'notif_message': notification.notif_message,
+        'notif_type': notification.notif_type,
+        'notif_created_at': notification.notif_created_at.isoformat() if notification.notif_created_at else None,
+        'web_route': notification.web_route,
+        'web_params': notification.web_params,
+        'mobile_route': notification.mobile_route,
+        'mobile_params': notification.mobile_params,
+        'is_read': is_read,
+    }
+
+
+def missed_notifications(acc_id, last_id, limit=RESUME_LIMIT):
+    """(payloads of notifications after last_id, oldest first, whether more were left out)"""
+    rows = list(
+        Recipient.objects.filter(acc_id=acc_id, notif_id__gt=last_id)
+        .select_related('notif').order_by('notif_id')[:limit + 1]
+    )
+    return [notification_payload(row.notif, row.is_read) for row in rows[:limit]], len(rows) > limit
+
+
+async def _send_all(channel_layer, groups_events):
+    results = await asyncio.gather(
+        *(channel_layer.group_send(group, event) for group, event in groups_events),
+        return_exceptions=True,
+    )
+    for (group, _), result in zip(groups_events, results):
+        if isinstance(result, Exception):
+            # Clients missing a push catch up on their next connect
+            logger.error(f"❌ Websocket push to {group} failed: {str(result)}")
+
+
+def _group_send(groups_events):
+    """Sends every (group, event) concurrently, in one trip to the event loop"""
+    channel_layer = get_channel_layer()
+    groups_events = list(groups_events)
+    if channel_layer is None or not groups_events:
+        return
+    try:
+        async_to_sync(_send_all)(channel_layer, groups_events)
+    except Exception as e:
+        logger.error(f"❌ Websocket push failed: {str(e)}")
+
+
+def push_notification(notification, accounts):
+    """Sends notification to the sockets of accounts; call after the recipient rows are committed"""
+    acc_ids = [acc.pk for acc in accounts]
+    payload = notification_payload(notification)
+    counts = unread_counts(acc_ids)
+    _group_send(
+        (account_group(acc_id), {'type': 'notification.new', 'notification': payload, 'unread': counts[acc_id]})
+        for acc_id in acc_ids
+    )
+
+
+def push_unread(acc_ids):
+    """Sends the current unread count to the sockets of acc_ids"""
+    counts = unread_counts(acc_ids)
+    _group_send(
+        (account_group(acc_id), {'type': 'notification.unread', 'unread': counts[acc_id]})
+        for acc_id in acc_ids
+    )
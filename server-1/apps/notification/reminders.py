@@ -0,0 +1,142 @@
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.utils import timezone
+from apps.account.models import Account
+from .models import ScheduledNotification
+from .fanout import resolve_recipient_accounts
+from datetime import timedelta
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+REMINDER_BATCH_SIZE = getattr(settings, 'REMINDER_BATCH_SIZE', 100)
+REMINDER_MAX_ATTEMPTS = getattr(settings, 'REMINDER_MAX_ATTEMPTS', 3)
+
+
+def reminder_job_id(title, send_at, account_ids):
+    """Stable job ID: rescheduling the same reminder replaces it instead of duplicating it"""
+    digest = hashlib.sha1(
+        f"{title}|{','.join(str(i) for i in sorted(account_ids))}".encode()
+    ).hexdigest()[:16]
+    return f"reminder_{int(send_at.timestamp())}_{digest}"
+
+
+# ===============================================================
+#  ENQUEUE
+# ===============================================================
+def schedule_reminder(
+    title, message, recipients, notif_type, send_at,
+    web_route=None, web_params=None, mobile_route=None, mobile_params=None,
+):
+    """Stores the reminder with recipient account IDs (never live model instances)"""
+    account_ids = [acc.pk for acc in resolve_recipient_accounts(recipients)]
+    if not account_ids:
+        logger.warning("⚠️ No valid recipient accounts for reminder")
+        return None
+
+    job_id = reminder_job_id(title, send_at, account_ids)
+    ScheduledNotification.objects.update_or_create(
+        sn_job_id=job_id,
+        defaults={
+            "sn_title": title,
+            "sn_message": message,
+            "sn_type": notif_type,
+            "sn_recipients": account_ids,
+            "web_route": web_route,
+            "web_params": web_params,
+            "mobile_route": mobile_route,
+            "mobile_params": mobile_params,
+            "sn_send_at": send_at,
+            "sn_status": ScheduledNotification.PENDING,
+            "sn_attempts": 0,
+            "sn_last_error": None,
+        },
+    )
+    return job_id
+
+
+# ===============================================================
+#  DISPATCH
+# ===============================================================
+def dispatch_due_reminders(batch_size=None, now=None):
+    """
+    Claims one batch of due reminders with SELECT ... FOR UPDATE SKIP LOCKED and
+    sends them. Concurrent workers skip rows another worker holds, and a row is
+    marked SENT in the same transaction that creates its notification, so each
+    reminder is delivered once. Push messages go out after the commit.
+    """
+    from .utils import create_notification
+
+    batch_size = batch_size or REMINDER_BATCH_SIZE
+    now = now or timezone.now()
+    sent = failed = 0
+
+    with transaction.atomic():
+        due = list(
+            ScheduledNotification.objects.select_for_update(skip_locked=True)
+            .filter(sn_status=ScheduledNotification.PENDING, sn_send_at__lte=now)
+            .order_by('sn_send_at', 'sn_id')[:batch_size]
+        )
+        if not due:
+            return {'claimed': 0, 'sent': 0, 'failed': 0}
+
+        account_ids = {acc_id for reminder in due for acc_id in reminder.sn_recipients}
+        accounts = Account.objects.in_bulk(account_ids)
+
+        for reminder in due:
+            reminder.sn_attempts += 1
+            try:
+                with transaction.atomic():
+                    notification = create_notification(
+                        title=reminder.sn_title,
+                        message=reminder.sn_message,
+                        recipients=[accounts[i] for i in reminder.sn_recipients if i in accounts],
+                        notif_type=reminder.sn_type,
+                        web_route=reminder.web_route,
+                        web_params=reminder.web_params,
+                        mobile_route=reminder.mobile_route,
+                        mobile_params=reminder.mobile_params,
+                    )
+            except Exception as e:
+                logger.error(f"❌ Reminder {reminder.sn_job_id} failed: {str(e)}")
+                reminder.sn_last_error = str(e)
+                if reminder.sn_attempts >= REMINDER_MAX_ATTEMPTS:
+                    reminder.sn_status = ScheduledNotification.FAILED
+                else:
+                    # Back off before the next attempt
+                    reminder.sn_send_at = timezone.now() + timedelta(minutes=reminder.sn_attempts)
+                failed += 1
+            else:
+                if notification is None:
+                    reminder.sn_status = ScheduledNotification.FAILED
+                    reminder.sn_last_error = "No valid recipient accounts"
+                    failed += 1
+                else:
+                    reminder.notif = notification
+                    reminder.sn_status = ScheduledNotification.SENT
+                    reminder.sn_sent_at = timezone.now()
+                    reminder.sn_last_error = None
+                    sent += 1
+
+            reminder.save(update_fields=[
+                'notif', 'sn_status', 'sn_send_at', 'sn_sent_at', 'sn_attempts', 'sn_last_error'
+            ])
+
+    logger.info(f"⏰ Dispatched {len(due)} reminder(s): {sent} sent, {failed} failed")
+    return {'claimed': len(due), 'sent': sent, 'failed': failed}
+
+
+def dispatch_all_due_reminders(batch_size=None):
+    """Drains every due reminder batch by batch. Used by the in-process poller."""
+    close_old_connections()
+    try:
+        total = {'claimed': 0, 'sent': 0, 'failed': 0}
+        while True:
+            result = dispatch_due_reminders(batch_size)
+            for key in total:
+                total[key] += result[key]
+            if result['claimed'] < (batch_size or REMINDER_BATCH_SIZE):
+                return total
+    finally:
+        close_old_connections()
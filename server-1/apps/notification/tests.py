@@ -1,3 +1,278 @@
-from django.test import TestCase
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+import json
 
-# Create your tests here.
+from asgiref.testing import ApplicationCommunicator
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from firebase_admin import messaging
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.account.models import Account
+from .fanout import bulk_create_recipients, collect_device_tokens, send_push_batches
+from .inbox import decode_cursor, inbox_page, mark_read, recount_unread, unread_count, unread_counts
+from .middleware import JWTAuthMiddleware
+from .models import Notification, Recipient, FCMToken, ScheduledNotification, UnreadCounter
+from .reminders import dispatch_due_reminders
+from .routing import websocket_urlpatterns
+from .utils import create_notification, reminder_notification, cancel_scheduled_notification
+
+
+def _batch_response(tokens, unregistered=()):
+    responses = []
+    for token in tokens:
+        if token in unregistered:
+            error = messaging.UnregisteredError('Requested entity was not found.')
+            responses.append(SimpleNamespace(success=False, exception=error))
+        else:
+            responses.append(SimpleNamespace(success=True, exception=None))
+    failures = sum(1 for r in responses if not r.success)
+    return SimpleNamespace(
+        responses=responses,
+        success_count=len(responses) - failures,
+        failure_count=failures,
+    )
+
+
+class NotificationFanoutTest(TestCase):
+    def setUp(self):
+        self.accounts = [
+            Account.objects.create(email=f'user{i}@example.com', username=f'user{i}', phone=f'0900000{i:04d}')
+            for i in range(3)
+        ]
+        for i, acc in enumerate(self.accounts):
+            FCMToken.objects.create(acc=acc, fcm_token=f'token-{i}', fcm_device_id=f'device-{i}')
+        self.notification = Notification.objects.create(notif_title='Title', notif_message='Message')
+
+    def test_recipients_created_in_batches(self):
+        # Per batch: the recipient rows, then the accounts' counter rows and their increment
+        with self.assertNumQueries(6):
+            created = bulk_create_recipients(self.notification, self.accounts, batch_size=2)
+
+        self.assertEqual(created, 3)
+        self.assertEqual(Recipient.objects.filter(notif=self.notification).count(), 3)
+        self.assertEqual(unread_counts([acc.pk for acc in self.accounts]), {acc.pk: 1 for acc in self.accounts})
+
+    def test_tokens_resolved_with_single_query(self):
+        with self.assertNumQueries(1):
+            tokens = collect_device_tokens(self.accounts)
+
+        self.assertEqual(sorted(tokens), ['token-0', 'token-1', 'token-2'])
+
+    @patch('apps.notification.fanout.send_multicast_notification')
+    def test_multicast_batches_report_counts_and_prune_invalid_tokens(self, send):
+        send.side_effect = lambda tokens, *args: _batch_response(tokens, unregistered={'token-1'})
+
+        result = send_push_batches(self.notification, ['token-0', 'token-1', 'token-2'], batch_size=2)
+
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(result['sent_count'], 2)
+        self.assertEqual(result['failed_count'], 1)
+        self.assertEqual(result['pruned_count'], 1)
+        self.assertEqual(len(result['batches']), 2)
+        self.assertFalse(FCMToken.objects.filter(fcm_token='token-1').exists())
+
+
+class ReminderQueueTest(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(email='resident@example.com', username='resident', phone='09000000001')
+
+    def _schedule(self, send_at):
+        return reminder_notification(
+            title='Reminder',
+            message='Pickup tomorrow',
+            recipients=[self.account],
+            notif_type='REMINDER',
+            send_at=send_at,
+        )
+
+    def test_reminder_persisted_with_account_ids(self):
+        job_id = self._schedule(timezone.now() + timedelta(hours=1))
+
+        reminder = ScheduledNotification.objects.get(sn_job_id=job_id)
+        self.assertEqual(reminder.sn_recipients, [self.account.pk])
+        self.assertEqual(reminder.sn_status, ScheduledNotification.PENDING)
+
+        # Scheduling the same reminder again replaces it
+        self.assertEqual(self._schedule(reminder.sn_send_at), job_id)
+        self.assertEqual(ScheduledNotification.objects.count(), 1)
+
+    def test_due_reminders_dispatched_once(self):
+        send_at = timezone.now() + timedelta(minutes=5)
+        job_id = self._schedule(send_at)
+
+        self.assertEqual(dispatch_due_reminders()['claimed'], 0)
+
+        with patch('apps.notification.utils._send_push') as push:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = dispatch_due_reminders(now=send_at + timedelta(seconds=1))
+
+        self.assertEqual(result, {'claimed': 1, 'sent': 1, 'failed': 0})
+        self.assertEqual(push.call_count, 1)
+        reminder = ScheduledNotification.objects.get(sn_job_id=job_id)
+        self.assertEqual(reminder.sn_status, ScheduledNotification.SENT)
+        self.assertTrue(Recipient.objects.filter(notif=reminder.notif, acc=self.account).exists())
+
+        self.assertEqual(dispatch_due_reminders(now=send_at + timedelta(hours=1))['claimed'], 0)
+
+    def test_cancelled_reminder_not_dispatched(self):
+        send_at = timezone.now() + timedelta(minutes=5)
+        job_id = self._schedule(send_at)
+
+        self.assertTrue(cancel_scheduled_notification(job_id))
+        self.assertEqual(dispatch_due_reminders(now=send_at + timedelta(seconds=1))['claimed'], 0)
+
+
+class NotificationInboxTest(TestCase):
+    def setUp(self):
+        self.account = Account.objects.create(email='resident@example.com', username='resident', phone='09000000001')
+        created_at = timezone.now()
+        self.notifications = []
+        for i in range(5):
+            # Two share a time, so pages must break ties on rec_id
+            notification = Notification.objects.create(notif_title=f'Title {i}', notif_message='Message')
+            Notification.objects.filter(pk=notification.pk).update(
+                notif_created_at=created_at - timedelta(minutes=min(i, 3))
+            )
+            notification.refresh_from_db()
+            bulk_create_recipients(notification, [self.account])
+            self.notifications.append(notification)
+
+    def test_keyset_pages_cover_every_row_once(self):
+        seen, cursor = [], None
+        while True:
+            with self.assertNumQueries(1):
+                rows, cursor = inbox_page(self.account.pk, cursor, limit=2)
+            seen.extend(row['notif_id'] for row in rows)
+            if not cursor:
+                break
+
+        newest_first = Recipient.objects.filter(acc=self.account).order_by('-rec_created_at', '-rec_id')
+        self.assertEqual(seen, list(newest_first.values_list('notif_id', flat=True)))
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_invalid_cursor_rejected(self):
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor')
+
+    def test_counter_follows_fanout_and_mark_read(self):
+        self.assertEqual(unread_count(self.account.pk), 5)
+
+        self.assertEqual(mark_read(self.account.pk, [self.notifications[0].notif_id, self.notifications[1].notif_id]), 2)
+        # Already read: counted once
+        self.assertEqual(mark_read(self.account.pk, [self.notifications[0].notif_id]), 0)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_count(self.account.pk), 3)
+
+    def test_recount_matches_recipient_rows(self):
+        UnreadCounter.objects.filter(acc=self.account).update(unread_count=40)
+        Recipient.objects.filter(notif=self.notifications[0]).update(is_read=True)
+
+        recount_unread()
+
+        self.assertEqual(unread_count(self.account.pk), 4)
+
+    def test_inbox_view(self):
+        client = APIClient()
+        client.force_authenticate(self.account)
+
+        response = client.get(reverse('notification-inbox'), {'limit': 3}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(response.data['results'][0]['notif_title'], 'Title 0')
+        self.assertEqual(response.data['unread'], 5)
+
+        response = client.get(reverse('notification-inbox'), {'cursor': response.data['next_cursor']}, secure=True)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next_cursor'])
+
+        self.assertEqual(client.get(reverse('notification-inbox'), {'cursor': 'x'}, secure=True).status_code, 400)
+        self.assertEqual(client.get(reverse('notification-unread'), secure=True).data, {'unread': 5})
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class NotificationSocketTest(TransactionTestCase):
+    # database_sync_to_async closes the connections it used, so no test transaction to roll back
+    application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+    def setUp(self):
+        self.account = Account.objects.create(email='resident@example.com', username='resident', phone='09000000001')
+        self.token = str(AccessToken.for_user(self.account))
+        self.notifications = [
+            Notification.objects.create(notif_title=f'Title {i}', notif_message='Message') for i in range(2)
+        ]
+        for notification in self.notifications:
+            bulk_create_recipients(notification, [self.account])
+
+    async def _connect(self, query):
+        # asgiref's communicator: channels.testing needs daphne, which is not installed
+        communicator = ApplicationCommunicator(self.application, {
+            'type': 'websocket', 'path': '/ws/notifications/', 'query_string': query.encode(),
+            'headers': [], 'subprotocols': [],
+        })
+        await communicator.send_input({'type': 'websocket.connect'})
+        return communicator, await communicator.receive_output(1)
+
+    async def _receive(self, communicator):
+        return json.loads((await communicator.receive_output(1))['text'])
+
+    async def _disconnect(self, communicator):
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait(1)
+
+    @patch('apps.notification.utils._send_push')
+    def _notify(self, send_push, recipients=None):
+        # Autocommit: the push runs as soon as create_notification registers it
+        return create_notification('New', 'Message', recipients or [self.account], 'REQUEST')
+
+    async def test_rejects_without_valid_token(self):
+        _, response = await self._connect('token=invalid')
+
+        self.assertEqual(response, {'type': 'websocket.close', 'code': 4401})
+
+    async def test_resume_sends_missed_notifications(self):
+        communicator, response = await self._connect(f'token={self.token}&last_id={self.notifications[0].notif_id}')
+        self.assertEqual(response['type'], 'websocket.accept')
+
+        message = await self._receive(communicator)
+        self.assertEqual(message['type'], 'resume')
+        self.assertEqual([n['notif_id'] for n in message['notifications']], [self.notifications[1].notif_id])
+        self.assertFalse(message['has_more'])
+        self.assertEqual(message['unread'], 2)
+        await self._disconnect(communicator)
+
+    async def test_new_notification_pushed_after_commit(self):
+        communicator, _ = await self._connect(f'token={self.token}')
+        self.assertEqual(await self._receive(communicator), {'type': 'unread', 'unread': 2})
+
+        notification = await database_sync_to_async(self._notify)()
+
+        message = await self._receive(communicator)
+        self.assertEqual(message['type'], 'notification')
+        self.assertEqual(message['notification']['notif_id'], notification.notif_id)
+        self.assertEqual(message['unread'], 3)
+        await self._disconnect(communicator)
+
+    async def test_one_push_reaches_every_recipient(self):
+        other = await database_sync_to_async(Account.objects.create)(
+            email='other@example.com', username='other', phone='09000000002'
+        )
+        communicators = []
+        for account in (self.account, other):
+            communicator, _ = await self._connect(f'token={AccessToken.for_user(account)}')
+            await self._receive(communicator)
+            communicators.append(communicator)
+
+        notification = await database_sync_to_async(self._notify)(recipients=[self.account, other])
+
+        messages = [await self._receive(communicator) for communicator in communicators]
+        self.assertEqual([m['notification']['notif_id'] for m in messages], [notification.notif_id] * 2)
+        self.assertEqual([m['unread'] for m in messages], [3, 1])
+        for communicator in communicators:
+            await self._disconnect(communicator)
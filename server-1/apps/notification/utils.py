@@ -1,17 +1,24 @@
 from datetime import datetime
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.date import DateTrigger
-from apps.notification.models import Notification, Recipient, FCMToken
-from apps.account.models import Account
-from apps.profiling.models import ResidentProfile
-from .notifications import send_push_notification
-import json
+from apps.notification.models import Notification, ScheduledNotification
+from .fanout import (
+    resolve_recipient_accounts,
+    bulk_create_recipients,
+    collect_device_tokens,
+    send_push_batches,
+)
+from .realtime import push_notification
+from .reminders import schedule_reminder, dispatch_all_due_reminders
 import logging
 
 logger = logging.getLogger(__name__)
 scheduler = BackgroundScheduler()
 
+REMINDER_POLL_SECONDS = getattr(settings, 'REMINDER_POLL_SECONDS', 30)
+
 
 # ===============================================================
 #  CREATE NEW NOTIFICATION 
@@ -33,18 +40,7 @@ def create_notification(
         return None
 
     # Convert recipients to Account objects
-    recipient_accounts = []
-    for recipient in recipients:
-        if isinstance(recipient, Account):
-            recipient_accounts.append(recipient)
-        elif isinstance(recipient, ResidentProfile):
-            account = recipient.account if hasattr(recipient, 'account') else None
-            if account:
-                recipient_accounts.append(account)
-            else:
-                logger.warning(f"⚠️ No Account found for ResidentProfile: {recipient.rp_id}")
-        else:
-            logger.error(f"❌ Invalid recipient type: {type(recipient)}")
+    recipient_accounts = resolve_recipient_accounts(recipients)
 
     if not recipient_accounts:
         logger.error("❌ No valid recipient accounts found")
@@ -67,13 +63,13 @@ def create_notification(
     logger.info(f"✅ Notification created: ID {notification.notif_id}")
 
     # Create recipient records
-    for acc in recipient_accounts:
-        Recipient.objects.create(notif=notification, acc=acc)
+    created = bulk_create_recipients(notification, recipient_accounts)
 
-    logger.info(f"✅ Created {len(recipient_accounts)} recipient records")
+    logger.info(f"✅ Created {created} recipient records")
 
-    # Send push notification
-    _send_push(notification, recipient_accounts)
+    # Push to open websockets, then to devices, once the rows are committed
+    transaction.on_commit(lambda: push_notification(notification, recipient_accounts), robust=True)
+    transaction.on_commit(lambda: _send_push(notification, recipient_accounts))
 
     return notification
 
@@ -108,28 +104,20 @@ def reminder_notification(
         logger.warning(f"⚠️ Cannot schedule reminder in the past: {send_at}")
         return None
 
-    # Generate unique job ID
-    job_id = f"reminder_{int(send_at.timestamp())}_{hash(title)}"
-    trigger = DateTrigger(run_date=send_at)
-
     try:
-        scheduler.add_job(
-            create_notification,
-            trigger=trigger,
-            id=job_id,
-            replace_existing=True,
-            kwargs={
-                "title": title,
-                "message": message,
-                "recipients": recipients,
-                "notif_type": notif_type,
-                "web_route": web_route,
-                "web_params": web_params,
-                "mobile_route": mobile_route,
-                "mobile_params": mobile_params,
-            },
+        job_id = schedule_reminder(
+            title=title,
+            message=message,
+            recipients=recipients,
+            notif_type=notif_type,
+            send_at=send_at,
+            web_route=web_route,
+            web_params=web_params,
+            mobile_route=mobile_route,
+            mobile_params=mobile_params,
         )
-        logger.info(f"⏰ Reminder scheduled for {send_at} with job ID: {job_id}")
+        if job_id:
+            logger.info(f"⏰ Reminder scheduled for {send_at} with job ID: {job_id}")
         return job_id
     except Exception as e:
         logger.error(f"❌ Error scheduling reminder: {str(e)}")
@@ -142,62 +130,9 @@ def reminder_notification(
 def _send_push(notification, recipient_accounts):
     logger.info(f"🔔 Starting _send_push for notification {notification.notif_id}")
     logger.info(f"👥 Processing {len(recipient_accounts)} recipient accounts")
-    
-    total_sent = 0
-    total_failed = 0
-    device_tokens = {}
-
-    # Collect device tokens with proper account filtering
-    for acc in recipient_accounts:
-        logger.info(f"🔍 Looking for FCM tokens for account ID: {acc.acc_id}")
-        
-        tokens = FCMToken.objects.filter(acc=acc)
-        token_count = tokens.count()
-        logger.info(f"📱 Found {token_count} FCM tokens for account {acc.acc_id}")
-        
-        for token_obj in tokens:
-            logger.info(f"Token found - Device ID: {token_obj.fcm_device_id}, Token: {token_obj.fcm_token[:20]}...")
-            if token_obj.fcm_device_id and token_obj.fcm_device_id not in device_tokens:
-                device_tokens[token_obj.fcm_device_id] = token_obj.fcm_token
-            else:
-                logger.warning(f"⚠️ Duplicate device ID skipped: {token_obj.fcm_device_id}")
-
-    if not device_tokens:
-        logger.warning("❌ No FCM tokens found for any recipients")
-        return {'success': False, 'sent_count': 0, 'failed_count': 0}
-
-    # FCM payload - match what frontend expects
-    fcm_payload = {
-        "notification_id": str(notification.notif_id),
-        "notif_type": notification.notif_type,
-        "web_route": notification.web_route or "",
-        "web_params": json.dumps(notification.web_params or {}),
-        "mobile_route": notification.mobile_route or "",
-        "mobile_params": json.dumps(notification.mobile_params or {}),
-    }
 
-    # Send push with detailed logging
-    for device_id, token in device_tokens.items():
-        try:
-            logger.info(f"🚀 Sending FCM to device {device_id} with token {token[:20]}...")
-            result = send_push_notification(
-                token=token,
-                title=notification.notif_title,
-                message=notification.notif_message,
-                data=fcm_payload,
-            )
-            if result:
-                logger.info(f"✅ FCM sent successfully to device {device_id}")
-                total_sent += 1
-            else:
-                logger.error(f"❌ FCM send failed for device {device_id}")
-                total_failed += 1
-        except Exception as e:
-            logger.error(f"💥 Exception sending to device {device_id}: {str(e)}")
-            total_failed += 1
-
-    logger.info(f"📊 FCM Final result: {total_sent} sent, {total_failed} failed")
-    return {'success': total_sent > 0, 'sent_count': total_sent, 'failed_count': total_failed}
+    tokens = collect_device_tokens(recipient_accounts)
+    return send_push_batches(notification, tokens)
 
 
 
@@ -205,30 +140,48 @@ def _send_push(notification, recipient_accounts):
 #  SCHEDULER HELPERS
 # ===============================================================
 def get_scheduled_jobs():
-    jobs = scheduler.get_jobs()
+    reminders = ScheduledNotification.objects.filter(
+        sn_status=ScheduledNotification.PENDING
+    ).order_by('sn_send_at')
     return [
         {
-            "job_id": job.id,
-            "next_run_time": job.next_run_time,
-            "function": job.func.__name__,
+            "job_id": reminder.sn_job_id,
+            "next_run_time": reminder.sn_send_at,
+            "function": create_notification.__name__,
         }
-        for job in sorted(jobs, key=lambda j: j.next_run_time or datetime.max)
+        for reminder in reminders
     ]
 
 
 def cancel_scheduled_notification(job_id: str):
-    try:
-        scheduler.remove_job(job_id)
+    cancelled = ScheduledNotification.objects.filter(
+        sn_job_id=job_id,
+        sn_status=ScheduledNotification.PENDING
+    ).update(sn_status=ScheduledNotification.CANCELLED)
+
+    if cancelled:
         logger.info(f"✅ Cancelled job: {job_id}")
         return True
-    except Exception as e:
-        logger.error(f"❌ Error cancelling job {job_id}: {str(e)}")
-        return False
+    logger.error(f"❌ Error cancelling job {job_id}: no pending reminder")
+    return False
 
 
 def start_scheduler():
+    """
+    Polls the reminder queue from this process. Safe to run in every worker:
+    rows are claimed with SKIP LOCKED, so no file lock is needed.
+    """
     if not scheduler.running:
+        scheduler.add_job(
+            dispatch_all_due_reminders,
+            'interval',
+            seconds=REMINDER_POLL_SECONDS,
+            id='dispatch_due_reminders',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
         scheduler.start()
         logger.info("✅ Notification scheduler started")
     else:
-        logger.warning("⚠️ Scheduler already running")
\ No newline at end of file
+        logger.warning("⚠️ Scheduler already running")
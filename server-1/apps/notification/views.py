@@ -9,9 +9,12 @@ from django.utils import timezone
 from .models import Notification, Recipient, FCMToken
 from .serializers import NotificationSerializer, FCMTokenSerializer, RecipientSerializer
 from .utils import create_notification, start_scheduler, reminder_notification
+from .inbox import MAX_PAGE_SIZE, PAGE_SIZE, inbox_page, mark_read, unread_count
+from .realtime import push_unread
 
 from apps.profiling.models import ResidentProfile
 from apps.account.models import Account
+from utils.partitions import date_range
 
 import uuid
 import logging
@@ -21,72 +24,77 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 
-""" 
-  API endpoint for other servers to CREATE a notification
-"""
-class CreateNotificationView(APIView):
-    permission_classes = [AllowAny]
+def _create_notification_from_payload(data):
+    """
+    Creates one notification from a Server-2 payload and returns (body, status)
+    """
+    recipient_ids = data.get("recipients", [])
+    logger.info(f"📥 Received ResidentProfile IDs: {recipient_ids}")
 
-    def post(self, request):
-        try:
-            recipient_ids = request.data.get("recipients", [])
-            logger.info(f"📥 Received ResidentProfile IDs: {recipient_ids}")
+    if not recipient_ids:
+        return {"error": "No ResidentProfile IDs provided."}, status.HTTP_400_BAD_REQUEST
 
-            if not recipient_ids:
-                return Response(
-                    {"error": "No ResidentProfile IDs provided."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+    resident_profiles = ResidentProfile.objects.filter(rp_id__in=recipient_ids).select_related("account")
 
-            resident_profiles = ResidentProfile.objects.filter(rp_id__in=recipient_ids).select_related("account")
+    recipients = []
+    skipped_ids = []
 
-            recipients = []
-            skipped_ids = []
+    for rp in resident_profiles:
+        if hasattr(rp, "account") and rp.account:
+            recipients.append(rp.account)
+        else:
+            skipped_ids.append(rp.rp_id)
+            logger.warning(f"⚠️ ResidentProfile ID {rp.rp_id} has no linked Account")
 
-            for rp in resident_profiles:
-                if hasattr(rp, "account") and rp.account:
-                    recipients.append(rp.account)
-                else:
-                    skipped_ids.append(rp.rp_id)
-                    logger.warning(f"⚠️ ResidentProfile ID {rp.rp_id} has no linked Account")
+    if not recipients:
+        return (
+            {"error": "No valid recipients found for given ResidentProfile IDs."},
+            status.HTTP_400_BAD_REQUEST,
+        )
 
-            if not recipients:
-                return Response(
-                    {"error": "No valid recipients found for given ResidentProfile IDs."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+    logger.info(f"✅ Found {len(recipients)} valid account(s)")
+    if skipped_ids:
+        logger.info(f"⚠️ Skipped IDs without linked accounts: {skipped_ids}")
+
+    notification = create_notification(
+        title=data.get("title"),
+        message=data.get("message"),
+        notif_type=data.get("notif_type"),
+        recipients=recipients,
+        web_route=data.get("web_route"),
+        web_params=data.get("web_params"),
+        mobile_route=data.get("mobile_route"),
+        mobile_params=data.get("mobile_params"),
+    )
+
+    if not notification:
+        return (
+            {"error": "Failed to create notification — invalid recipients or data."},
+            status.HTTP_400_BAD_REQUEST,
+        )
 
-            logger.info(f"✅ Found {len(recipients)} valid account(s)")
-            if skipped_ids:
-                logger.info(f"⚠️ Skipped IDs without linked accounts: {skipped_ids}")
+    response_data = {
+        "message": "✅ Notification created successfully from Server-2",
+        "notification_id": notification.notif_id,
+        "recipients_count": len(recipients),
+    }
 
-            create_notification(
-                title=request.data.get("title"),
-                message=request.data.get("message"),
-                notif_type=request.data.get("notif_type"),
-                recipients=recipients,
-                web_route=request.data.get("web_route"),
-                web_params=request.data.get("web_params"),
-                mobile_route=request.data.get("mobile_route"),
-                mobile_params=request.data.get("mobile_params"),
-            )
+    if skipped_ids:
+        response_data["skipped_ids"] = skipped_ids
 
-            if not notification:
-                return Response(
-                    {"error": "Failed to create notification — invalid recipients or data."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+    return response_data, status.HTTP_201_CREATED
 
-            response_data = {
-                "message": "✅ Notification created successfully from Server-2",
-                "notification_id": notification.notif_id,
-                "recipients_count": len(recipients),
-            }
 
-            if skipped_ids:
-                response_data["skipped_ids"] = skipped_ids
+""" 
+  API endpoint for other servers to CREATE a notification
+"""
+class CreateNotificationView(APIView):
+    permission_classes = [AllowAny]
 
-            return Response(response_data, status=status.HTTP_201_CREATED)
+    def post(self, request):
+        try:
+            response_data, response_status = _create_notification_from_payload(request.data)
+            return Response(response_data, status=response_status)
 
         except Exception as e:
             logger.error(f"❌ Error creating notification from Server-2: {str(e)}")
@@ -95,6 +103,41 @@ class CreateNotificationView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+
+""" 
+  API endpoint for other servers to CREATE several notifications in one request
+"""
+class CreateNotificationBatchView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        items = request.data.get("items", [])
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "No notification items provided."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = []
+        created = 0
+        for item in items:
+            try:
+                response_data, response_status = _create_notification_from_payload(item)
+            except Exception as e:
+                logger.error(f"❌ Error creating batched notification from Server-2: {str(e)}")
+                response_data = {"error": f"Failed to create notification: {str(e)}"}
+                response_status = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+            if response_status == status.HTTP_201_CREATED:
+                created += 1
+            results.append({"status": response_status, **response_data})
+
+        logger.info(f"📦 Created {created}/{len(items)} batched notification(s) from Server-2")
+        return Response(
+            {"created": created, "failed": len(items) - created, "results": results},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
 class CreateReminderNotificationView(APIView):
     permission_classes = [AllowAny]
 
@@ -185,12 +228,49 @@ class NotificationListView(generics.ListAPIView):
         if not user.is_authenticated:
             return Recipient.objects.none()
 
+        # rec_created_at is the notification time and the partition key:
+        # ?date_from=&date_to= only reads the matching monthly partitions
         return (
             Recipient.objects.filter(acc=user)
+            .filter(date_range(self.request.query_params, "rec_created_at"))
             .select_related("notif", "acc")
-            .order_by("-notif__notif_created_at")
+            .order_by("-rec_created_at")
         )
 
+""" 
+    Notification inbox: ?cursor= from the previous page's next_cursor, ?limit=
+"""
+class NotificationInboxView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE)
+        except ValueError:
+            limit = PAGE_SIZE
+
+        try:
+            results, next_cursor = inbox_page(request.user.pk, request.query_params.get('cursor'), max(limit, 1))
+        except ValueError:
+            return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'results': results,
+            'next_cursor': next_cursor,
+            'unread': unread_count(request.user.pk),
+        })
+
+
+""" 
+    Unread notifications badge
+"""
+class UnreadCountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread': unread_count(request.user.pk)})
+
+
 """ 
     Mark multiple notifications as read
 """
@@ -201,9 +281,10 @@ class BulkMarkAsReadView(APIView):
         notif_ids = request.data.get('notification_ids', [])
 
         try:
-            updated_count = Recipient.objects.filter(
-                notif_id__in=notif_ids, acc=request.user, is_read=False
-            ).update(is_read=True)
+            updated_count = mark_read(request.user.pk, notif_ids)
+            if updated_count:
+                # Badges of the account's other open sockets
+                push_unread([request.user.pk])
 
             return Response(
                 {'message': f'{updated_count} notifications marked as read successfully'},
@@ -224,9 +305,9 @@ class SingleMarkAsReadView(APIView):
         notif_id = request.data.get('notification_id')
 
         try:
-            updated_count = Recipient.objects.filter(
-                notif_id=notif_id, acc=request.user, is_read=False
-            ).update(is_read=True)
+            updated_count = mark_read(request.user.pk, [notif_id])
+            if updated_count:
+                push_unread([request.user.pk])
 
             return Response(
                 {'message': 'Notification marked as read successfully'},
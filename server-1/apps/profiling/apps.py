@@ -17,10 +17,16 @@ class ProfilingConfig(AppConfig):
     def ready(self):
         # Start scheduler only when Django is fully loaded
         import apps.profiling.signals
+        import apps.profiling.partitions
         # Check if we're running a management command that shouldn't trigger scheduler
         if os.environ.get('SCHEDULER_AUTOSTART') != 'True':
             return
 
+        # Replication rows are locked while they are relayed, so every worker
+        # can run the relay; it also picks up rows left by a previous process.
+        from .replication import replication_relay
+        replication_relay.wake()
+
         # 2. Use a file lock to ensure only ONE Gunicorn worker starts this
         # Render's ephemeral storage is shared across workers in the same instance
         lock_file_path = '/tmp/profiling_scheduler.lock'
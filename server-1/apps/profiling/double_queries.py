@@ -1,100 +1,102 @@
-from decouple import config
-import requests
+from .replication import replicate
 
 # Class that holds double query functions
+# Writes are queued on the replication outbox in the caller's transaction and
+# relayed to Server-2 after commit (see replication.py)
 class PostQueries:
-    def __init__(self):
-        self.client = config("CLIENT", default="http://127.0.0.1:8001")
-    
-    def personal(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/personal/create/",
-            json=data
+    def personal(self, data, per_id=None):
+        return replicate(
+            "personal",
+            "/health-profiling/personal/create/",
+            data,
+            entity_id=per_id
         )
-        return response
-    
+
     def address(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/address/create/",
-            json=data
+        return replicate(
+            "address",
+            "/health-profiling/address/create/",
+            data
         )
-        return response
-    
-    def personal_address(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/per_address/create/",
-            json=data
+
+    def personal_address(self, data, per_id=None):
+        return replicate(
+            "personal",
+            "/health-profiling/per_address/create/",
+            data,
+            entity_id=per_id
         )
-        return response
-    
-    def resident_personal(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/resident/create/combined",
-            json=data
+
+    def resident_personal(self, data, rp_id=None):
+        return replicate(
+            "resident",
+            "/health-profiling/resident/create/combined/",
+            data,
+            entity_id=rp_id
         )
 
-        return response
-    
-    def complete_profile(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/complete/registration/",
-            json=data
+    def complete_profile(self, data, rp_id=None):
+        return replicate(
+            "resident",
+            "/health-profiling/complete/registration/",
+            data,
+            entity_id=rp_id
         )
-        return response
 
-    def family(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/family/create/",
-            json=data
+    def family(self, data, fam_id=None):
+        return replicate(
+            "family",
+            "/health-profiling/family/create/",
+            data,
+            entity_id=fam_id
         )
-        return response
-    
-    def family_registration_request(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/family/registration-request/approve/",
-            json=data
+
+    def family_registration_request(self, data, fam_id=None):
+        return replicate(
+            "family",
+            "/health-profiling/family/registration-request/approve/",
+            data,
+            entity_id=fam_id
         )
-        return response
 
-    def family_composition(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/family/composition/bulk/create/",
-            json=data
+    def family_composition(self, data, fam_id=None):
+        return replicate(
+            "family",
+            "/health-profiling/family/composition/bulk/create/",
+            data,
+            entity_id=fam_id
         )
-        return response
-    
-    def household(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/household/create/",
-            json=data
+
+    def household(self, data, hh_id=None):
+        return replicate(
+            "household",
+            "/health-profiling/household/create/",
+            data,
+            entity_id=hh_id
         )
-        return response
-    
+
     def sitio(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/sitio/create/",
-            json=data
+        return replicate(
+            "sitio",
+            "/health-profiling/sitio/create/",
+            data
         )
-        return response
-    
-class DeleteQueries:
-    def __init__(self):
-        self.client = config("CLIENT", default="http://127.0.0.1:8001")
 
+class DeleteQueries:
     def sitio(self, sitio_id):
-        response = requests.delete(
-            f"{self.client}/health-profiling/sitio/{sitio_id}/delete/"
+        return replicate(
+            "sitio",
+            f"/health-profiling/sitio/{sitio_id}/delete/",
+            entity_id=sitio_id,
+            method="DELETE"
         )
-        return response
 
 class UpdateQueries:
-    def __init__(self):
-        self.client = config("CLIENT", default="http://127.0.0.1:8001")
-
     def personal(self, data, per_id):
-        response = requests.patch(
-            f"{self.client}/health-profiling/personal/update/{per_id}/",
-            json=data
+        return replicate(
+            "personal",
+            f"/health-profiling/personal/update/{per_id}/",
+            data,
+            entity_id=per_id,
+            method="PATCH"
         )
-        return response
-        
\ No newline at end of file
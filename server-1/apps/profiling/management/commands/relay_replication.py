@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.profiling.replication import relay_all_pending, replication_lag, REPLICATION_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Relays the profile replication outbox to Server-2 in ordered batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls')
+        parser.add_argument('--batch-size', type=int, default=REPLICATION_BATCH_SIZE)
+        parser.add_argument('--once', action='store_true', help='Drain the outbox once and exit')
+        parser.add_argument('--status', action='store_true', help='Print the replication lag and exit')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self.print_lag()
+            return
+
+        self.stdout.write("Relaying replication outbox...")
+
+        try:
+            while True:
+                result = relay_all_pending(options['batch_size'])
+                if result['claimed']:
+                    self.stdout.write(
+                        f"Claimed {result['claimed']}: {result['sent']} sent, {result['failed']} failed"
+                    )
+                    self.print_lag()
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('Replication relay stopped.'))
+
+    def print_lag(self):
+        lag = replication_lag()
+        self.stdout.write(
+            f"Pending: {lag['pending']}, failed: {lag['failed']}, lag: {lag['lag_seconds']:.1f}s"
+        )
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+import uuid
+
+from apps.profiling.models import ReplicationOutbox
+from apps.profiling.replication import next_sequence
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-queues replication outbox items for Server-2. By default only FAILED items are retried; '
+        'items keep their idempotency key and sequence number, so anything Server-2 already applied is '
+        'skipped and an item Server-2 found stale fails again. Use --reapply for stale items.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from-id', type=int, help='First outbox ID to replay (includes SENT items)')
+        parser.add_argument('--to-id', type=int, help='Last outbox ID to replay')
+        parser.add_argument('--entity', help='Only replay items for this entity (e.g. resident, family)')
+        parser.add_argument('--entity-id', help='Only replay items for this entity ID')
+        parser.add_argument(
+            '--reapply', action='store_true',
+            help='Issue new idempotency keys and sequence numbers so Server-2 applies the items again'
+        )
+
+    def handle(self, *args, **options):
+        if options['to_id'] and not options['from_id']:
+            raise CommandError('--to-id requires --from-id')
+
+        items = ReplicationOutbox.objects.all()
+        if options['from_id']:
+            items = items.filter(ro_id__gte=options['from_id'])
+            if options['to_id']:
+                items = items.filter(ro_id__lte=options['to_id'])
+            items = items.filter(~Q(ro_status=ReplicationOutbox.PENDING))
+        else:
+            items = items.filter(ro_status=ReplicationOutbox.FAILED)
+
+        if options['entity']:
+            items = items.filter(ro_entity=options['entity'])
+        if options['entity_id']:
+            items = items.filter(ro_entity_id=options['entity_id'])
+
+        if options['reapply']:
+            count = 0
+            for item in items.order_by('ro_id'):
+                item.ro_key = uuid.uuid4()
+                item.ro_seq = next_sequence(item.ro_entity, item.ro_entity_id) if item.ro_entity_id else 0
+                item.ro_status = ReplicationOutbox.PENDING
+                item.ro_attempts = 0
+                item.ro_last_error = None
+                item.ro_next_attempt_at = None
+                item.save(update_fields=['ro_key', 'ro_seq', 'ro_status', 'ro_attempts', 'ro_last_error', 'ro_next_attempt_at'])
+                count += 1
+        else:
+            count = items.update(
+                ro_status=ReplicationOutbox.PENDING,
+                ro_attempts=0,
+                ro_last_error=None,
+                ro_next_attempt_at=None,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Re-queued {count} replication item(s).'))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 15:41
+
+import django.core.serializers.json
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiling', '0004_alter_historicalpersonal_per_contact_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicationOutbox',
+            fields=[
+                ('ro_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('ro_key', models.UUIDField(default=uuid.uuid4, unique=True)),
+                ('ro_entity', models.CharField(max_length=50)),
+                ('ro_entity_id', models.CharField(blank=True, default='', max_length=50)),
+                ('ro_seq', models.PositiveIntegerField(default=1)),
+                ('ro_method', models.CharField(default='POST', max_length=10)),
+                ('ro_path', models.CharField(max_length=255)),
+                ('ro_payload', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('ro_status', models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('ro_attempts', models.PositiveIntegerField(default=0)),
+                ('ro_last_error', models.TextField(blank=True, null=True)),
+                ('ro_next_attempt_at', models.DateTimeField(blank=True, null=True)),
+                ('ro_created_at', models.DateTimeField(auto_now_add=True)),
+                ('ro_sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'replication_outbox',
+                'indexes': [models.Index(fields=['ro_status', 'ro_id'], name='replication_ro_stat_c2c2b4_idx'), models.Index(fields=['ro_entity', 'ro_entity_id'], name='replication_ro_enti_7ad02c_idx')],
+            },
+        ),
+    ]
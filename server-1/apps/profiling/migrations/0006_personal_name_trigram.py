@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 17:20
+
+from django.db import migrations
+
+from utils.search import SearchIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiling', '0005_replicationoutbox'),
+    ]
+
+    operations = [
+        # Names searched from activity logs and incident reports (utils.search)
+        SearchIndex(table='personal', trigram=['per_fname', 'per_mname', 'per_lname']),
+    ]
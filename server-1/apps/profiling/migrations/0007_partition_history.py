@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 17:20
+
+from django.db import migrations
+
+from utils.partitions import PartitionByMonth
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiling', '0006_personal_name_trigram'),
+    ]
+
+    operations = [
+        PartitionByMonth(table='personal_history', column='history_date', pk='history_id'),
+        PartitionByMonth(table='business_history', column='history_date', pk='history_id'),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiling', '0007_partition_history'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='replicationoutbox',
+            name='ro_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=20),
+        ),
+    ]
@@ -1,8 +1,10 @@
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from datetime import date
 from simple_history.models import HistoricalRecords
 from abstract_classes import AbstractModels
+import uuid
 
 class Voter(models.Model):
     voter_id = models.BigAutoField(primary_key=True)
@@ -233,4 +235,47 @@ class BusinessFile(models.Model):
     bm = models.ForeignKey(BusinessModification, on_delete=models.CASCADE, related_name='business_files', null=True)
 
     class Meta:
-        db_table = 'business_file'
\ No newline at end of file
+        db_table = 'business_file'
+
+class ReplicationOutbox(models.Model):
+    """
+    Profile writes waiting to be replicated to Server-2. Rows are written in the
+    same transaction as the records they describe and relayed in ro_id order by
+    apps.profiling.replication, so a slow Server-2 never blocks or rolls back
+    a registration.
+    """
+    PENDING = 'PENDING'
+    SENDING = 'SENDING'  # Claimed by a relay; ro_next_attempt_at is when the claim lapses
+    SENT = 'SENT'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    ro_id = models.BigAutoField(primary_key=True)
+    ro_key = models.UUIDField(default=uuid.uuid4, unique=True)  # Idempotency key
+    ro_entity = models.CharField(max_length=50)
+    ro_entity_id = models.CharField(max_length=50, blank=True, default='')
+    ro_seq = models.PositiveIntegerField(default=1)  # Per-entity sequence number
+    ro_method = models.CharField(max_length=10, default='POST')
+    ro_path = models.CharField(max_length=255)
+    ro_payload = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    ro_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    ro_attempts = models.PositiveIntegerField(default=0)
+    ro_last_error = models.TextField(null=True, blank=True)
+    ro_next_attempt_at = models.DateTimeField(null=True, blank=True)
+    ro_created_at = models.DateTimeField(auto_now_add=True)
+    ro_sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'replication_outbox'
+        indexes = [
+            models.Index(fields=['ro_status', 'ro_id']),
+            models.Index(fields=['ro_entity', 'ro_entity_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.ro_method} {self.ro_path} ({self.ro_entity}:{self.ro_entity_id} #{self.ro_seq})"
@@ -0,0 +1,8 @@
+from django.conf import settings
+
+from utils.partitions import register
+
+RETENTION_MONTHS = getattr(settings, 'HISTORY_RETENTION_MONTHS', 60)
+
+register('personal_history', 'history_date', RETENTION_MONTHS)
+register('business_history', 'history_date', RETENTION_MONTHS)
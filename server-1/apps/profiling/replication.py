@@ -0,0 +1,291 @@
+"""
+Transactional outbox for replicating profile writes to Server-2.
+
+Views call replicate() inside their atomic block instead of calling Server-2
+directly. The relay drains the outbox in ro_id order and posts batches to
+Server-2's replication endpoint, which applies each item once (by ro_key) and
+ignores items older than the last sequence it applied for the same entity.
+
+Sequence numbers come from an id_counter row per entity (utils.ids), so two
+concurrent writes to one entity never get the same number. Items without an
+entity_id (new addresses, sitios) are not ordered by Server-2 and get seq 0
+without touching a counter. The counter rows ('replication_outbox:<entity>:<id>')
+grow by one per replicated resident, family or household; they are a key
+and a number each, and a deleted row is reseeded from the outbox on next use.
+
+The relay claims a batch in a short transaction (status SENDING, with a lease)
+and posts it with no locks held; other relays wait for the claim to be
+settled or to lapse. Once an item is FAILED, later items of the same entity
+are held back until it is replayed (replay_replication), so an entity's
+changes never reach Server-2 out of order. An item Server-2 answers 'stale'
+(a newer change of its entity was applied first) was not applied: it is
+marked FAILED and has to be replayed with --reapply.
+"""
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.db.models import Exists, Max, Min, OuterRef
+from django.utils import timezone
+from apps.administration.models import IdCounter
+from utils.ids import allocate
+from utils.peer_client import peer_client
+from .models import ReplicationOutbox
+from datetime import timedelta
+import hashlib
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+REPLICATION_BATCH_PATH = "/health-profiling/replication/batch/"
+REPLICATION_BATCH_SIZE = getattr(settings, 'REPLICATION_BATCH_SIZE', 200)
+REPLICATION_MAX_ATTEMPTS = getattr(settings, 'REPLICATION_MAX_ATTEMPTS', 10)
+REPLICATION_POLL_SECONDS = getattr(settings, 'REPLICATION_POLL_SECONDS', 15)
+# How long a claimed batch is left to its relay before another one may take it over
+REPLICATION_CLAIM_SECONDS = getattr(settings, 'REPLICATION_CLAIM_SECONDS', 120)
+APPLIED_STATUSES = {'applied', 'duplicate'}
+STALE_STATUS = 'stale'
+
+
+
+# ===============================================================
+#  ENQUEUE
+# ===============================================================
+def _sequence_key(entity, entity_id):
+    key = f"{ReplicationOutbox._meta.db_table}:{entity}:{entity_id}"
+    if len(key) > IdCounter._meta.get_field('ic_key').max_length:
+        key = f"{ReplicationOutbox._meta.db_table}:{hashlib.sha1(key.encode()).hexdigest()}"
+    return key
+
+
+def next_sequence(entity, entity_id):
+    """Next sequence number of an entity, from its counter row (seeded from existing items)"""
+    def seed():
+        return ReplicationOutbox.objects.filter(
+            ro_entity=entity, ro_entity_id=entity_id
+        ).aggregate(seq=Max('ro_seq'))['seq'] or 0
+
+    return allocate(_sequence_key(entity, entity_id), seed=seed)[0]
+
+
+def replicate(entity, path, payload=None, entity_id=None, method='POST'):
+    """
+    Writes one replication item in the caller's transaction. The relay is woken
+    once the transaction commits; if it rolls back, nothing is replicated.
+    """
+    entity_id = '' if entity_id is None else str(entity_id)
+    item = ReplicationOutbox.objects.create(
+        ro_entity=entity,
+        ro_entity_id=entity_id,
+        ro_seq=next_sequence(entity, entity_id) if entity_id else 0,
+        ro_method=method.upper(),
+        ro_path=path,
+        ro_payload=payload,
+    )
+    transaction.on_commit(replication_relay.wake)
+    return item
+
+
+# ===============================================================
+#  RELAY
+# ===============================================================
+def _as_item(row):
+    return {
+        "key": str(row.ro_key),
+        "entity": row.ro_entity,
+        "entity_id": row.ro_entity_id,
+        "seq": row.ro_seq,
+        "method": row.ro_method,
+        "path": row.ro_path,
+        "payload": row.ro_payload,
+    }
+
+
+def _record_failure(row, error):
+    row.ro_status = ReplicationOutbox.PENDING
+    row.ro_attempts += 1
+    row.ro_last_error = str(error)[:2000]
+    if row.ro_attempts >= REPLICATION_MAX_ATTEMPTS:
+        row.ro_status = ReplicationOutbox.FAILED
+        logger.error(f"❌ Replication {row.ro_key} gave up after {row.ro_attempts} attempts: {error}")
+    else:
+        # Exponential backoff, capped at 10 minutes
+        delay = min(2 ** row.ro_attempts, 600)
+        row.ro_next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        logger.warning(f"⚠️ Replication {row.ro_key} failed (attempt {row.ro_attempts}), retrying in {delay}s: {error}")
+    row.save(update_fields=['ro_status', 'ro_attempts', 'ro_last_error', 'ro_next_attempt_at'])
+
+
+def _record_stale(row):
+    row.ro_status = ReplicationOutbox.FAILED
+    row.ro_last_error = (
+        f"Stale: Server-2 already applied a newer change of {row.ro_entity} {row.ro_entity_id}, "
+        f"so seq {row.ro_seq} was not applied; replay it with --reapply"
+    )
+    row.ro_next_attempt_at = None
+    row.save(update_fields=['ro_status', 'ro_last_error', 'ro_next_attempt_at'])
+    logger.error(f"❌ Replication {row.ro_key}: {row.ro_last_error}")
+
+
+def claim_batch(batch_size=None, now=None):
+    """
+    Claims the oldest waiting items, in ro_id order, in a short transaction of
+    its own. Nothing is claimed while the first item is backing off after a
+    failure or is held by another relay whose claim has not lapsed, and items
+    behind a FAILED item of the same entity are skipped, so an entity's items
+    always reach Server-2 in order.
+    """
+    batch_size = batch_size or REPLICATION_BATCH_SIZE
+    now = now or timezone.now()
+    failed_before = ReplicationOutbox.objects.filter(
+        ro_status=ReplicationOutbox.FAILED,
+        ro_entity=OuterRef('ro_entity'),
+        ro_entity_id=OuterRef('ro_entity_id'),
+        ro_id__lt=OuterRef('ro_id'),
+    ).exclude(ro_entity_id='')
+    with transaction.atomic():
+        rows = list(
+            ReplicationOutbox.objects.select_for_update()
+            .filter(ro_status__in=[ReplicationOutbox.PENDING, ReplicationOutbox.SENDING])
+            .exclude(Exists(failed_before))
+            .order_by('ro_id')[:batch_size]
+        )
+        claimed = []
+        for row in rows:
+            waiting = row.ro_next_attempt_at and row.ro_next_attempt_at > now
+            if waiting and (claimed or row.ro_status == ReplicationOutbox.SENDING):
+                break  # Held by another relay
+            if waiting:
+                return []  # Backing off
+            claimed.append(row)
+        if claimed:
+            ReplicationOutbox.objects.filter(ro_id__in=[row.ro_id for row in claimed]).update(
+                ro_status=ReplicationOutbox.SENDING,
+                ro_next_attempt_at=now + timedelta(seconds=REPLICATION_CLAIM_SECONDS),
+            )
+    return claimed
+
+
+def relay_pending(batch_size=None, now=None):
+    """
+    Sends the oldest pending items to Server-2 in one batch. The batch is
+    claimed first and posted with no locks held. Processing stops at the first
+    item Server-2 rejects; it is retried with backoff and the items behind it
+    keep their order.
+    """
+    rows = claim_batch(batch_size, now)
+    if not rows:
+        return {'claimed': 0, 'sent': 0, 'failed': 0}
+    sent = failed = 0
+
+    try:
+        response = peer_client.post(REPLICATION_BATCH_PATH, json={"items": [_as_item(row) for row in rows]})
+        if not response.ok:
+            raise ValueError(f"{response.status_code} {response.text[:500]}")
+        results = {result["key"]: result for result in response.json().get("results", [])}
+    except Exception as e:
+        results, error = {}, e
+    else:
+        error = None
+
+    with transaction.atomic():
+        sent_ids = []
+        for row in rows:
+            result = results.get(str(row.ro_key))
+            if result is None:
+                if error is not None:
+                    _record_failure(row, error)
+                    failed += 1
+                break
+            if result.get("status") in APPLIED_STATUSES:
+                sent_ids.append(row.ro_id)
+                continue
+            if result.get("status") == STALE_STATUS:
+                _record_stale(row)
+                failed += 1
+                break
+            _record_failure(row, result.get("error") or result.get("status"))
+            failed += 1
+            break
+
+        if sent_ids:
+            sent = ReplicationOutbox.objects.filter(ro_id__in=sent_ids).update(
+                ro_status=ReplicationOutbox.SENT,
+                ro_sent_at=timezone.now(),
+                ro_last_error=None,
+                ro_next_attempt_at=None,
+            )
+        # Release the rest of the claim
+        ReplicationOutbox.objects.filter(
+            ro_id__in=[row.ro_id for row in rows], ro_status=ReplicationOutbox.SENDING
+        ).exclude(ro_id__in=sent_ids).update(ro_status=ReplicationOutbox.PENDING, ro_next_attempt_at=None)
+
+    if error is None:
+        logger.info(f"🔁 Replicated {sent}/{len(rows)} profile change(s) to Server-2")
+    return {'claimed': len(rows), 'sent': sent, 'failed': failed}
+
+
+def relay_all_pending(batch_size=None):
+    """Drains the outbox batch by batch until it is empty or a batch fails"""
+    close_old_connections()
+    try:
+        total = {'claimed': 0, 'sent': 0, 'failed': 0}
+        while True:
+            result = relay_pending(batch_size)
+            for key in total:
+                total[key] += result[key]
+            if result['failed'] or result['sent'] < (batch_size or REPLICATION_BATCH_SIZE):
+                return total
+    finally:
+        close_old_connections()
+
+
+def replication_lag(now=None):
+    """Backlog size and age of the oldest item still waiting to reach Server-2"""
+    now = now or timezone.now()
+    pending = ReplicationOutbox.objects.filter(ro_status__in=[ReplicationOutbox.PENDING, ReplicationOutbox.SENDING])
+    oldest = pending.aggregate(oldest=Min('ro_created_at'))['oldest']
+    return {
+        'pending': pending.count(),
+        'failed': ReplicationOutbox.objects.filter(ro_status=ReplicationOutbox.FAILED).count(),
+        'oldest_pending_at': oldest,
+        'lag_seconds': (now - oldest).total_seconds() if oldest else 0,
+    }
+
+
+class ReplicationRelay:
+    """
+    In-process relay thread. It wakes on commit of every replicate() call and
+    also polls every REPLICATION_POLL_SECONDS, so rows left behind by a crashed
+    worker or a failed attempt are picked up again.
+    """
+
+    def __init__(self, poll_seconds=None):
+        self.poll_seconds = poll_seconds or REPLICATION_POLL_SECONDS
+        self._event = threading.Event()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def wake(self):
+        if not getattr(settings, 'REPLICATION_RELAY_IN_PROCESS', True):
+            return
+        self._ensure_worker()
+        self._event.set()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='replication-relay', daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            self._event.wait(self.poll_seconds)
+            self._event.clear()
+            try:
+                relay_all_pending()
+            except Exception as e:
+                logger.error(f"❌ Replication relay error: {str(e)}")
+
+
+replication_relay = ReplicationRelay()
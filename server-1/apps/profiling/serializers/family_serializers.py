@@ -96,13 +96,7 @@ class FamilyCreateSerializer(serializers.ModelSerializer):
     # Perform double query
     request = self.context.get("request")
     double_queries = PostQueries()
-    response = double_queries.family(request.data)
-    if not response.ok:
-      try:
-          error_detail = response.json()
-      except ValueError:
-          error_detail = response.text
-      raise serializers.ValidationError({"error": error_detail})
+    double_queries.family(request.data, family.fam_id)
     
     # Create notification
     create_notification(
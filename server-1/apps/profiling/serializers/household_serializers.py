@@ -105,13 +105,7 @@ class HouseholdCreateSerializer(serializers.ModelSerializer):
     # Perform double query
     request = self.context.get("request")
     double_queries = PostQueries()
-    response = double_queries.household(request.data)
-    if not response.ok:
-      try:
-          error_detail = response.json()
-      except ValueError:
-          error_detail = response.text
-      raise serializers.ValidationError({"error": error_detail})
+    double_queries.household(request.data, household.hh_id)
 
     # Create notification
     create_notification(
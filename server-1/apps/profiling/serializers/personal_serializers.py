@@ -123,12 +123,6 @@ class PersonalUpdateSerializer(serializers.ModelSerializer):
                     
         pk = instance.pk
         request = self.context.get("request")
-        response = UpdateQueries().personal(request.data, pk)
-        if not response.ok:
-            try:
-                error_details = response.json()
-            except ValueError:
-                error_details = response.text
-            raise serializers.ValidationError({'error': error_details})
+        UpdateQueries().personal(request.data, pk)
 
         return instance
@@ -129,14 +129,7 @@ class ResidentPersonalCreateSerializer(serializers.ModelSerializer):
         # Double Query
         request = self.context.get('request')
         double_query = PostQueries()
-        response = double_query.resident_personal(request.data)
-
-        if not response.ok:
-            try:
-                error_details = response.json()
-            except ValueError:
-                error_details = response.text
-            raise serializers.ValidationError({'error': error_details})
+        double_query.resident_personal(request.data, resident_profile.rp_id)
 
         # Create notification
         resident_name = f"{resident_profile.per.per_fname}{f' {resident_profile.per.per_mname[0]}.' if resident_profile.per.per_mname else ''} {resident_profile.per.per_lname}"
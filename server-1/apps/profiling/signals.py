@@ -1,6 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Business
+from .models import Business, Family, FamilyComposition, Household, ResidentProfile
+from .models import Sitio
+from .views.analytics_views import CARD_COUNTS
+from .views.sitio_views import SITIO_CACHE
+from utils.cache import invalidate_on_change
+from utils.counters import invalidate_counts
 from apps.notification.utils import create_notification
 
 @receiver(post_save, sender=Business)
@@ -28,4 +33,14 @@ def notify_approved_business(sender, instance, created, **kwargs):
 #  response = receiver(signal=self, sender=sender, **named)
 # TypeError: notify_approved_business() missing 1 required positional argument: 'created'
 # Request: POST /profiling/complete/registration/ Status: 500 Duration: 14.49s
-# [21/Nov/2025 20:03:19] "POST /profiling/complete/registration/ HTTP/1.1" 500 26415
\ No newline at end of file
+# [21/Nov/2025 20:03:19] "POST /profiling/complete/registration/ HTTP/1.1" 500 26415
+
+@receiver([post_save, post_delete], sender=ResidentProfile)
+@receiver([post_save, post_delete], sender=Family)
+@receiver([post_save, post_delete], sender=FamilyComposition)
+@receiver([post_save, post_delete], sender=Household)
+@receiver([post_save, post_delete], sender=Business)
+def card_counts_changed(sender, **kwargs):
+  invalidate_counts(CARD_COUNTS)
+
+invalidate_on_change(SITIO_CACHE, Sitio)
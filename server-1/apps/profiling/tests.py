@@ -1 +1,209 @@
-from django.test import TestCase
\ No newline at end of file
+from datetime import date
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from apps.administration.models import IdCounter
+from .models import Personal, ReplicationOutbox, ResidentProfile
+from .replication import replicate, relay_pending, replication_lag
+from .views.analytics_views import CardAnalyticsView
+from .utils import generate_fam_no, generate_resident_no, generate_resident_nos
+
+
+def _peer_response(statuses):
+    def post(path, json=None):
+        results = [
+            {"key": item["key"], "status": status}
+            for item, status in zip(json["items"], statuses)
+        ]
+        return SimpleNamespace(ok=True, status_code=200, text='', json=lambda: {"results": results})
+    return post
+
+
+class _FakeServer2:
+    """Server-2's batch endpoint: receipts by key, newest seq per entity, optional failing keys"""
+
+    def __init__(self):
+        self.keys = set()
+        self.last_seq = {}
+        self.failing = set()
+
+    def apply(self, item):
+        self.keys.add(item["key"])
+        entity = (item["entity"], item["entity_id"])
+        self.last_seq[entity] = max(self.last_seq.get(entity, 0), item["seq"])
+
+    def post(self, path, json=None):
+        results = []
+        for item in json["items"]:
+            entity = (item["entity"], item["entity_id"])
+            if item["key"] in self.keys:
+                status = 'duplicate'
+            elif item["key"] in self.failing:
+                results.append({"key": item["key"], "status": 'failed'})
+                break
+            elif item["entity_id"] and item["seq"] < self.last_seq.get(entity, 0):
+                status = 'stale'
+            else:
+                self.apply(item)
+                status = 'applied'
+            results.append({"key": item["key"], "status": status})
+        return SimpleNamespace(ok=True, status_code=200, text='', json=lambda: {"results": results})
+
+
+class ReplicationOutboxTest(TestCase):
+    def test_items_written_in_caller_transaction(self):
+        replicate("household", "/health-profiling/household/create/", {"hh_id": "HH-1"}, entity_id="HH-1")
+
+        try:
+            with transaction.atomic():
+                replicate("household", "/health-profiling/household/create/", {"hh_id": "HH-2"}, entity_id="HH-2")
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertEqual(list(ReplicationOutbox.objects.values_list('ro_entity_id', flat=True)), ["HH-1"])
+
+    def test_sequence_numbers_are_per_entity(self):
+        for _ in range(2):
+            replicate("personal", "/health-profiling/personal/update/1/", {}, entity_id=1, method="PATCH")
+        replicate("personal", "/health-profiling/personal/update/2/", {}, entity_id=2, method="PATCH")
+
+        self.assertEqual(
+            list(ReplicationOutbox.objects.order_by('ro_id').values_list('ro_entity_id', 'ro_seq')),
+            [("1", 1), ("1", 2), ("2", 1)],
+        )
+
+    def test_sequence_continues_from_existing_items(self):
+        ReplicationOutbox.objects.create(ro_entity="personal", ro_entity_id="1", ro_seq=7, ro_path="/")
+
+        item = replicate("personal", "/health-profiling/personal/update/1/", {}, entity_id=1, method="PATCH")
+
+        self.assertEqual(item.ro_seq, 8)
+
+    def test_items_without_entity_id_take_no_counter(self):
+        item = replicate("address", "/health-profiling/address/create/", {})
+
+        self.assertEqual(item.ro_seq, 0)
+        self.assertFalse(IdCounter.objects.filter(ic_key__startswith='replication_outbox:').exists())
+
+    @patch('apps.profiling.replication.REPLICATION_MAX_ATTEMPTS', 1)
+    @patch('apps.profiling.replication.peer_client')
+    def test_failed_item_holds_back_its_entity_and_stale_replay_is_not_sent(self, peer_client):
+        server = _FakeServer2()
+        peer_client.post.side_effect = server.post
+        first, second = [
+            replicate("personal", "/health-profiling/personal/update/1/", {}, entity_id=1, method="PATCH")
+            for _ in range(2)
+        ]
+        other = replicate("personal", "/health-profiling/personal/update/2/", {}, entity_id=2, method="PATCH")
+
+        server.failing.add(str(first.ro_key))
+        relay_pending()
+        self.assertEqual(relay_pending(), {'claimed': 1, 'sent': 1, 'failed': 0})  # Only the other entity
+        statuses = dict(ReplicationOutbox.objects.values_list('ro_id', 'ro_status'))
+        self.assertEqual(
+            [statuses[row.ro_id] for row in (first, second, other)], ['FAILED', 'PENDING', 'SENT']
+        )
+
+        # Seq 2 reached Server-2 anyway (e.g. before the hold-back), then seq 1 is replayed
+        server.failing.clear()
+        second.refresh_from_db()
+        server.apply({"key": str(second.ro_key), "entity": "personal", "entity_id": "1", "seq": second.ro_seq})
+        call_command('replay_replication', stdout=StringIO())
+        relay_pending()
+
+        first.refresh_from_db()
+        self.assertEqual(first.ro_status, 'FAILED')
+        self.assertIn('Stale', first.ro_last_error)
+
+    @patch('apps.profiling.replication.peer_client')
+    def test_batch_is_claimed_before_it_is_posted(self, peer_client):
+        replicate("sitio", "/health-profiling/sitio/create/", [{"sitio_name": "SITIO"}])
+        seen = {}
+
+        def post(path, json=None):
+            seen['statuses'] = list(ReplicationOutbox.objects.values_list('ro_status', flat=True))
+            seen['second_relay'] = relay_pending()
+            return _peer_response(['applied'])(path, json)
+
+        peer_client.post.side_effect = post
+        self.assertEqual(relay_pending()['sent'], 1)
+
+        self.assertEqual(seen['statuses'], ['SENDING'])
+        self.assertEqual(seen['second_relay']['claimed'], 0)
+        self.assertEqual(peer_client.post.call_count, 1)
+
+    @patch('apps.profiling.replication.peer_client')
+    def test_relay_sends_one_ordered_batch_and_stops_at_failure(self, peer_client):
+        rows = [
+            replicate("sitio", "/health-profiling/sitio/create/", [{"sitio_name": f"SITIO {i}"}])
+            for i in range(3)
+        ]
+        peer_client.post.side_effect = _peer_response(['applied', 'failed'])
+
+        result = relay_pending()
+
+        self.assertEqual(peer_client.post.call_count, 1)
+        sent_keys = [item["key"] for item in peer_client.post.call_args.kwargs["json"]["items"]]
+        self.assertEqual(sent_keys, [str(row.ro_key) for row in rows])
+        self.assertEqual(result, {'claimed': 3, 'sent': 1, 'failed': 1})
+
+        statuses = list(ReplicationOutbox.objects.order_by('ro_id').values_list('ro_status', 'ro_attempts'))
+        self.assertEqual(statuses, [('SENT', 0), ('PENDING', 1), ('PENDING', 0)])
+        self.assertEqual(replication_lag()['pending'], 2)
+
+        # The failed item is backing off, so nothing is sent past it
+        self.assertEqual(relay_pending()['claimed'], 0)
+        self.assertEqual(peer_client.post.call_count, 1)
+
+
+class IdGeneratorTest(TestCase):
+    def test_numbers_continue_from_existing_ids_in_blocks(self):
+        per = Personal.objects.create(
+            per_lname='Cruz', per_fname='Ana', per_dob=date(1990, 1, 1),
+            per_sex='FEMALE', per_status='SINGLE', per_religion='CATHOLIC',
+        )
+        # Two residents, but numbers were skipped before (count() + 1 would reuse 2)
+        ResidentProfile.objects.create(rp_id='2401011', per=per)
+        ResidentProfile.objects.create(rp_id='2401015', per=per)
+
+        first, second = generate_resident_nos(2)
+        prefix = first[:6]
+        self.assertEqual((first, second), (f"{prefix}6", f"{prefix}7"))
+        self.assertEqual(generate_resident_no(), f"{prefix}8")
+        self.assertEqual(generate_fam_no('Renter'), f"{prefix}1-R")
+
+
+class CardAnalyticsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.per = Personal.objects.create(
+            per_lname='Cruz', per_fname='Ana', per_dob=date(1990, 1, 1),
+            per_sex='FEMALE', per_status='SINGLE', per_religion='CATHOLIC',
+        )
+
+    def _cards(self):
+        return CardAnalyticsView.as_view()(APIRequestFactory().get('/')).data
+
+    def test_cards_in_one_query_until_a_counted_model_changes(self):
+        ResidentProfile.objects.create(rp_id='2401011', per=self.per)
+        with CaptureQueriesContext(connection) as queries:
+            cards = self._cards()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(cards, {"residents": 1, "families": 0, "households": 0, "businesses": 0})
+
+        with CaptureQueriesContext(connection) as queries:
+            self._cards()
+        self.assertEqual(len(queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ResidentProfile.objects.create(rp_id='2401012', per=self.per)
+        self.assertEqual(self._cards()["residents"], 2)
@@ -96,6 +96,7 @@ urlpatterns = [
     # Analytics Urls,
     path("card/analytics/data/", CardAnalyticsView.as_view(), name='card-analytics'),
     path("sidebar/analytics/data/", SidebarAnalyticsView.as_view(), name="sidebar-analytics"),
+    path("replication/lag/", ReplicationLagView.as_view(), name="replication-lag"),
     
     # KYC
     path("kyc/match-document/", KYCDocumentMatchingView.as_view(), name="document-matching"),
@@ -1,52 +1,72 @@
 from .models import Family, ResidentProfile, Household, Business, BusinessRespondent
+from utils.ids import allocate
 from datetime import datetime
+import re
 
-def generate_resident_no():
-  next_val = ResidentProfile.objects.count() + 1
+# The running number in each ID (not zero-padded, never reset)
+RESIDENT_NO = re.compile(r'^\d{6}(\d+)$')
+HH_NO = re.compile(r'^HH-\d{4}-(\d+)$')
+FAM_NO = re.compile(r'^\d{6}(\d+)-[A-Z]$')
+BUSRESPONDENT_NO = re.compile(r'^BR-\d{6}-(\d+)$')
+BUSINESS_NO = re.compile(r'^BUS-\d{4}-(\d+)$')
+
+def _next_values(model, pattern, count):
+  # The first allocation continues after the existing rows (count() + 1 before counters)
+  def seed():
+    numbers = [model.objects.count()]
+    for pk in model.objects.values_list('pk', flat=True).iterator():
+      match = pattern.match(str(pk))
+      if match:
+        numbers.append(int(match.group(1)))
+    return max(numbers)
+
+  return allocate(model._meta.db_table, count, seed=seed)
+
+def generate_resident_nos(count):
   date = datetime.now()
   year = str(date.year - 2000)
   month = str(date.month).zfill(2)
   day = str(date.day).zfill(2)
-  resident_id = f"{year}{month}{day}{next_val}"
-  
-  return resident_id
+  return [f"{year}{month}{day}{next_val}" for next_val in _next_values(ResidentProfile, RESIDENT_NO, count)]
 
-def generate_hh_no():
-  next_val = Household.objects.count() + 1
+def generate_resident_no():
+  return generate_resident_nos(1)[0]
+
+def generate_hh_nos(count):
   date = datetime.now()
   year = str(date.year - 2000)
   month = str(date.month).zfill(2)
-  house_no = f"HH-{year}{month}-{next_val}"
-  return house_no
+  return [f"HH-{year}{month}-{next_val}" for next_val in _next_values(Household, HH_NO, count)]
+
+def generate_hh_no():
+  return generate_hh_nos(1)[0]
 
 def generate_fam_no(building_type):
   type = {'owner' : 'O', 'renter' : 'R', 'sharer' : 'S'}
-  next_val = Family.objects.count() + 1
+  next_val = _next_values(Family, FAM_NO, 1)[0]
   date = datetime.now()
   year = str(date.year - 2000)
   month = str(date.month).zfill(2)
   day = str(date.day).zfill(2)
-  
+
   family_id = f"{year}{month}{day}{next_val}-{type[building_type.lower()]}"
-  
+
   return family_id
 
 def generate_busrespondent_no():
-  next_val = BusinessRespondent.objects.count() + 1
+  next_val = _next_values(BusinessRespondent, BUSRESPONDENT_NO, 1)[0]
   date = datetime.now()
   year = str(date.year - 2000)
   month = str(date.month).zfill(2)
   day = str(date.day).zfill(2)
 
   resident_id = f"BR-{year}{month}{day}-{next_val}"
-  
+
   return resident_id
 
 def generate_business_no():
-  next_val = Business.objects.count() + 1
+  next_val = _next_values(Business, BUSINESS_NO, 1)[0]
   date = datetime.now()
   year = str(date.year - 2000)
   month = str(date.month).zfill(2)
   return f"BUS-{year}{month}-{next_val}"
-
-  
@@ -30,13 +30,7 @@ class AddressBulkCreateView(generics.CreateAPIView):
     
     if len(addresses) > 0:
       double_queries = PostQueries()
-      response = double_queries.address(addresses_req)
-      if not response.ok:
-        try:
-          error_details = response.json()
-        except ValueError:
-          error_details = response.text
-        raise serializers.ValidationError({'error': error_details})
+      double_queries.address(addresses_req)
       return Response(data=AddressBaseSerializer(addresses, many=True).data, status=status.HTTP_200_OK)
     return Response(status=status.HTTP_400_BAD_REQUEST)
     
@@ -87,13 +81,7 @@ class PerAddressBulkCreateView(generics.CreateAPIView):
     }
 
     double_queries = PostQueries()
-    response = double_queries.personal_address(request.data)
-    if not response.ok:
-      try:
-        error_details = response.json()
-      except ValueError:
-        error_details = response.text
-      raise serializers.ValidationError({'error': error_details})
+    double_queries.personal_address(request.data, per_id)
     return Response(response_data, status=status.HTTP_201_CREATED)
   
 class PerAddressListView(generics.ListAPIView):
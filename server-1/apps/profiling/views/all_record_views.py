@@ -120,13 +120,7 @@ class CompleteRegistrationView(APIView):
 
     # Perform double query
     double_queries = PostQueries()
-    response = double_queries.complete_profile(request.data) 
-    if not response.ok:
-      try:
-          error_details = response.json()
-      except ValueError:
-          error_details = response.text
-      raise serializers.ValidationError({"error": error_details})
+    double_queries.complete_profile(request.data, rp.rp_id)
     
     if business:
         bus = self.create_business(business, rp, staff)
@@ -242,10 +236,10 @@ class CompleteRegistrationView(APIView):
   
   def create_household(self, houses, rp, staff):
     house_instances = []
-    for house in houses:
+    for house, hh_id in zip(houses, generate_hh_nos(len(houses))):
       data = house["address"].split("-") 
       house_instances.append(Household(
-        hh_id = generate_hh_no(),
+        hh_id = hh_id,
         hh_nhts = house['nhts'],
         add = Address.objects.get_or_create(
           add_province="CEBU",
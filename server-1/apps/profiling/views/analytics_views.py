@@ -3,24 +3,22 @@ from rest_framework.response import Response
 from django.db.models import Count
 from ..models import *
 from ..serializers.request_registration_serializers import RequestTableSerializer
+from ..replication import replication_lag
 from datetime import date, timedelta
+from utils.counters import cached_counts, count_all
+
+CARD_COUNTS = 'profiling_cards'
 
 class CardAnalyticsView(APIView):
   def get(self, request, *args, **kwargs):
-    total_residents = ResidentProfile.objects.count()
-    # Only count families that have at least 1 family member
-    total_families = Family.objects.annotate(
-      members_count=Count('family_compositions')
-    ).filter(members_count__gte=1).count()
-    total_households = Household.objects.count()
-    total_businesses = Business.objects.count()
-
-    card_data = {
-      "residents": total_residents, 
-      "families": total_families,
-      "households": total_households,
-      "businesses": total_businesses
-    }
+    # One query for all cards, cached until a counted model changes
+    card_data = cached_counts(CARD_COUNTS, lambda: count_all({
+      "residents": ResidentProfile.objects.all(),
+      # Only count families that have at least 1 family member
+      "families": Family.objects.filter(family_compositions__isnull=False).values('pk').distinct(),
+      "households": Household.objects.all(),
+      "businesses": Business.objects.all(),
+    }))
 
     return Response(card_data)
 
@@ -30,4 +28,9 @@ class SidebarAnalyticsView(APIView):
     return Response({
       'count': queryset.count(),
       'data': RequestTableSerializer(queryset[:3], many=True).data
-    })
\ No newline at end of file
+    })
+
+class ReplicationLagView(APIView):
+  def get(self, request, *args, **kwargs):
+    # Backlog of profile changes not yet replicated to Server-2
+    return Response(replication_lag())
@@ -71,13 +71,7 @@ class FamilyCompositionBulkCreateView(generics.CreateAPIView):
         if len(created_instances) > 0:
             # Perform double query
             double_queries = PostQueries()
-            response = double_queries.family_composition(self.request.data)
-            if not response.ok:
-                try:
-                    error_detail = response.json()
-                except ValueError:
-                    error_detail = response.text
-                raise serializers.ValidationError({"error": error_detail})
+            double_queries.family_composition(self.request.data, created_instances[0].fam_id)
             
             # Create notification
             create_notification(
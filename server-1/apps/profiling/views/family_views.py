@@ -192,7 +192,8 @@ class FamilyRegistrationRequestView(APIView):
             new_composition = []
             
             # Register each member as resident
-            for member in compositions:
+            rp_ids = generate_resident_nos(len(compositions))
+            for member, rp_id in zip(compositions, rp_ids):
                 member.pop('per_addresses', None)
                 per = member.pop('per_id', None)
                 acc = member.pop('acc', None)
@@ -208,7 +209,7 @@ class FamilyRegistrationRequestView(APIView):
                 
                 # Create ResidentProfile record
                 resident_profile = ResidentProfile.objects.create(
-                    rp_id = generate_resident_no(),
+                    rp_id = rp_id,
                     per = personal,
                     staff = staff
                 )
@@ -264,13 +265,7 @@ class FamilyRegistrationRequestView(APIView):
                 )
 
             # Perform double query
-            response = PostQueries().family_registration_request(request.data)
-            if not response.ok:
-                try:
-                    error_details = response.json()
-                except ValueError:
-                    error_details = response.text
-                raise serializers.ValidationError({'error': error_details})
+            PostQueries().family_registration_request(request.data, family.fam_id)
             
             # Remove request after approval
             reg_request = RequestRegistration.objects.filter(req_id=req_id).first()
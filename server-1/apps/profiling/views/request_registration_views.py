@@ -122,15 +122,8 @@ class RequestCreateView(APIView):
       )
 
       # Perform double query
-      for data in composition:
-        personal = data['per']
-        response = PostQueries().personal(personal)
-        if not response.ok:
-          try:
-            error_details = response.json()
-          except ValueError:
-            error_details = response.text
-          raise serializers.ValidationError({'error': error_details})
+      for data, comp in zip(composition, new_comp):
+        PostQueries().personal(data['per'], comp.per.per_id)
     
       return Response(status=status.HTTP_200_OK)
     return Response(status=status.HTTP_400_BAD_REQUEST)
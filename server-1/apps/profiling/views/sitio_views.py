@@ -5,8 +5,12 @@ from rest_framework.views import APIView
 from ..serializers.sitio_serializers import *
 from ..double_queries import *
 from django.db import transaction
+from utils.cache import CachedListMixin
 
-class SitioListView(generics.ListAPIView):
+SITIO_CACHE = 'sitios'
+
+class SitioListView(CachedListMixin, generics.ListAPIView):
+  cache_namespace = SITIO_CACHE
   serializer_class = SitioBaseSerializer
   queryset = Sitio.objects.all()
 
@@ -44,13 +48,7 @@ class SitioCreateView(generics.CreateAPIView):
     
     if len(created_instances) > 0:
       double_queries = PostQueries()
-      response = double_queries.sitio(request.data)
-      if not response.ok:
-        try:
-          error_details = response.json()
-        except ValueError:
-          error_details = response.text
-        raise serializers.ValidationError({"error": error_details })
+      double_queries.sitio(request.data)
       return Response(data=SitioBaseSerializer(created_instances, many=True).data, status=status.HTTP_200_OK)
     return Response(status=status.HTTP_400_BAD_REQUEST)
   
@@ -65,11 +63,5 @@ class SitioDeleteView(generics.DestroyAPIView):
     instance.delete()
 
     double_queries = DeleteQueries()
-    response = double_queries.sitio(sitio_id)
-    if not response.ok:
-      try:
-        error_details = response.json()
-      except ValueError:
-        error_details = response.text
-      raise serializers.ValidationError({"error": error_details})
+    double_queries.sitio(sitio_id)
     return Response(status=status.HTTP_200_OK)
\ No newline at end of file
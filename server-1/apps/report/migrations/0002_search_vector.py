@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 17:10
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from utils.search import SearchIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incidentreport',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        SearchIndex(
+            table='incident_report',
+            weights={'A': ['ir_track_user_name'], 'B': ['ir_area'], 'C': ['ir_add_details']},
+            trigram=['ir_id', 'ir_date', 'ir_time'],
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from datetime import date
 from abstract_classes import AbstractModels
@@ -34,6 +35,7 @@ class IncidentReport(AbstractModels):
   ir_remark = models.TextField(null=True)
   rt = models.ForeignKey(ReportType, on_delete=models.CASCADE, null=True)
   rp = models.ForeignKey('profiling.ResidentProfile', on_delete=models.CASCADE, null=True)
+  search_vector = SearchVectorField(null=True, editable=False) # Filled by a trigger (utils.search)
 
   class Meta:
     db_table = 'incident_report'
@@ -9,7 +9,7 @@ import datetime
 class IRBaseSerializer(serializers.ModelSerializer):
   class Meta:
     model = IncidentReport
-    fields = '__all__'
+    exclude = ['search_vector']
 
 class IRTableSerializer(serializers.ModelSerializer):
   ir_reported_by = serializers.SerializerMethodField()
@@ -1,7 +1,9 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.db.models import Q
-from .models import ActionReport, IncidentReport
+from .models import ActionReport, IncidentReport, WeeklyAccomplishmentReport
+from .views.analytics_views import CARD_COUNTS
+from utils.counters import invalidate_counts
 from .serializers.incident_report_serializers import IRTableSerializer
 from apps.notification.utils import create_notification
 from apps.administration.models import Assignment, Staff
@@ -58,4 +60,10 @@ def handle_ir_notif(sender, instance, created, **kwargs):
         web_params={},
         mobile_route="/(report)/securado/map",
         mobile_params={},
-      )
\ No newline at end of file
+      )
+
+@receiver([post_save, post_delete], sender=IncidentReport)
+@receiver([post_save, post_delete], sender=ActionReport)
+@receiver([post_save, post_delete], sender=WeeklyAccomplishmentReport)
+def card_counts_changed(sender, **kwargs):
+  invalidate_counts(CARD_COUNTS)
@@ -6,18 +6,18 @@ from datetime import date, timedelta
 from django.db.models.functions import TruncDate
 from dateutil.relativedelta import relativedelta
 from ..serializers.incident_report_serializers import IRTableSerializer
+from utils.counters import cached_counts, count_all
+
+CARD_COUNTS = 'report_cards'
 
 class CardAnalyticsView(APIView):
   def get(self, request, *args, **kwargs):
-      total_ir = IncidentReport.objects.count()
-      total_ar = ActionReport.objects.count()
-      total_war = WeeklyAccomplishmentReport.objects.count()
-      
-      card_data = {
-          "incidentReports": total_ir,
-          "actionReports": total_ar,
-          "weeklyARs": total_war
-      }
+      # One query for all cards, cached until a counted model changes
+      card_data = cached_counts(CARD_COUNTS, lambda: count_all({
+          "incidentReports": IncidentReport.objects.all(),
+          "actionReports": ActionReport.objects.all(),
+          "weeklyARs": WeeklyAccomplishmentReport.objects.all(),
+      }))
 
       return Response(card_data)
   
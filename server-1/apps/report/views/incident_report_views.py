@@ -1,10 +1,19 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from django.db.models import Q
 from ..serializers.incident_report_serializers import *
 from ..models import IncidentReport
 from apps.pagination import StandardResultsPagination
 from rest_framework.permissions import AllowAny
+from utils.search import SearchSpec, search
+
+IR_SEARCH = SearchSpec(
+  fields=['ir_track_user_name', 'ir_area', 'ir_add_details'],
+  trigram=['ir_id', 'ir_date', 'ir_time'],
+  related={
+    'rt': ['rt_label'],
+    'rp': ['per__per_fname', 'per__per_mname', 'per__per_lname'],
+  },
+)
 
 class IRCreateView(generics.CreateAPIView):
   permission_classes = [AllowAny]
@@ -40,7 +49,7 @@ class IRTableView(generics.ListAPIView):
   pagination_class = StandardResultsPagination
 
   def get_queryset(self):
-    search = self.request.query_params.get('search', '').strip()
+    search_text = self.request.query_params.get('search', '').strip()
     rp_id = self.request.query_params.get("rp_id", None)
     is_get_tracker = self.request.query_params.get('get_tracker', None)
     is_archive = self.request.query_params.get('is_archive', 'false') == 'true'
@@ -97,19 +106,6 @@ class IRTableView(generics.ListAPIView):
     if severity and severity != "all":
       queryset = queryset.filter(ir_severity__iexact=severity)
 
-    # Filter by search query
-    if search:
-      queryset = queryset.filter(
-        Q(ir_id__icontains=search) |
-        Q(ir_add_details__icontains=search) |
-        Q(ir_date__icontains=search) |
-        Q(ir_time__icontains=search) |
-        Q(ir_track_user_name__icontains=search) |
-        Q(rt__rt_label__icontains=search) |
-        Q(rp__per__per_lname__icontains=search) |
-        Q(rp__per__per_fname__icontains=search) |
-        Q(rp__per__per_mname__icontains=search) 
-      ).distinct()
-
-    return queryset.order_by('-ir_updated_at') if verified \
-      else queryset.order_by('-ir_created_at')
\ No newline at end of file
+    # Filter by search query (ranked, indexed)
+    ordering = ['-ir_updated_at'] if verified else ['-ir_created_at']
+    return search(queryset, search_text, IR_SEARCH, ordering)
\ No newline at end of file
@@ -102,10 +102,13 @@
 
 # signals.py
 
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
-from .models import Budget_Plan, Income_Expense_Main, Budget_Plan_Detail
+from .models import Budget_Plan, Income_Expense_Main, Budget_Plan_Detail, Purpose_And_Rates
 from django.apps import apps
+from utils.cache import invalidate_on_change
+from utils.counters import invalidate_counts
+from .views import PAYMENT_STATISTICS, PURPOSE_RATES_CACHE
 
 @receiver(post_save, sender='treasurer.Budget_Plan')
 def sync_income_expense_main(sender, instance, created, **kwargs):
@@ -258,4 +261,10 @@ def delete_related_records(sender, instance, **kwargs):
     # Delete GAD_Budget_Year record
     GAD_Budget_Year.objects.filter(
         gbudy_year=instance.plan_year
-    ).delete()
\ No newline at end of file
+    ).delete()
+
+@receiver([post_save, post_delete], sender='clerk.ClerkCertificate')
+def payment_statistics_changed(sender, **kwargs):
+    invalidate_counts(PAYMENT_STATISTICS)
+
+invalidate_on_change(PURPOSE_RATES_CACHE, Purpose_And_Rates)
@@ -5,7 +5,7 @@ from django.shortcuts import get_object_or_404
 from django.http import Http404
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q
+from django.db.models import Count, Q
 from datetime import datetime
 from rest_framework.exceptions import NotFound
 from rest_framework.permissions import AllowAny
@@ -15,12 +15,17 @@ from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 import logging
 from apps.pagination import StandardResultsPagination
+from utils.cache import CachedListMixin
+from utils.counters import cached_counts
 from django.db.models.functions import ExtractYear
 from apps.gad.serializers import GADBudgetYearSerializer
 from apps.gad.models import GAD_Budget_Year
 
 logger = logging.getLogger(__name__)
 
+PAYMENT_STATISTICS = 'treasurer_payment_statistics'
+PURPOSE_RATES_CACHE = 'purpose_rates'
+
 class BudgetPlanAnalyticsView(ActivityLogMixin, generics.RetrieveAPIView):
     permission_classes = [AllowAny]
     serializer_class = BudgetPlanSerializer
@@ -1191,9 +1196,10 @@ class DeleteUpdate_Annual_Gross_SalesView(generics.UpdateAPIView):
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class Purpose_And_RatesView(generics.ListCreateAPIView):
+class Purpose_And_RatesView(CachedListMixin, generics.ListCreateAPIView):
     permission_classes = [AllowAny]
     serializer_class = Purpose_And_RatesSerializers
+    cache_namespace = PURPOSE_RATES_CACHE
     queryset = Purpose_And_Rates.objects.all().order_by('-pr_date')   
 
 class Purpose_And_RatesPersonalActiveView(generics.ListCreateAPIView):
@@ -1740,22 +1746,19 @@ class PaymentStatisticsView(generics.ListAPIView):
     
     def list(self, request, *args, **kwargs):
         from apps.clerk.models import ClerkCertificate
-        total_requests = ClerkCertificate.objects.count()
-        paid_requests = ClerkCertificate.objects.filter(req_payment_status='Paid').count()
-        unpaid_requests = ClerkCertificate.objects.filter(req_payment_status='Unpaid').count()
-        partial_requests = ClerkCertificate.objects.filter(req_payment_status='Partial').count()
-        overdue_requests = ClerkCertificate.objects.filter(req_payment_status='Overdue').count()
-        pending_requests = ClerkCertificate.objects.filter(req_status='Pending').count()
-        
-        statistics = {
-            'total_requests': total_requests,
-            'paid_requests': paid_requests,
-            'unpaid_requests': unpaid_requests,
-            'partial_requests': partial_requests,
-            'overdue_requests': overdue_requests,
-            'pending_requests': pending_requests
-        }
-        
+
+        def build():
+            # One conditional aggregate over the certificate requests
+            return ClerkCertificate.objects.aggregate(
+                total_requests=Count('pk'),
+                paid_requests=Count('pk', filter=Q(cr_req_payment_status='Paid')),
+                unpaid_requests=Count('pk', filter=Q(cr_req_payment_status='Unpaid')),
+                partial_requests=Count('pk', filter=Q(cr_req_payment_status='Partial')),
+                overdue_requests=Count('pk', filter=Q(cr_req_payment_status='Overdue')),
+                pending_requests=Count('pk', filter=Q(cr_req_status='Pending')),
+            )
+
+        statistics = cached_counts(PAYMENT_STATISTICS, build)
         return Response(statistics, status=status.HTTP_200_OK)
 
 # Clearance Request Views
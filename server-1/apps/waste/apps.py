@@ -5,4 +5,5 @@ class WasteConfig(AppConfig):
     name = 'apps.waste'
 
     def ready(self):
-        import apps.waste.signals
\ No newline at end of file
+        import apps.waste.signals
+        import apps.waste.transitions
\ No newline at end of file
@@ -2,7 +2,8 @@ from rest_framework import serializers
 from .models import *
 from .models import WasteTruck
 from apps.profiling.models import Sitio
-from utils.supabase_client import upload_to_storage
+from utils.supabase_client import upload_many
+from utils.storage import request_files
 from .models import WasteTruck
 from apps.treasurer.serializers import FileInputSerializer
 from django.db import transaction
@@ -155,18 +156,17 @@ class WasteReportFileSerializer(serializers.ModelSerializer):
             
             raise ValueError(f"Income_Expense_Tracking with id {rep_id} does not exist")       
         
-        rep_files = []
-        for file_data in files:
-            rep_file = WasteReport_File(
+        urls = upload_many(files, 'report-bucket', 'illegal-dumping')
+        rep_files = [
+            WasteReport_File(
                 wrf_name =file_data['name'],
                 wrf_type=file_data['type'],
                 wrf_path=f"illegal-dumping/{file_data['name']}",
+                wrf_url=url,
                 rep_id=tracking_instance  # THIS SETS THE FOREIGN KEY
             )
-
-            url = upload_to_storage(file_data, 'report-bucket', 'illegal-dumping')
-            rep_file.wrf_url = url
-            rep_files.append(rep_file)
+            for file_data, url in zip(files, urls)
+        ]
 
         if rep_files:
             WasteReport_File.objects.bulk_create(rep_files)
@@ -188,18 +188,17 @@ class WasteReportResolveFileSerializer(serializers.ModelSerializer):
             
             raise ValueError(f"Income_Expense_Tracking with id {rep_id} does not exist")       
         
-        rep_rslv_files = []
-        for file_data in files:
-            rep_rslv_file = WasteReportResolve_File(
+        urls = upload_many(files, 'report-bucket', 'illegal-dumping')
+        rep_rslv_files = [
+            WasteReportResolve_File(
                 wrsf_name =file_data['name'],
                 wrsf_type=file_data['type'],
                 wrsf_path=f"illegal-dumping/{file_data['name']}",
+                wrsf_url=url,
                 rep_id=tracking_instance  # THIS SETS THE FOREIGN KEY
             )
-
-            url = upload_to_storage(file_data, 'report-bucket', 'illegal-dumping')
-            rep_rslv_file.wrsf_url = url
-            rep_rslv_files.append(rep_rslv_file)
+            for file_data, url in zip(files, urls)
+        ]
 
         if rep_rslv_files:
             WasteReportResolve_File.objects.bulk_create(rep_rslv_files)
@@ -294,7 +293,8 @@ class GarbagePickupFileSerializer(serializers.ModelSerializer):
 
     @transaction.atomic
     def create(self, validated_data):
-        files_data = validated_data.pop('files', [])
+        # Multipart requests send the files as parts instead of base64 JSON
+        files_data = validated_data.pop('files', []) or request_files(self.context.get('request'))
         if not files_data:
             raise serializers.ValidationError({"files": "At least one file must be provided"})
             
@@ -306,17 +306,16 @@ class GarbagePickupFileSerializer(serializers.ModelSerializer):
         return created_files[0]
 
     def _upload_files(self, files_data):
-        gprf_files = []
-        for file_data in files_data:
-            gprf_file = GarbagePickupRequestFile(
+        urls = upload_many(files_data, 'request-bucket', 'garbage-pickup')
+        gprf_files = [
+            GarbagePickupRequestFile(
                 gprf_name=file_data['name'],
                 gprf_type=file_data['type'],
                 gprf_path=file_data['name'],
+                gprf_url=url,
             )
-
-            url = upload_to_storage(file_data, 'request-bucket', 'garbage-pickup')
-            gprf_file.gprf_url = url
-            gprf_files.append(gprf_file)
+            for file_data, url in zip(files_data, urls)
+        ]
 
         if gprf_files:
             return GarbagePickupRequestFile.objects.bulk_create(gprf_files)
@@ -1,3 +1,96 @@
-from django.test import TestCase
+import base64
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from pathlib import Path
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIRequestFactory
+
+from utils import storage
+from .models import GarbagePickupRequestFile
+from .views import GarbagePickupFileView
+
+
+def _jpeg(width, height):
+    file = BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(file, format='JPEG')
+    return file.getvalue()
+
+
+def _data_url(content, content_type='image/jpeg'):
+    return f"data:{content_type};base64,{base64.b64encode(content).decode()}"
+
+
+class LocalStorageMixin:
+    def setUp(self):
+        super().setUp()
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        override = override_settings(
+            FILE_STORAGE_BACKEND='local', LOCAL_STORAGE_ROOT=self.root, LOCAL_STORAGE_URL='/files/'
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class UploadPipelineTest(LocalStorageMixin, SimpleTestCase):
+    def test_base64_decoded_in_chunks(self):
+        content = bytes(range(256)) * 9000  # Over SPOOL_MAX_BYTES: decoded on disk
+        decoded = storage.decode_base64(_data_url(content, 'application/pdf'))
+        self.assertTrue(isinstance(decoded.name, str))
+        self.assertEqual(decoded.read(), content)
+        # Unpadded input still decodes
+        self.assertEqual(storage.decode_base64(base64.b64encode(b'abcd').decode().rstrip('=')).read(), b'abcd')
+        # Line-wrapped (MIME) input spanning several chunks
+        content = os.urandom(storage.DECODE_CHUNK)
+        self.assertEqual(storage.decode_base64(base64.encodebytes(content).decode()).read(), content)
+
+    def test_large_images_downscaled_with_thumbnail(self):
+        url = storage.upload_to_storage(
+            {'name': 'scan.jpg', 'type': 'image/jpeg', 'file': _data_url(_jpeg(4000, 1000))},
+            'lab-bucket', 'labs', thumbnail=True,
+        )
+        self.assertEqual(url, '/files/lab-bucket/labs/scan.jpg')
+        self.assertEqual(Image.open(self.root / 'lab-bucket/labs/scan.jpg').size, (2048, 512))
+        self.assertEqual(Image.open(self.root / 'lab-bucket/labs/thumbs/scan.jpg').size, (320, 80))
+
+    def test_upload_many_keeps_order_and_reports_failures(self):
+        files = [
+            {'name': f'doc{i}.txt', 'type': 'text/plain', 'file': _data_url(f'file {i}'.encode(), 'text/plain')}
+            for i in range(5)
+        ]
+        files.append(dict(files[0]))  # Same path again: never overwritten
+        urls = storage.upload_many(files, 'report-bucket', 'docs')
+        self.assertEqual(urls[1:5], [f'/files/report-bucket/docs/doc{i}.txt' for i in range(1, 5)])
+        # Whichever copy of doc0 runs second fails
+        self.assertEqual(sorted([urls[0], urls[5]], key=bool), [None, '/files/report-bucket/docs/doc0.txt'])
+        self.assertEqual((self.root / 'report-bucket/docs/doc3.txt').read_bytes(), b'file 3')
+        self.assertIsNone(storage.upload_to_storage(
+            {'name': '../escape.txt', 'type': 'text/plain', 'file': _data_url(b'x')}, 'report-bucket',
+        ))
+
+
+class GarbagePickupFileUploadTest(LocalStorageMixin, TestCase):
+    def test_multipart_and_base64_uploads(self):
+        factory = APIRequestFactory()
+        request = factory.post('/', {'files': [
+            SimpleUploadedFile('bin.jpg', _jpeg(64, 64), content_type='image/jpeg'),
+            SimpleUploadedFile('note.txt', b'full bin', content_type='text/plain'),
+        ]}, format='multipart')
+        self.assertEqual(GarbagePickupFileView.as_view()(request).status_code, 201)
+
+        request = factory.post('/', {'files': [
+            {'name': 'street.txt', 'type': 'text/plain', 'file': _data_url(b'street', 'text/plain')},
+        ]}, format='json')
+        self.assertEqual(GarbagePickupFileView.as_view()(request).status_code, 201)
+
+        self.assertEqual(
+            sorted(GarbagePickupRequestFile.objects.values_list('gprf_url', flat=True)),
+            ['/files/request-bucket/garbage-pickup/bin.jpg', '/files/request-bucket/garbage-pickup/note.txt',
+             '/files/request-bucket/garbage-pickup/street.txt'],
+        )
+        self.assertEqual((self.root / 'request-bucket/garbage-pickup/note.txt').read_bytes(), b'full bin')
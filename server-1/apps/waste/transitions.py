@@ -0,0 +1,10 @@
+from django.db.models import Q
+from utils.transitions import register, set_fields
+from .models import WasteEvent
+
+# Waste events are archived once their date and time have passed
+WASTE_EVENT_ARCHIVE = register(
+    'waste_event_archive', WasteEvent, ('we_date', 'we_time'),
+    Q(we_is_archive=False),
+    set_fields(we_is_archive=True),
+)
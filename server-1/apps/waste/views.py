@@ -8,9 +8,11 @@ from rest_framework import status, filters
 from .models import WasteTruck
 from apps.profiling.models import Sitio
 from rest_framework import generics
-from .signals import archive_completed_hotspots, archive_passed_waste_events
+from .signals import archive_completed_hotspots
 from rest_framework.permissions import AllowAny
 from apps.act_log.utils import ActivityLogMixin
+from utils.storage import request_files
+from .transitions import WASTE_EVENT_ARCHIVE
 from django.db.models import OuterRef, Subquery
 from django.db.models import Q
 from datetime import date, timedelta, datetime
@@ -32,15 +34,18 @@ class WasteEventView(ActivityLogMixin, generics.ListCreateAPIView):
     permission_classes = [AllowAny]
     
     def get_queryset(self):
-        # Auto-archive waste events that have passed
-        archive_passed_waste_events()
-        
+        # Passed events are archived by the transition scheduler or the run_transitions
+        # command (see transitions.py); until then they are filtered as archived
         queryset = WasteEvent.objects.all()
         
         # Archive filter
         is_archive = self.request.query_params.get('is_archive', None)
         if is_archive is not None:
-            queryset = queryset.filter(we_is_archive=is_archive.lower() == 'true')
+            passed = WASTE_EVENT_ARCHIVE.due()
+            if is_archive.lower() == 'true':
+                queryset = queryset.filter(Q(we_is_archive=True) | passed)
+            else:
+                queryset = queryset.filter(we_is_archive=False).exclude(passed)
         
         return queryset
     
@@ -893,7 +898,7 @@ class WasteReportFileView(generics.ListCreateAPIView):
             )
 
         # Call your serializer's upload method
-        files = request.data.get('files', [])
+        files = request_files(request)
         self.get_serializer()._upload_files(files, rep_id=rep_id)
         
         return Response({"status": "Files uploaded successfully"}, status=status.HTTP_201_CREATED)   
@@ -929,7 +934,7 @@ class WasteReportResolveFileView(generics.ListCreateAPIView):
             )
 
         # Call your serializer's upload method
-        files = request.data.get('files', [])
+        files = request_files(request)
         self.get_serializer()._upload_files(files, rep_id=rep_id)
         
         return Response({"status": "Files uploaded successfully"}, status=status.HTTP_201_CREATED)    
@@ -12,14 +12,19 @@ import django
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
-from channels.security.websocket import AllowedHostsOriginValidator
-# from apps.notification.routing import websocket_urlpatterns
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 django.setup()
 django_asgi_app = get_asgi_application()
+
+# Imported once the apps are loaded
+from apps.notification.middleware import CorsOriginValidator, JWTAuthMiddleware
+from apps.notification.routing import websocket_urlpatterns
    
 application = ProtocolTypeRouter({
-  "http": django_asgi_app
+  "http": django_asgi_app,
+  "websocket": CorsOriginValidator(
+    AuthMiddlewareStack(JWTAuthMiddleware(URLRouter(websocket_urlpatterns)))
+  ),
 })
\ No newline at end of file
@@ -147,6 +147,48 @@ DATABASES = {
     }
 }
 
+# ========================
+# CACHE
+# ========================
+# One cache shared by every worker: Redis when REDIS_URL is set, otherwise a
+# file cache in the instance's temp dir (or the django_cache table with
+# CACHE_BACKEND=db, after createcachetable). The file cache is only shared by
+# the workers of one host: run more than one instance against Redis. locmem is
+# per process and only suits local development.
+REDIS_URL = config('REDIS_URL', default='')
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis' if REDIS_URL else 'file')
+CACHE_BACKENDS = {
+    'redis': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL},
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_DIR', default='/tmp/ciudad_server1_cache'),
+    },
+    'db': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache'},
+    'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'KEY_PREFIX': 'server1',
+        'TIMEOUT': 300,
+    }
+}
+CACHE_DEFAULT_TTL_SECONDS = config('CACHE_DEFAULT_TTL_SECONDS', default=300, cast=int)
+DASHBOARD_COUNTS_TTL_SECONDS = config('DASHBOARD_COUNTS_TTL_SECONDS', default=60, cast=int)
+
+# ========================
+# CHANNELS (websockets)
+# ========================
+# Websocket groups reach every worker through Redis when REDIS_URL is set; the
+# in-memory layer only reaches sockets of the same process (tests, one worker).
+CHANNEL_LAYER_BACKEND = config('CHANNEL_LAYER_BACKEND', default='redis' if REDIS_URL else 'memory')
+CHANNEL_LAYER_BACKENDS = {
+    'redis': {'BACKEND': 'channels_redis.core.RedisChannelLayer', 'CONFIG': {'hosts': [REDIS_URL]}},
+    'memory': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+}
+CHANNEL_LAYERS = {'default': CHANNEL_LAYER_BACKENDS[CHANNEL_LAYER_BACKEND]}
+NOTIFICATION_RESUME_LIMIT = config('NOTIFICATION_RESUME_LIMIT', default=50, cast=int) # Missed notifications sent on reconnect
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -302,14 +344,54 @@ LOGGING = {
 }
 
 
+# ========================
+# NOTIFICATIONS
+# ========================
+NOTIFICATION_RECIPIENT_BATCH_SIZE = config('NOTIFICATION_RECIPIENT_BATCH_SIZE', default=1000, cast=int)
+FCM_MULTICAST_BATCH_SIZE = config('FCM_MULTICAST_BATCH_SIZE', default=500, cast=int) # FCM max is 500
+FCM_SEND_WORKERS = config('FCM_SEND_WORKERS', default=4, cast=int)
+NOTIFICATION_INBOX_PAGE_SIZE = config('NOTIFICATION_INBOX_PAGE_SIZE', default=20, cast=int)
+REMINDER_POLL_SECONDS = config('REMINDER_POLL_SECONDS', default=30, cast=int)
+REMINDER_BATCH_SIZE = config('REMINDER_BATCH_SIZE', default=100, cast=int)
+REMINDER_MAX_ATTEMPTS = config('REMINDER_MAX_ATTEMPTS', default=3, cast=int)
+
+# ========================
+# PEER SERVER CLIENT
+# ========================
+PEER_TIMEOUT = config('PEER_TIMEOUT', default=10, cast=float)
+PEER_CONNECT_TIMEOUT = config('PEER_CONNECT_TIMEOUT', default=3, cast=float)
+PEER_MAX_RETRIES = config('PEER_MAX_RETRIES', default=2, cast=int)
+PEER_RETRY_BACKOFF = config('PEER_RETRY_BACKOFF', default=0.2, cast=float)
+PEER_MAX_CONNECTIONS = config('PEER_MAX_CONNECTIONS', default=20, cast=int)
+PEER_OUTBOX_BATCH_SIZE = config('PEER_OUTBOX_BATCH_SIZE', default=50, cast=int)
+PEER_OUTBOX_MAXSIZE = config('PEER_OUTBOX_MAXSIZE', default=10000, cast=int)
+
+# ========================
+# PROFILE REPLICATION
+# ========================
+REPLICATION_BATCH_SIZE = config('REPLICATION_BATCH_SIZE', default=200, cast=int)
+REPLICATION_MAX_ATTEMPTS = config('REPLICATION_MAX_ATTEMPTS', default=10, cast=int)
+REPLICATION_POLL_SECONDS = config('REPLICATION_POLL_SECONDS', default=15, cast=int)
+REPLICATION_RELAY_IN_PROCESS = config('REPLICATION_RELAY_IN_PROCESS', default=True, cast=bool) # Disable when running relay_replication as a worker
+
 # ========================
 # SCHEDULER
 # ========================
 SCHEDULER_AUTOSTART = config('SCHEDULER_AUTOSTART', default=True)
+TRANSITION_POLL_SECONDS = config('TRANSITION_POLL_SECONDS', default=300, cast=int) # Also runs at the next due moment (utils.transitions)
+TRANSITION_BATCH_SIZE = config('TRANSITION_BATCH_SIZE', default=500, cast=int)
 
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",  
-    }
-}
\ No newline at end of file
+# ========================
+# ACTIVITY LOG
+# ========================
+ACTIVITY_LOG_BATCH_SIZE = config('ACTIVITY_LOG_BATCH_SIZE', default=500, cast=int)
+ACTIVITY_LOG_FLUSH_SECONDS = config('ACTIVITY_LOG_FLUSH_SECONDS', default=2, cast=float) # 0 writes each log as soon as it is buffered (apps.act_log.writer)
+
+# ========================
+# PARTITIONS & RETENTION
+# ========================
+PARTITION_MONTHS_AHEAD = config('PARTITION_MONTHS_AHEAD', default=3, cast=int) # Kept ready by manage_partitions (utils.partitions)
+PARTITION_ARCHIVE_DIR = config('PARTITION_ARCHIVE_DIR', default=str(BASE_DIR / 'archive'))
+ACTIVITY_LOG_RETENTION_MONTHS = config('ACTIVITY_LOG_RETENTION_MONTHS', default=24, cast=int)
+NOTIFICATION_RETENTION_MONTHS = config('NOTIFICATION_RETENTION_MONTHS', default=12, cast=int)
+HISTORY_RETENTION_MONTHS = config('HISTORY_RETENTION_MONTHS', default=60, cast=int)
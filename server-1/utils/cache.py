@@ -0,0 +1,82 @@
+"""
+Cache-aside helpers on the shared cache (settings.CACHES, see CACHE_BACKEND).
+
+Values live under namespaced keys, '<namespace>:v<version>:<key>'. Each
+namespace has a version; invalidate() replaces it, which drops every key of
+the namespace at once without knowing or deleting them (old versions simply
+expire). Versions are time.time_ns() values written with a plain set, so a
+version key that was evicted, or two workers bumping at once, never bring
+back a version that already has entries, and no backend needs an atomic
+incr. invalidate_on_change() wires that to the post_save
+and post_delete signals of the models a namespace is built from; bulk
+.update() calls send no signals and show up once the TTL runs out.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = getattr(settings, 'CACHE_DEFAULT_TTL_SECONDS', 300)
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def make_key(namespace, *parts):
+    version = cache.get_or_set(_version_key(namespace), time.time_ns, None)
+    return ':'.join([namespace, f'v{version}', *(str(part) for part in parts)])
+
+
+def get_or_build(namespace, key, build, ttl=DEFAULT_TTL_SECONDS):
+    """The cached value of key in namespace; build() and store it on a miss"""
+    full_key = make_key(namespace, key)
+    value = cache.get(full_key)
+    if value is None:
+        value = build()
+        cache.set(full_key, value, ttl)
+    return value
+
+
+def invalidate(namespace):
+    """Drop every key of namespace now and again once the surrounding transaction commits"""
+    key = _version_key(namespace)
+
+    def bump():
+        cache.set(key, time.time_ns(), None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_on_change(namespace, *models):
+    """Invalidate namespace whenever a row of one of models is saved or deleted"""
+    def handler(sender, **kwargs):
+        invalidate(namespace)
+
+    for model in models:
+        for signal in (post_save, post_delete):
+            signal.connect(handler, sender=model, weak=False, dispatch_uid=f'cache_{namespace}_{model._meta.label}')
+
+
+class CachedListMixin:
+    """
+    For list views: caches the serialized list (or page) per view and query
+    string in cache_namespace. Pair it with invalidate_on_change() on the
+    models the list is serialized from.
+    """
+    cache_namespace = None
+    cache_ttl = DEFAULT_TTL_SECONDS
+
+    def list(self, request, *args, **kwargs):
+        def build():
+            return super(CachedListMixin, self).list(request, *args, **kwargs).data
+
+        key = f"{type(self).__name__}:{request.query_params.urlencode()}"
+        return Response(get_or_build(self.cache_namespace, key, build, self.cache_ttl))
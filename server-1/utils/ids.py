@@ -0,0 +1,55 @@
+"""
+Counters for the readable primary keys (TRNSMED2410180001, HH-2410-12, ...).
+
+Each key, usually the fixed part of an ID such as 'TRNSMED241018', has one
+id_counter row holding the last number handed out. allocate() moves it forward
+by n in a single UPDATE ... RETURNING, so concurrent requests never receive
+the same number and a bulk insert gets all of its IDs in one statement instead
+of a MAX() or COUNT() per row. The counter changes in the caller's
+transaction: if the insert rolls back, the numbers are handed out again.
+"""
+from django.db import connection
+
+from apps.administration.models import IdCounter
+
+
+def allocate(key, n=1, seed=None):
+    """
+    The next n numbers of the counter key, as a range. seed() returns the last
+    number already used by existing rows; it is only called the first time a
+    key is allocated from.
+    """
+    if n < 1:
+        raise ValueError("Number of IDs to allocate must be at least 1")
+    table = connection.ops.quote_name(IdCounter._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET ic_value = ic_value + %s WHERE ic_key = %s RETURNING ic_value",
+            [n, key],
+        )
+        row = cursor.fetchone()
+        if row is None:
+            start = seed() if seed else 0
+            # A concurrent first allocation may insert the key first; then add to its value
+            cursor.execute(
+                f"INSERT INTO {table} (ic_key, ic_value) VALUES (%s, %s) "
+                f"ON CONFLICT (ic_key) DO UPDATE SET ic_value = {table}.ic_value + %s RETURNING ic_value",
+                [key, start + n, n],
+            )
+            row = cursor.fetchone()
+    return range(row[0] - n + 1, row[0] + 1)
+
+
+def last_number(model, field, prefix):
+    """Highest number following prefix in model.field (0 when there is none)"""
+    values = model.objects.filter(**{f'{field}__startswith': prefix}).values_list(field, flat=True)
+    # Compared as numbers; MAX() on the text puts ...999 after ...1000
+    return max((int(value[len(prefix):]) for value in values if value[len(prefix):].isdigit()), default=0)
+
+
+def prefixed_ids(model, field, prefix, n=1, width=4):
+    """n new IDs of the form prefix + zero-padded number, continuing model's existing IDs"""
+    numbers = allocate(
+        f"{model._meta.db_table}:{prefix}", n, seed=lambda: last_number(model, field, prefix)
+    )
+    return [f"{prefix}{number:0{width}d}" for number in numbers]
@@ -0,0 +1,319 @@
+"""
+Monthly range partitions for append-only tables (activity logs,
+notifications, model history).
+
+PartitionByMonth is the migration operation turning an existing table into one
+partitioned by month on a timestamp column (PostgreSQL only). Partitions are
+named <table>_pYYYYMM (months in UTC); <table>_default takes rows outside
+them. The primary key becomes (pk, column), as PostgreSQL requires the
+partition key in it. Apps register their partitioned tables and retention in
+their partitions.py.
+
+The manage_partitions command creates the partitions of the coming months,
+and detaches the partitions past retention. It archives each one as
+gzip-compressed CSV under PARTITION_ARCHIVE_DIR before dropping it. Queries
+filtering the timestamp column by range (date_range) only read the matching
+partitions.
+"""
+from datetime import date, datetime, time, timedelta
+import gzip
+import logging
+import os
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.migrations.operations.base import Operation
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MONTHS_AHEAD = getattr(settings, 'PARTITION_MONTHS_AHEAD', 3)
+ARCHIVE_DIR = getattr(settings, 'PARTITION_ARCHIVE_DIR', 'archive')
+
+_PARTITION = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+# ===============================================================
+#  MONTHS
+# ===============================================================
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def partition_month(table, name):
+    """Month of a partition of table by its name; None for the default partition"""
+    match = _PARTITION.search(name)
+    if not name.startswith(f'{table}_p') or not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def expired_months(months, retention_months, today=None):
+    """Months entirely older than the retention window, oldest first"""
+    cutoff = add_months(month_start(today or timezone.now().date()), -retention_months)
+    return sorted(month for month in months if add_months(month, 1) <= cutoff)
+
+
+def date_range(params, field, start_param='date_from', end_param='date_to'):
+    """
+    Q for ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD (local days, both
+    inclusive) on a partitioned timestamp column, so only those months' partitions are read
+    """
+    condition = Q()
+    for param, lookup, day_offset in ((start_param, 'gte', 0), (end_param, 'lt', 1)):
+        value = params.get(param)
+        if not value:
+            continue
+        try:
+            day = date.fromisoformat(value) + timedelta(days=day_offset)
+        except ValueError:
+            continue
+        condition &= Q(**{f'{field}__{lookup}': timezone.make_aware(datetime.combine(day, time.min))})
+    return condition
+
+
+# ===============================================================
+#  REGISTRY
+# ===============================================================
+class PartitionedTable:
+    def __init__(self, table, column, retention_months, after_archive=None):
+        self.table = table
+        self.column = column
+        self.retention_months = retention_months
+        self.after_archive = after_archive
+
+
+_tables = {}
+
+
+def register(table, column, retention_months, after_archive=None):
+    """
+    Registers a table partitioned by PartitionByMonth; partitions older than
+    retention_months are archived, then after_archive() is called if given
+    (e.g. to rebuild data derived from the archived rows)
+    """
+    _tables[table] = PartitionedTable(table, column, retention_months, after_archive)
+    return _tables[table]
+
+
+def registered_tables():
+    return list(_tables.values())
+
+
+# ===============================================================
+#  PARTITION MAINTENANCE (PostgreSQL)
+# ===============================================================
+def _bound(month):
+    return f"'{month:%Y-%m-%d} 00:00:00+00'"
+
+
+def _create_partition_sql(qn, table, month):
+    return (
+        f"CREATE TABLE IF NOT EXISTS {qn(partition_name(table, month))} PARTITION OF {qn(table)} "
+        f"FOR VALUES FROM ({_bound(month)}) TO ({_bound(add_months(month, 1))})"
+    )
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+        [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def partitions(cursor, table):
+    """{month: partition name} of the attached monthly partitions of table"""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = %s",
+        [table],
+    )
+    found = {}
+    for (name,) in cursor.fetchall():
+        month = partition_month(table, name)
+        if month:
+            found[month] = name
+    return found
+
+
+def ensure_partitions(table, months_ahead=MONTHS_AHEAD, today=None):
+    """Creates the missing partitions from this month to months_ahead; returns their names"""
+    qn = connection.ops.quote_name
+    first = month_start(today or timezone.now().date())
+    created = []
+    with connection.cursor() as cursor:
+        existing = partitions(cursor, table)
+        for offset in range(months_ahead + 1):
+            month = add_months(first, offset)
+            if month in existing:
+                continue
+            try:
+                with transaction.atomic():
+                    cursor.execute(_create_partition_sql(qn, table, month))
+            except Exception as e:
+                # e.g. the default partition already holds rows of that month
+                logger.error(f"❌ Could not create {partition_name(table, month)}: {str(e)}")
+                continue
+            created.append(partition_name(table, month))
+    return created
+
+
+def _copy_out(cursor, sql, stream):
+    raw = cursor.cursor
+    if hasattr(raw, 'copy_expert'):
+        raw.copy_expert(sql, stream)
+    else:
+        # psycopg 3
+        with raw.copy(sql) as copy:
+            for data in copy:
+                stream.write(data)
+
+
+def archive_partition(table, name, archive_dir=ARCHIVE_DIR, detach_only=False):
+    """
+    Detaches partition name of table. Unless detach_only, writes it to
+    <archive_dir>/<table>/<name>.csv.gz and drops it. Returns the archive path.
+    """
+    qn = connection.ops.quote_name
+    path = None
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+        if detach_only:
+            return None
+        directory = os.path.join(archive_dir, table)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{name}.csv.gz')
+        partial = f'{path}.partial'
+        with gzip.open(partial, 'wb') as stream:
+            _copy_out(cursor, f"COPY {qn(name)} TO STDOUT WITH (FORMAT csv, HEADER)", stream)
+        os.replace(partial, path)
+        cursor.execute(f"DROP TABLE {qn(name)}")
+    return path
+
+
+def expired_partitions(table, retention_months, today=None):
+    with connection.cursor() as cursor:
+        found = partitions(cursor, table)
+    return [found[month] for month in expired_months(found, retention_months, today)]
+
+
+# ===============================================================
+#  MIGRATIONS
+# ===============================================================
+class PartitionByMonth(Operation):
+    """
+    Rebuilds table as a table partitioned by month on column, on PostgreSQL
+    only. Rows are copied into monthly partitions from the oldest row to
+    months_ahead. The default, indexes, triggers, check and foreign key
+    constraints and the pk sequence are carried over. Foreign keys pointing to
+    table must be dropped first (db_constraint=False). Not reversible.
+    """
+    reversible = False
+
+    def __init__(self, table, column, pk, months_ahead=MONTHS_AHEAD):
+        self.table = table
+        self.column = column
+        self.pk = pk
+        self.months_ahead = months_ahead
+
+    def deconstruct(self):
+        return (self.__class__.__name__, [], {'table': self.table, 'column': self.column, 'pk': self.pk})
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def describe(self):
+        return f'Partition {self.table} by month of {self.column}'
+
+    @property
+    def migration_name_fragment(self):
+        return f'partition_{self.table}'
+
+    def _retarget(self, definition, source):
+        # 'CREATE INDEX x ON public.<source> USING ...' -> '... ON public.<table> ...'
+        return re.sub(
+            rf'\bON (ONLY )?((?:\w+|"[^"]+")\.)?"?{re.escape(source)}"? ',
+            lambda m: f'ON {m.group(2) or ""}{self.table} ',
+            definition,
+            count=1,
+        )
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        qn = schema_editor.quote_name
+        table, column, pk = self.table, self.column, self.pk
+        legacy = f'{table}_unpartitioned'
+        execute = schema_editor.execute
+
+        with schema_editor.connection.cursor() as cursor:
+            if is_partitioned(cursor, table):
+                return
+            execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+
+            cursor.execute(
+                "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass",
+                [legacy],
+            )
+            constraints = cursor.fetchall()
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s",
+                [legacy],
+            )
+            constraint_names = {name for name, _, _ in constraints}
+            indexes = [definition for name, definition in cursor.fetchall() if name not in constraint_names]
+            cursor.execute(
+                "SELECT pg_get_triggerdef(oid) FROM pg_trigger WHERE tgrelid = %s::regclass AND NOT tgisinternal",
+                [legacy],
+            )
+            triggers = [definition for (definition,) in cursor.fetchall()]
+            cursor.execute(f"SELECT min({qn(column)}), coalesce(max({qn(pk)}), 0) FROM {qn(legacy)}")
+            oldest, last_pk = cursor.fetchone()
+
+        # The primary key name is reused by the new table
+        for name, kind, _ in constraints:
+            if kind == 'p':
+                execute(f"ALTER TABLE {qn(legacy)} RENAME CONSTRAINT {qn(name)} TO {qn(f'{legacy}_pkey')}")
+
+        execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+            f"PARTITION BY RANGE ({qn(column)})"
+        )
+        execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY ({qn(pk)}, {qn(column)})")
+
+        # Own sequence for the key, whether the old one was serial or identity
+        sequence = f'{table}_{pk}_part_seq'
+        execute(f"CREATE SEQUENCE {qn(sequence)}")
+        execute(f"SELECT setval('{sequence}', {int(last_pk) + 1}, false)")
+        execute(f"ALTER TABLE {qn(table)} ALTER COLUMN {qn(pk)} SET DEFAULT nextval('{sequence}')")
+        execute(f"ALTER SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.{qn(pk)}")
+
+        first = month_start(oldest if oldest else timezone.now())
+        last = add_months(month_start(timezone.now()), self.months_ahead)
+        month = first
+        while month <= last:
+            execute(_create_partition_sql(qn, table, month))
+            month = add_months(month, 1)
+        execute(f"CREATE TABLE {qn(f'{table}_default')} PARTITION OF {qn(table)} DEFAULT")
+
+        execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)}")
+        execute(f"DROP TABLE {qn(legacy)}")
+
+        for name, kind, definition in constraints:
+            if kind == 'f':
+                execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}")
+        for definition in indexes + triggers:
+            execute(self._retarget(definition, legacy))
@@ -0,0 +1,222 @@
+"""
+Indexed search for large, growing tables (activity logs, complaints,
+incident reports).
+
+On PostgreSQL each searchable table has a search_vector tsvector column,
+filled by a trigger from the table's own columns (weighted A-D) and GIN
+indexed, plus trigram (pg_trgm) GIN indexes on the short columns searched by
+substring, such as IDs and dates. SearchIndex is the migration operation
+creating those. search() parses the user query once (parse_query) and keeps
+the rows where every term matches somewhere: as a prefix in the vector, as a
+substring of a trigram column or in the names of related rows (staff,
+residents) in their own small tables. Rows are ordered by rank against any
+of the terms. Other databases fall back to icontains on the same columns.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.migrations.operations.base import Operation
+from django.db.models import F, Q
+
+SEARCH_CONFIG = 'simple'  # Names and codes: no stemming or stop words
+MAX_TERMS = 8
+TRIGRAM_MIN_LENGTH = 3  # Shorter substrings cannot use a trigram index
+
+_WORD = re.compile(r'\w+')
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def parse_query(text):
+    """Terms of a search query, as lists of lowercase words: a "quoted phrase" is one term"""
+    terms = []
+    for phrase, word in _TERM.findall(text or ''):
+        words = _WORD.findall((phrase or word).lower())
+        if not words:
+            continue
+        if phrase:
+            terms.append(words)
+        else:
+            # 'IR-0012' is searched as ir & 0012, like the parser splits it in the vector
+            terms.extend([w] for w in words)
+    return terms[:MAX_TERMS]
+
+
+def to_tsquery(terms, operator='&'):
+    """Raw tsquery matching every term (any with operator='|'), the last word of each as a prefix"""
+    return f' {operator} '.join(
+        '(' + ' <-> '.join(words[:-1] + [f'{words[-1]}:*']) + ')' for words in terms
+    )
+
+
+class SearchSpec:
+    """
+      fields   columns in the table's search vector (see SearchIndex)
+      trigram  columns with a trigram index, matched by substring
+      related  {relation: [lookups]}: names matched in the related table
+    """
+
+    def __init__(self, fields, trigram=(), related=None):
+        self.fields = list(fields)
+        self.trigram = list(trigram)
+        self.related = related or {}
+
+    def _term_match(self, lookups, words):
+        phrase = ' '.join(words)
+        match = Q()
+        for lookup in lookups:
+            match |= Q(**{f'{lookup}__icontains': phrase})
+        return match
+
+    def related_condition(self, model, terms):
+        condition = Q()
+        for relation, lookups in self.related.items():
+            field = model._meta.get_field(relation)
+            match = Q()
+            for words in terms:
+                match &= self._term_match(lookups, words)
+            rows = field.related_model.objects.filter(match).values('pk')
+            if field.many_to_many or field.one_to_many:
+                # Matched through the join table, without duplicating rows
+                condition |= Q(pk__in=model.objects.filter(**{f'{relation}__in': rows}).values('pk'))
+            else:
+                condition |= Q(**{f'{relation}__in': rows})
+        return condition
+
+    def trigram_condition(self, substring):
+        condition = Q()
+        if len(substring) >= TRIGRAM_MIN_LENGTH:
+            for field in self.trigram:
+                condition |= Q(**{f'{field}__icontains': substring})
+        return condition
+
+    def fallback_condition(self, terms):
+        lookups = self.fields + self.trigram + [
+            f'{relation}__{lookup}' for relation, names in self.related.items() for lookup in names
+        ]
+        condition = Q()
+        for words in terms:
+            condition &= self._term_match(lookups, words)
+        return condition
+
+
+def search(queryset, text, spec, ordering=()):
+    """queryset rows matching text, best matches first, then by ordering"""
+    terms = parse_query(text)
+    if not terms:
+        return queryset.order_by(*ordering) if ordering else queryset
+
+    if connections[queryset.db].vendor != 'postgresql':
+        queryset = queryset.filter(spec.fallback_condition(terms))
+        return queryset.distinct().order_by(*ordering) if spec.related else queryset.order_by(*ordering)
+
+    # Each term may match the row's vector, a related name or a trigram column
+    # on its own: 'cruz archived' finds rows archived by staff named Cruz
+    condition = Q()
+    for words in terms:
+        query = SearchQuery(to_tsquery([words]), search_type='raw', config=SEARCH_CONFIG)
+        condition &= (
+            Q(search_vector=query)
+            | spec.related_condition(queryset.model, [words])
+            | spec.trigram_condition(' '.join(words))
+        )
+    # The whole query as one substring, e.g. an ID like 'IR-0012'
+    condition |= spec.trigram_condition(text.strip())
+
+    any_term = SearchQuery(to_tsquery(terms, '|'), search_type='raw', config=SEARCH_CONFIG)
+    return queryset.filter(condition).annotate(
+        search_rank=SearchRank(F('search_vector'), any_term)
+    ).order_by('-search_rank', *ordering)
+
+
+# ===============================================================
+#  MIGRATIONS
+# ===============================================================
+class SearchIndex(Operation):
+    """
+    Creates, on PostgreSQL only, the search vector trigger of table (weights:
+    {'A': [columns], ...}), fills search_vector for existing rows and adds its
+    GIN index, plus trigram indexes on the trigram columns. The indexes are on
+    UPPER(column::text), the expression icontains filters on. The
+    search_vector column itself is added by a regular AddField.
+    """
+    reversible = True
+
+    def __init__(self, table, weights=None, trigram=()):
+        self.table = table
+        self.weights = weights or {}
+        self.trigram = list(trigram)
+
+    def deconstruct(self):
+        kwargs = {'table': self.table}
+        if self.weights:
+            kwargs['weights'] = self.weights
+        if self.trigram:
+            kwargs['trigram'] = self.trigram
+        return (self.__class__.__name__, [], kwargs)
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def describe(self):
+        return f'Search index on {self.table}'
+
+    @property
+    def migration_name_fragment(self):
+        return f'search_index_{self.table}'
+
+    def _vector_sql(self, qn, row):
+        parts = []
+        for weight, columns in sorted(self.weights.items()):
+            text = " || ' ' || ".join(f"coalesce({row}{qn(column)}::text, '')" for column in columns)
+            parts.append(f"setweight(to_tsvector('{SEARCH_CONFIG}', {text}), '{weight}')")
+        return ' || '.join(parts)
+
+    def _names(self):
+        return {
+            'function': f'{self.table}_search_vector',
+            'vector_index': f'{self.table}_search_vector_gin',
+            'trigram_indexes': [f'{self.table}_{column}_trgm' for column in self.trigram],
+        }
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        qn = schema_editor.quote_name
+        names = self._names()
+        table = qn(self.table)
+        if self.weights:
+            columns = sorted({column for group in self.weights.values() for column in group})
+            schema_editor.execute(
+                f"CREATE OR REPLACE FUNCTION {qn(names['function'])}() RETURNS trigger AS $$ "
+                f"BEGIN NEW.search_vector := {self._vector_sql(qn, 'NEW.')}; RETURN NEW; END "
+                f"$$ LANGUAGE plpgsql"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER {qn(names['function'])} "
+                f"BEFORE INSERT OR UPDATE OF {', '.join(qn(column) for column in columns)} ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION {qn(names['function'])}()"
+            )
+            schema_editor.execute(f"UPDATE {table} SET search_vector = {self._vector_sql(qn, '')}")
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {qn(names['vector_index'])} ON {table} USING gin (search_vector)"
+            )
+        if self.trigram:
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column, index in zip(self.trigram, names['trigram_indexes']):
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {qn(index)} ON {table} "
+                f"USING gin ((UPPER({qn(column)}::text)) gin_trgm_ops)"
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        qn = schema_editor.quote_name
+        names = self._names()
+        for index in names['trigram_indexes']:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {qn(index)}")
+        if self.weights:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {qn(names['vector_index'])}")
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {qn(names['function'])} ON {qn(self.table)}")
+            schema_editor.execute(f"DROP FUNCTION IF EXISTS {qn(names['function'])}()")
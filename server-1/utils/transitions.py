@@ -0,0 +1,212 @@
+"""
+Time-based state transitions (an event becomes archived, an announcement
+becomes active or expires).
+
+Each model registers the column holding the moment its rows change state, the
+filter selecting rows still in the old state and the action to apply. The
+scheduler finds due rows with one range query on that column per transition
+and applies them in batches: at the earliest pending moment, which saves of
+registered models move forward, and every TRANSITION_POLL_SECONDS for rows
+written by other workers. The scheduler only runs in the worker holding its
+lock (SCHEDULER_AUTOSTART), so the run_transitions command applies the same
+transitions from cron. List endpoints stay pure reads; one whose rows must
+never show a stale state filters with the transition's due() condition.
+"""
+from datetime import datetime
+import logging
+import threading
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = getattr(settings, 'TRANSITION_POLL_SECONDS', 300)
+BATCH_SIZE = getattr(settings, 'TRANSITION_BATCH_SIZE', 500)
+JOB_ID = 'state_transitions'
+
+
+def set_fields(**values):
+    """Action updating the due rows"""
+    return lambda queryset: queryset.update(**values)
+
+
+def delete_rows(queryset):
+    """Action deleting the due rows"""
+    return queryset.delete()[1].get(queryset.model._meta.label, 0)
+
+
+class Transition:
+    """
+      at       DateTimeField name, or a (DateField, TimeField) pair read as local time
+      pending  Q (or callable(now) -> Q) selecting rows still waiting for the transition
+      action   callable(queryset) -> number of rows changed
+      on_applied  callable(count), called after a run that changed rows
+    """
+
+    def __init__(self, name, model, at, pending, action, on_applied=None):
+        self.name = name
+        self.model = model
+        self.at = at
+        self.pending = pending
+        self.action = action
+        self.on_applied = on_applied
+
+    @property
+    def at_fields(self):
+        return list(self.at) if isinstance(self.at, (list, tuple)) else [self.at]
+
+    def _pending(self, now):
+        return self.pending(now) if callable(self.pending) else self.pending
+
+    def due(self, now=None):
+        """Q of the rows whose transition moment has passed by now, applied or not"""
+        now = now or timezone.now()
+        if len(self.at_fields) == 1:
+            return Q(**{f'{self.at}__lte': now})
+        date_field, time_field = self.at_fields
+        local = timezone.localtime(now)
+        return Q(**{f'{date_field}__lt': local.date()}) | Q(
+            **{date_field: local.date(), f'{time_field}__lte': local.time()}
+        )
+
+    def to_datetime(self, *values):
+        """The transition moment from the at column values of a row"""
+        if any(value is None for value in values):
+            return None
+        if len(values) == 1:
+            return values[0]
+        return timezone.make_aware(datetime.combine(*values))
+
+    def instance_at(self, instance):
+        return self.to_datetime(*(getattr(instance, field) for field in self.at_fields))
+
+    def next_at(self, now=None):
+        """Earliest transition moment of the pending rows"""
+        now = now or timezone.now()
+        row = self.model.objects.filter(
+            self._pending(now), **{f'{field}__isnull': False for field in self.at_fields}
+        ).order_by(*self.at_fields).values_list(*self.at_fields).first()
+        return self.to_datetime(*row) if row else None
+
+    def apply(self, now=None):
+        """Applies every due transition in batches; returns the number of rows changed"""
+        now = now or timezone.now()
+        condition = self._pending(now) & self.due(now)
+        total = 0
+        while True:
+            pks = list(
+                self.model.objects.filter(condition).order_by(*self.at_fields).values_list('pk', flat=True)[:BATCH_SIZE]
+            )
+            if not pks:
+                break
+            with transaction.atomic():
+                # Rows changed by someone else since the select no longer match
+                changed = self.action(self.model.objects.filter(condition, pk__in=pks))
+            total += changed
+            if len(pks) < BATCH_SIZE or not changed:
+                break
+        if total and self.on_applied:
+            self.on_applied(total)
+        return total
+
+
+_transitions = {}
+
+
+def register(name, model, at, pending, action, on_applied=None):
+    """Registers a transition; saves of model wake the scheduler for the row's moment"""
+    item = Transition(name, model, at, pending, action, on_applied)
+    _transitions[name] = item
+
+    def wake_on_save(sender, instance, **kwargs):
+        moment = item.instance_at(instance)
+        if moment:
+            transaction.on_commit(lambda: transition_scheduler.wake(moment))
+
+    post_save.connect(wake_on_save, sender=model, weak=False, dispatch_uid=f'transition_{name}')
+    return item
+
+
+def run_due_transitions(now=None, names=None):
+    """
+    Applies every registered transition (or those in names), in registration
+    order; returns {name: rows changed}.
+    """
+    now = now or timezone.now()
+    applied = {}
+    for name, item in list(_transitions.items()):
+        if names is not None and name not in names:
+            continue
+        try:
+            # A failing transition must not abort the others
+            with transaction.atomic():
+                applied[name] = item.apply(now)
+        except Exception as e:
+            logger.error(f"❌ Transition {name} failed: {str(e)}")
+    return applied
+
+
+def next_due_at(now=None):
+    """Earliest pending transition moment of every registered transition"""
+    moments = []
+    for name, item in list(_transitions.items()):
+        try:
+            with transaction.atomic():
+                moment = item.next_at(now)
+        except Exception as e:
+            logger.error(f"❌ Transition {name} failed: {str(e)}")
+            continue
+        if moment:
+            moments.append(moment)
+    return min(moments) if moments else None
+
+
+# ===============================================================
+#  SCHEDULER
+# ===============================================================
+class TransitionScheduler:
+    def __init__(self):
+        self._scheduler = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._scheduler:
+                return
+            scheduler = BackgroundScheduler()
+            scheduler.add_job(
+                self.run,
+                'interval',
+                seconds=POLL_SECONDS,
+                next_run_time=timezone.now(),
+                misfire_grace_time=900,
+                coalesce=True,
+                max_instances=1,
+                id=JOB_ID,
+            )
+            scheduler.start()
+            self._scheduler = scheduler
+            logger.info(f"✅ Transition scheduler started for {', '.join(_transitions)}")
+
+    def run(self):
+        applied = run_due_transitions()
+        if any(applied.values()):
+            logger.info(f"⚡ Applied transitions: {applied}")
+        self.wake(next_due_at())
+
+    def wake(self, moment):
+        """Runs the transitions at moment when that is before the next planned run"""
+        if not self._scheduler or moment is None:
+            return
+        job = self._scheduler.get_job(JOB_ID)
+        if job is None or (job.next_run_time and job.next_run_time <= moment):
+            return
+        job.modify(next_run_time=max(moment, timezone.now()))
+
+
+transition_scheduler = TransitionScheduler()
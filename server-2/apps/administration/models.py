@@ -42,4 +42,12 @@ class Staff(AbstractModels):
     manager = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='subordinates')
     
     class Meta: 
-        db_table = 'staff'
\ No newline at end of file
+        db_table = 'staff'
+
+class IdCounter(models.Model):
+    """Last number handed out for each ID key (see utils.ids)"""
+    ic_key = models.CharField(primary_key=True, max_length=100)
+    ic_value = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'id_counter'
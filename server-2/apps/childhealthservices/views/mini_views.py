@@ -32,7 +32,11 @@ from apps.medicalConsultation.utils import apply_patient_type_filter
 
     
 class ChildHealthHistoryView(generics.ListCreateAPIView):
-    queryset = ChildHealth_History.objects.all()
+    queryset = ChildHealth_History.objects.select_related(
+        'chrec__patrec__pat_id__rp_id__per',
+        'chrec__patrec__pat_id__trans_id',
+        'chrec__patrec__pat_id__summary',
+    )
     serializer_class = ChildHealthHistorySerializer
     
 class CheckUPChildHealthHistoryView(generics.ListAPIView):
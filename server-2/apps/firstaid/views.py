@@ -16,6 +16,7 @@ from datetime import timedelta
 from apps.pagination import StandardResultsPagination
 from apps.healthProfiling.models import *
 from apps.medicalConsultation.utils import *
+from apps.inventory.ledger import deduct
 
 
 class PatientFirstaidRecordsView(generics.ListAPIView):
@@ -161,7 +162,6 @@ class CreateFirstAidRequestView(APIView):
             
             # 4. Process each first aid item
             firstaid_records = []
-            inventory_updates = {}  # Store original quantities for rollback
             firstaid_transactions = []  # Store transactions
             
             for item_data in firstaid_items:
@@ -181,12 +181,6 @@ class CreateFirstAidRequestView(APIView):
                     if unit == "boxes":
                         unit = "pc/s"
                     
-                    # Store original quantity for rollback
-                    inventory_updates[finv_id] = {
-                        'firstaid_inv': firstaid_inv,
-                        'original_qty': firstaid_inv.finv_qty_avail
-                    }
-                    
                     # Handle zero quantity case
                     if qty == 0:
                         # Create record without updating inventory
@@ -202,13 +196,13 @@ class CreateFirstAidRequestView(APIView):
                         firstaid_records.append(firstaid_record)
                         continue
                     
-                    # Check stock for non-zero quantities
-                    if firstaid_inv.finv_qty_avail < qty:
-                        raise Exception(f"Insufficient stock for First Aid ID {finv_id}. Available: {firstaid_inv.finv_qty_avail}, Requested: {qty}")
-                    
-                    # Update inventory
-                    firstaid_inv.finv_qty_avail -= qty
-                    firstaid_inv.save()
+                    # Update inventory and create first aid transaction
+                    firstaid_inv = deduct(
+                        'first_aid', finv_id, qty,
+                        qty_label=f"{qty} {unit}",
+                        staff=staff_instance,
+                    )
+                    firstaid_transactions.append(finv_id)
                     
                     # Update inventory timestamp if available - FIXED HERE
                     # Use inv_id directly instead of inv_detail
@@ -221,15 +215,6 @@ class CreateFirstAidRequestView(APIView):
                     except Exception as e:
                         print(f"Could not update inventory timestamp: {str(e)}")
                     
-                    # Create first aid transaction
-                    firstaid_transaction = FirstAidTransactions.objects.create(
-                        fat_qty=f"{qty} {unit}",
-                        fat_action="Deducted",
-                        staff=staff_instance,
-                        finv_id=firstaid_inv
-                    )
-                    firstaid_transactions.append(firstaid_transaction)
-                    
                     # Create first aid record
                     firstaid_record = FirstAidRecord.objects.create(
                         patrec=patient_record,
@@ -255,16 +240,8 @@ class CreateFirstAidRequestView(APIView):
         except Exception as e:
             print(f"Unexpected error: {str(e)}")
             
-            # Manual inventory rollback
-            try:
-                for finv_id, update_info in inventory_updates.items():
-                    firstaid_inv = update_info['firstaid_inv']
-                    original_qty = update_info['original_qty']
-                    firstaid_inv.finv_qty_avail = original_qty
-                    firstaid_inv.save()
-                    print(f"Rolled back inventory for first aid {finv_id} to {original_qty}")
-            except Exception as rollback_error:
-                print(f"Error during inventory rollback: {str(rollback_error)}")
+            # Roll back the deductions already made for this request
+            transaction.set_rollback(True)
             
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
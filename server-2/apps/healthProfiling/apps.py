@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class HealthprofilingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.healthProfiling'
-    
+
+    def ready(self):
+        # Drop the cached sitio list when a sitio changes
+        from . import signals
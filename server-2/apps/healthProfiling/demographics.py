@@ -0,0 +1,220 @@
+"""
+Vectorized age/sex bucketing for population and FHIS reports.
+
+Residents are fetched once as compact (dob, sex, group) arrays and binned in a
+single NumPy pass, instead of looping over the queryset once per age group.
+Reports define their own buckets and reuse the same engine.
+"""
+from collections import namedtuple
+from datetime import date
+
+import numpy as np
+
+# Bucket bounds are whole months of age, inclusive. None means unbounded.
+AgeBucket = namedtuple('AgeBucket', ['label', 'min_months', 'max_months'])
+
+MALE, FEMALE, OTHER = 0, 1, 2
+SEX_CODES = {'M': MALE, 'MALE': MALE, 'F': FEMALE, 'FEMALE': FEMALE}
+
+_NO_MIN = np.iinfo(np.int64).min
+_NO_MAX = np.iinfo(np.int64).max
+
+
+def months_bucket(label, min_months, max_months):
+    return AgeBucket(label, min_months, max_months)
+
+
+def years_bucket(label, min_years, max_years=None):
+    """Bucket covering min_years up to the last month of max_years"""
+    return AgeBucket(
+        label,
+        None if min_years is None else min_years * 12,
+        None if max_years is None else max_years * 12 + 11,
+    )
+
+
+# Age groups of the population structure (pyramid) report
+POPULATION_STRUCTURE_AGE_GROUPS = [
+    months_bucket("0-5 mos.", 0, 5),
+    months_bucket("6-11 mos.", 6, 11),
+    months_bucket("12-23 mos.", 12, 23),
+    months_bucket("24-35 mos.", 24, 35),
+    months_bucket("36-47 mos.", 36, 47),
+    months_bucket("48-59 mos.", 48, 59),
+    months_bucket("60-71 mos.", 60, 71),
+    years_bucket("6 yrs.", 6, 6),
+    years_bucket("7-9 yrs.", 7, 9),
+    years_bucket("10-14 yrs.", 10, 14),
+    years_bucket("15-19 yrs.", 15, 19),
+    years_bucket("20-24 yrs.", 20, 24),
+    years_bucket("25-29 yrs.", 25, 29),
+    years_bucket("30-34 yrs.", 30, 34),
+    years_bucket("35-39 yrs.", 35, 39),
+    years_bucket("40-44 yrs.", 40, 44),
+    years_bucket("45-49 yrs.", 45, 49),
+    years_bucket("50-54 yrs.", 50, 54),
+    years_bucket("55-59 yrs.", 55, 59),
+    months_bucket("60 yrs. & above", 720, 1800),
+]
+
+# Coarse age distribution used by the population-by-sitio report
+SITIO_AGE_DISTRIBUTION_GROUPS = [
+    years_bucket('0-5', None, 5),
+    years_bucket('6-12', 6, 12),
+    years_bucket('13-19', 13, 19),
+    years_bucket('20-39', 20, 39),
+    years_bucket('40-59', 40, 59),
+    years_bucket('60+', 60, None),
+]
+
+
+def age_in_months(dobs, reference_date=None):
+    """
+    Whole months of age for an array of dates of birth, matching
+    relativedelta(reference_date, dob) (years * 12 + months), including
+    end-of-month clipping.
+    """
+    dobs = np.asarray(dobs, dtype='datetime64[D]')
+    ref = np.datetime64(reference_date or date.today(), 'D')
+
+    dob_month = dobs.astype('datetime64[M]')
+    ref_month = ref.astype('datetime64[M]')
+    months = (ref_month - dob_month).astype(np.int64)
+
+    dob_day = (dobs - dob_month).astype(np.int64)
+    ref_day = (ref - ref_month).astype(np.int64)
+    days_in_ref_month = ((ref_month + 1).astype('datetime64[D]') - ref_month.astype('datetime64[D]')).astype(np.int64)
+
+    # dob + months lands on min(dob_day, last day of ref month); not reached yet -> one month less
+    return months - (ref_day < np.minimum(dob_day, days_in_ref_month - 1))
+
+
+def sex_codes(sexes):
+    """Map raw per_sex values to MALE/FEMALE/OTHER codes"""
+    values, inverse = np.unique(np.asarray(sexes, dtype=str), return_inverse=True)
+    lookup = np.array(
+        [SEX_CODES.get(value.strip().upper(), OTHER) for value in values],
+        dtype=np.int64,
+    )
+    return lookup[inverse] if len(values) else np.zeros(0, dtype=np.int64)
+
+
+class BucketCounts:
+    """Counts indexed by [group, bucket, sex]"""
+
+    def __init__(self, labels, groups, matrix):
+        self.labels = labels
+        self.groups = groups
+        self.matrix = matrix
+        self._group_index = {group: i for i, group in enumerate(groups)}
+
+    def for_group(self, group=None):
+        """(bucket, sex) counts for one group, or for all groups when group is None"""
+        if group is None:
+            return self.matrix.sum(axis=0)
+        index = self._group_index.get(group)
+        if index is None:
+            return np.zeros(self.matrix.shape[1:], dtype=np.int64)
+        return self.matrix[index]
+
+    def to_rows(self, group=None, label_key='ageGroup'):
+        """Report rows of {label, male, female, total}; total excludes unknown sex"""
+        counts = self.for_group(group)
+        rows = []
+        for label, row in zip(self.labels, counts):
+            male, female = int(row[MALE]), int(row[FEMALE])
+            rows.append({
+                label_key: label,
+                "male": male,
+                "female": female,
+                "total": male + female,
+            })
+        return rows
+
+    def to_dict(self, group=None):
+        """{label: count} across all sexes"""
+        counts = self.for_group(group)
+        return {label: int(row.sum()) for label, row in zip(self.labels, counts)}
+
+
+class DemographicBucketer:
+    """
+    Bins residents into non-overlapping age buckets by sex (and optionally by
+    an extra group such as sitio) in one vectorized pass.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self.labels = [bucket.label for bucket in self.buckets]
+
+        lows = np.array([_NO_MIN if b.min_months is None else b.min_months for b in self.buckets], dtype=np.int64)
+        highs = np.array([_NO_MAX if b.max_months is None else b.max_months for b in self.buckets], dtype=np.int64)
+        order = np.argsort(lows, kind='stable')
+        if np.any(highs[order][:-1] >= lows[order][1:]) or np.any(highs < lows):
+            raise ValueError("Age buckets must not overlap and must have min_months <= max_months")
+
+        self._order = order
+        self._lows = lows[order]
+        self._highs = highs[order]
+
+    def bin(self, dobs, sexes, groups=None, reference_date=None):
+        """Bin parallel arrays of dates of birth, sexes and optional group keys"""
+        months = age_in_months(dobs, reference_date)
+        sex = sex_codes(sexes)
+
+        if groups is None:
+            group_keys, group_codes = [None], np.zeros(len(months), dtype=np.int64)
+        else:
+            group_keys, group_codes = self._encode_groups(groups)
+
+        sorted_idx = np.searchsorted(self._lows, months, side='right') - 1
+        valid = sorted_idx >= 0
+        clipped = np.where(valid, sorted_idx, 0)
+        valid &= months <= self._highs[clipped]
+        bucket_idx = self._order[clipped]
+
+        n_groups, n_buckets = len(group_keys), len(self.buckets)
+        flat = (group_codes * n_buckets + bucket_idx) * 3 + sex
+        matrix = np.bincount(
+            flat[valid], minlength=n_groups * n_buckets * 3
+        ).reshape(n_groups, n_buckets, 3)
+
+        return BucketCounts(self.labels, group_keys, matrix)
+
+    def bin_queryset(self, queryset, dob_field='per__per_dob', sex_field='per__per_sex',
+                     group_field=None, reference_date=None):
+        """Fetch only (dob, sex[, group]) columns from the queryset and bin them"""
+        fields = [dob_field, sex_field] + ([group_field] if group_field else [])
+        rows = list(
+            queryset.filter(**{f'{dob_field}__isnull': False})
+            .order_by()
+            .values_list(*fields)
+        )
+        if not rows:
+            return BucketCounts(
+                self.labels,
+                [None] if group_field is None else [],
+                np.zeros((1 if group_field is None else 0, len(self.buckets), 3), dtype=np.int64),
+            )
+
+        columns = list(zip(*rows))
+        return self.bin(
+            np.array(columns[0], dtype='datetime64[D]'),
+            columns[1],
+            groups=columns[2] if group_field else None,
+            reference_date=reference_date,
+        )
+
+    @staticmethod
+    def _encode_groups(groups):
+        keys = {}
+        codes = np.fromiter(
+            (keys.setdefault(group, len(keys)) for group in groups),
+            dtype=np.int64,
+            count=len(groups),
+        )
+        return list(keys), codes
+
+
+population_structure_bucketer = DemographicBucketer(POPULATION_STRUCTURE_AGE_GROUPS)
+sitio_age_distribution_bucketer = DemographicBucketer(SITIO_AGE_DISTRIBUTION_GROUPS)
@@ -1,66 +1,65 @@
-from decouple import config
-import requests
+from utils.peer_client import peer_client
 
 # Class that holds double query functions
 class PostQueries:
     def __init__(self):
-        self.client = config("CLIENT", default="http://127.0.0.1:8001")
+        self.client = peer_client
     
     def personal(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/personal/create/",
+        response = self.client.post(
+            "/health-profiling/personal/create/",
             json=data
         )
         return response
     
     def address(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/address/create/",
+        response = self.client.post(
+            "/health-profiling/address/create/",
             json=data
         )
         return response
     
     def complete_profile(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/complete/registration/",
+        response = self.client.post(
+            "/health-profiling/complete/registration/",
             json=data
         )
         return response
 
     def family(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/family/create/",
+        response = self.client.post(
+            "/health-profiling/family/create/",
             json=data
         )
         return response
 
     def family_composition(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/family/composition/bulk/create/",
+        response = self.client.post(
+            "/health-profiling/family/composition/bulk/create/",
             json=data
         )
         return response
     
     def household(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/household/create/",
+        response = self.client.post(
+            "/health-profiling/household/create/",
             json=data
         )
         return response
     
     def sitio(self, data):
-        response = requests.post(
-            f"{self.client}/health-profiling/sitio/create/",
+        response = self.client.post(
+            "/health-profiling/sitio/create/",
             json=data
         )
         return response
     
 class DeleteQueries:
     def __init__(self):
-        self.client = config("CLIENT", default="http://127.0.0.1:8001")
+        self.client = peer_client
 
     def sitio(self, sitio_id):
-        response = requests.delete(
-            f"{self.client}/health-profiling/sitio/{sitio_id}/delete/"
+        response = self.client.delete(
+            f"/health-profiling/sitio/{sitio_id}/delete/"
         )
         return response
\ No newline at end of file
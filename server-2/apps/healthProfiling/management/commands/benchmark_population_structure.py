@@ -0,0 +1,90 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from dateutil.relativedelta import relativedelta
+
+from apps.healthProfiling.demographics import (
+    POPULATION_STRUCTURE_AGE_GROUPS, population_structure_bucketer
+)
+from apps.healthProfiling.models import Personal, ResidentProfile
+
+
+class Command(BaseCommand):
+    help = 'Seeds synthetic residents (rolled back afterwards) and times the population structure age/sex binning'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--residents', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--legacy', action='store_true',
+            help='Also time the previous per-age-group relativedelta loop (slow)'
+        )
+
+    def handle(self, *args, **options):
+        total = options['residents']
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {total} synthetic residents...")
+            started = time.perf_counter()
+            self._seed(total, options['batch_size'], rng)
+            self.stdout.write(f"Seeded in {time.perf_counter() - started:.2f}s")
+
+            queryset = ResidentProfile.objects.filter(rp_id__startswith='BENCH-')
+
+            started = time.perf_counter()
+            rows = population_structure_bucketer.bin_queryset(queryset).to_rows()
+            elapsed = time.perf_counter() - started
+            binned = sum(row['total'] for row in rows)
+            self.stdout.write(self.style.SUCCESS(
+                f"Fetch + bin: {elapsed * 1000:.1f}ms for {binned} residents"
+            ))
+
+            if options['legacy']:
+                started = time.perf_counter()
+                legacy_total = self._legacy_total(queryset)
+                self.stdout.write(
+                    f"Legacy loop: {(time.perf_counter() - started) * 1000:.1f}ms for {legacy_total} residents"
+                )
+
+            # Never keep benchmark data
+            transaction.set_rollback(True)
+
+        self.stdout.write("Synthetic residents rolled back.")
+
+    def _seed(self, total, batch_size, rng):
+        today = date.today()
+        for offset in range(0, total, batch_size):
+            count = min(batch_size, total - offset)
+            personals = Personal.objects.bulk_create([
+                Personal(
+                    per_lname='BENCH',
+                    per_fname=f'RESIDENT {offset + i}',
+                    per_dob=today - timedelta(days=rng.randint(0, 95 * 365)),
+                    per_sex=rng.choice(['MALE', 'FEMALE']),
+                    per_status='SINGLE',
+                    per_religion='N/A',
+                    per_contact='09000000000',
+                )
+                for i in range(count)
+            ])
+            ResidentProfile.objects.bulk_create([
+                ResidentProfile(rp_id=f'BENCH-{offset + i}', per=personal)
+                for i, personal in enumerate(personals)
+            ])
+
+    def _legacy_total(self, queryset):
+        today = date.today()
+        total = 0
+        for bucket in POPULATION_STRUCTURE_AGE_GROUPS:
+            for resident in queryset.select_related('per'):
+                delta = relativedelta(today, resident.per.per_dob)
+                months = delta.years * 12 + delta.months
+                if bucket.min_months <= months <= bucket.max_months:
+                    if resident.per.per_sex in ('M', 'MALE', 'F', 'FEMALE'):
+                        total += 1
+        return total
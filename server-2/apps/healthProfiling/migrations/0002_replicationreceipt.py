@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthProfiling', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicationReceipt',
+            fields=[
+                ('rr_key', models.UUIDField(primary_key=True, serialize=False)),
+                ('rr_entity', models.CharField(max_length=50)),
+                ('rr_entity_id', models.CharField(blank=True, default='', max_length=50)),
+                ('rr_seq', models.PositiveIntegerField()),
+                ('rr_applied_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'replication_receipt',
+                'indexes': [models.Index(fields=['rr_entity', 'rr_entity_id', 'rr_seq'], name='replication_rr_enti_847818_idx')],
+            },
+        ),
+    ]
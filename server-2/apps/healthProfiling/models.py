@@ -406,6 +406,23 @@ class SurveyIdentification(AbstractModels):
     def __str__(self):
         return f"Survey {self.si_id} - Family {self.fam.fam_id}"
 
+class ReplicationReceipt(models.Model):
+    """
+    One row per replication item applied from Server-1's outbox. rr_key makes
+    redelivered items no-ops; rr_seq lets older items for an entity be skipped.
+    """
+    rr_key = models.UUIDField(primary_key=True)
+    rr_entity = models.CharField(max_length=50)
+    rr_entity_id = models.CharField(max_length=50, blank=True, default='')
+    rr_seq = models.PositiveIntegerField()
+    rr_applied_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'replication_receipt'
+        indexes = [
+            models.Index(fields=['rr_entity', 'rr_entity_id', 'rr_seq']),
+        ]
+
 
 
 # class RiskClassGroups(models.Model):
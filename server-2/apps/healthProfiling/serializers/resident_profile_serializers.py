@@ -5,6 +5,7 @@ from ..models import *
 from ..serializers.personal_serializers import *
 from ..serializers.address_serializers import *
 from apps.administration.models import Staff
+from apps.patientrecords.loaders import get_lookups
 from datetime import datetime
 
 
@@ -176,27 +177,30 @@ class ResidentPersonalInfoSerializer(serializers.ModelSerializer):
         return age
     
     def get_per_addresses(self, obj):
-        per_addresses = PersonalAddress.objects.filter(per=obj.per)
-        addresses = [pa.add for pa in per_addresses.select_related('add')]
+        # Reuse per__personal_addresses__add when the list view prefetched it
+        per_addresses = getattr(obj.per, '_prefetched_objects_cache', {}).get('personal_addresses')
+        if per_addresses is None:
+            per_addresses = PersonalAddress.objects.filter(per=obj.per).select_related('add')
+        addresses = [pa.add for pa in per_addresses]
         return AddressBaseSerializer(addresses, many=True).data
 
     def get_per_add_bloodType(self, obj):
         try:
-            health_details = HealthRelatedDetails.objects.filter(rp=obj).first()
+            health_details = get_lookups(self.context).health_details(obj)
             return health_details.per_add_bloodType if health_details else None
         except:
             return None
     
     def get_per_add_philhealth_id(self, obj):
         try:
-            health_details = HealthRelatedDetails.objects.filter(rp=obj).first()
+            health_details = get_lookups(self.context).health_details(obj)
             return health_details.per_add_philhealth_id if health_details else None
         except:
             return None
     
     def get_per_add_covid_vax_status(self, obj):
         try:
-            health_details = HealthRelatedDetails.objects.filter(rp=obj).first()
+            health_details = get_lookups(self.context).health_details(obj)
             return health_details.per_add_covid_vax_status if health_details else None
         except:
             return None
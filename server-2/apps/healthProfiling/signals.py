@@ -0,0 +1,5 @@
+from utils.cache import invalidate_on_change
+from .models import Sitio
+from .views.sitio_views import SITIO_CACHE
+
+invalidate_on_change(SITIO_CACHE, Sitio)
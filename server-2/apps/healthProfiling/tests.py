@@ -1,3 +1,126 @@
-from django.test import TestCase
+import random
+import uuid
+from datetime import date, timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from dateutil.relativedelta import relativedelta
+from django.test import SimpleTestCase, TestCase
+
+from .demographics import (
+    DemographicBucketer, age_in_months, months_bucket,
+    population_structure_bucketer, sitio_age_distribution_bucketer
+)
+from .models import Sitio, ReplicationReceipt
+
+
+class AgeInMonthsTest(SimpleTestCase):
+    def test_matches_relativedelta_including_month_ends(self):
+        rng = random.Random(7)
+        for today in [date(2024, 2, 29), date(2023, 2, 28), date(2024, 3, 31), date(2025, 10, 18)]:
+            dobs = [today - timedelta(days=rng.randint(0, 40000)) for _ in range(2000)]
+            expected = [
+                relativedelta(today, dob).years * 12 + relativedelta(today, dob).months
+                for dob in dobs
+            ]
+            self.assertEqual(list(age_in_months(dobs, today)), expected)
+
+
+class DemographicBucketerTest(SimpleTestCase):
+    def setUp(self):
+        self.today = date(2025, 10, 18)
+
+    def test_population_structure_rows(self):
+        dobs = [
+            date(2025, 8, 1),   # 2 months
+            date(2025, 4, 17),  # 6 months
+            date(2019, 10, 18), # exactly 6 years
+            date(1950, 1, 1),   # 75 years
+            date(1800, 1, 1),   # out of range
+        ]
+        sexes = ['MALE', 'F', 'FEMALE', 'M', 'MALE']
+
+        rows = population_structure_bucketer.bin(dobs, sexes, reference_date=self.today).to_rows()
+        by_label = {row['ageGroup']: row for row in rows}
+
+        self.assertEqual(by_label['0-5 mos.'], {'ageGroup': '0-5 mos.', 'male': 1, 'female': 0, 'total': 1})
+        self.assertEqual(by_label['6-11 mos.']['female'], 1)
+        self.assertEqual(by_label['6 yrs.']['female'], 1)
+        self.assertEqual(by_label['60 yrs. & above']['male'], 1)
+        self.assertEqual(sum(row['total'] for row in rows), 4)
+
+    def test_unknown_sex_excluded_from_totals(self):
+        counts = population_structure_bucketer.bin(
+            [date(2000, 1, 1), date(2000, 1, 1)], ['MALE', None], reference_date=self.today
+        )
+        self.assertEqual(sum(row['total'] for row in counts.to_rows()), 1)
+        self.assertEqual(sum(counts.to_dict().values()), 2)
+
+    def test_grouped_counts(self):
+        counts = sitio_age_distribution_bucketer.bin(
+            [date(2024, 1, 1), date(1990, 1, 1), date(1940, 1, 1)],
+            ['MALE', 'FEMALE', 'FEMALE'],
+            groups=[1, 1, 2],
+            reference_date=self.today,
+        )
+        self.assertEqual(counts.to_dict(1)['0-5'], 1)
+        self.assertEqual(counts.to_dict(1)['20-39'], 1)
+        self.assertEqual(counts.to_dict(2)['60+'], 1)
+        self.assertEqual(sum(counts.to_dict(3).values()), 0)
+
+    def test_overlapping_buckets_rejected(self):
+        with self.assertRaises(ValueError):
+            DemographicBucketer([months_bucket('a', 0, 12), months_bucket('b', 12, 24)])
+
+
+
+@patch('apps.healthProfiling.views.sitio_views.PostQueries')
+class ReplicationBatchTest(TestCase):
+    def _item(self, name, seq=1, key=None):
+        return {
+            "key": key or str(uuid.uuid4()),
+            "entity": "sitio",
+            "entity_id": "",
+            "seq": seq,
+            "method": "POST",
+            "path": "/health-profiling/sitio/create/",
+            "payload": [{"sitio_name": name}],
+        }
+
+    def _send(self, items):
+        response = self.client.post(
+            '/health-profiling/replication/batch/', {"items": items}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return [result['status'] for result in response.json()['results']]
+
+    def test_items_applied_once_in_order(self, post_queries):
+        items = [self._item("SITIO A"), self._item("SITIO B")]
+
+        self.assertEqual(self._send(items), ['applied', 'applied'])
+        self.assertEqual(self._send(items), ['duplicate', 'duplicate'])
+        self.assertEqual(list(Sitio.objects.order_by('sitio_id').values_list('sitio_name', flat=True)), ['SITIO A', 'SITIO B'])
+        self.assertEqual(ReplicationReceipt.objects.count(), 2)
+
+    def test_processing_stops_at_first_rejected_item(self, post_queries):
+        bad = self._item("SITIO A")
+        bad["path"] = "/health-profiling/not-a-route/"
+
+        self.assertEqual(self._send([bad, self._item("SITIO B")]), ['failed'])
+        self.assertFalse(Sitio.objects.exists())
+        self.assertFalse(ReplicationReceipt.objects.exists())
+
+    def test_paths_outside_health_profiling_are_rejected(self, post_queries):
+        for path in ("/admin/", "/health-profiling/replication/batch/"):
+            item = self._item("SITIO A")
+            item["path"] = path
+            self.assertEqual(self._send([item]), ['failed'])
+        self.assertFalse(ReplicationReceipt.objects.exists())
+
+    def test_stale_items_stay_stale_when_redelivered(self, post_queries):
+        newer = {**self._item("SITIO B", seq=2), "entity_id": "1"}
+        older = {**self._item("SITIO A", seq=1), "entity_id": "1"}
+
+        self.assertEqual(self._send([newer]), ['applied'])
+        self.assertEqual(self._send([older]), ['stale'])
+        self.assertEqual(self._send([older]), ['stale'])
+        self.assertEqual(ReplicationReceipt.objects.count(), 1)
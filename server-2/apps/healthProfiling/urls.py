@@ -20,12 +20,14 @@ from .views.all_record_views import *
 from .views.dependents_views import *
 from .views.history_views import *
 from .views.population_report_views import *
+from .views.replication_views import *
 # from .views_deprecated import * # To be removed
 
 urlpatterns = [
      # All record (combined record of resident and business respondents)
     # path("all/", AllRecordTableView.as_view(), name="all-record"),
     path("complete/registration/", CompleteRegistrationView.as_view(), name="complete-registration"),
+    path("replication/batch/", ReplicationBatchView.as_view(), name="replication-batch"),
     # Sitio Urls
     path("sitio/list/", SitioListView.as_view(), name="sitio-list"),
     path("sitio/create/", SitioCreateView.as_view(), name="sitio-create"),
@@ -3,8 +3,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db.models import Q, Count, Case, When, IntegerField, F, OuterRef, Exists, CharField, Value
 from django.db.models.functions import Upper
-from datetime import datetime, date
-from dateutil.relativedelta import relativedelta
+from datetime import datetime
 import logging
 
 from ..models import (
@@ -13,6 +12,9 @@ from ..models import (
     Dependents_Under_Five, MotherHealthInfo, NonCommunicableDisease
 )
 from apps.patientrecords.models import BodyMeasurement
+from ..demographics import (
+    MALE, FEMALE, population_structure_bucketer, sitio_age_distribution_bucketer
+)
 
 
 logger = logging.getLogger(__name__)
@@ -112,66 +114,9 @@ class PopulationStructureReportView(APIView):
                     household__add__sitio__sitio_name=sitio
                 )
             
-            # Define age groups matching the image structure
-            age_groups = [
-                ("0-5 mos.", 0, 5/12),
-                ("6-11 mos.", 6/12, 11/12),
-                ("12-23 mos.", 1, 23/12),
-                ("24-35 mos.", 2, 35/12),
-                ("36-47 mos.", 3, 47/12),
-                ("48-59 mos.", 4, 59/12),
-                ("60-71 mos.", 5, 71/12),
-                ("6 yrs.", 6, 6.99),
-                ("7-9 yrs.", 7, 9.99),
-                ("10-14 yrs.", 10, 14.99),
-                ("15-19 yrs.", 15, 19.99),
-                ("20-24 yrs.", 20, 24.99),
-                ("25-29 yrs.", 25, 29.99),
-                ("30-34 yrs.", 30, 34.99),
-                ("35-39 yrs.", 35, 39.99),
-                ("40-44 yrs.", 40, 44.99),
-                ("45-49 yrs.", 45, 49.99),
-                ("50-54 yrs.", 50, 54.99),
-                ("55-59 yrs.", 55, 59.99),
-                ("60 yrs. & above", 60, 150),
-            ]
-            
-            # Calculate age for each resident and categorize
-            today = date.today()
-            age_group_data = []
-            total_population = 0
-            
-            for group_name, min_age, max_age in age_groups:
-                male_count = 0
-                female_count = 0
-                
-                for resident in residents_query:
-                    if not resident.per or not resident.per.per_dob:
-                        continue
-                    
-                    # Calculate age in years (with decimal for months)
-                    dob = resident.per.per_dob
-                    age_years = relativedelta(today, dob).years
-                    age_months = relativedelta(today, dob).months
-                    age_decimal = age_years + (age_months / 12)
-                    
-                    # Check if age falls within this group
-                    if min_age <= age_decimal <= max_age:
-                        sex = resident.per.per_sex
-                        if sex == 'M' or sex == 'MALE':
-                            male_count += 1
-                        elif sex == 'F' or sex == 'FEMALE':
-                            female_count += 1
-                
-                total = male_count + female_count
-                total_population += total
-                
-                age_group_data.append({
-                    "ageGroup": group_name,
-                    "male": male_count,
-                    "female": female_count,
-                    "total": total
-                })
+            # Bin every resident by age group and sex in a single pass
+            age_group_data = population_structure_bucketer.bin_queryset(residents_query).to_rows()
+            total_population = sum(row["total"] for row in age_group_data)
             
             # Count families (only families with members)
             family_query = Family.objects.annotate(
@@ -538,6 +483,25 @@ class PopulationBySitioReportView(APIView):
             from ..models import Sitio
             sitios = Sitio.objects.all().order_by('sitio_name')
             
+            # Age/sex counts for every sitio, fetched and binned in one pass
+            residents_query = ResidentProfile.objects.filter(
+                per__isnull=False,
+                household__add__sitio__isnull=False
+            )
+            if year and year != 'all':
+                try:
+                    year_int = int(year)
+                    residents_query = residents_query.filter(
+                        Q(rp_date_registered__year=year_int) |
+                        Q(per__per_dob__year__lte=year_int)
+                    )
+                except ValueError:
+                    pass
+            
+            sitio_counts = sitio_age_distribution_bucketer.bin_queryset(
+                residents_query, group_field='household__add__sitio'
+            )
+            
             sitio_data = []
             total_population = 0
             total_households = 0
@@ -546,34 +510,14 @@ class PopulationBySitioReportView(APIView):
             for sitio in sitios:
                 sitio_name = sitio.sitio_name
                 
-                # Base queryset for residents in this sitio
-                residents_query = ResidentProfile.objects.select_related('per').filter(
-                    per__isnull=False,
-                    household__add__sitio=sitio
-                )
-                
-                # Apply year filter if specified
-                if year and year != 'all':
-                    try:
-                        year_int = int(year)
-                        residents_query = residents_query.filter(
-                            Q(rp_date_registered__year=year_int) |
-                            Q(per__per_dob__year__lte=year_int)
-                        )
-                    except ValueError:
-                        pass
+                counts = sitio_counts.for_group(sitio.sitio_id)
                 
                 # Count population
-                population = residents_query.count()
+                population = int(counts.sum())
                 
                 # Count male and female
-                male_count = residents_query.filter(
-                    Q(per__per_sex='M') | Q(per__per_sex='MALE')
-                ).count()
-                
-                female_count = residents_query.filter(
-                    Q(per__per_sex='F') | Q(per__per_sex='FEMALE')
-                ).count()
+                male_count = int(counts[:, MALE].sum())
+                female_count = int(counts[:, FEMALE].sum())
                 
                 # Count households in this sitio
                 household_query = Household.objects.filter(add__sitio=sitio)
@@ -603,32 +547,8 @@ class PopulationBySitioReportView(APIView):
                 
                 families = family_query.count()
                 
-                # Calculate age distribution
-                today = date.today()
-                age_groups = {
-                    '0-5': 0,
-                    '6-12': 0,
-                    '13-19': 0,
-                    '20-39': 0,
-                    '40-59': 0,
-                    '60+': 0
-                }
-                
-                for resident in residents_query:
-                    if resident.per and resident.per.per_dob:
-                        age = relativedelta(today, resident.per.per_dob).years
-                        if age <= 5:
-                            age_groups['0-5'] += 1
-                        elif age <= 12:
-                            age_groups['6-12'] += 1
-                        elif age <= 19:
-                            age_groups['13-19'] += 1
-                        elif age <= 39:
-                            age_groups['20-39'] += 1
-                        elif age <= 59:
-                            age_groups['40-59'] += 1
-                        else:
-                            age_groups['60+'] += 1
+                # Age distribution
+                age_groups = sitio_counts.to_dict(sitio.sitio_id)
                 
                 # Average household size
                 avg_household_size = round(population / households, 2) if households > 0 else 0
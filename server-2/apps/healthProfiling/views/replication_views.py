@@ -0,0 +1,108 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction, IntegrityError
+from django.db.models import Max
+from django.urls import resolve, Resolver404
+from ..models import ReplicationReceipt
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Items may only replay health-profiling routes (what Server-1's PostQueries,
+# UpdateQueries and DeleteQueries call), never this endpoint or another app
+REPLICATION_PATH_PREFIX = '/health-profiling/'
+REPLICATION_BATCH_PATH = '/health-profiling/replication/batch/'
+
+
+class ReplicationRejected(Exception):
+  pass
+
+
+def _dispatch(method, path, payload):
+  """Runs the health-profiling view for path as if Server-1 had called it directly"""
+  body = json.dumps(payload).encode() if payload is not None else b''
+  request = WSGIRequest({
+    'REQUEST_METHOD': method,
+    'PATH_INFO': path,
+    'SCRIPT_NAME': '',
+    'QUERY_STRING': '',
+    'SERVER_NAME': 'replication',
+    'SERVER_PORT': '80',
+    'CONTENT_TYPE': 'application/json',
+    'CONTENT_LENGTH': str(len(body)),
+    'wsgi.input': io.BytesIO(body),
+    'wsgi.url_scheme': 'http',
+  })
+  request._dont_enforce_csrf_checks = True
+
+  if not path.startswith(REPLICATION_PATH_PREFIX) or path.startswith(REPLICATION_BATCH_PATH):
+    raise ReplicationRejected(f"Path not allowed for replication: {path}")
+  try:
+    match = resolve(path)
+  except Resolver404:
+    raise ReplicationRejected(f"No route for {method} {path}")
+  response = match.func(request, *match.args, **match.kwargs)
+  if response.status_code >= 400:
+    raise ReplicationRejected(getattr(response, 'data', None) or response.status_code)
+  return response
+
+
+def _apply(item):
+  key = item['key']
+  entity = item.get('entity', '')
+  entity_id = item.get('entity_id') or ''
+  seq = item.get('seq', 1)
+
+  if ReplicationReceipt.objects.filter(rr_key=key).exists():
+    return 'duplicate'
+
+  # An entity-scoped item older than one already applied would overwrite newer data.
+  # No receipt is written: it was not applied, and a redelivery must get 'stale' again.
+  if entity_id:
+    last_seq = ReplicationReceipt.objects.filter(
+      rr_entity=entity, rr_entity_id=entity_id
+    ).aggregate(seq=Max('rr_seq'))['seq']
+    if last_seq is not None and seq < last_seq:
+      return 'stale'
+
+  _dispatch(item.get('method', 'POST').upper(), item['path'], item.get('payload'))
+  ReplicationReceipt.objects.create(rr_key=key, rr_entity=entity, rr_entity_id=entity_id, rr_seq=seq)
+  return 'applied'
+
+
+"""
+  API endpoint for Server-1's replication relay. Items are applied in order
+  and processing stops at the first failure so later items never overtake it.
+"""
+class ReplicationBatchView(APIView):
+  permission_classes = [AllowAny]
+
+  def post(self, request, *args, **kwargs):
+    items = request.data.get('items', [])
+    if not isinstance(items, list):
+      return Response({'error': 'items must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = []
+    for item in items:
+      try:
+        # The view's writes and the receipt commit together, so a retried item is never applied twice
+        with transaction.atomic():
+          results.append({'key': item['key'], 'status': _apply(item)})
+      except IntegrityError:
+        # Another delivery of the same key committed first
+        results.append({'key': item['key'], 'status': 'duplicate'})
+      except ReplicationRejected as e:
+        logger.error(f"Replication item {item.get('key')} rejected: {str(e)}")
+        results.append({'key': item.get('key'), 'status': 'failed', 'error': str(e)})
+        break
+      except Exception as e:
+        logger.error(f"Replication item {item.get('key')} failed: {str(e)}")
+        results.append({'key': item.get('key'), 'status': 'failed', 'error': str(e)})
+        break
+
+    return Response({'results': results}, status=status.HTTP_200_OK)
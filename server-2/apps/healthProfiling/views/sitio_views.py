@@ -4,8 +4,12 @@ from rest_framework.permissions import AllowAny
 from ..serializers.sitio_serializers import *
 from django.db import transaction
 from ..double_queries import *
+from utils.cache import CachedListMixin
 
-class SitioListView(generics.ListAPIView):
+SITIO_CACHE = 'sitios'
+
+class SitioListView(CachedListMixin, generics.ListAPIView):
+  cache_namespace = SITIO_CACHE
   serializer_class = SitioBaseSerializer
   queryset = Sitio.objects.all()
 
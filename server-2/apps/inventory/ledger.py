@@ -0,0 +1,171 @@
+"""
+Inventory ledger: every stock deduction goes through here.
+
+Each deduction is a single conditional UPDATE
+    UPDATE ... SET avail = avail - qty WHERE pk = id AND avail >= qty
+so two devices dispensing from the same batch can never oversell it or lose
+each other's update, whatever the isolation level. The matching *Transactions
+row is written in the same database transaction, and a batch of deductions
+either applies completely or not at all.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .signals import notify_stock_change
+from .models import (
+    MedicineInventory, MedicineTransactions,
+    CommodityInventory, CommodityTransaction,
+    FirstAidInventory, FirstAidTransactions,
+    VaccineStock, ImmunizationStock, AntigenTransaction,
+    daily_ids,
+)
+from .quantities import parse_qty
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientStock(Exception):
+    def __init__(self, kind, stock_id, requested, available):
+        self.kind = kind
+        self.stock_id = stock_id
+        self.requested = requested
+        self.available = available
+        super().__init__(
+            f"Insufficient stock for {kind} {stock_id}. Available: {available}, Requested: {requested}"
+        )
+
+
+def _boxes_in_pcs(unit):
+    return 'pcs' if unit and unit.lower() == 'boxes' else (unit or 'pcs')
+
+
+class StockLedger:
+    def __init__(self, model, avail_field, transaction_model, transaction_fk, qty_field, action_field, unit_label):
+        self.model = model
+        self.avail_field = avail_field
+        self.transaction_model = transaction_model
+        self.transaction_fk = transaction_fk
+        self.qty_field = qty_field
+        self.action_field = action_field
+        self.unit_label = unit_label
+
+    def available(self, stock_id):
+        return self.model.objects.filter(pk=stock_id).values_list(self.avail_field, flat=True).first()
+
+
+LEDGERS = {
+    'medicine': StockLedger(
+        MedicineInventory, 'minv_qty_avail', MedicineTransactions, 'minv_id', 'mdt_qty', 'mdt_action',
+        lambda stock: _boxes_in_pcs(stock.minv_qty_unit),
+    ),
+    'commodity': StockLedger(
+        CommodityInventory, 'cinv_qty_avail', CommodityTransaction, 'cinv_id', 'comt_qty', 'comt_action',
+        lambda stock: _boxes_in_pcs(stock.cinv_qty_unit),
+    ),
+    'first_aid': StockLedger(
+        FirstAidInventory, 'finv_qty_avail', FirstAidTransactions, 'finv_id', 'fat_qty', 'fat_action',
+        lambda stock: _boxes_in_pcs(stock.finv_qty_unit),
+    ),
+    'vaccine': StockLedger(
+        VaccineStock, 'vacStck_qty_avail', AntigenTransaction, 'vacStck_id', 'antt_qty', 'antt_action',
+        lambda stock: 'container/s' if stock.solvent == 'diluent' else 'dose/s',
+    ),
+    'supply': StockLedger(
+        ImmunizationStock, 'imzStck_avail', AntigenTransaction, 'imzStck_id', 'antt_qty', 'antt_action',
+        lambda stock: 'boxes' if stock.imzStck_unit == 'boxes' else 'pcs',
+    ),
+}
+
+
+def deduction(kind, stock_id, qty, action='Deducted', qty_label=None, adjust=None):
+    """
+    One line of a batch.
+      adjust     other counters to move by a delta in the same UPDATE, e.g. {'wasted': qty}
+      qty_label  transaction quantity text; defaults to "<qty> <unit>" for the stock
+    """
+    if kind not in LEDGERS:
+        raise ValueError(f"Unknown stock kind '{kind}'")
+    return {
+        'kind': kind, 'stock_id': LEDGERS[kind].model._meta.pk.to_python(stock_id), 'qty': int(qty),
+        'action': action, 'qty_label': qty_label, 'adjust': adjust or {},
+    }
+
+
+def _apply(item):
+    ledger = LEDGERS[item['kind']]
+    qty = item['qty']
+    if qty <= 0:
+        raise ValueError("Deduct quantity must be greater than zero")
+
+    changes = {ledger.avail_field: F(ledger.avail_field) - qty}
+    changes.update({field: F(field) + delta for field, delta in item['adjust'].items()})
+    if any(field.name == 'updated_at' for field in ledger.model._meta.concrete_fields):
+        # auto_now is only applied by save()
+        changes['updated_at'] = timezone.now()
+    updated = ledger.model.objects.filter(
+        pk=item['stock_id'], **{f'{ledger.avail_field}__gte': qty}
+    ).update(**changes)
+
+    if not updated:
+        available = ledger.available(item['stock_id'])
+        if available is None:
+            raise ledger.model.DoesNotExist(f"{item['kind']} stock {item['stock_id']} not found")
+        logger.warning(f"⚠️ Refused {item['kind']} deduction of {qty} from {item['stock_id']}: {available} available")
+        raise InsufficientStock(item['kind'], item['stock_id'], qty, available)
+
+
+def deduct_many(items, staff=None):
+    """
+    Applies a batch of deductions atomically and records a transaction row for each.
+    Returns {(kind, stock_id): refreshed stock}. Raises InsufficientStock (nothing
+    applied) if any line exceeds what is available.
+    """
+    staff_id = getattr(staff, 'pk', staff)
+    with transaction.atomic():
+        # Rows are updated in a fixed order so concurrent batches cannot deadlock
+        for item in sorted(items, key=lambda item: (item['kind'], str(item['stock_id']))):
+            _apply(item)
+
+        stocks = {}
+        for kind in {item['kind'] for item in items}:
+            ledger = LEDGERS[kind]
+            ids = [item['stock_id'] for item in items if item['kind'] == kind]
+            for stock in ledger.model.objects.select_related('inv_id').filter(pk__in=ids):
+                stocks[(kind, stock.pk)] = stock
+
+        records = {}
+        for item in items:
+            ledger = LEDGERS[item['kind']]
+            stock = stocks[(item['kind'], item['stock_id'])]
+            qty = item['qty_label'] or f"{item['qty']} {ledger.unit_label(stock)}"
+            qty_num, unit = parse_qty(qty)
+            records.setdefault(ledger.transaction_model, []).append(ledger.transaction_model(**{
+                ledger.qty_field: qty,
+                f'{ledger.qty_field}_num': qty_num,
+                ledger.qty_field.replace('_qty', '_unit'): unit,
+                ledger.action_field: item['action'],
+                ledger.transaction_fk: stock,
+                'staff_id': staff_id,
+            }))
+        # One ID block and one INSERT per transaction table (bulk_create skips save())
+        for model, rows in records.items():
+            for row, row_id in zip(rows, daily_ids(model, model.ID_PREFIX, len(rows))):
+                row.pk = row_id
+            model.objects.bulk_create(rows)
+
+        # The UPDATEs bypass save(), so run the stock alert checks the post_save signal would have
+        transaction.on_commit(lambda: _notify_stock_changes(stocks.values()))
+    return stocks
+
+
+def _notify_stock_changes(stocks):
+    for stock in stocks:
+        notify_stock_change(stock)
+
+
+def deduct(kind, stock_id, qty, action='Deducted', qty_label=None, adjust=None, staff=None):
+    """Single deduction; returns the refreshed stock row"""
+    item = deduction(kind, stock_id, qty, action=action, qty_label=qty_label, adjust=adjust)
+    stocks = deduct_many([item], staff=staff)
+    return next(iter(stocks.values()))
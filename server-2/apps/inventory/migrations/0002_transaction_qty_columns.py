@@ -0,0 +1,82 @@
+# Generated by Django 5.2 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+from apps.inventory.quantities import parse_qty
+
+TRANSACTION_TABLES = (
+    ('MedicineTransactions', 'mdt'),
+    ('CommodityTransaction', 'comt'),
+    ('FirstAidTransactions', 'fat'),
+    ('AntigenTransaction', 'antt'),
+)
+BATCH_SIZE = 1000
+
+
+def backfill_quantities(apps, schema_editor):
+    """Parses the legacy quantity text ("10 pc/s") into the new columns"""
+    for model_name, prefix in TRANSACTION_TABLES:
+        model = apps.get_model('inventory', model_name)
+        qty_num, unit = f'{prefix}_qty_num', f'{prefix}_unit'
+        batch = []
+        for row in model.objects.only(f'{prefix}_id', f'{prefix}_qty').iterator(chunk_size=BATCH_SIZE):
+            num, parsed_unit = parse_qty(getattr(row, f'{prefix}_qty'))
+            setattr(row, qty_num, num)
+            setattr(row, unit, parsed_unit)
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, [qty_num, unit])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, [qty_num, unit])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='antigentransaction',
+            name='antt_qty_num',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='antigentransaction',
+            name='antt_unit',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='commoditytransaction',
+            name='comt_qty_num',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='commoditytransaction',
+            name='comt_unit',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='firstaidtransactions',
+            name='fat_qty_num',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='firstaidtransactions',
+            name='fat_unit',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='medicinetransactions',
+            name='mdt_qty_num',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='medicinetransactions',
+            name='mdt_unit',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(backfill_quantities, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,14 @@ from datetime import datetime
 from django.utils import timezone  # Import timezone for default value
 from django.core.validators import MinValueValidator
 from apps.administration.models import Staff
+from utils.ids import prefixed_ids
+from .quantities import UNIT_MAX_LENGTH, parse_qty
+
+
+def daily_ids(model, prefix, n=1):
+    """n new primary keys of the form PREFIX + YYMMDD + 4-digit number, e.g. TRNSMED2410180001"""
+    now = timezone.now()
+    return prefixed_ids(model, model._meta.pk.name, f"{prefix}{now.year % 100:02d}{now.month:02d}{now.day:02d}", n)
 
 
 
@@ -34,18 +42,7 @@ class Medicinelist(models.Model):
         if not self.med_id:
             today = timezone.now()
             prefix = f"MED{today.day:02d}{today.year % 100:02d}"
-            
-            # Get the maximum existing ID with this prefix
-            max_id = Medicinelist.objects.filter(
-                med_id__startswith=prefix
-            ).order_by('-med_id').first()
-            
-            if max_id:
-                last_num = int(max_id.med_id[len(prefix):]) + 1
-            else:
-                last_num = 1
-                
-            self.med_id = f"{prefix}{last_num:03d}"
+            self.med_id = prefixed_ids(Medicinelist, 'med_id', prefix, width=3)[0]
             
         if self.med_name:
             self.med_name = self.med_name.title()
@@ -79,33 +76,8 @@ class CommodityList(models.Model):
         
     def save(self, *args, **kwargs):
         if not self.com_id:
-            with transaction.atomic():
-                # Get current date
-                now = timezone.now()
-                
-                # Prefix: COM (Commodity)
-                prefix = "COM"
-                
-                # Format: COM + Year (2-digit) + Month + Day
-                date_part = f"{now.year % 100:02d}{now.month:02d}{now.day:02d}"
-                base_id = f"{prefix}{date_part}"
-                
-                # Get the maximum existing ID for today using database aggregation
-                max_id_today = CommodityList.objects.filter(
-                    com_id__startswith=base_id
-                ).aggregate(Max('com_id'))['com_id__max']
-                
-                if max_id_today:
-                    try:
-                        # Extract the numeric part from the max ID and increment
-                        last_num = int(max_id_today[len(base_id):]) + 1
-                    except (ValueError, IndexError):
-                        last_num = 1
-                else:
-                    last_num = 1
-                
-                # Generate unique com_id with 4-digit number
-                self.com_id = f"{base_id}{last_num:04d}"
+            # Format: COM + Year (2-digit) + Month + Day + 4-digit number
+            self.com_id = daily_ids(CommodityList, "COM")[0]
             
         if self.com_name:
             self.com_name = self.com_name.title()
@@ -127,18 +99,7 @@ class FirstAidList(models.Model):
         if not self.fa_id:
             today = timezone.now()
             prefix = f"FA{today.day:02d}{today.year % 100:02d}"
-            
-            # Get the maximum existing ID with this prefix
-            max_id = FirstAidList.objects.filter(
-                fa_id__startswith=prefix
-            ).order_by('-fa_id').first()
-            
-            if max_id:
-                last_num = int(max_id.fa_id[len(prefix):]) + 1
-            else:
-                last_num = 1
-                
-            self.fa_id = f"{prefix}{last_num:03d}"
+            self.fa_id = prefixed_ids(FirstAidList, 'fa_id', prefix, width=3)[0]
             
         if self.fa_name:
             self.fa_name = self.fa_name.title()
@@ -172,17 +133,8 @@ class Inventory(models.Model):
             prefix = type_prefixes.get(self.inv_type, 'INV')
             # Format: PREFIX + YY + MM (from date_source)
             full_prefix = f"{prefix}{date_source.year % 100:02d}{date_source.month:02d}"
-            # Get the maximum existing ID with this prefix
-            max_id = Inventory.objects.filter(
-                inv_id__startswith=full_prefix
-            ).order_by('-inv_id').first()
-            if max_id:
-                # Extract the numeric part and increment
-                last_num = int(max_id.inv_id[len(full_prefix):]) + 1
-            else:
-                last_num = 1
             # Generate unique inv_id with auto-increment number
-            self.inv_id = f"{full_prefix}{last_num:03d}"
+            self.inv_id = prefixed_ids(Inventory, 'inv_id', full_prefix, width=3)[0]
         super().save(*args, **kwargs)
 
     class Meta:
@@ -214,8 +166,12 @@ class MedicineInventory(models.Model):
 
 
 class MedicineTransactions(models.Model):
+    ID_PREFIX = "TRNSMED"
+
     mdt_id = models.CharField(primary_key=True, max_length=20, editable=False)
     mdt_qty = models.CharField(max_length=100)
+    mdt_qty_num = models.PositiveIntegerField(default=0, editable=False)  # parsed from mdt_qty on save
+    mdt_unit = models.CharField(max_length=UNIT_MAX_LENGTH, blank=True, default='', editable=False)
     mdt_action = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
     staff = models.ForeignKey(Staff, on_delete=models.CASCADE, related_name='medicine_transaction', null=True, blank=True)  
@@ -226,34 +182,10 @@ class MedicineTransactions(models.Model):
         ordering = ['-created_at']
 
     def save(self, *args, **kwargs):
+        self.mdt_qty_num, self.mdt_unit = parse_qty(self.mdt_qty)
         if not self.mdt_id:
-            with transaction.atomic():
-                # Get current date
-                now = timezone.now()
-                
-                # Prefix: TRNSMED
-                prefix = "TRNSMED"
-                
-                # Format: TRNSMED + Year (2-digit) + Month + Day
-                date_part = f"{now.year % 100:02d}{now.month:02d}{now.day:02d}"
-                base_id = f"{prefix}{date_part}"
-                
-                # Get the maximum existing ID for today using database aggregation
-                max_id_today = MedicineTransactions.objects.filter(
-                    mdt_id__startswith=base_id
-                ).aggregate(Max('mdt_id'))['mdt_id__max']
-                
-                if max_id_today:
-                    try:
-                        # Extract the numeric part from the max ID and increment
-                        last_num = int(max_id_today[len(base_id):]) + 1
-                    except (ValueError, IndexError):
-                        last_num = 1
-                else:
-                    last_num = 1
-                
-                # Generate unique mdt_id with 4-digit number
-                self.mdt_id = f"{base_id}{last_num:04d}"
+            # Format: TRNSMED + Year (2-digit) + Month + Day + 4-digit number
+            self.mdt_id = daily_ids(type(self), self.ID_PREFIX)[0]
         
         super().save(*args, **kwargs)
 
@@ -279,8 +211,12 @@ class CommodityInventory(models.Model):
         
         
 class CommodityTransaction(models.Model):
+    ID_PREFIX = "TRNSCOM"
+
     comt_id = models.CharField(primary_key=True, max_length=20, editable=False)
     comt_qty = models.CharField(max_length=100)
+    comt_qty_num = models.PositiveIntegerField(default=0, editable=False)  # parsed from comt_qty on save
+    comt_unit = models.CharField(max_length=UNIT_MAX_LENGTH, blank=True, default='', editable=False)
     comt_action = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)  # Remove `default`
     cinv_id = models.ForeignKey('CommodityInventory', on_delete=models.PROTECT,related_name='commodity_transaction',  db_column='cinv_id')
@@ -291,34 +227,10 @@ class CommodityTransaction(models.Model):
         ordering = ['-created_at']
 
     def save(self, *args, **kwargs):
+        self.comt_qty_num, self.comt_unit = parse_qty(self.comt_qty)
         if not self.comt_id:
-            with transaction.atomic():
-                # Get current date
-                now = timezone.now()
-                
-                # Prefix: TRNSCOM
-                prefix = "TRNSCOM"
-                
-                # Format: TRNSCOM + Year (2-digit) + Month + Day
-                date_part = f"{now.year % 100:02d}{now.month:02d}{now.day:02d}"
-                base_id = f"{prefix}{date_part}"
-                
-                # Get the maximum existing ID for today using database aggregation
-                max_id_today = CommodityTransaction.objects.filter(
-                    comt_id__startswith=base_id
-                ).aggregate(Max('comt_id'))['comt_id__max']
-                
-                if max_id_today:
-                    try:
-                        # Extract the numeric part from the max ID and increment
-                        last_num = int(max_id_today[len(base_id):]) + 1
-                    except (ValueError, IndexError):
-                        last_num = 1
-                else:
-                    last_num = 1
-                
-                # Generate unique comt_id with 4-digit number
-                self.comt_id = f"{base_id}{last_num:04d}"
+            # Format: TRNSCOM + Year (2-digit) + Month + Day + 4-digit number
+            self.comt_id = daily_ids(type(self), self.ID_PREFIX)[0]
         
         super().save(*args, **kwargs)
 
@@ -342,8 +254,12 @@ class FirstAidInventory(models.Model):
 
     
 class FirstAidTransactions(models.Model):
+    ID_PREFIX = "TRNSFA"
+
     fat_id = models.CharField(primary_key=True, max_length=20, editable=False)
     fat_qty = models.CharField(max_length=100)
+    fat_qty_num = models.PositiveIntegerField(default=0, editable=False)  # parsed from fat_qty on save
+    fat_unit = models.CharField(max_length=UNIT_MAX_LENGTH, blank=True, default='', editable=False)
     fat_action = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)  # Remove `default`
     finv_id = models.ForeignKey('FirstAidInventory', on_delete=models.PROTECT,  db_column='finv_id')
@@ -354,34 +270,10 @@ class FirstAidTransactions(models.Model):
         ordering = ['-created_at']
 
     def save(self, *args, **kwargs):
+        self.fat_qty_num, self.fat_unit = parse_qty(self.fat_qty)
         if not self.fat_id:
-            with transaction.atomic():
-                # Get current date
-                now = timezone.now()
-                
-                # Prefix: TRNSFA
-                prefix = "TRNSFA"
-                
-                # Format: TRNSFA + Year (2-digit) + Month + Day
-                date_part = f"{now.year % 100:02d}{now.month:02d}{now.day:02d}"
-                base_id = f"{prefix}{date_part}"
-                
-                # Get the maximum existing ID for today using database aggregation
-                max_id_today = FirstAidTransactions.objects.filter(
-                    fat_id__startswith=base_id
-                ).aggregate(Max('fat_id'))['fat_id__max']
-                
-                if max_id_today:
-                    try:
-                        # Extract the numeric part from the max ID and increment
-                        last_num = int(max_id_today[len(base_id):]) + 1
-                    except (ValueError, IndexError):
-                        last_num = 1
-                else:
-                    last_num = 1
-                
-                # Generate unique fat_id with 4-digit number
-                self.fat_id = f"{base_id}{last_num:04d}"
+            # Format: TRNSFA + Year (2-digit) + Month + Day + 4-digit number
+            self.fat_id = daily_ids(type(self), self.ID_PREFIX)[0]
         
         super().save(*args, **kwargs)
 
@@ -531,8 +423,12 @@ class ImmunizationStock(models.Model):
   
 
 class AntigenTransaction(models.Model):
+    ID_PREFIX = "TRNSANT"
+
     antt_id = models.CharField(primary_key=True, max_length=20, editable=False)
     antt_qty = models.CharField(max_length=100)
+    antt_qty_num = models.PositiveIntegerField(default=0, editable=False)  # parsed from antt_qty on save
+    antt_unit = models.CharField(max_length=UNIT_MAX_LENGTH, blank=True, default='', editable=False)
     antt_action = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)  
     vacStck_id = models.ForeignKey(VaccineStock, on_delete=models.PROTECT,  db_column='vacStck_id',related_name='antigen_transactions', null=True, blank=True)
@@ -544,33 +440,9 @@ class AntigenTransaction(models.Model):
         ordering = ['-created_at']
 
     def save(self, *args, **kwargs):
+        self.antt_qty_num, self.antt_unit = parse_qty(self.antt_qty)
         if not self.antt_id:
-            with transaction.atomic():
-                # Get current date
-                now = timezone.now()
-                
-                # Prefix: TRNSANT
-                prefix = "TRNSANT"
-                
-                # Format: TRNSANT + Year (2-digit) + Month + Day
-                date_part = f"{now.year % 100:02d}{now.month:02d}{now.day:02d}"
-                base_id = f"{prefix}{date_part}"
-                
-                # Get the maximum existing ID for today using database aggregation
-                max_id_today = AntigenTransaction.objects.filter(
-                    antt_id__startswith=base_id
-                ).aggregate(Max('antt_id'))['antt_id__max']
-                
-                if max_id_today:
-                    try:
-                        # Extract the numeric part from the max ID and increment
-                        last_num = int(max_id_today[len(base_id):]) + 1
-                    except (ValueError, IndexError):
-                        last_num = 1
-                else:
-                    last_num = 1
-                
-                # Generate unique antt_id with 6-digit number
-                self.antt_id = f"{base_id}{last_num:04d}"
+            # Format: TRNSANT + Year (2-digit) + Month + Day + 4-digit number
+            self.antt_id = daily_ids(type(self), self.ID_PREFIX)[0]
         
         super().save(*args, **kwargs)
\ No newline at end of file
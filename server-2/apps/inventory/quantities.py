@@ -0,0 +1,104 @@
+"""
+Numeric quantities for the inventory transaction tables.
+
+Transactions keep their display text ("10 pc/s", "2 boxes"), and save() also
+stores the parsed number and a normalized unit in <prefix>_qty_num /
+<prefix>_unit. Reports add those numbers up with action_sum() in SQL instead
+of reading every transaction back and parsing the text; stock_movements()
+gives the per-stock opening / received / dispensed totals the monthly
+inventory reports are built from in one grouped query.
+"""
+import re
+from django.db.models import Count, DateField, F, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+QTY_NUMBER = re.compile(r'\d+')
+
+UNIT_ALIASES = {
+    'pc': 'pcs', 'pcs': 'pcs', 'pc/s': 'pcs', 'pc(s)': 'pcs', 'piece': 'pcs', 'pieces': 'pcs',
+    'box': 'boxes', 'boxes': 'boxes', 'box/es': 'boxes',
+    'dose': 'doses', 'doses': 'doses', 'dose/s': 'doses',
+    'container': 'containers', 'containers': 'containers', 'container/s': 'containers',
+    'unit': 'units', 'units': 'units',
+}
+UNIT_MAX_LENGTH = 20
+
+
+def normalize_unit(unit):
+    unit = (unit or '').strip().lower()
+    return UNIT_ALIASES.get(unit, unit)[:UNIT_MAX_LENGTH]
+
+
+def parse_qty(text):
+    """
+    "10 pc/s" -> (10, 'pcs'), "2 boxes (20 pcs)" -> (2, 'boxes'). Uses the first
+    number in the text, as the reports always have; text without a number is (0, '').
+    """
+    text = str(text or '')
+    match = QTY_NUMBER.search(text)
+    if not match:
+        return 0, ''
+    unit = text[match.end():].split('(')[0]
+    return int(match.group()), normalize_unit(unit)
+
+
+def action_sum(qty_field, action_field, actions, **filters):
+    """
+    Sum of qty_field over the transactions whose action contains any of
+    actions (case-insensitive), restricted by filters; 0 when none match.
+    """
+    matches_action = Q()
+    for action in actions:
+        matches_action |= Q(**{f'{action_field}__icontains': action})
+    return Coalesce(Sum(qty_field, filter=matches_action & Q(**filters)), 0)
+
+
+ADDED_ACTIONS = ('added',)
+
+
+def stock_movements(transactions, stock_field, prefix, start_date, end_date, out_actions, in_actions=ADDED_ACTIONS):
+    """
+    Totals per stock (grouped on stock_field, e.g. 'minv_id') from one query:
+      opening_in / opening_out   quantities added / taken out before start_date
+      received / dispensed       quantities added / taken out from start_date to end_date
+      period_transactions        number of transactions from start_date to end_date
+    Stocks with no transactions up to end_date, or that expired before
+    start_date, are left out. Most recently active stocks come first.
+    """
+    qty = (f'{prefix}_qty_num', f'{prefix}_action')
+    before = {'created_at__date__lt': start_date}
+    within = {'created_at__date__gte': start_date}
+    return list(
+        transactions.filter(created_at__date__lte=end_date)
+        .exclude(**{f'{stock_field}__inv_id__expiry_date__lt': start_date})
+        .values(stock_id=F(stock_field))
+        .annotate(
+            opening_in=action_sum(*qty, in_actions, **before),
+            opening_out=action_sum(*qty, out_actions, **before),
+            received=action_sum(*qty, in_actions, **within),
+            dispensed=action_sum(*qty, out_actions, **within),
+            period_transactions=Count('pk', filter=Q(**within)),
+            first_transaction_at=Min('created_at'),
+            last_transaction_at=Max('created_at'),
+        )
+        .order_by('-last_transaction_at')
+    )
+
+
+def active_stock_counts(transactions, stock_field):
+    """
+    {first day of month: number of stocks with transactions that month}, one
+    grouped query; stocks that expired before the month are not counted.
+    """
+    month = TruncMonth('created_at', output_field=DateField())
+    expiry = f'{stock_field}__inv_id__expiry_date'
+    rows = (
+        transactions.annotate(month=month)
+        .values('month')
+        .annotate(total_items=Count(
+            stock_field, distinct=True,
+            filter=Q(**{f'{expiry}__isnull': True}) | Q(**{f'{expiry}__gte': F('month')}),
+        ))
+        .order_by('-month')
+    )
+    return {row['month']: row['total_items'] for row in rows}
@@ -10,6 +10,7 @@ from .models import (
     VaccineStock, ImmunizationStock
 )
 from apps.administration.models import Staff
+from utils.cache import invalidate_on_change
 from utils.create_notification import NotificationQueries
 
 logger = logging.getLogger(__name__)
@@ -330,6 +331,13 @@ def _notify_for_instance(instance):
     logger.info(f"⏭️ No notifications needed for {display_name} (stock: {available} {unit})")
     return False
 
+def notify_stock_change(instance):
+    """Stock alert checks for writes that bypass save(), such as the ledger's UPDATEs"""
+    try:
+        _notify_for_instance(instance)
+    except Exception as e:
+        logger.exception(f"❌ Error in notify_stock_change: {e}")
+
 # ---------------------- Signal Handlers ----------------------
 
 @receiver(pre_save, sender=MedicineInventory)
@@ -380,4 +388,11 @@ def inventory_post_delete(sender, instance, **kwargs):
     try:
         _notify_for_instance(instance)
     except Exception:
-        logger.exception("Error in inventory_post_delete signal")
\ No newline at end of file
+        logger.exception("Error in inventory_post_delete signal")
+
+# ---------------------- Cached Lists ----------------------
+
+from .models import Agegroup, RoutineFrequency, VaccineInterval, VaccineList
+from .views.vaccination_views import VACCINE_LIST_CACHE
+
+invalidate_on_change(VACCINE_LIST_CACHE, VaccineList, VaccineInterval, RoutineFrequency, Agegroup)
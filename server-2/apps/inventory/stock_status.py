@@ -0,0 +1,73 @@
+"""
+Stock status flags for the inventory stock tables, computed in the database.
+
+The medicine, commodity, first aid and antigen stock tables all classify a
+batch as expired / near expiry / out of stock / low stock. annotate_stock_status()
+adds those flags as annotations, filter_by_status() applies the table's filter
+tab, and stock_filter_counts() returns the tab badges from one conditional
+aggregate, so only the requested page is ever loaded.
+"""
+from datetime import timedelta
+from django.db.models import BooleanField, Case, Count, Q, Value, When
+from django.utils import timezone
+
+NEAR_EXPIRY_DAYS = 30
+STOCK_FILTERS = ('expired', 'near_expiry', 'low_stock', 'out_of_stock')
+
+
+def unit_threshold(unit_field, boxes=2, default=20):
+    """Low stock threshold that depends on whether the batch is counted in boxes"""
+    return Case(
+        When(**{f'{unit_field}__iexact': 'boxes'}, then=Value(boxes)),
+        default=Value(default),
+    )
+
+
+def _flag(condition):
+    return Case(When(condition, then=Value(True)), default=Value(False), output_field=BooleanField())
+
+
+def stock_status_conditions(avail_field, low_stock_threshold, today=None):
+    today = today or timezone.now().date()
+    expiry = 'inv_id__expiry_date'
+    return {
+        'is_expired': Q(**{f'{expiry}__lt': today}),
+        'is_near_expiry': Q(**{f'{expiry}__gt': today, f'{expiry}__lte': today + timedelta(days=NEAR_EXPIRY_DAYS)}),
+        'is_out_of_stock': Q(**{f'{avail_field}__lte': 0}),
+        'is_low_stock': Q(**{f'{avail_field}__gt': 0, f'{avail_field}__lte': low_stock_threshold}),
+    }
+
+
+def annotate_stock_status(queryset, avail_field, low_stock_threshold, today=None):
+    """
+    Adds is_expired, is_near_expiry, is_out_of_stock and is_low_stock.
+    low_stock_threshold is a number or an expression such as unit_threshold().
+    """
+    conditions = stock_status_conditions(avail_field, low_stock_threshold, today)
+    return queryset.annotate(**{name: _flag(condition) for name, condition in conditions.items()})
+
+
+def filter_by_status(queryset, stock_filter):
+    """Applies a filter tab to an annotated queryset; 'all' and unknown values pass through"""
+    if stock_filter in STOCK_FILTERS:
+        return queryset.filter(**{f'is_{stock_filter}': True})
+    return queryset
+
+
+def stock_filter_counts(queryset):
+    """
+    Badge counts for the filter tabs in one query. Low stock is only counted
+    for batches that have not expired, as the tables always have.
+    """
+    counts = queryset.aggregate(
+        total=Count('pk'),
+        out_of_stock=Count('pk', filter=Q(is_out_of_stock=True)),
+        low_stock=Count('pk', filter=Q(is_low_stock=True, is_expired=False)),
+        near_expiry=Count('pk', filter=Q(is_near_expiry=True)),
+        expired=Count('pk', filter=Q(is_expired=True)),
+    )
+    return {key: counts[key] for key in ('out_of_stock', 'low_stock', 'near_expiry', 'expired', 'total')}
+
+
+def combine_filter_counts(*counts):
+    return {key: sum(count[key] for count in counts) for key in counts[0]}
@@ -291,4 +291,311 @@
 # class ImmunizationSuppliesTransactionSerializer(serializers.ModelSerializer):
 #     class Meta:
 #         model = ImmunizationTransaction
-#         fields = '__all__'
\ No newline at end of file
+#         fields = '__all__'
+
+import threading
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from apps.inventory.models import (
+    Category, Medicinelist, Inventory, MedicineInventory,
+    VaccineList, VaccineStock, ImmunizationSupplies, ImmunizationStock,
+    MedicineTransactions, AntigenTransaction,
+)
+from apps.inventory.ledger import InsufficientStock, deduct, deduct_many, deduction
+from apps.inventory.quantities import parse_qty, stock_movements
+from apps.inventory.views.inventory_views import InventoryDeductBatchView
+from apps.inventory.views.medicine_views import MedicineStockTableView
+from apps.inventory.views.vaccination_views import CombinedStockTable, VaccineListView
+from utils.ids import allocate
+
+
+class StockStatusTableTest(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.medicine = Medicinelist.objects.create(
+            med_name='Paracetamol', cat=Category.objects.create(cat_type='Medicine', cat_name='Analgesic')
+        )
+
+    def _medicine_stock(self, avail, unit='pcs', expiry_in_days=365, archived=False):
+        inventory = Inventory.objects.create(
+            inv_type='Medicine', expiry_date=self.today + timedelta(days=expiry_in_days), is_Archived=archived
+        )
+        return MedicineInventory.objects.create(
+            inv_id=inventory, med_id=self.medicine, minv_qty=100, minv_qty_unit=unit, minv_pcs=10, minv_qty_avail=avail
+        )
+
+    def _get(self, view, **params):
+        return view.as_view()(APIRequestFactory().get('/', params)).data
+
+    def test_flags_filters_and_counts(self):
+        ok = self._medicine_stock(avail=50)
+        out = self._medicine_stock(avail=0)
+        low_pcs = self._medicine_stock(avail=20)
+        low_boxes = self._medicine_stock(avail=2, unit='Boxes')
+        near = self._medicine_stock(avail=50, expiry_in_days=30)
+        expired_low = self._medicine_stock(avail=5, expiry_in_days=-1)
+        self._medicine_stock(avail=0, archived=True)
+
+        data = self._get(MedicineStockTableView)
+        self.assertEqual(data['filter_counts'], {
+            'out_of_stock': 1, 'low_stock': 2, 'near_expiry': 1, 'expired': 1, 'total': 6,
+        })
+        self.assertEqual(
+            [row['id'] for row in data['results']],
+            sorted([ok.minv_id, out.minv_id, low_pcs.minv_id, low_boxes.minv_id, near.minv_id, expired_low.minv_id], reverse=True),
+        )
+
+        # The low stock tab also lists expired batches; only the badge excludes them
+        low = self._get(MedicineStockTableView, filter='low_stock')
+        self.assertEqual(
+            [row['id'] for row in low['results']], [expired_low.minv_id, low_boxes.minv_id, low_pcs.minv_id]
+        )
+        self.assertTrue(all(row['isLowStock'] for row in low['results']))
+        self.assertEqual([row['id'] for row in self._get(MedicineStockTableView, filter='near_expiry')['results']], [near.minv_id])
+
+    def test_page_queries_do_not_grow_with_inventory_size(self):
+        for _ in range(3):
+            self._medicine_stock(avail=50)
+        with CaptureQueriesContext(connection) as small:
+            self._get(MedicineStockTableView, page_size=2)
+
+        for _ in range(20):
+            self._medicine_stock(avail=50)
+        with CaptureQueriesContext(connection) as large:
+            data = self._get(MedicineStockTableView, page_size=2)
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(data['count'], 23)
+
+    def test_combined_table_pages_across_vaccines_and_supplies(self):
+        vaccine = VaccineList.objects.create(vac_type_choices='routine', vac_name='BCG')
+        supply = ImmunizationSupplies.objects.create(imz_name='Syringe')
+        keys = []
+        for avail in (0, 30):
+            stock = VaccineStock.objects.create(
+                inv_id=Inventory.objects.create(inv_type='Antigen', expiry_date=self.today + timedelta(days=365)),
+                vac_id=vaccine, solvent='doses', qty=10, dose_ml=2, vacStck_qty_avail=avail,
+            )
+            keys.append(('vaccine', stock.pk))
+        for avail in (1, 30):
+            stock = ImmunizationStock.objects.create(
+                inv_id=Inventory.objects.create(inv_type='Antigen', expiry_date=self.today + timedelta(days=365)),
+                imz_id=supply, imzStck_unit='boxes', imzStck_qty=3, imzStck_pcs=10, imzStck_avail=avail,
+            )
+            keys.append(('supply', stock.pk))
+
+        data = self._get(CombinedStockTable, page_size=3)
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(data['filter_counts'], {
+            'out_of_stock': 1, 'low_stock': 1, 'near_expiry': 0, 'expired': 0, 'total': 4,
+        })
+        # IDs descending across both tables, vaccines first on equal IDs
+        expected = sorted(keys, key=lambda key: (key[1], key[0]), reverse=True)[:3]
+        self.assertEqual([(row['type'], row['id']) for row in data['results']], expected)
+
+
+def _ledger_fixtures(medicine_avail=10, vaccine_avail=5):
+    medicine = Medicinelist.objects.create(
+        med_name='Amoxicillin', cat=Category.objects.create(cat_type='Medicine', cat_name='Antibiotic')
+    )
+    expiry = timezone.now().date() + timedelta(days=365)
+    medicine_stock = MedicineInventory.objects.create(
+        inv_id=Inventory.objects.create(inv_type='Medicine', expiry_date=expiry),
+        med_id=medicine, minv_qty=100, minv_qty_unit='pcs', minv_pcs=10, minv_qty_avail=medicine_avail,
+    )
+    vaccine_stock = VaccineStock.objects.create(
+        inv_id=Inventory.objects.create(inv_type='Antigen', expiry_date=expiry),
+        vac_id=VaccineList.objects.create(vac_type_choices='routine', vac_name='Pentavalent'),
+        solvent='doses', qty=10, dose_ml=2, vacStck_qty_avail=vaccine_avail,
+    )
+    return medicine_stock, vaccine_stock
+
+
+class StockLedgerTest(TestCase):
+    def setUp(self):
+        self.medicine_stock, self.vaccine_stock = _ledger_fixtures()
+
+    def test_deduct_updates_counters_and_records_transaction(self):
+        stock = deduct('medicine', self.medicine_stock.minv_id, 4, action='Wasted', adjust={'wasted': 4})
+
+        self.assertEqual((stock.minv_qty_avail, stock.wasted), (6, 4))
+        transaction_row = MedicineTransactions.objects.get(minv_id=self.medicine_stock)
+        self.assertEqual((transaction_row.mdt_qty, transaction_row.mdt_action), ('4 pcs', 'Wasted'))
+
+    def test_batch_is_all_or_nothing(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            deduct_many([
+                deduction('medicine', self.medicine_stock.minv_id, 3),
+                deduction('vaccine', self.vaccine_stock.vacStck_id, 6),
+            ])
+
+        self.assertEqual(raised.exception.available, 5)
+        self.medicine_stock.refresh_from_db()
+        self.assertEqual(self.medicine_stock.minv_qty_avail, 10)
+        self.assertFalse(MedicineTransactions.objects.exists())
+        self.assertFalse(AntigenTransaction.objects.exists())
+
+    def test_stale_copies_cannot_oversell(self):
+        stale = MedicineInventory.objects.get(pk=self.medicine_stock.pk)
+        deduct('medicine', stale.minv_id, 8)
+        # The caller still sees 10 available, but the ledger checks the row itself
+        with self.assertRaises(InsufficientStock):
+            deduct('medicine', stale.minv_id, 8)
+
+    def test_batch_endpoint(self):
+        def post(items):
+            request = APIRequestFactory().post('/', {'items': items}, format='json')
+            return InventoryDeductBatchView.as_view()(request)
+
+        response = post([
+            {'kind': 'medicine', 'stock_id': self.medicine_stock.minv_id, 'qty': 2},
+            {'kind': 'vaccine', 'stock_id': str(self.vaccine_stock.vacStck_id), 'qty': 1, 'action': 'Administered'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['new_available_stock'] for row in response.data['items']], [8, 4])
+        self.assertEqual(AntigenTransaction.objects.get().antt_qty, '1 dose/s')
+
+        response = post([{'kind': 'medicine', 'stock_id': self.medicine_stock.minv_id, 'qty': 50}])
+        self.assertEqual((response.status_code, response.data['available']), (400, 8))
+        self.assertEqual(post([{'kind': 'medicine', 'stock_id': 999999, 'qty': 1}]).status_code, 404)
+        self.assertEqual(post([{'kind': 'bandage', 'stock_id': 1, 'qty': 1}]).status_code, 400)
+
+
+class StockLedgerConcurrencyTest(TransactionTestCase):
+    WORKERS = 8
+    DEDUCTIONS_PER_WORKER = 5
+
+    def test_parallel_deductions_never_oversell(self):
+        medicine_stock, _ = _ledger_fixtures(medicine_avail=30)
+        results = []
+        start = threading.Barrier(self.WORKERS)
+
+        def worker():
+            start.wait()
+            try:
+                for _ in range(self.DEDUCTIONS_PER_WORKER):
+                    try:
+                        deduct('medicine', medicine_stock.minv_id, 1)
+                        results.append(True)
+                    except InsufficientStock:
+                        results.append(False)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.WORKERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        medicine_stock.refresh_from_db()
+        self.assertEqual(results.count(True), 30)
+        self.assertEqual(medicine_stock.minv_qty_avail, 0)
+        self.assertEqual(MedicineTransactions.objects.filter(minv_id=medicine_stock).count(), 30)
+
+
+class TransactionQuantityTest(TestCase):
+    def test_parse_qty(self):
+        self.assertEqual(parse_qty('10 pc/s'), (10, 'pcs'))
+        self.assertEqual(parse_qty('2 boxes (20 pcs)'), (2, 'boxes'))
+        self.assertEqual(parse_qty('1 dose/s'), (1, 'doses'))
+        self.assertEqual(parse_qty('3 Bottles'), (3, 'bottles'))
+        self.assertEqual(parse_qty('N/A'), (0, ''))
+
+    def test_save_fills_numeric_columns_and_movements_sum_them(self):
+        medicine_stock, _ = _ledger_fixtures(medicine_avail=0)
+        MedicineTransactions.objects.create(mdt_qty='2 boxes (20 pcs)', mdt_action='Added', minv_id=medicine_stock)
+        MedicineTransactions.objects.create(mdt_qty='5 pc/s', mdt_action='Deducted', minv_id=medicine_stock)
+        MedicineTransactions.objects.create(mdt_qty='1 pc/s', mdt_action='Wasted', minv_id=medicine_stock)
+
+        transaction_row = MedicineTransactions.objects.get(mdt_action='Added')
+        self.assertEqual((transaction_row.mdt_qty_num, transaction_row.mdt_unit), (2, 'boxes'))
+
+        today = timezone.localdate()
+        with CaptureQueriesContext(connection) as queries:
+            rows = stock_movements(
+                MedicineTransactions.objects.all(), 'minv_id', 'mdt', today, today, ('deducted', 'wasted')
+            )
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(
+            {key: rows[0][key] for key in ('stock_id', 'opening_in', 'received', 'dispensed', 'period_transactions')},
+            {'stock_id': medicine_stock.minv_id, 'opening_in': 0, 'received': 2, 'dispensed': 6, 'period_transactions': 3},
+        )
+
+
+class IdAllocatorTest(TestCase):
+    def test_ids_continue_existing_rows_and_keep_their_format(self):
+        medicine_stock, _ = _ledger_fixtures()
+        now = timezone.now()
+        base_id = f"TRNSMED{now.year % 100:02d}{now.month:02d}{now.day:02d}"
+        # Rows written before the counters existed; the text MAX() would pick ...0999
+        for number in (999, 1000):
+            MedicineTransactions.objects.create(
+                mdt_id=f"{base_id}{number:04d}", mdt_qty='1 pcs', mdt_action='Added', minv_id=medicine_stock
+            )
+
+        row = MedicineTransactions.objects.create(mdt_qty='1 pcs', mdt_action='Added', minv_id=medicine_stock)
+        self.assertEqual(row.mdt_id, f"{base_id}1001")
+        self.assertEqual(medicine_stock.inv_id.inv_id[:6], 'INVMED')
+        self.assertEqual(len(medicine_stock.inv_id.inv_id), len('INVMED2410') + 3)
+
+    def test_block_is_one_statement_and_rolls_back_with_the_caller(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(list(allocate('test', 3)), [1, 2, 3])
+            self.assertEqual(list(allocate('test', 2)), [4, 5])
+        self.assertEqual(len(queries), 3)  # The first allocation also creates the counter
+
+        try:
+            with transaction.atomic():
+                allocate('test', 10)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(list(allocate('test')), [6])
+        with self.assertRaises(ValueError):
+            allocate('test', 0)
+
+    def test_batch_deduction_bulk_inserts_transactions(self):
+        medicine_stock, vaccine_stock = _ledger_fixtures()
+        second = MedicineInventory.objects.create(
+            inv_id=Inventory.objects.create(inv_type='Medicine'), med_id=medicine_stock.med_id,
+            minv_qty=10, minv_qty_unit='pcs', minv_pcs=10, minv_qty_avail=10,
+        )
+        deduct_many([
+            deduction('medicine', medicine_stock.minv_id, 1),
+            deduction('medicine', second.minv_id, 2),
+            deduction('vaccine', vaccine_stock.vacStck_id, 1),
+        ])
+
+        ids = sorted(MedicineTransactions.objects.values_list('mdt_id', flat=True))
+        self.assertEqual([mdt_id[-4:] for mdt_id in ids], ['0001', '0002'])
+        self.assertEqual(MedicineTransactions.objects.get(minv_id=second).mdt_qty_num, 2)
+        self.assertTrue(AntigenTransaction.objects.get().antt_id.endswith('0001'))
+
+
+class CachedVaccineListTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        VaccineList.objects.create(vac_name='Bcg', vac_type_choices='Routine')
+
+    def _list(self):
+        return VaccineListView.as_view()(APIRequestFactory().get('/')).data
+
+    def test_list_is_cached_until_a_vaccine_changes(self):
+        self.assertEqual([row['vac_name'] for row in self._list()], ['Bcg'])
+        with CaptureQueriesContext(connection) as queries:
+            self._list()
+        self.assertEqual(len(queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            VaccineList.objects.create(vac_name='Hepatitis B', vac_type_choices='Routine')
+        self.assertEqual(len(self._list()), 2)
@@ -132,6 +132,9 @@ urlpatterns = [
      path('waste/vaccine/<int:vacStck_id>/', VaccineWasteView.as_view(), name='vaccine-waste'),
     path('waste/supply/<int:imzStck_id>/', SupplyWasteView.as_view(), name='supply-waste'),
 
+    # BATCH DEDUCTION
+    path('deduct/batch/', InventoryDeductBatchView.as_view(), name='inventory-deduct-batch'),
+
     # path('update-pending-medreq/<str:medreq_id>/',ConfirmAllPendingItemsView.as_view(), name='update-all medicine-request-pending'),
     
     # path('medreq-items-pending/<str:medreq_id>/', MedicineRequestPendingItemsTableView.as_view(), name='medicine_request-pending-details'),
@@ -2,6 +2,9 @@
 from rest_framework import generics
 from ..models import *
 from ..serializers.commodity_serializers import *
+from ..ledger import InsufficientStock, deduct
+from ..quantities import active_stock_counts, stock_movements
+from ..stock_status import annotate_stock_status, filter_by_status, stock_filter_counts, unit_threshold
 from django.shortcuts import get_object_or_404
 from rest_framework.response import Response
 from rest_framework import status
@@ -13,7 +16,6 @@ from rest_framework.pagination import PageNumberPagination
 from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
 from pagination import StandardResultsPagination
-import re
 
 
 class CommodityListView(generics.ListCreateAPIView):
@@ -118,140 +120,25 @@ class CommodityStockTableView(APIView):
                     Q(cinv_recevFrom__icontains=search_query)
                 )
             
-            # Calculate today's date for expiry comparisons
-            today = timezone.now().date()
-            
-            combined_data = []
-            filter_counts = {
-                'out_of_stock': 0,
-                'low_stock': 0,
-                'near_expiry': 0,
-                'expired': 0,
-                'total': 0
-            }
-            
-            # Process commodity stocks
-            for stock in commodity_stocks:
-                # Convert quantities to integers to avoid string operations
-                cinv_qty = int(stock.cinv_qty) if stock.cinv_qty else 0
-                cinv_pcs = int(stock.cinv_pcs) if stock.cinv_pcs else 1
-                cinv_qty_avail = int(stock.cinv_qty_avail) if stock.cinv_qty_avail else 0
-                
-                # Calculate total pieces
-                if stock.cinv_qty_unit and stock.cinv_qty_unit.lower() == "boxes":
-                    total_pcs = cinv_qty * cinv_pcs
-                else:
-                    total_pcs = cinv_qty
-                
-                # Calculate available stock
-                available_stock = cinv_qty_avail
-                
-                # Check expiry status
-                expiry_date = stock.inv_id.expiry_date if stock.inv_id else None
-                is_expired = expiry_date and expiry_date < today if expiry_date else False
-                
-                # Check near expiry (within 30 days)
-                is_near_expiry = False
-                if expiry_date and not is_expired:
-                    days_until_expiry = (expiry_date - today).days
-                    is_near_expiry = 0 < days_until_expiry <= 30
-                
-                # Check out of stock
-                is_out_of_stock = available_stock <= 0
-                
-                # Check low stock based on unit type (only if not out of stock)
-                is_low_stock = False
-                if not is_out_of_stock:  # Only check for low stock if there's some stock available
-                    if stock.cinv_qty_unit and stock.cinv_qty_unit.lower() == "boxes":
-                        # For boxes, low stock threshold is 2 boxes
-                        is_low_stock = available_stock <= 2
-                    else:
-                        # For pieces, low stock threshold is 20 pcs
-                        is_low_stock = available_stock <= 20
-                
-                # Update filter counts (only count non-archived items)
-                if not stock.inv_id.is_Archived if stock.inv_id else False:
-                    filter_counts['total'] += 1
-                    if is_out_of_stock:
-                        filter_counts['out_of_stock'] += 1
-                    if is_low_stock and not is_expired:
-                        filter_counts['low_stock'] += 1
-                    if is_near_expiry:
-                        filter_counts['near_expiry'] += 1
-                    if is_expired:
-                        filter_counts['expired'] += 1
-                
-                # Apply filter
-                if stock_filter != 'all':
-                    if stock_filter == 'expired' and not is_expired:
-                        continue
-                    elif stock_filter == 'near_expiry' and not is_near_expiry:
-                        continue
-                    elif stock_filter == 'low_stock' and not is_low_stock:
-                        continue
-                    elif stock_filter == 'out_of_stock' and not is_out_of_stock:
-                        continue
-                
-                # Calculate dispensed quantity
-                if stock.cinv_qty_unit and stock.cinv_qty_unit.lower() == "boxes":
-                    dispensed_qty = total_pcs - available_stock
-                    dispensed_display = f"{dispensed_qty - stock.wasted} pcs"
-                else:
-                    dispensed_qty = cinv_qty - available_stock
-                    dispensed_display = f"{dispensed_qty - stock.wasted} {stock.cinv_qty_unit}"
-                
-                # Get category - since CommodityList doesn't have cat field, we'll use a default or check if it exists
-                category = "N/A"
-                # If you have a category field in CommodityList, adjust this line accordingly
-                # For example: category = stock.com_id.category.cat_name if stock.com_id and stock.com_id.category else "N/A"
-                
-                item_data = {
-                    'type': 'commodity',
-                    'id': stock.cinv_id,
-                    'batchNumber': stock.inv_id.inv_id if stock.inv_id else "N/A",
-                    'category': category,  # Using the default category
-                    'item': {
-                        'com_name': stock.com_id.com_name if stock.com_id else "Unknown Commodity",
-                    },
-                    'qty': {
-                        'cinv_qty': cinv_qty,
-                        'cinv_pcs': cinv_pcs,
-                    },
-                    'cinv_qty_unit': stock.cinv_qty_unit,
-                    'recevFrom': stock.cinv_recevFrom or "OTHERS",
-                    'qty_used': dispensed_display,
-                    'wasted': f"{stock.wasted} {'pcs' if stock.cinv_qty_unit and stock.cinv_qty_unit.lower() == 'boxes' else stock.cinv_qty_unit}",  # Adjusted for boxes
-                    'availableStock': available_stock,
-                    'expiryDate': expiry_date.isoformat() if expiry_date else None,
-                    'inv_id': stock.inv_id.inv_id if stock.inv_id else None,
-                    'com_id': stock.com_id.com_id if stock.com_id else None,
-                    'cinv_id': stock.cinv_id,
-                    'qty_number': cinv_qty,
-                    'isArchived': stock.inv_id.is_Archived if stock.inv_id else False,
-                    'created_at': stock.created_at.isoformat() if stock.created_at else None,
-                    'isExpired': is_expired,
-                    'isNearExpiry': is_near_expiry,
-                    'isLowStock': is_low_stock,
-                    'isOutOfStock': is_out_of_stock
-                }
-                
-                combined_data.append(item_data)
-            
-            # Sort by ID descending
-            combined_data.sort(key=lambda x: x['id'], reverse=True)
+            # Status flags, the filter tab and the badge counts are all computed in SQL,
+            # so only the requested page is loaded
+            commodity_stocks = annotate_stock_status(commodity_stocks, 'cinv_qty_avail', unit_threshold('cinv_qty_unit'))
+            filter_counts = stock_filter_counts(commodity_stocks)
+            commodity_stocks = filter_by_status(commodity_stocks, stock_filter).order_by('-cinv_id')
             
             # Apply pagination
             paginator = self.pagination_class()
-            paginated_data = paginator.paginate_queryset(combined_data, request)
+            paginated_stocks = paginator.paginate_queryset(commodity_stocks, request)
             
-            if paginated_data is not None:
+            if paginated_stocks is not None:
                 # Create custom response with both paginated data and filter counts
-                response = paginator.get_paginated_response(paginated_data)
+                response = paginator.get_paginated_response([self.format_stock(stock) for stock in paginated_stocks])
                 # Add filter_counts to the response data
                 response_data = response.data
                 response_data['filter_counts'] = filter_counts
                 return Response(response_data)
             
+            combined_data = [self.format_stock(stock) for stock in commodity_stocks]
             return Response({
                 'success': True,
                 'data': combined_data,
@@ -264,6 +151,60 @@ class CommodityStockTableView(APIView):
                 'success': False,
                 'error': f'Error fetching commodity stock data: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def format_stock(self, stock):
+        """Table row for a CommodityInventory annotated by annotate_stock_status()"""
+        # Convert quantities to integers to avoid string operations
+        cinv_qty = int(stock.cinv_qty) if stock.cinv_qty else 0
+        cinv_pcs = int(stock.cinv_pcs) if stock.cinv_pcs else 1
+        available_stock = int(stock.cinv_qty_avail) if stock.cinv_qty_avail else 0
+        
+        # Calculate total pieces
+        if stock.cinv_qty_unit and stock.cinv_qty_unit.lower() == "boxes":
+            total_pcs = cinv_qty * cinv_pcs
+        else:
+            total_pcs = cinv_qty
+        
+        expiry_date = stock.inv_id.expiry_date if stock.inv_id else None
+        
+        # Calculate dispensed quantity
+        if stock.cinv_qty_unit and stock.cinv_qty_unit.lower() == "boxes":
+            dispensed_qty = total_pcs - available_stock
+            dispensed_display = f"{dispensed_qty - stock.wasted} pcs"
+        else:
+            dispensed_qty = cinv_qty - available_stock
+            dispensed_display = f"{dispensed_qty - stock.wasted} {stock.cinv_qty_unit}"
+        
+        return {
+            'type': 'commodity',
+            'id': stock.cinv_id,
+            'batchNumber': stock.inv_id.inv_id if stock.inv_id else "N/A",
+            'category': "N/A",  # CommodityList has no category field
+            'item': {
+                'com_name': stock.com_id.com_name if stock.com_id else "Unknown Commodity",
+            },
+            'qty': {
+                'cinv_qty': cinv_qty,
+                'cinv_pcs': cinv_pcs,
+            },
+            'cinv_qty_unit': stock.cinv_qty_unit,
+            'recevFrom': stock.cinv_recevFrom or "OTHERS",
+            'qty_used': dispensed_display,
+            'wasted': f"{stock.wasted} {'pcs' if stock.cinv_qty_unit and stock.cinv_qty_unit.lower() == 'boxes' else stock.cinv_qty_unit}",  # Adjusted for boxes
+            'availableStock': available_stock,
+            'expiryDate': expiry_date.isoformat() if expiry_date else None,
+            'inv_id': stock.inv_id.inv_id if stock.inv_id else None,
+            'com_id': stock.com_id.com_id if stock.com_id else None,
+            'cinv_id': stock.cinv_id,
+            'qty_number': cinv_qty,
+            'isArchived': stock.inv_id.is_Archived if stock.inv_id else False,
+            'created_at': stock.created_at.isoformat() if stock.created_at else None,
+            'isExpired': stock.is_expired,
+            'isNearExpiry': stock.is_near_expiry,
+            'isLowStock': stock.is_low_stock,
+            'isOutOfStock': stock.is_out_of_stock
+        }
+    
     # def auto_archive_expired_commodities(self):
     #     """Auto-archive commodities that expired more than 10 days ago and log transactions"""
     #     from datetime import timedelta
@@ -748,33 +689,28 @@ class CommodityDeduct(APIView):
                     'error': 'Invalid cinv_id or deduct_qty'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Fetch the medicine inventory
+            # Fetch the commodity inventory
             commodity_inventory = get_object_or_404(CommodityInventory, cinv_id=cinv_id)
             
-            if commodity_inventory.cinv_qty_avail < deduct_qty:
-                return Response({
-                    'error': 'Deduct quantity exceeds available stock'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Deduct the quantity
-            commodity_inventory.cinv_qty_avail -= deduct_qty
-            commodity_inventory.wasted += deduct_qty
-            commodity_inventory.updated_at = timezone.now()
-            commodity_inventory.save()
-            
             # Prepare quantity string for transaction
             if commodity_inventory.cinv_qty_unit and commodity_inventory.cinv_qty_unit.lower() == "boxes":
-                            qty_string = f"{deduct_qty} pc/s"
+                qty_string = f"{deduct_qty} pc/s"
             else:
                 qty_string = f"{deduct_qty} {commodity_inventory.cinv_qty_unit or 'units'}"
 
-            # Create transaction record
-            CommodityTransaction.objects.create(
-                comt_qty=qty_string,
-                comt_action=action,
-                cinv_id=commodity_inventory,
-                staff_id=staff_id if staff_id else None  # Set to None if not provided
-            )
+            # Deduct the quantity and record the transaction atomically
+            try:
+                commodity_inventory = deduct(
+                    'commodity', cinv_id, deduct_qty,
+                    action=action,
+                    qty_label=qty_string,
+                    adjust={'wasted': deduct_qty},
+                    staff=staff_id or None,
+                )
+            except InsufficientStock:
+                return Response({
+                    'error': 'Deduct quantity exceeds available stock'
+                }, status=status.HTTP_400_BAD_REQUEST)
             
             return Response({
                 'success': True,
@@ -815,6 +751,46 @@ class CommodityDeduct(APIView):
 
 # ============================ COMMODITY REPORT =====================
 
+# ==================COMMODITY REPORTS=======================
+COMMODITY_DEDUCTED_ACTIONS = ('deduct',)
+COMMODITY_DISPENSED_ACTIONS = ('deduct', 'wasted')
+
+
+def commodity_stock_movements(start_date, end_date, out_actions=COMMODITY_DEDUCTED_ACTIONS):
+    """stock_movements() for commodity stocks; returns (rows, {cinv_id: CommodityInventory})"""
+    rows = stock_movements(
+        CommodityTransaction.objects.all(), 'cinv_id', 'comt', start_date, end_date, out_actions
+    )
+    stocks = CommodityInventory.objects.select_related('com_id', 'inv_id').in_bulk(
+        [row['stock_id'] for row in rows]
+    )
+    return rows, stocks
+
+
+def commodity_pcs_per_box(cinv):
+    if cinv.cinv_qty_unit and cinv.cinv_qty_unit.lower() == "boxes":
+        return cinv.cinv_pcs or 1
+    return 1
+
+
+def commodity_stock_problem(row, cinv, start_date, end_date):
+    """Closing stock and expiry flags for one commodity_stock_movements() row"""
+    pcs_per_box = commodity_pcs_per_box(cinv)
+    opening_qty = row['opening_in'] * pcs_per_box - row['opening_out']
+    received_qty = row['received'] * pcs_per_box
+    closing_qty = opening_qty + received_qty - row['dispensed']
+    expiry_date = cinv.inv_id.expiry_date
+    near_expiry_threshold = end_date + timedelta(days=30)  # 1 month after end of current month
+    return {
+        'opening_qty': opening_qty,
+        'received_qty': received_qty,
+        'closing_qty': closing_qty,
+        'is_expired': start_date <= expiry_date <= end_date,
+        'is_out_of_stock': closing_qty <= 0,
+        'is_near_expiry': (end_date < expiry_date <= near_expiry_threshold) and closing_qty > 0,
+    }
+
+
 class CommoditySummaryMonthsAPIView(APIView):
     pagination_class = StandardResultsPagination
 
@@ -842,42 +818,17 @@ class CommoditySummaryMonthsAPIView(APIView):
                         'error': 'Invalid year format. Use YYYY or YYYY-MM.'
                     }, status=400)
 
-            # Get distinct months only
-            distinct_months = queryset.annotate(
-                month=TruncMonth('created_at')
-            ).values('month').distinct().order_by('-month')
+            # Distinct commodity stocks per month - EXCLUDE items that expired BEFORE the month
+            months = active_stock_counts(queryset, 'cinv_id')
 
             formatted_months = []
-            for item in distinct_months:
-                month_date = item['month']
-                if not month_date:
-                    continue
+            for month_date, total_items in months.items():
                 month_str = month_date.strftime('%Y-%m')
                 month_name = month_date.strftime('%B %Y')
 
                 if search_query and search_query not in month_name.lower():
                     continue
 
-                start_date = month_date.date()
-                last_day = monthrange(start_date.year, start_date.month)[1]
-                end_date = start_date.replace(day=last_day)
-
-                # Transactions within month - EXCLUDE expired items
-                month_transactions = queryset.filter(
-                    created_at__date__gte=start_date,
-                    created_at__date__lte=end_date
-                ).exclude(
-                    # Exclude items that expired BEFORE this month
-                    cinv_id__inv_id__expiry_date__lt=start_date
-                )
-
-                # Count distinct commodity+inventory combos for this month
-                # Only include items that are not expired (expiry during or after current month)
-                total_items = month_transactions.values(
-                    "cinv_id__com_id",
-                    "cinv_id__inv_id"
-                ).distinct().count()
-
                 formatted_months.append({
                     'month': month_str,
                     'month_name': month_name,
@@ -926,75 +877,16 @@ class MonthlyCommodityRecordsDetailAPIView(generics.ListAPIView):
 
         inventory_summary = []
 
-        # Get unique commodity + expiry_date + inv_id combos to avoid duplicates
-        com_expiry_inv_pairs = CommodityTransaction.objects.filter(
-            created_at__date__lte=end_of_month
-        ).values_list(
-            "cinv_id__com_id",
-            "cinv_id__inv_id__expiry_date",
-            "cinv_id__inv_id"
-        ).distinct()
-
-        # Track unique combinations to avoid duplicates
-        seen_combinations = set()
-
-        for com_id, expiry_date, inv_id in com_expiry_inv_pairs:
-            # Skip if expiry date is before the current month (already expired)
-            if expiry_date and expiry_date < start_of_month:
-                continue
-                
-            # Create a unique key for this combination
-            combo_key = (com_id, expiry_date, inv_id)
-            
-            # Skip if we've already processed this combination
-            if combo_key in seen_combinations:
-                continue
-                
-            seen_combinations.add(combo_key)
-
-            transactions = CommodityTransaction.objects.filter(
-                cinv_id__com_id=com_id,
-                cinv_id__inv_id__expiry_date=expiry_date,
-                cinv_id__inv_id=inv_id
-            ).order_by('created_at')
-
-            first_tx = transactions.select_related("cinv_id__com_id", "cinv_id__inv_id").first()
-            if not first_tx:
-                continue
-
-            unit = first_tx.cinv_id.cinv_qty_unit
-            pcs_per_box = first_tx.cinv_id.cinv_pcs if unit and unit.lower() == "boxes" else 1
+        rows, stocks = commodity_stock_movements(start_of_month, end_of_month, COMMODITY_DISPENSED_ACTIONS)
+        for row in rows:
+            cinv = stocks[row['stock_id']]
+            expiry_date = cinv.inv_id.expiry_date
 
-            # Opening stock before month start (added minus deducted)
-            opening_in = transactions.filter(
-                created_at__date__lt=start_of_month,
-                comt_action__icontains="added"
-            )
-            opening_out = transactions.filter(
-                created_at__date__lt=start_of_month
-            ).filter(
-                Q(comt_action__icontains="deduct") | Q(comt_action__icontains="wasted")
-            )
-            # For opening stock, multiply boxes for added quantities but not for deducted
-            opening_qty = sum(self._parse_qty(t, multiply_boxes=True) for t in opening_in) - sum(self._parse_qty(t, multiply_boxes=False) for t in opening_out)
-
-            # Received during the month (multiply boxes for received items)
-            received_qty = sum(self._parse_qty(t, multiply_boxes=True) for t in transactions.filter(
-                created_at__date__gte=start_of_month,
-                created_at__date__lte=end_of_month,
-                comt_action__icontains="added"
-            ))
-
-            # Dispensed during the month (DON'T multiply boxes for dispensed items)
-            dispensed_qty = sum(
-                self._parse_qty(t, multiply_boxes=False)
-                for t in transactions.filter(
-                    created_at__date__gte=start_of_month,
-                    created_at__date__lte=end_of_month
-                ).filter(
-                    Q(comt_action__icontains="deduct") | Q(comt_action__icontains="wasted")
-                )
-            )
+            # Boxes are multiplied out for added quantities but not for deducted ones
+            pcs_per_box = commodity_pcs_per_box(cinv)
+            opening_qty = row['opening_in'] * pcs_per_box - row['opening_out']
+            received_qty = row['received'] * pcs_per_box
+            dispensed_qty = row['dispensed']
 
             # Opening displayed includes received during the month
             display_opening = opening_qty + received_qty
@@ -1004,29 +896,23 @@ class MonthlyCommodityRecordsDetailAPIView(generics.ListAPIView):
             expired_this_month = (expiry_date and 
                                 start_of_month <= expiry_date <= end_of_month)
             
-            # Skip if there's no stock and it's not expiring this month
-            if (closing_qty <= 0 and 
-                (not expiry_date or expiry_date < start_of_month) and 
-                not expired_this_month and
-                not transactions.filter(created_at__date__gte=start_of_month, created_at__date__lte=end_of_month).exists()):
+            # Skip if there's no stock, no expiry date and no activity this month
+            if closing_qty <= 0 and not expiry_date and not row['period_transactions']:
                 continue
 
-            # Display unit as is (frontend will handle conversion)
-            display_unit = unit
-
             inventory_summary.append({
-                'com_name': first_tx.cinv_id.com_id.com_name,
+                'com_name': cinv.com_id.com_name,
                 'opening': display_opening,
                 'received': received_qty,
-                'pcs':first_tx.cinv_id.cinv_pcs,
-                'wasted': first_tx.cinv_id.wasted,
-                'receivedfrom': first_tx.cinv_id.cinv_recevFrom,
+                'pcs': cinv.cinv_pcs,
+                'wasted': cinv.wasted,
+                'receivedfrom': cinv.cinv_recevFrom,
                 'dispensed': dispensed_qty,
                 'closing': closing_qty,
-                'date_received': first_tx.created_at.date() if first_tx.created_at else None,
-                'unit': display_unit,
+                'date_received': row['first_transaction_at'].date(),
+                'unit': cinv.cinv_qty_unit,  # Display unit as is (frontend will handle conversion)
                 'expiry': expiry_date,
-                'received_from': first_tx.cinv_id.cinv_recevFrom,
+                'received_from': cinv.cinv_recevFrom,
                 'expired_this_month': expired_this_month,  # Added this field for consistency
             })
 
@@ -1038,25 +924,6 @@ class MonthlyCommodityRecordsDetailAPIView(generics.ListAPIView):
                 'total_items': len(inventory_summary)
             }
         })
-
-    def _parse_qty(self, transaction, multiply_boxes=False):
-        """Parse quantity number from transaction.comt_qty.
-        
-        Args:
-            multiply_boxes: Whether to multiply by pcs_per_box for box units
-                           (False for dispensed quantities)
-        """
-        match = re.search(r'\d+', str(transaction.comt_qty))
-        qty_num = int(match.group()) if match else 0
-
-        # Only multiply if it's a box unit AND we're supposed to multiply
-        if (multiply_boxes and 
-            transaction.cinv_id.cinv_qty_unit and 
-            transaction.cinv_id.cinv_qty_unit.lower() == "boxes"):
-            pcs_per_box = transaction.cinv_id.cinv_pcs or 1
-            qty_num *= pcs_per_box
-
-        return qty_num
     
     
     
@@ -1064,19 +931,6 @@ class MonthlyCommodityRecordsDetailAPIView(generics.ListAPIView):
 class CommodityExpiredOutOfStockSummaryAPIView(APIView):
     pagination_class = StandardResultsPagination
 
-    def _parse_qty(self, transaction, multiply_boxes=False):
-        """Extract numeric value from comt_qty and convert boxes to pieces if needed."""
-        match = re.search(r'\d+', str(transaction.comt_qty))
-        qty_num = int(match.group()) if match else 0
-        
-        if (multiply_boxes and 
-            transaction.cinv_id.cinv_qty_unit and 
-            transaction.cinv_id.cinv_qty_unit.lower() == "boxes"):
-            pcs_per_box = transaction.cinv_id.cinv_pcs or 1
-            qty_num *= pcs_per_box
-            
-        return qty_num
-
     def get(self, request):
         try:
             # Get distinct months from commodity transactions
@@ -1098,71 +952,28 @@ class CommodityExpiredOutOfStockSummaryAPIView(APIView):
                 start_date = month_date.date()
                 last_day = monthrange(start_date.year, start_date.month)[1]
                 end_date = start_date.replace(day=last_day)
-                near_expiry_threshold = end_date + timedelta(days=30)
-
-                # Get all commodity inventory items that were active up to this month
-                com_expiry_inv_pairs = CommodityTransaction.objects.filter(
-                    created_at__date__lte=end_date
-                ).values_list(
-                    "cinv_id__com_id",
-                    "cinv_id__inv_id__expiry_date",
-                    "cinv_id__inv_id"
-                ).distinct()
 
                 expired_count = 0
                 out_of_stock_count = 0
                 expired_out_of_stock_count = 0
                 near_expiry_count = 0
 
-                seen_combinations = set()
-
-                for com_id, expiry_date, inv_id in com_expiry_inv_pairs:
-                    # Create a unique key for this combination
-                    combo_key = (com_id, expiry_date, inv_id)
-                    if combo_key in seen_combinations:
-                        continue
-                    seen_combinations.add(combo_key)
-
+                # All commodity inventory items that were active up to this month
+                rows, stocks = commodity_stock_movements(start_date, end_date)
+                for row in rows:
+                    cinv = stocks[row['stock_id']]
                     # Skip if no expiry date (can't be expired or near expiry)
-                    if not expiry_date:
+                    if not cinv.inv_id.expiry_date:
                         continue
 
-                    # Skip if expired BEFORE current month
-                    if expiry_date < start_date:
-                        continue
-
-                    transactions = CommodityTransaction.objects.filter(
-                        cinv_id__com_id=com_id,
-                        cinv_id__inv_id__expiry_date=expiry_date,
-                        cinv_id__inv_id=inv_id
-                    ).order_by("created_at")
-
-                    # Calculate stock levels
-                    opening_in = transactions.filter(created_at__date__lt=start_date, comt_action__icontains="added")
-                    opening_out = transactions.filter(created_at__date__lt=start_date, comt_action__icontains="deduct")
-                    opening_qty = sum(self._parse_qty(t, multiply_boxes=True) for t in opening_in) - sum(self._parse_qty(t, multiply_boxes=False) for t in opening_out)
-
-                    monthly_transactions = transactions.filter(
-                        created_at__date__gte=start_date,
-                        created_at__date__lte=end_date
-                    )
-                    received_qty = sum(self._parse_qty(t, multiply_boxes=True) for t in monthly_transactions.filter(comt_action__icontains="added"))
-                    dispensed_qty = sum(self._parse_qty(t, multiply_boxes=False) for t in monthly_transactions.filter(comt_action__icontains="deduct"))
-
-                    closing_qty = opening_qty + received_qty - dispensed_qty
-
-                    # Check conditions
-                    is_expired = start_date <= expiry_date <= end_date
-                    is_out_of_stock = closing_qty <= 0
-                    is_near_expiry = (end_date < expiry_date <= near_expiry_threshold) and closing_qty > 0
-
-                    if is_expired and is_out_of_stock:
+                    problem = commodity_stock_problem(row, cinv, start_date, end_date)
+                    if problem['is_expired'] and problem['is_out_of_stock']:
                         expired_out_of_stock_count += 1
-                    elif is_expired:
+                    elif problem['is_expired']:
                         expired_count += 1
-                    elif is_out_of_stock:
+                    elif problem['is_out_of_stock']:
                         out_of_stock_count += 1
-                    elif is_near_expiry:
+                    elif problem['is_near_expiry']:
                         near_expiry_count += 1
 
                 total_problems = expired_count + out_of_stock_count + expired_out_of_stock_count + near_expiry_count
@@ -1203,20 +1014,6 @@ class CommodityExpiredOutOfStockSummaryAPIView(APIView):
 class MonthlyCommodityExpiredOutOfStockDetailAPIView(APIView):
     pagination_class = StandardResultsPagination
 
-    def _parse_qty(self, transaction, multiply_boxes=False):
-        """Extract numeric value from comt_qty and convert boxes to pieces if needed."""
-        match = re.search(r'\d+', str(transaction.comt_qty))
-        qty_num = int(match.group()) if match else 0
-        
-        # If it's a box unit AND we need to multiply, convert to pieces
-        if (multiply_boxes and 
-            transaction.cinv_id.cinv_qty_unit and 
-            transaction.cinv_id.cinv_qty_unit.lower() == "boxes"):
-            pcs_per_box = transaction.cinv_id.cinv_pcs or 1
-            qty_num *= pcs_per_box
-            
-        return qty_num
-
     def get(self, request, *args, **kwargs):
         month_str = self.kwargs['month']  # Format: YYYY-MM
         try:
@@ -1226,89 +1023,37 @@ class MonthlyCommodityExpiredOutOfStockDetailAPIView(APIView):
 
         start_date = datetime(year, month, 1).date()
         end_date = (start_date + relativedelta(months=1)) - timedelta(days=1)
-        near_expiry_threshold = end_date + timedelta(days=30)  # 1 month after end of current month
 
         expired_items = []
         out_of_stock_items = []
         expired_out_of_stock_items = []
         near_expiry_items = []  # New category for near expiry
 
-        # Get all commodity inventory items that were active up to this month
-        com_expiry_inv_pairs = CommodityTransaction.objects.filter(
-            created_at__date__lte=end_date
-        ).values_list(
-            "cinv_id__com_id",
-            "cinv_id__inv_id__expiry_date",
-            "cinv_id__inv_id"
-        ).distinct()
-
-        seen_combinations = set()
-
-        for com_id, expiry_date, inv_id in com_expiry_inv_pairs:
-            # Create a unique key for this combination
-            combo_key = (com_id, expiry_date, inv_id)
-            if combo_key in seen_combinations:
-                continue
-            seen_combinations.add(combo_key)
+        # All commodity inventory items that were active up to this month
+        rows, stocks = commodity_stock_movements(start_date, end_date)
+        for row in rows:
+            cinv = stocks[row['stock_id']]
+            expiry_date = cinv.inv_id.expiry_date
 
             # Skip if no expiry date
             if not expiry_date:
                 continue
 
-            # Skip if expired BEFORE current month
-            if expiry_date < start_date:
-                continue
-
-            try:
-                cinv = CommodityInventory.objects.get(
-                    com_id=com_id,
-                    inv_id__expiry_date=expiry_date,
-                    inv_id=inv_id
-                )
-            except CommodityInventory.DoesNotExist:
-                continue
-
-            transactions = CommodityTransaction.objects.filter(
-                cinv_id__com_id=com_id,
-                cinv_id__inv_id__expiry_date=expiry_date,
-                cinv_id__inv_id=inv_id
-            ).order_by("created_at")
-
-            # Get unit information
-            unit = cinv.cinv_qty_unit
-            pcs_per_box = cinv.cinv_pcs if unit and unit.lower() == "boxes" else 1
-
-            # Calculate stock levels - multiply boxes for added quantities
-            opening_in = transactions.filter(created_at__date__lt=start_date, comt_action__icontains="added")
-            opening_out = transactions.filter(created_at__date__lt=start_date, comt_action__icontains="deduct")
-            opening_qty = sum(self._parse_qty(t, multiply_boxes=True) for t in opening_in) - sum(self._parse_qty(t, multiply_boxes=False) for t in opening_out)
-
-            monthly_transactions = transactions.filter(
-                created_at__date__gte=start_date,
-                created_at__date__lte=end_date
-            )
-            # Multiply boxes for received items
-            received_qty = sum(self._parse_qty(t, multiply_boxes=True) for t in monthly_transactions.filter(comt_action__icontains="added"))
-            # Don't multiply boxes for dispensed items (they're already in pieces)
-            dispensed_qty = sum(self._parse_qty(t, multiply_boxes=False) for t in monthly_transactions.filter(comt_action__icontains="deduct"))
-
-            closing_qty = opening_qty + received_qty - dispensed_qty
-
-            # Check conditions
-            is_expired = start_date <= expiry_date <= end_date
-            is_out_of_stock = closing_qty <= 0
-            is_near_expiry = (end_date < expiry_date <= near_expiry_threshold) and closing_qty > 0
+            problem = commodity_stock_problem(row, cinv, start_date, end_date)
+            is_expired = problem['is_expired']
+            is_out_of_stock = problem['is_out_of_stock']
+            is_near_expiry = problem['is_near_expiry']
 
             item_data = {
                 'com_name': f"{cinv.com_id.com_name}",
                 'expiry_date': expiry_date.strftime('%Y-%m-%d') if expiry_date else 'No expiry',
                 'wasted':cinv.wasted,
                 'pcs':cinv.cinv_pcs,
-                'opening_stock': opening_qty,
-                'received': received_qty,
+                'opening_stock': problem['opening_qty'],
+                'received': problem['received_qty'],
                 'date_received': cinv.created_at.date() if cinv.created_at else None,
-                'dispensed': dispensed_qty,
-                'closing_stock': closing_qty,
+                'dispensed': row['dispensed'],
+                'closing_stock': problem['closing_qty'],
                 'unit': cinv.cinv_qty_unit,
                 'received_from': cinv.cinv_recevFrom,
                 'status': 'Expired' if is_expired else 'Out of Stock' if is_out_of_stock else 'Near Expiry' if is_near_expiry else 'Active'
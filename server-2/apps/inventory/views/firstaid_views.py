@@ -1,6 +1,9 @@
 from rest_framework import generics
 from ..models import *
 from ..serializers.firstaid_serializers import *
+from ..ledger import InsufficientStock, deduct
+from ..quantities import active_stock_counts, stock_movements
+from ..stock_status import annotate_stock_status, filter_by_status, stock_filter_counts
 from django.shortcuts import get_object_or_404
 from rest_framework.response import Response
 from rest_framework import status
@@ -9,7 +12,6 @@ from rest_framework.views import APIView
 from pagination import StandardResultsPagination
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
-import re
 from django.db.models.functions import TruncMonth
 from calendar import monthrange
 
@@ -104,134 +106,25 @@ class FirstAidStockTableView(APIView):
                     Q(inv_id__inv_id__icontains=search_query)
                 )
             
-            # Calculate today's date for expiry comparisons
-            today = timezone.now().date()
-            
-            combined_data = []
-            filter_counts = {
-                'out_of_stock': 0,
-                'low_stock': 0,
-                'near_expiry': 0,
-                'expired': 0,
-                'total': 0
-            }
-            
-            # Process first aid stocks
-            for stock in first_aid_stocks:
-                # Convert quantities to integers to avoid string operations
-                finv_qty = int(stock.finv_qty) if stock.finv_qty else 0
-                finv_pcs = int(stock.finv_pcs) if stock.finv_pcs else 1
-                finv_qty_avail = int(stock.finv_qty_avail) if stock.finv_qty_avail else 0
-                finv_used = int(stock.finv_used) if stock.finv_used else 0
-                
-                # Calculate total pieces
-                if stock.finv_qty_unit and stock.finv_qty_unit.lower() == "boxes":
-                    total_pcs = finv_qty * finv_pcs
-                else:
-                    total_pcs = finv_qty
-                
-                # Calculate available stock
-                available_stock = finv_qty_avail
-                
-                # Check expiry status
-                expiry_date = stock.inv_id.expiry_date if stock.inv_id else None
-                is_expired = expiry_date and expiry_date < today if expiry_date else False
-                
-                # Check near expiry (within 30 days)
-                is_near_expiry = False
-                if expiry_date and not is_expired:
-                    days_until_expiry = (expiry_date - today).days
-                    is_near_expiry = 0 < days_until_expiry <= 30
-                
-                # Check out of stock FIRST
-                is_out_of_stock = available_stock <= 0
-                
-                # Check low stock based on unit type (only if NOT out of stock)
-                is_low_stock = False
-                if not is_out_of_stock:
-                    if stock.finv_qty_unit and stock.finv_qty_unit.lower() == "boxes":
-                        # For boxes, low stock threshold is 2 boxes
-                        is_low_stock = available_stock <= 20
-                    else:
-                        # For pieces, low stock threshold is 20 pcs
-                        is_low_stock = available_stock <= 20
-                
-                # Update filter counts (only count non-archived items)
-                if not stock.inv_id.is_Archived if stock.inv_id else False:
-                    filter_counts['total'] += 1
-                    if is_out_of_stock:
-                        filter_counts['out_of_stock'] += 1
-                    elif is_low_stock and not is_expired:  # Only count as low stock if not out of stock and not expired
-                        filter_counts['low_stock'] += 1
-                    if is_near_expiry:
-                        filter_counts['near_expiry'] += 1
-                    if is_expired:
-                        filter_counts['expired'] += 1
-                
-                # Apply filter
-                if stock_filter != 'all':
-                    if stock_filter == 'expired' and not is_expired:
-                        continue
-                    elif stock_filter == 'near_expiry' and not is_near_expiry:
-                        continue
-                    elif stock_filter == 'low_stock' and not is_low_stock:
-                        continue
-                    elif stock_filter == 'out_of_stock' and not is_out_of_stock:
-                        continue
-                
-                # Calculate used quantity
-                if stock.finv_qty_unit and stock.finv_qty_unit.lower() == "boxes":
-                    used_qty = total_pcs - available_stock
-                    used_display = f"{used_qty - stock.wasted} pcs"
-                else:
-                    used_qty = finv_qty - available_stock
-                    used_display = f"{used_qty -stock.wasted} {stock.finv_qty_unit}"
-                
-                item_data = {
-                    'type': 'first_aid',
-                    'id': stock.finv_id,
-                    'batchNumber': stock.inv_id.inv_id if stock.inv_id else "N/A",
-                    'item': {
-                        'fa_name': stock.fa_id.fa_name if stock.fa_id else "Unknown First Aid",
-                    },
-                    'qty': {
-                        'finv_qty': finv_qty,
-                        'finv_pcs': finv_pcs,
-                    },
-                    'finv_qty_unit': stock.finv_qty_unit,
-                    'qty_used': used_display,
-                    'wasted': f"{stock.wasted} {'pcs' if stock.finv_qty_unit and stock.finv_qty_unit.lower() == 'boxes' else stock.finv_qty_unit}",  # Adjusted for boxes
-                    'availableStock': available_stock,
-                    'expiryDate': expiry_date.isoformat() if expiry_date else None,
-                    'inv_id': stock.inv_id.inv_id if stock.inv_id else None,
-                    'fa_id': stock.fa_id.fa_id if stock.fa_id else None,
-                    'finv_id': stock.finv_id,
-                    'qty_number': finv_qty,
-                    'isArchived': stock.inv_id.is_Archived if stock.inv_id else False,
-                    'created_at': stock.created_at.isoformat() if stock.created_at else None,
-                    'isExpired': is_expired,
-                    'isNearExpiry': is_near_expiry,
-                    'isLowStock': is_low_stock,
-                    'isOutOfStock': is_out_of_stock
-                }
-                
-                combined_data.append(item_data)
-            
-            # Sort by ID descending
-            combined_data.sort(key=lambda x: x['id'], reverse=True)
+            # Status flags, the filter tab and the badge counts are all computed in SQL,
+            # so only the requested page is loaded
+            first_aid_stocks = annotate_stock_status(first_aid_stocks, 'finv_qty_avail', 20)
+            filter_counts = stock_filter_counts(first_aid_stocks)
+            first_aid_stocks = filter_by_status(first_aid_stocks, stock_filter).order_by('-finv_id')
             
             # Apply pagination
             paginator = self.pagination_class()
-            paginated_data = paginator.paginate_queryset(combined_data, request)
+            paginated_stocks = paginator.paginate_queryset(first_aid_stocks, request)
             
-            if paginated_data is not None:
+            if paginated_stocks is not None:
                 # Create custom response with both paginated data and filter counts
-                response = paginator.get_paginated_response(paginated_data)
+                response = paginator.get_paginated_response([self.format_stock(stock) for stock in paginated_stocks])
                 # Add filter_counts to the response data
                 response_data = response.data
                 response_data['filter_counts'] = filter_counts
                 return Response(response_data)
             
+            combined_data = [self.format_stock(stock) for stock in first_aid_stocks]
             return Response({
                 'success': True,
                 'data': combined_data,
@@ -244,6 +137,58 @@ class FirstAidStockTableView(APIView):
                 'success': False,
                 'error': f'Error fetching first aid stock data: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def format_stock(self, stock):
+        """Table row for a FirstAidInventory annotated by annotate_stock_status()"""
+        # Convert quantities to integers to avoid string operations
+        finv_qty = int(stock.finv_qty) if stock.finv_qty else 0
+        finv_pcs = int(stock.finv_pcs) if stock.finv_pcs else 1
+        available_stock = int(stock.finv_qty_avail) if stock.finv_qty_avail else 0
+        
+        # Calculate total pieces
+        if stock.finv_qty_unit and stock.finv_qty_unit.lower() == "boxes":
+            total_pcs = finv_qty * finv_pcs
+        else:
+            total_pcs = finv_qty
+        
+        expiry_date = stock.inv_id.expiry_date if stock.inv_id else None
+        
+        # Calculate used quantity
+        if stock.finv_qty_unit and stock.finv_qty_unit.lower() == "boxes":
+            used_qty = total_pcs - available_stock
+            used_display = f"{used_qty - stock.wasted} pcs"
+        else:
+            used_qty = finv_qty - available_stock
+            used_display = f"{used_qty -stock.wasted} {stock.finv_qty_unit}"
+        
+        return {
+            'type': 'first_aid',
+            'id': stock.finv_id,
+            'batchNumber': stock.inv_id.inv_id if stock.inv_id else "N/A",
+            'item': {
+                'fa_name': stock.fa_id.fa_name if stock.fa_id else "Unknown First Aid",
+            },
+            'qty': {
+                'finv_qty': finv_qty,
+                'finv_pcs': finv_pcs,
+            },
+            'finv_qty_unit': stock.finv_qty_unit,
+            'qty_used': used_display,
+            'wasted': f"{stock.wasted} {'pcs' if stock.finv_qty_unit and stock.finv_qty_unit.lower() == 'boxes' else stock.finv_qty_unit}",  # Adjusted for boxes
+            'availableStock': available_stock,
+            'expiryDate': expiry_date.isoformat() if expiry_date else None,
+            'inv_id': stock.inv_id.inv_id if stock.inv_id else None,
+            'fa_id': stock.fa_id.fa_id if stock.fa_id else None,
+            'finv_id': stock.finv_id,
+            'qty_number': finv_qty,
+            'isArchived': stock.inv_id.is_Archived if stock.inv_id else False,
+            'created_at': stock.created_at.isoformat() if stock.created_at else None,
+            'isExpired': stock.is_expired,
+            'isNearExpiry': stock.is_near_expiry,
+            'isLowStock': stock.is_low_stock,
+            'isOutOfStock': stock.is_out_of_stock
+        }
+    
     
     # def auto_archive_expired_first_aid(self):
     #     """Auto-archive first aid items that expired more than 10 days ago and log transactions"""
@@ -715,18 +660,6 @@ class FirstAidDeduct(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             firstaid_inventory = get_object_or_404(FirstAidInventory, finv_id=finv_id)
-            current_avail = firstaid_inventory.finv_qty_avail or 0
-            
-            if deduct_qty > current_avail:
-                return Response({
-                    'error': 'Deduct quantity exceeds available stock.'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Update available quantity
-            firstaid_inventory.finv_qty_avail = current_avail - deduct_qty
-            firstaid_inventory.wasted = (firstaid_inventory.wasted or 0) + deduct_qty
-            firstaid_inventory.finv_used = (firstaid_inventory.finv_used or 0) + deduct_qty
-            firstaid_inventory.save()
             
             # Format quantity string for transaction
             if firstaid_inventory.finv_qty_unit and firstaid_inventory.finv_qty_unit.lower() == "boxes":
@@ -734,13 +667,19 @@ class FirstAidDeduct(APIView):
             else:
                 qty_str = f"{deduct_qty} {firstaid_inventory.finv_qty_unit or 'units'}"
             
-            # Create transaction record
-            FirstAidTransactions.objects.create(
-                fat_qty=qty_str,
-                fat_action=action,
-                finv_id=firstaid_inventory,
-                staff_id=staff_id if staff_id else None
-            )
+            # Update available quantity and record the transaction atomically
+            try:
+                deduct(
+                    'first_aid', finv_id, deduct_qty,
+                    action=action,
+                    qty_label=qty_str,
+                    adjust={'wasted': deduct_qty, 'finv_used': deduct_qty},
+                    staff=staff_id or None,
+                )
+            except InsufficientStock:
+                return Response({
+                    'error': 'Deduct quantity exceeds available stock.'
+                }, status=status.HTTP_400_BAD_REQUEST)
             
             return Response({
                 'success': True,
@@ -783,6 +722,26 @@ class FirstAidDeduct(APIView):
 
 # ==================FIRST AID REPORT=======================
 
+# ==================FIRST AID REPORTS=======================
+FIRSTAID_DEDUCTED_ACTIONS = ('deduct',)
+FIRSTAID_DISPENSED_ACTIONS = ('deducted', 'wasted')
+
+
+def firstaid_stock_movements(start_date, end_date, out_actions=FIRSTAID_DEDUCTED_ACTIONS):
+    """stock_movements() for first aid stocks; returns (rows, {finv_id: FirstAidInventory})"""
+    rows = stock_movements(
+        FirstAidTransactions.objects.all(), 'finv_id', 'fat', start_date, end_date, out_actions
+    )
+    stocks = FirstAidInventory.objects.select_related('fa_id', 'inv_id').in_bulk(
+        [row['stock_id'] for row in rows]
+    )
+    return rows, stocks
+
+
+def _is_boxes(finv):
+    return bool(finv.finv_qty_unit) and finv.finv_qty_unit.lower() == "boxes"
+
+      
 class FirstAidSummaryMonthsAPIView(APIView):
     pagination_class = StandardResultsPagination
 
@@ -810,44 +769,19 @@ class FirstAidSummaryMonthsAPIView(APIView):
                         'error': 'Invalid year format. Use YYYY or YYYY-MM.'
                     }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Get distinct months in queryset, sorted descending
-            distinct_months = queryset.annotate(
-                month=TruncMonth('created_at')
-            ).values('month').distinct().order_by('-month')
+            # Distinct first aid stocks per month, sorted descending - EXCLUDE items
+            # that expired BEFORE the month
+            months = active_stock_counts(queryset, 'finv_id')
 
             formatted_months = []
 
-            for item in distinct_months:
-                month_date = item['month']
-                if not month_date:
-                    continue
+            for month_date, total_items in months.items():
                 month_str = month_date.strftime('%Y-%m')
                 month_name = month_date.strftime('%B %Y')
 
                 if search_query and search_query not in month_name.lower():
                     continue
 
-                # Get the date range for this month
-                start_date = month_date.date()
-                from calendar import monthrange
-                last_day = monthrange(start_date.year, start_date.month)[1]
-                end_date = start_date.replace(day=last_day)
-
-                # Filter transactions for this month - EXCLUDE expired items
-                month_transactions = queryset.filter(
-                    created_at__date__gte=start_date,
-                    created_at__date__lte=end_date
-                ).exclude(
-                    # Exclude items that expired BEFORE this month
-                    finv_id__inv_id__expiry_date__lt=start_date
-                )
-
-                # Count distinct firstaid+inventory combos
-                total_items = month_transactions.values(
-                    "finv_id__fa_id",
-                    "finv_id__inv_id"
-                ).distinct().count()
-
                 formatted_months.append({
                     'month': month_str,
                     'month_name': month_name,
@@ -893,83 +827,16 @@ class MonthlyFirstAidRecordsDetailAPIView(generics.ListAPIView):
 
         inventory_summary = []
 
-        # Get unique first aid + expiry_date + inv_id combos to avoid duplicates
-        fa_expiry_inv_pairs = FirstAidTransactions.objects.filter(
-            created_at__date__lte=end_date
-        ).values_list(
-            "finv_id__fa_id",
-            "finv_id__inv_id__expiry_date",
-            "finv_id__inv_id"
-        ).distinct()
-
-        # Track unique combinations to avoid duplicates
-        seen_combinations = set()
-
-        for fa_id, expiry_date, inv_id in fa_expiry_inv_pairs:
-            # Skip if expiry date is before the current month (already expired)
-            if expiry_date and expiry_date < start_date:
-                continue
-                
-            # Create a unique key for this combination
-            combo_key = (fa_id, expiry_date, inv_id)
-            
-            # Skip if we've already processed this combination
-            if combo_key in seen_combinations:
-                continue
-                
-            seen_combinations.add(combo_key)
+        rows, stocks = firstaid_stock_movements(start_date, end_date, FIRSTAID_DISPENSED_ACTIONS)
+        for row in rows:
+            finv = stocks[row['stock_id']]
+            expiry_date = finv.inv_id.expiry_date
+            pcs_per_box = finv.finv_pcs if _is_boxes(finv) else 1
 
-            # Get the specific first aid inventory item
-            try:
-                finv = FirstAidInventory.objects.get(
-                    fa_id=fa_id,
-                    inv_id__expiry_date=expiry_date,
-                    inv_id=inv_id
-                )
-            except FirstAidInventory.DoesNotExist:
-                continue
-
-            transactions = FirstAidTransactions.objects.filter(
-                finv_id=finv.finv_id
-            ).order_by("created_at")
-
-            unit = finv.finv_qty_unit
-            pcs_per_box = finv.finv_pcs if unit and unit.lower() == "boxes" else 1
-
-            # Opening stock before start_date
-            opening_in = transactions.filter(
-                created_at__date__lt=start_date,
-                fat_action__icontains="added"
-            )
-            opening_out = transactions.filter(
-                Q(fat_action__icontains="deducted") | Q(fat_action__icontains="wasted"),
-                created_at__date__lt=start_date
-            )
-            opening_qty = (sum(self._parse_qty(t) for t in opening_in) -
-                         sum(self._parse_qty(t) for t in opening_out))
-
-            if unit and unit.lower() == "boxes":
-                opening_qty *= pcs_per_box
-
-            # Received during the month
-            monthly_transactions = transactions.filter(
-                created_at__date__gte=start_date,
-                created_at__date__lte=end_date,
-                fat_action__icontains="added"
-            )
-            received_qty = sum(self._parse_qty(t) for t in monthly_transactions)
-            if unit and unit.lower() == "boxes":
-                received_qty *= pcs_per_box
-
-            # Dispensed during the month
-            dispensed_qty = sum(
-                self._parse_qty(t) for t in transactions.filter(
-                    created_at__date__gte=start_date,
-                    created_at__date__lte=end_date
-                ).filter(
-                    Q(fat_action__icontains="deducted") | Q(fat_action__icontains="wasted")
-                )
-            )
+            # Opening stock before start_date, and received during the month
+            opening_qty = (row['opening_in'] - row['opening_out']) * pcs_per_box
+            received_qty = row['received'] * pcs_per_box
+            dispensed_qty = row['dispensed']
 
             # Calculate total stock available in the month
             # If no received during month but have opening, show opening as both opening and received
@@ -979,18 +846,11 @@ class MonthlyFirstAidRecordsDetailAPIView(generics.ListAPIView):
             closing_qty = total_available - dispensed_qty
 
             # Check if expired this month
-            expired_this_month = (finv.inv_id.expiry_date and 
-                                start_date <= finv.inv_id.expiry_date <= end_date)
-            
-            # REMOVED: Don't set closing to 0 for expired items
-            # if expired_this_month:
-            #     closing_qty = 0
-
-            if (closing_qty <= 0 and 
-                (not expiry_date or expiry_date < start_date) and 
-                not expired_this_month and
-                not monthly_transactions.exists() and
-                not transactions.filter(created_at__date__gte=start_date, created_at__date__lte=end_date).exists()):
+            expired_this_month = (expiry_date and 
+                                start_date <= expiry_date <= end_date)
+
+            # Skip if there's no stock, no expiry date and no activity this month
+            if closing_qty <= 0 and not expiry_date and not row['period_transactions']:
                 continue
 
 
@@ -1006,7 +866,7 @@ class MonthlyFirstAidRecordsDetailAPIView(generics.ListAPIView):
                 'dispensed': dispensed_qty,
                 'closing': closing_qty,
                 'unit': finv.finv_qty_unit,
-                'expiry': finv.inv_id.expiry_date.strftime('%Y-%m-%d') if finv.inv_id.expiry_date else None,
+                'expiry': expiry_date.strftime('%Y-%m-%d') if expiry_date else None,
                 'expired_this_month': expired_this_month,
             })
 
@@ -1018,30 +878,12 @@ class MonthlyFirstAidRecordsDetailAPIView(generics.ListAPIView):
                 'total_items': len(inventory_summary)
             }
         })
-
-    def _parse_qty(self, transaction):
-        """Extract numeric value from fat_qty."""
-        match = re.search(r'\d+', str(transaction.fat_qty))
-        return int(match.group()) if match else 0
     
     
 # First Aid Expired/Out-of-Stock Summary API View
 class FirstAidExpiredOutOfStockSummaryAPIView(APIView):
     pagination_class = StandardResultsPagination
 
-    def _parse_qty(self, transaction, multiply_boxes=False):
-        """Extract numeric value from fat_qty and convert boxes to pieces if needed."""
-        match = re.search(r'\d+', str(transaction.fat_qty))
-        qty_num = int(match.group()) if match else 0
-        
-        if (multiply_boxes and 
-            transaction.finv_id.finv_qty_unit and 
-            transaction.finv_id.finv_qty_unit.lower() == "boxes"):
-            pcs_per_box = transaction.finv_id.finv_pcs or 1
-            qty_num *= pcs_per_box
-            
-        return qty_num
-
     def get(self, request):
         try:
             # Get distinct months from first aid transactions
@@ -1065,56 +907,26 @@ class FirstAidExpiredOutOfStockSummaryAPIView(APIView):
                 end_date = start_date.replace(day=last_day)
                 near_expiry_threshold = end_date + timedelta(days=30)
 
-                # Get all first aid inventory items that were active up to this month
-                fa_expiry_inv_pairs = FirstAidTransactions.objects.filter(
-                    created_at__date__lte=end_date
-                ).values_list(
-                    "finv_id__fa_id",
-                    "finv_id__inv_id__expiry_date",
-                    "finv_id__inv_id"
-                ).distinct()
-
                 expired_count = 0
                 out_of_stock_count = 0
                 expired_out_of_stock_count = 0
                 near_expiry_count = 0
 
-                seen_combinations = set()
-
-                for fa_id, expiry_date, inv_id in fa_expiry_inv_pairs:
-                    # Create a unique key for this combination
-                    combo_key = (fa_id, expiry_date, inv_id)
-                    if combo_key in seen_combinations:
-                        continue
-                    seen_combinations.add(combo_key)
+                # All first aid inventory items that were active up to this month
+                rows, stocks = firstaid_stock_movements(start_date, end_date)
+                for row in rows:
+                    finv = stocks[row['stock_id']]
+                    expiry_date = finv.inv_id.expiry_date
 
                     # Skip if no expiry date (can't be expired or near expiry)
                     if not expiry_date:
                         continue
 
-                    # Skip if expired BEFORE current month
-                    if expiry_date < start_date:
-                        continue
-
-                    transactions = FirstAidTransactions.objects.filter(
-                        finv_id__fa_id=fa_id,
-                        finv_id__inv_id__expiry_date=expiry_date,
-                        finv_id__inv_id=inv_id
-                    ).order_by("created_at")
-
-                    # Calculate stock levels
-                    opening_in = transactions.filter(created_at__date__lt=start_date, fat_action__icontains="added")
-                    opening_out = transactions.filter(created_at__date__lt=start_date, fat_action__icontains="deduct")
-                    opening_qty = sum(self._parse_qty(t, multiply_boxes=True) for t in opening_in) - sum(self._parse_qty(t, multiply_boxes=False) for t in opening_out)
-
-                    monthly_transactions = transactions.filter(
-                        created_at__date__gte=start_date,
-                        created_at__date__lte=end_date
-                    )
-                    received_qty = sum(self._parse_qty(t, multiply_boxes=True) for t in monthly_transactions.filter(fat_action__icontains="added"))
-                    dispensed_qty = sum(self._parse_qty(t, multiply_boxes=False) for t in monthly_transactions.filter(fat_action__icontains="deduct"))
-
-                    closing_qty = opening_qty + received_qty - dispensed_qty
+                    # Added quantities of box stocks are counted in boxes
+                    pcs_per_box = (finv.finv_pcs or 1) if _is_boxes(finv) else 1
+                    opening_qty = row['opening_in'] * pcs_per_box - row['opening_out']
+                    received_qty = row['received'] * pcs_per_box
+                    closing_qty = opening_qty + received_qty - row['dispensed']
 
                     # Check conditions
                     is_expired = start_date <= expiry_date <= end_date
@@ -1170,11 +982,6 @@ class FirstAidExpiredOutOfStockSummaryAPIView(APIView):
 class MonthlyFirstAidExpiredOutOfStockDetailAPIView(APIView):
     pagination_class = StandardResultsPagination
 
-    def _parse_qty(self, transaction):
-        """Extract numeric value from fat_qty."""
-        match = re.search(r'\d+', str(transaction.fat_qty))
-        return int(match.group()) if match else 0
-
     def get(self, request, *args, **kwargs):
         month_str = self.kwargs['month']  # Format: YYYY-MM
         try:
@@ -1193,89 +1000,22 @@ class MonthlyFirstAidExpiredOutOfStockDetailAPIView(APIView):
         near_expiry_items = []
         low_stock_items = []
 
-        # Get all FIRST AID inventory items that were active up to this month
-        fa_expiry_inv_pairs = FirstAidTransactions.objects.filter(
-            created_at__date__lte=end_date
-        ).values_list(
-            "finv_id__fa_id",
-            "finv_id__inv_id__expiry_date",
-            "finv_id__inv_id"
-        ).distinct()
-
-        seen_combinations = set()
-
-        for fa_id, expiry_date, inv_id in fa_expiry_inv_pairs:
-            # Create a unique key for this combination
-            combo_key = (fa_id, expiry_date, inv_id)
-            if combo_key in seen_combinations:
-                continue
-            seen_combinations.add(combo_key)
+        # All FIRST AID inventory items that were active up to this month
+        rows, stocks = firstaid_stock_movements(start_date, end_date)
+        for row in rows:
+            finv = stocks[row['stock_id']]
+            expiry_date = finv.inv_id.expiry_date
 
             # Skip if no expiry date
             if not expiry_date:
                 continue
 
-            # Skip if expired BEFORE current month
-            if expiry_date < start_date:
-                continue
-
-            try:
-                finv = FirstAidInventory.objects.get(
-                    fa_id=fa_id,
-                    inv_id__expiry_date=expiry_date,
-                    inv_id=inv_id
-                )
-            except FirstAidInventory.DoesNotExist:
-                continue
-
-            transactions = FirstAidTransactions.objects.filter(
-                finv_id__fa_id=fa_id,
-                finv_id__inv_id__expiry_date=expiry_date,
-                finv_id__inv_id=inv_id
-            ).order_by("created_at")
-
-            # Get unit information
-            unit = finv.finv_qty_unit
-            pcs_per_box = finv.finv_pcs if unit and unit.lower() == "boxes" else 1
-
-            # Calculate opening stock (before start_date)
-            opening_in = transactions.filter(
-                created_at__date__lt=start_date,
-                fat_action__icontains="added"
-            )
-            opening_out = transactions.filter(
-                created_at__date__lt=start_date,
-                fat_action__icontains="deduct"
-            )
-            
-            # Calculate raw opening quantity
-            opening_qty = (sum(self._parse_qty(t) for t in opening_in) - 
-                          sum(self._parse_qty(t) for t in opening_out))
-            
-            # Convert boxes to pieces for opening stock
-            if unit and unit.lower() == "boxes":
-                opening_qty *= pcs_per_box
-
-            # Calculate received during the month
-            monthly_transactions = transactions.filter(
-                created_at__date__gte=start_date,
-                created_at__date__lte=end_date
-            )
-            
-            received_qty = sum(
-                self._parse_qty(t) 
-                for t in monthly_transactions.filter(fat_action__icontains="added")
-            )
-            
-            # Convert boxes to pieces for received stock
-            if unit and unit.lower() == "boxes":
-                received_qty *= pcs_per_box
-
-            # Calculate dispensed during the month (already in pieces)
-            dispensed_qty = sum(
-                self._parse_qty(t)
-                for t in monthly_transactions.filter(fat_action__icontains="deduct")
-            )
+            # Convert boxes to pieces for opening and received stock;
+            # dispensed is already in pieces
+            pcs_per_box = finv.finv_pcs if _is_boxes(finv) else 1
+            opening_qty = (row['opening_in'] - row['opening_out']) * pcs_per_box
+            received_qty = row['received'] * pcs_per_box
+            dispensed_qty = row['dispensed']
 
             # Calculate closing stock
             closing_qty = opening_qty + received_qty - dispensed_qty
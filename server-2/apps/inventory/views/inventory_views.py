@@ -6,6 +6,9 @@ from django.db.models import ProtectedError
 from rest_framework import viewsets
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import api_view
+from rest_framework.views import APIView
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from ..ledger import LEDGERS, InsufficientStock, deduct_many, deduction
 
 
 
@@ -57,4 +60,47 @@ class InventoryUpdateView(generics.RetrieveUpdateAPIView):
     def get_object(self):
        inv_id = self.kwargs.get('inv_id')
        obj = get_object_or_404(Inventory, inv_id = inv_id)
-       return obj
\ No newline at end of file
+       return obj
+
+# ====================STOCK DEDUCTIONS========================
+class InventoryDeductBatchView(APIView):
+    """
+    Deducts several stock lines in one request, all or nothing.
+    {"staff_id": ..., "items": [{"kind": "medicine", "stock_id": 12, "qty": 3, "action": "Deducted"}, ...]}
+    kind is one of medicine, commodity, first_aid, vaccine, supply.
+    """
+    def post(self, request):
+        items = request.data.get('items') or []
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'items must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            deductions = [
+                deduction(
+                    item.get('kind'), item.get('stock_id'), item.get('qty'),
+                    action=item.get('action') or 'Deducted',
+                )
+                for item in items
+            ]
+            stocks = deduct_many(deductions, staff=request.data.get('staff_id') or None)
+        except (ValueError, TypeError, ValidationError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except InsufficientStock as e:
+            return Response({
+                'error': str(e),
+                'kind': e.kind,
+                'stock_id': e.stock_id,
+                'available': e.available,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except ObjectDoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+        results = []
+        for item in deductions:
+            stock = stocks[(item['kind'], item['stock_id'])]
+            results.append({
+                'kind': item['kind'],
+                'stock_id': item['stock_id'],
+                'new_available_stock': getattr(stock, LEDGERS[item['kind']].avail_field),
+            })
+        return Response({'success': True, 'items': results}, status=status.HTTP_200_OK)
@@ -18,6 +18,8 @@ from calendar import monthrange
 from apps.healthProfiling.models   import *   
 from ..models import *
 from ..serializers.medicine_serializers import * 
+from ..ledger import InsufficientStock, deduct
+from ..stock_status import annotate_stock_status, filter_by_status, stock_filter_counts, unit_threshold
          
          
          
@@ -250,132 +252,29 @@ class MedicineStockTableView(APIView):
                     Q(minv_dsg_unit__icontains=search_query)
                 )
             
-            # Calculate today's date for expiry comparisons
-            today = timezone.now().date()
-            
-            combined_data = []
-            filter_counts = {
-                'out_of_stock': 0,
-                'low_stock': 0,
-                'near_expiry': 0,
-                'expired': 0,
-                'total': 0
-            }
-            
-            # Process medicine stocks
-            for stock in medicine_stocks:
-                # Calculate total pieces
-                if stock.minv_qty_unit.lower() == "boxes":
-                    total_pcs = stock.minv_qty * stock.minv_pcs
-                else:
-                    total_pcs = stock.minv_qty
-                
-                # Calculate available stock
-                available_stock = stock.minv_qty_avail
-                
-                # Check expiry status
-                expiry_date = stock.inv_id.expiry_date if stock.inv_id else None
-                is_expired = expiry_date and expiry_date < today if expiry_date else False
-                
-                # Check near expiry (within 30 days)
-                is_near_expiry = False
-                if expiry_date and not is_expired:
-                    days_until_expiry = (expiry_date - today).days
-                    is_near_expiry = 0 < days_until_expiry <= 30
-                
-                # Check out of stock FIRST
-                is_out_of_stock = available_stock <= 0
-                
-                # Check low stock based on unit type (only if NOT out of stock)
-                is_low_stock = False
-                if not is_out_of_stock:
-                    if stock.minv_qty_unit.lower() == "boxes":
-                        # For boxes, low stock threshold is 2 boxes
-                        is_low_stock = available_stock <= 2
-                    else:
-                        # For pieces, low stock threshold is 20 pcs
-                        is_low_stock = available_stock <= 20
-                
-                # Update filter counts (only count non-archived items)
-                if not stock.inv_id.is_Archived if stock.inv_id else False:
-                    filter_counts['total'] += 1
-                    if is_out_of_stock:
-                        filter_counts['out_of_stock'] += 1
-                    elif is_low_stock and not is_expired:  # Only count as low stock if not out of stock and not expired
-                        filter_counts['low_stock'] += 1
-                    if is_near_expiry:
-                        filter_counts['near_expiry'] += 1
-                    if is_expired:
-                        filter_counts['expired'] += 1
-                
-                # Apply filter
-                if stock_filter != 'all':
-                    if stock_filter == 'expired' and not is_expired:
-                        continue
-                    elif stock_filter == 'near_expiry' and not is_near_expiry:
-                        continue
-                    elif stock_filter == 'low_stock' and not is_low_stock:
-                        continue
-                    elif stock_filter == 'out_of_stock' and not is_out_of_stock:
-                        continue
-                
-                # Calculate used quantity
-                if stock.minv_qty_unit.lower() == "boxes":
-                    used_qty = total_pcs - available_stock
-                    used_display = f"{used_qty-stock.wasted} pcs"
-                else:
-                    used_qty = stock.minv_qty - available_stock
-                    used_display = f"{used_qty-stock.wasted} {stock.minv_qty_unit}"
-                
-                item_data = {
-                    'type': 'medicine',
-                    'id': stock.minv_id,
-                    'batchNumber': stock.inv_id.inv_id if stock.inv_id else "N/A",
-                    'category': stock.med_id.cat.cat_name if stock.med_id and stock.med_id.cat else "N/A",
-                    'item': {
-                        'medicineName': stock.med_id.med_name if stock.med_id else "Unknown Medicine",
-                        'dosage': stock.med_id.med_dsg,
-                        'dsgUnit': stock.med_id.med_dsg_unit,
-                        'form': stock.med_id.med_form,
-                    },
-                    'qty': {
-                        'qty': stock.minv_qty,
-                        'pcs': stock.minv_pcs,
-                    },
-                    'minv_qty_unit': stock.minv_qty_unit,
-                    'qty_used': used_display,
-                    'wasted': f"{stock.wasted} {'pcs' if stock.minv_qty_unit and stock.minv_qty_unit.lower() == 'boxes' else stock.minv_qty_unit}",  # Adjusted for boxes
-                    'availableStock': available_stock,
-                    'expiryDate': expiry_date.isoformat() if expiry_date else None,
-                    'inv_id': stock.inv_id.inv_id if stock.inv_id else None,
-                    'med_id': stock.med_id.med_id if stock.med_id else None,
-                    'minv_id': stock.minv_id,
-                    'qty_number': stock.minv_qty,
-                    'isArchived': stock.inv_id.is_Archived if stock.inv_id else False,
-                    'created_at': stock.created_at.isoformat() if stock.created_at else None,
-                    'isExpired': is_expired,
-                    'isNearExpiry': is_near_expiry,
-                    'isLowStock': is_low_stock,
-                    'isOutOfStock': is_out_of_stock
-                }
-                
-                combined_data.append(item_data)
-            
-            # Sort by ID descending
-            combined_data.sort(key=lambda x: x['id'], reverse=True)
+            # Status flags, the filter tab and the badge counts are all computed in SQL,
+            # so only the requested page is loaded
+            medicine_stocks = annotate_stock_status(
+                medicine_stocks, 'minv_qty_avail', unit_threshold('minv_qty_unit')
+            )
+            filter_counts = stock_filter_counts(medicine_stocks)
+            medicine_stocks = filter_by_status(medicine_stocks, stock_filter).select_related(
+                'med_id__cat'
+            ).order_by('-minv_id')
             
             # Apply pagination
             paginator = self.pagination_class()
-            paginated_data = paginator.paginate_queryset(combined_data, request)
+            paginated_stocks = paginator.paginate_queryset(medicine_stocks, request)
             
-            if paginated_data is not None:
+            if paginated_stocks is not None:
                 # Create custom response with both paginated data and filter counts
-                response = paginator.get_paginated_response(paginated_data)
+                response = paginator.get_paginated_response([self.format_stock(stock) for stock in paginated_stocks])
                 # Add filter_counts to the response data
                 response_data = response.data
                 response_data['filter_counts'] = filter_counts
                 return Response(response_data)
             
+            combined_data = [self.format_stock(stock) for stock in medicine_stocks]
             return Response({
                 'success': True,
                 'data': combined_data,
@@ -388,6 +287,58 @@ class MedicineStockTableView(APIView):
                 'success': False,
                 'error': f'Error fetching medicine stock data: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def format_stock(self, stock):
+        """Table row for a MedicineInventory annotated by annotate_stock_status()"""
+        # Calculate total pieces
+        if stock.minv_qty_unit.lower() == "boxes":
+            total_pcs = stock.minv_qty * stock.minv_pcs
+        else:
+            total_pcs = stock.minv_qty
+        
+        available_stock = stock.minv_qty_avail
+        expiry_date = stock.inv_id.expiry_date if stock.inv_id else None
+        
+        # Calculate used quantity
+        if stock.minv_qty_unit.lower() == "boxes":
+            used_qty = total_pcs - available_stock
+            used_display = f"{used_qty-stock.wasted} pcs"
+        else:
+            used_qty = stock.minv_qty - available_stock
+            used_display = f"{used_qty-stock.wasted} {stock.minv_qty_unit}"
+        
+        return {
+            'type': 'medicine',
+            'id': stock.minv_id,
+            'batchNumber': stock.inv_id.inv_id if stock.inv_id else "N/A",
+            'category': stock.med_id.cat.cat_name if stock.med_id and stock.med_id.cat else "N/A",
+            'item': {
+                'medicineName': stock.med_id.med_name if stock.med_id else "Unknown Medicine",
+                'dosage': stock.med_id.med_dsg,
+                'dsgUnit': stock.med_id.med_dsg_unit,
+                'form': stock.med_id.med_form,
+            },
+            'qty': {
+                'qty': stock.minv_qty,
+                'pcs': stock.minv_pcs,
+            },
+            'minv_qty_unit': stock.minv_qty_unit,
+            'qty_used': used_display,
+            'wasted': f"{stock.wasted} {'pcs' if stock.minv_qty_unit and stock.minv_qty_unit.lower() == 'boxes' else stock.minv_qty_unit}",  # Adjusted for boxes
+            'availableStock': available_stock,
+            'expiryDate': expiry_date.isoformat() if expiry_date else None,
+            'inv_id': stock.inv_id.inv_id if stock.inv_id else None,
+            'med_id': stock.med_id.med_id if stock.med_id else None,
+            'minv_id': stock.minv_id,
+            'qty_number': stock.minv_qty,
+            'isArchived': stock.inv_id.is_Archived if stock.inv_id else False,
+            'created_at': stock.created_at.isoformat() if stock.created_at else None,
+            'isExpired': stock.is_expired,
+            'isNearExpiry': stock.is_near_expiry,
+            'isLowStock': stock.is_low_stock,
+            'isOutOfStock': stock.is_out_of_stock
+        }
+    
     # def auto_archive_expired_medicines(self):
     #     """Auto-archive medicines that expired more than 10 days ago and log transactions"""
     #     from datetime import timedelta
@@ -891,30 +842,25 @@ class MedicineDeduct(APIView):
             # Fetch the medicine inventory
             medicine_inventory = get_object_or_404(MedicineInventory, minv_id=minv_id)
             
-            if medicine_inventory.minv_qty_avail < deduct_qty:
-                return Response({
-                    'error': 'Deduct quantity exceeds available stock'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Deduct the quantity
-            medicine_inventory.minv_qty_avail -= deduct_qty
-            medicine_inventory.wasted += deduct_qty
-            medicine_inventory.updated_at = timezone.now()
-            medicine_inventory.save()
-            
             # Prepare quantity string for transaction
             if medicine_inventory.minv_qty_unit and medicine_inventory.minv_qty_unit.lower() == "boxes":
-                            qty_string = f"{deduct_qty} pc/s"
+                qty_string = f"{deduct_qty} pc/s"
             else:
                 qty_string = f"{deduct_qty} {medicine_inventory.minv_qty_unit or 'units'}"
 
-            # Create transaction record
-            MedicineTransactions.objects.create(
-                mdt_qty=qty_string,
-                mdt_action=action,
-                minv_id=medicine_inventory,
-                staff_id=staff_id if staff_id else None  # Set to None if not provided
-            )
+            # Deduct the quantity and record the transaction atomically
+            try:
+                medicine_inventory = deduct(
+                    'medicine', minv_id, deduct_qty,
+                    action=action,
+                    qty_label=qty_string,
+                    adjust={'wasted': deduct_qty},
+                    staff=staff_id or None,
+                )
+            except InsufficientStock:
+                return Response({
+                    'error': 'Deduct quantity exceeds available stock'
+                }, status=status.HTTP_400_BAD_REQUEST)
             
             return Response({
                 'success': True,
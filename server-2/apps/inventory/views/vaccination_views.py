@@ -12,11 +12,16 @@ from django.db.models.functions import TruncMonth
 from dateutil.relativedelta import relativedelta
 from datetime import datetime, timedelta
 from calendar import monthrange
-import re
-from django.db.models import Q
+from django.db.models import Case, Q, Value, When
 from pagination import *
 from apps.inventory.serializers.vaccine_serializers import *
 from apps.vaccination.models import *
+from utils.cache import CachedListMixin
+from ..ledger import InsufficientStock, deduct
+from ..quantities import action_sum
+from ..stock_status import (
+    annotate_stock_status, combine_filter_counts, filter_by_status, stock_filter_counts
+)
 
 # =======================AGE GROUP================================#
 
@@ -254,8 +259,11 @@ class ImmunizationStockCreate(APIView):
 
 
 # =======================VACCINES================================#
-class VaccineListView(generics.ListCreateAPIView):
+VACCINE_LIST_CACHE = 'vaccine_list'
+
+class VaccineListView(CachedListMixin, generics.ListCreateAPIView):
     serializer_class = VacccinationListSerializer
+    cache_namespace = VACCINE_LIST_CACHE
     queryset = VaccineList.objects.all().order_by('-updated_at')
 
     def create(self, request, *args, **kwargs):
@@ -662,249 +670,40 @@ class CombinedStockTable(APIView):
                     Q(batch_number__icontains=search_query)
                 )
             
-            # Calculate today's date for expiry comparisons
-            today = timezone.now().date()
-            
-            combined_data = []
-            filter_counts = {
-                'out_of_stock': 0,
-                'low_stock': 0,
-                'near_expiry': 0,
-                'expired': 0,
-                'total': 0
-            }
-            
-            # Process vaccine stocks
-            for stock in vaccine_stocks:
-                doses_per_vial = stock.dose_ml if stock.dose_ml else 1
-                total_doses = doses_per_vial * stock.qty
-                
-                # Calculate available stock
-                if stock.solvent and stock.solvent.lower() == "diluent":
-                    available_stock = stock.vacStck_qty_avail
-                    # For diluent, low stock threshold is 10 containers
-                    low_stock_threshold = 20
-                else:
-                    available_stock = stock.vacStck_qty_avail
-                    # For regular vaccines, low stock threshold is 10 vials
-                    low_stock_threshold = 20
-                
-                # Check expiry status
-                expiry_date = stock.inv_id.expiry_date if stock.inv_id else None
-                is_expired = expiry_date and expiry_date < today if expiry_date else False
-                
-                # Check near expiry (within 30 days)
-                is_near_expiry = False
-                if expiry_date and not is_expired:
-                    days_until_expiry = (expiry_date - today).days
-                    is_near_expiry = 0 < days_until_expiry <= 30
-                
-                # Check out of stock FIRST
-                is_out_of_stock = available_stock <= 0
-                
-                # Check low stock based on unit type (only if NOT out of stock)
-                is_low_stock = False
-                if not is_out_of_stock:
-                    is_low_stock = available_stock <= low_stock_threshold
-                
-                # Update filter counts (only count non-archived items)
-                if not stock.inv_id.is_Archived if stock.inv_id else False:
-                    filter_counts['total'] += 1
-                    if is_out_of_stock:
-                        filter_counts['out_of_stock'] += 1
-                    elif is_low_stock and not is_expired:  # Only count as low stock if not out of stock and not expired
-                        filter_counts['low_stock'] += 1
-                    if is_near_expiry:
-                        filter_counts['near_expiry'] += 1
-                    if is_expired:
-                        filter_counts['expired'] += 1
-                
-                # Apply filter
-                if stock_filter != 'all':
-                    if stock_filter == 'expired' and not is_expired:
-                        continue
-                    elif stock_filter == 'near_expiry' and not is_near_expiry:
-                        continue
-                    elif stock_filter == 'low_stock' and not is_low_stock:
-                        continue
-                    elif stock_filter == 'out_of_stock' and not is_out_of_stock:
-                        continue
-                
-                if stock.solvent and stock.solvent.lower() == "diluent":
-                    # Diluent handling
-                    # Diluent handling
-                    # Calculate used containers: total containers - available_stock - wasted_dose
-                    used_qty = stock.qty - available_stock - (stock.wasted_dose or 0)
-                    used_qty = max(0, used_qty)  # Prevent negative values
-                    item_data = {
-                        'type': 'vaccine',
-                        'id': stock.vacStck_id,
-                        'batchNumber': stock.batch_number,
-                        'category': 'Vaccine',
-                        'item': {
-                            'antigen': stock.vac_id.vac_name if stock.vac_id else "Unknown Vaccine",
-                            'dosage': stock.dose_ml if hasattr(stock, 'dose_ml') else None,
-                            'unit': 'ml',
-                        },
-                        'qty': f"{stock.qty or 0} container/s",
-                        'administered': f"{used_qty} container/s",
-                        'wastedDose': f"{str(stock.wasted_dose or 0)} container/s",
-                        'availableStock': available_stock,
-                        'expiryDate': expiry_date.isoformat() if expiry_date else None,
-                        'inv_id': stock.inv_id.inv_id if stock.inv_id else None,
-                        'solvent': stock.solvent,
-                        'vacStck_id': stock.vacStck_id,
-                        'vac_id': stock.vac_id.vac_id if stock.vac_id else None,
-                        'qty_number': stock.qty,
-                        'isArchived': stock.inv_id.is_Archived if stock.inv_id else False,
-                        'created_at': stock.created_at.isoformat() if stock.created_at else None,
-                        'isExpired': is_expired,
-                        'isNearExpiry': is_near_expiry,
-                        'isLowStock': is_low_stock,
-                        'isOutOfStock': is_out_of_stock
-                    }
-                else:
-                    # Regular vaccine handling
-                    # Calculate used doses: total_doses - available_stock - wasted_dose
-                    used_qty = total_doses - available_stock - (stock.wasted_dose or 0)
-                    used_qty = max(0, used_qty)  # Prevent negative values
-                    item_data = {
-                        'type': 'vaccine',
-                        'id': stock.vacStck_id,
-                        'batchNumber': stock.batch_number,
-                        'category': 'Vaccine',
-                        'item': {
-                            'antigen': stock.vac_id.vac_name if stock.vac_id else "Unknown Vaccine",
-                            'dosage': stock.dose_ml,
-                            'unit': 'doses',
-                        },
-                        'qty': f"{stock.qty} vials ({total_doses} dose/s)",
-                        'administered': f"{used_qty} dose/s",
-                        'wastedDose': f"{str(stock.wasted_dose or 0)} dose/s",
-                        'availableStock': available_stock,
-                        'expiryDate': expiry_date.isoformat() if expiry_date else None,
-                        'solvent': stock.solvent,
-                        'inv_id': stock.inv_id.inv_id if stock.inv_id else None,
-                        'dose_ml': stock.dose_ml,
-                        'vacStck_id': stock.vacStck_id,
-                        'dosesPerVial': doses_per_vial,
-                        'vac_id': stock.vac_id.vac_id if stock.vac_id else None,
-                        'qty_number': stock.qty,
-                        'isArchived': stock.inv_id.is_Archived if stock.inv_id else False,
-                        'created_at': stock.created_at.isoformat() if stock.created_at else None,
-                        'isExpired': is_expired,
-                        'isNearExpiry': is_near_expiry,
-                        'isLowStock': is_low_stock,
-                        'isOutOfStock': is_out_of_stock
-                    }
-                
-                combined_data.append(item_data)
-            
-            # Process immunization supplies
-            for stock in immunization_stocks:
-                total_pcs = stock.imzStck_qty * stock.imzStck_pcs
-                
-                if stock.imzStck_unit == "pcs":
-                    qty_display = f"{stock.imzStck_qty} pc/s"
-                    # For pieces, low stock threshold is 20 pcs
-                    low_stock_threshold = 20
-                else:
-                    qty_display = f"{stock.imzStck_qty} boxes ({total_pcs} pcs)"
-                    # For boxes, low stock threshold is 2 boxes
-                    low_stock_threshold = 2
-                
-                # Calculate available stock
-                available_stock = stock.imzStck_avail
-                
-                # Check expiry status
-                expiry_date = stock.inv_id.expiry_date if stock.inv_id else None
-                is_expired = expiry_date and expiry_date < today if expiry_date else False
-                
-                # Check near expiry (within 30 days)
-                is_near_expiry = False
-                if expiry_date and not is_expired:
-                    days_until_expiry = (expiry_date - today).days
-                    is_near_expiry = 0 < days_until_expiry <= 30
-                
-                # Check out of stock FIRST
-                is_out_of_stock = available_stock <= 0
-                
-                # Check low stock based on unit type (only if NOT out of stock)
-                is_low_stock = False
-                if not is_out_of_stock:
-                    is_low_stock = available_stock <= low_stock_threshold
-                
-                # Update filter counts (only count non-archived items)
-                if not stock.inv_id.is_Archived if stock.inv_id else False:
-                    filter_counts['total'] += 1
-                    if is_out_of_stock:
-                        filter_counts['out_of_stock'] += 1
-                    elif is_low_stock and not is_expired:  # Only count as low stock if not out of stock and not expired
-                        filter_counts['low_stock'] += 1
-                    if is_near_expiry:
-                        filter_counts['near_expiry'] += 1
-                    if is_expired:
-                        filter_counts['expired'] += 1
-                
-                # Apply filter
-                if stock_filter != 'all':
-                    if stock_filter == 'expired' and not is_expired:
-                        continue
-                    elif stock_filter == 'near_expiry' and not is_near_expiry:
-                        continue
-                    elif stock_filter == 'low_stock' and not is_low_stock:
-                        continue
-                    elif stock_filter == 'out_of_stock' and not is_out_of_stock:
-                        continue
-                
-                # Calculate used quantity: total pieces - available_stock - wasted
-                total_pcs = stock.imzStck_qty * stock.imzStck_pcs if stock.imzStck_unit == "boxes" else stock.imzStck_qty
-                wasted = getattr(stock, 'wasted', 0) or 0
-                used_qty = total_pcs - available_stock - wasted
-                used_qty = max(0, used_qty)  # Prevent negative values
-
-                item_data = {
-                    'type': 'supply',
-                    'id': stock.imzStck_id,
-                    'batchNumber': stock.batch_number or "N/A",
-                    'category': 'Immunization Supplies',
-                    'item': {
-                        'antigen': stock.imz_id.imz_name if stock.imz_id else "Unknown Supply",
-                        'dosage': 1,
-                        'unit': stock.imzStck_unit,
-                    },
-                    'qty': qty_display,
-                    'administered': f"{used_qty} {'pcs' if stock.imzStck_unit and stock.imzStck_unit.lower() == 'boxes' else stock.imzStck_unit}",  # Adjusted for boxes",
-                    'wastedDose':f"{str(wasted)} {'pcs' if stock.imzStck_unit and stock.imzStck_unit.lower() == 'boxes' else stock.imzStck_unit}",  # Adjusted for boxes",,
-                    'availableStock': available_stock,
-                    'expiryDate': expiry_date.isoformat() if expiry_date else "N/A",
-                    'inv_id': stock.inv_id.inv_id if stock.inv_id else None,
-                    'imz_id': stock.imz_id.imz_id if stock.imz_id else None,
-                    'imzStck_id': stock.imzStck_id,
-                    'imzStck_unit': stock.imzStck_unit,
-                    # 'imzStck_used': stock.imzStck_used or 0,
-                    'imzStck_pcs': stock.imzStck_pcs,
-                    'qty_number': stock.imzStck_qty,
-                    'isArchived': stock.inv_id.is_Archived if stock.inv_id else False,
-                    'created_at': stock.created_at.isoformat() if stock.created_at else None,
-                    'isExpired': is_expired,
-                    'isNearExpiry': is_near_expiry,
-                    'isLowStock': is_low_stock,
-                    'isOutOfStock': is_out_of_stock
-                }
-                
-                combined_data.append(item_data)
-            
-            # Sort by ID descending (matching frontend logic)
-            combined_data.sort(key=lambda x: x['id'], reverse=True)
+            # Status flags, the filter tab and the badge counts are all computed in SQL
+            vaccine_stocks = annotate_stock_status(vaccine_stocks, 'vacStck_qty_avail', 20)
+            immunization_stocks = annotate_stock_status(
+                immunization_stocks, 'imzStck_avail',
+                # 20 for supplies counted in pieces, 2 for everything else (boxes)
+                Case(When(imzStck_unit='pcs', then=Value(20)), default=Value(2)),
+            )
+            filter_counts = combine_filter_counts(
+                stock_filter_counts(vaccine_stocks), stock_filter_counts(immunization_stocks)
+            )
+            vaccine_stocks = filter_by_status(vaccine_stocks, stock_filter)
+            immunization_stocks = filter_by_status(immunization_stocks, stock_filter)
+            
+            # Page over both tables by ID descending (vaccines first on equal IDs),
+            # then load only the rows on that page
+            stock_keys = vaccine_stocks.annotate(stock_type=Value('vaccine')).values_list(
+                'vacStck_id', 'stock_type'
+            ).order_by().union(
+                immunization_stocks.annotate(stock_type=Value('supply')).values_list(
+                    'imzStck_id', 'stock_type'
+                ).order_by(),
+                all=True,
+            ).order_by('-vacStck_id', '-stock_type')
             
             # Apply pagination
             paginator = self.pagination_class()
-            page = paginator.paginate_queryset(combined_data, request)
+            page = paginator.paginate_queryset(stock_keys, request)
+            combined_data = self.format_stocks(
+                page if page is not None else list(stock_keys), vaccine_stocks, immunization_stocks
+            )
             
             if page is not None:
                 # Create custom response with both paginated data and filter counts
-                response = paginator.get_paginated_response(page)
+                response = paginator.get_paginated_response(combined_data)
                 # Add filter_counts to the response data
                 response_data = response.data
                 response_data['filter_counts'] = filter_counts
@@ -916,13 +715,147 @@ class CombinedStockTable(APIView):
                 'count': len(combined_data),
                 'filter_counts': filter_counts
             }, status=status.HTTP_200_OK)
-        
             
         except Exception as e:
             return Response({
                 'success': False,
                 'error': f'Error fetching combined stock data: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def format_stocks(self, stock_keys, vaccine_stocks, immunization_stocks):
+        """Rows for (id, type) keys, in key order, from querysets annotated by annotate_stock_status()"""
+        vaccine_ids = [stock_id for stock_id, stock_type in stock_keys if stock_type == 'vaccine']
+        supply_ids = [stock_id for stock_id, stock_type in stock_keys if stock_type == 'supply']
+        stocks = {
+            **{('vaccine', stock.vacStck_id): stock for stock in vaccine_stocks.filter(vacStck_id__in=vaccine_ids)},
+            **{('supply', stock.imzStck_id): stock for stock in immunization_stocks.filter(imzStck_id__in=supply_ids)},
+        }
+        return [
+            self.format_vaccine_stock(stocks[(stock_type, stock_id)]) if stock_type == 'vaccine'
+            else self.format_supply_stock(stocks[(stock_type, stock_id)])
+            for stock_id, stock_type in stock_keys
+        ]
+    
+    def format_vaccine_stock(self, stock):
+        doses_per_vial = stock.dose_ml if stock.dose_ml else 1
+        total_doses = doses_per_vial * stock.qty
+        available_stock = stock.vacStck_qty_avail
+        expiry_date = stock.inv_id.expiry_date if stock.inv_id else None
+        
+        if stock.solvent and stock.solvent.lower() == "diluent":
+            # Diluent handling
+            # Calculate used containers: total containers - available_stock - wasted_dose
+            used_qty = stock.qty - available_stock - (stock.wasted_dose or 0)
+            used_qty = max(0, used_qty)  # Prevent negative values
+            
+            return {
+                'type': 'vaccine',
+                'id': stock.vacStck_id,
+                'batchNumber': stock.batch_number,
+                'category': 'Vaccine',
+                'item': {
+                    'antigen': stock.vac_id.vac_name if stock.vac_id else "Unknown Vaccine",
+                    'dosage': stock.dose_ml if hasattr(stock, 'dose_ml') else None,
+                    'unit': 'ml',
+                },
+                'qty': f"{stock.qty or 0} container/s",
+                'administered': f"{used_qty} container/s",
+                'wastedDose': f"{str(stock.wasted_dose or 0)} container/s",
+                'availableStock': available_stock,
+                'expiryDate': expiry_date.isoformat() if expiry_date else None,
+                'inv_id': stock.inv_id.inv_id if stock.inv_id else None,
+                'solvent': stock.solvent,
+                'vacStck_id': stock.vacStck_id,
+                'vac_id': stock.vac_id.vac_id if stock.vac_id else None,
+                'qty_number': stock.qty,
+                'isArchived': stock.inv_id.is_Archived if stock.inv_id else False,
+                'created_at': stock.created_at.isoformat() if stock.created_at else None,
+                'isExpired': stock.is_expired,
+                'isNearExpiry': stock.is_near_expiry,
+                'isLowStock': stock.is_low_stock,
+                'isOutOfStock': stock.is_out_of_stock
+            }
+        
+        # Regular vaccine handling
+        # Calculate used doses: total_doses - available_stock - wasted_dose
+        used_qty = total_doses - available_stock - (stock.wasted_dose or 0)
+        used_qty = max(0, used_qty)  # Prevent negative values
+        
+        return {
+            'type': 'vaccine',
+            'id': stock.vacStck_id,
+            'batchNumber': stock.batch_number,
+            'category': 'Vaccine',
+            'item': {
+                'antigen': stock.vac_id.vac_name if stock.vac_id else "Unknown Vaccine",
+                'dosage': stock.dose_ml,
+                'unit': 'doses',
+            },
+            'qty': f"{stock.qty} vials ({total_doses} dose/s)",
+            'administered': f"{used_qty} dose/s",
+            'wastedDose': f"{str(stock.wasted_dose or 0)} dose/s",
+            'availableStock': available_stock,
+            'expiryDate': expiry_date.isoformat() if expiry_date else None,
+            'solvent': stock.solvent,
+            'inv_id': stock.inv_id.inv_id if stock.inv_id else None,
+            'dose_ml': stock.dose_ml,
+            'vacStck_id': stock.vacStck_id,
+            'dosesPerVial': doses_per_vial,
+            'vac_id': stock.vac_id.vac_id if stock.vac_id else None,
+            'qty_number': stock.qty,
+            'isArchived': stock.inv_id.is_Archived if stock.inv_id else False,
+            'created_at': stock.created_at.isoformat() if stock.created_at else None,
+            'isExpired': stock.is_expired,
+            'isNearExpiry': stock.is_near_expiry,
+            'isLowStock': stock.is_low_stock,
+            'isOutOfStock': stock.is_out_of_stock
+        }
+    
+    def format_supply_stock(self, stock):
+        total_pcs = stock.imzStck_qty * stock.imzStck_pcs
+        if stock.imzStck_unit == "pcs":
+            qty_display = f"{stock.imzStck_qty} pc/s"
+        else:
+            qty_display = f"{stock.imzStck_qty} boxes ({total_pcs} pcs)"
+        
+        available_stock = stock.imzStck_avail
+        expiry_date = stock.inv_id.expiry_date if stock.inv_id else None
+        
+        # Calculate used quantity: total pieces - available_stock - wasted
+        total_pcs = stock.imzStck_qty * stock.imzStck_pcs if stock.imzStck_unit == "boxes" else stock.imzStck_qty
+        wasted = getattr(stock, 'wasted', 0) or 0
+        used_qty = total_pcs - available_stock - wasted
+        used_qty = max(0, used_qty)  # Prevent negative values
+        
+        return {
+            'type': 'supply',
+            'id': stock.imzStck_id,
+            'batchNumber': stock.batch_number or "N/A",
+            'category': 'Immunization Supplies',
+            'item': {
+                'antigen': stock.imz_id.imz_name if stock.imz_id else "Unknown Supply",
+                'dosage': 1,
+                'unit': stock.imzStck_unit,
+            },
+            'qty': qty_display,
+            'administered': f"{used_qty} {'pcs' if stock.imzStck_unit and stock.imzStck_unit.lower() == 'boxes' else stock.imzStck_unit}",  # Adjusted for boxes
+            'wastedDose': f"{str(wasted)} {'pcs' if stock.imzStck_unit and stock.imzStck_unit.lower() == 'boxes' else stock.imzStck_unit}",  # Adjusted for boxes
+            'availableStock': available_stock,
+            'expiryDate': expiry_date.isoformat() if expiry_date else "N/A",
+            'inv_id': stock.inv_id.inv_id if stock.inv_id else None,
+            'imz_id': stock.imz_id.imz_id if stock.imz_id else None,
+            'imzStck_id': stock.imzStck_id,
+            'imzStck_unit': stock.imzStck_unit,
+            'imzStck_pcs': stock.imzStck_pcs,
+            'qty_number': stock.imzStck_qty,
+            'isArchived': stock.inv_id.is_Archived if stock.inv_id else False,
+            'created_at': stock.created_at.isoformat() if stock.created_at else None,
+            'isExpired': stock.is_expired,
+            'isNearExpiry': stock.is_near_expiry,
+            'isLowStock': stock.is_low_stock,
+            'isOutOfStock': stock.is_out_of_stock
+        }
+    
     # def auto_archive_expired_items(self):
     #     """Auto-archive items that expired more than 10 days ago and log transactions"""
     #     from datetime import timedelta
@@ -1442,53 +1375,43 @@ class VaccineWasteView(APIView, WasteRequestMixin):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check available quantity
-        if vaccine_stock.vacStck_qty_avail < wasted_amount:
-            return Response(
-                {"error": f"Cannot process {wasted_amount} doses, only {vaccine_stock.vacStck_qty_avail} available"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        if action_type == "administered":
+            # For administered vaccines, deduct from available stock only
+            transaction_action = "Administered"
+            adjust = None
+            success_message = f"Successfully recorded {wasted_amount} doses as administered"
+        else:  # action_type == "wasted"
+            # For wasted vaccines, deduct from available stock and add to wasted count
+            transaction_action = "Wasted"
+            adjust = {'wasted_dose': wasted_amount}
+            success_message = f"Successfully wasted {wasted_amount} doses"
         
         try:
             with transaction.atomic():
-                # Update vaccine stock based on action type
-                if action_type == "administered":
-                    # For administered vaccines, deduct from available stock only
-                    vaccine_stock.vacStck_qty_avail -= wasted_amount
-                    transaction_action = "Administered"
-                    success_message = f"Successfully recorded {wasted_amount} doses as administered"
-                else:  # action_type == "wasted"
-                    # For wasted vaccines, deduct from available stock and add to wasted count
-                    vaccine_stock.wasted_dose += wasted_amount
-                    vaccine_stock.vacStck_qty_avail -= wasted_amount
-                    transaction_action = "Wasted"
-                    success_message = f"Successfully wasted {wasted_amount} doses"
-                
-                vaccine_stock.save()
+                vaccine_stock = deduct(
+                    'vaccine', vacStck_id, wasted_amount,
+                    action=transaction_action, adjust=adjust, staff=staff_id,
+                )
                 
                 # Update inventory timestamp - IMPORTANT: This updates the related Inventory object
                 vaccine_stock.inv_id.save()  # This will trigger auto_now=True on updated_at
                 
-                # Create transaction record
-                unit = "container/s" if vaccine_stock.solvent == "diluent" else "dose/s"
-                AntigenTransaction.objects.create(
-                    antt_qty=f"{wasted_amount} {unit}",
-                    antt_action=transaction_action,
-                    vacStck_id=vaccine_stock,
-                    staff_id=staff_id,
-                )
-                
-                # Return serialized response using your existing serializer
-                serializer = VaccineStockSerializer(vaccine_stock)
-                
-                return Response(
-                    {
-                        "success": success_message,
-                        "data": serializer.data
-                    },
-                    status=status.HTTP_200_OK
-                )
+            # Return serialized response using your existing serializer
+            serializer = VaccineStockSerializer(vaccine_stock)
+            
+            return Response(
+                {
+                    "success": success_message,
+                    "data": serializer.data
+                },
+                status=status.HTTP_200_OK
+            )
                 
+        except InsufficientStock as e:
+            return Response(
+                {"error": f"Cannot process {wasted_amount} doses, only {e.available} available"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return Response(
                 {"error": str(e)},
@@ -1526,57 +1449,42 @@ class SupplyWasteView(APIView, WasteRequestMixin):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check available quantity
-        if supply_stock.imzStck_avail < wasted_amount:
-            return Response(
-                {"error": f"Cannot process {wasted_amount} items, only {supply_stock.imzStck_avail} available"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        if action_type == "deducted":
+            transaction_action = "Deducted"
+            adjust = None
+            success_message = f"Successfully recorded {wasted_amount} items as administered"
+        else:  # action_type == "wasted"
+            # For wasted items, deduct from available stock and add to wasted count
+            transaction_action = "Wasted"
+            adjust = {'wasted': wasted_amount}
+            success_message = f"Successfully wasted {wasted_amount} items"
         
         try:
             with transaction.atomic():
-                # Update supply stock based on action type
-                if action_type == "administered":
-                    # For administered items, deduct from available stock only
-                    supply_stock.imzStck_avail -= wasted_amount
-                    transaction_action = "Administered"
-                    success_message = f"Successfully recorded {wasted_amount} items as administered"
-                elif action_type == "deducted":
-                    supply_stock.imzStck_avail -= wasted_amount
-                    transaction_action = "Deducted"
-                    success_message = f"Successfully recorded {wasted_amount} items as administered"
-                else:  # action_type == "wasted"
-                    # For wasted items, deduct from available stock and add to wasted count
-                    supply_stock.wasted = (supply_stock.wasted or 0) + wasted_amount
-                    supply_stock.imzStck_avail -= wasted_amount
-                    transaction_action = "Wasted"
-                    success_message = f"Successfully wasted {wasted_amount} items"
-                
-                supply_stock.save()
+                supply_stock = deduct(
+                    'supply', imzStck_id, wasted_amount,
+                    action=transaction_action, adjust=adjust, staff=staff_id,
+                )
                 
                 # Update inventory timestamp - IMPORTANT: This updates the related Inventory object
                 supply_stock.inv_id.save()  # This will trigger auto_now=True on updated_at
                 
-                # Create transaction record
-                unit = "boxes" if supply_stock.imzStck_unit == "boxes" else "pcs"
-                AntigenTransaction.objects.create(
-                    antt_qty=f"{wasted_amount} {unit}",
-                    antt_action=transaction_action,
-                    imzStck_id=supply_stock,
-                    staff_id=staff_id,
-                )
-                
-                # Return serialized response using your existing serializer
-                serializer = ImmunizationStockSerializer(supply_stock)
-                
-                return Response(
-                    {
-                        "success": success_message,
-                        "data": serializer.data
-                    },
-                    status=status.HTTP_200_OK
-                )
+            # Return serialized response using your existing serializer
+            serializer = ImmunizationStockSerializer(supply_stock)
+            
+            return Response(
+                {
+                    "success": success_message,
+                    "data": serializer.data
+                },
+                status=status.HTTP_200_OK
+            )
                 
+        except InsufficientStock as e:
+            return Response(
+                {"error": f"Cannot process {wasted_amount} items, only {e.available} available"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return Response(
                 {"error": str(e)},
@@ -1770,10 +1678,7 @@ class MonthlyVaccinationRecordsDetailAPIView(generics.ListAPIView):
             dose_ml = vstock.dose_ml if (is_doses and vstock.dose_ml and vstock.dose_ml > 0) else 1
 
             def calculate_quantities(qs, action):
-                return sum(
-                    int(re.search(r'\d+', str(t.antt_qty)).group()) if re.search(r'\d+', str(t.antt_qty)) else 0
-                    for t in qs.filter(antt_action__icontains=action)
-                )
+                return qs.aggregate(total=action_sum('antt_qty_num', 'antt_action', (action,)))['total']
 
             if is_doses:
                 # For vaccine doses
@@ -1988,10 +1893,7 @@ class MonthlyVaccinationRecordsDetailAPIView(generics.ListAPIView):
             ).order_by("created_at")
 
             def calculate_quantities(qs, action):
-                return sum(
-                    int(re.search(r'\d+', str(t.antt_qty)).group()) if re.search(r'\d+', str(t.antt_qty)) else 0
-                    for t in qs.filter(antt_action__icontains=action)
-                )
+                return qs.aggregate(total=action_sum('antt_qty_num', 'antt_action', (action,)))['total']
 
             opening_in = calculate_quantities(
                 transactions.filter(created_at__date__lt=start_date), "added")
@@ -2081,9 +1983,8 @@ class VaccinationExpiredOutOfStockSummaryAPIView(APIView):
     pagination_class = StandardResultsPagination
 
     def _parse_qty(self, transaction, is_vaccine=False, multiply_doses=False):
-        """Extract numeric value from antt_qty and convert vials to doses if needed."""
-        match = re.search(r'\d+', str(transaction.antt_qty))
-        qty_num = int(match.group()) if match else 0
+        """Numeric quantity of the transaction, converting vials to doses if needed."""
+        qty_num = transaction.antt_qty_num
         
         # For vaccine doses, multiply by dose_ml if needed
         if is_vaccine and multiply_doses and transaction.vacStck_id:
@@ -2312,9 +2213,8 @@ class MonthlyVaccinationExpiredOutOfStockDetailAPIView(APIView):
     pagination_class = StandardResultsPagination
 
     def _parse_qty(self, transaction, is_vaccine=False, multiply_doses=False):
-        """Extract numeric value from antt_qty and convert vials to doses if needed."""
-        match = re.search(r'\d+', str(transaction.antt_qty))
-        qty_num = int(match.group()) if match else 0
+        """Numeric quantity of the transaction, converting vials to doses if needed."""
+        qty_num = transaction.antt_qty_num
         
         # For vaccine doses, multiply by dose_ml if needed
         if is_vaccine and multiply_doses and transaction.vacStck_id:
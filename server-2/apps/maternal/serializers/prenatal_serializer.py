@@ -1052,46 +1052,51 @@ class PrenatalCompleteSerializer(serializers.ModelSerializer):
             'vital_o2': safe_str(vital_o2),
         }
 
-    def _upload_lab_image(self, img_data, lab_result):
+    def _upload_lab_images(self, pending):
         """
-        Upload a single lab image to Supabase and create LaboratoryResultImg record.
-        Handles cleanup on failure.
+        Upload lab images to Supabase in parallel and create their LaboratoryResultImg records.
+        pending is a list of (img_data, lab_result); a lab result whose image fails to upload is deleted.
         """
-        try:
-            import time
+        import time
+        stamp = int(time.time() * 1000)
+        files = []
+        for i, (img_data, _) in enumerate(pending):
             original_name = img_data['image_name']
             name_parts = original_name.rsplit('.', 1)
             
             if len(name_parts) == 2:
-                unique_name = f"{name_parts[0]}_{int(time.time() * 1000)}.{name_parts[1]}"
+                unique_name = f"{name_parts[0]}_{stamp}_{i}.{name_parts[1]}"
             else:
-                unique_name = f"{original_name}_{int(time.time() * 1000)}"
+                unique_name = f"{original_name}_{stamp}_{i}"
             
-            file_data = {
+            files.append({
                 'file': img_data['image_url'],
                 'name': unique_name,
                 'type': img_data['image_type'],
                 'size': img_data['image_size'],
-            }
-            
-            uploaded_url = upload_to_storage(file_data, bucket=self.LAB_IMAGE_BUCKET, folder=self.LAB_IMAGE_FOLDER)
-            
+            })
+        
+        uploaded_urls = upload_many(files, bucket=self.LAB_IMAGE_BUCKET, folder=self.LAB_IMAGE_FOLDER, thumbnail=True)
+        
+        failed_labs = {}
+        for (img_data, lab_result), uploaded_url in zip(pending, uploaded_urls):
             if not uploaded_url:
-                raise Exception(f"Failed to upload image {original_name}")
-            
-            LaboratoryResultImg.objects.create(
+                logger.error(f"Failed to upload lab image {img_data['image_name']}")
+                failed_labs[lab_result.pk] = lab_result
+        
+        LaboratoryResultImg.objects.bulk_create([
+            LaboratoryResultImg(
                 lab_id=lab_result,
                 image_url=uploaded_url,
-                image_name=original_name,
+                image_name=img_data['image_name'],
                 image_type=img_data['image_type'],
                 image_size=img_data['image_size'],
             )
-            
-            return True
-            
-        except Exception as e:
+            for (img_data, lab_result), uploaded_url in zip(pending, uploaded_urls)
+            if lab_result.pk not in failed_labs
+        ])
+        for lab_result in failed_labs.values():
             lab_result.delete()
-            raise Exception(f"Failed to upload lab images: {str(e)}")
 
     def validate_pat_id(self, value):
         """Validate patient ID exists and is not null"""
@@ -1995,7 +2000,7 @@ class PrenatalCompleteSerializer(serializers.ModelSerializer):
                         patient=patient,
                         lab_results_data=lab_results_data,
                         prenatal_form=prenatal_form,
-                        upload_image_callback=self._upload_lab_image
+                        upload_images_callback=self._upload_lab_images
                     )
                     logger.info(f"Processed {len(created_updated_labs)} laboratory result records (updated existing or created new).")
 
@@ -6,7 +6,7 @@ from apps.maternal.serializers.postpartum_serializer import *
 from apps.patientrecords.serializers.patients_serializers import *
 from apps.administration.models import Staff 
 
-from utils.supabase_client import upload_to_storage
+from utils.supabase_client import upload_many, upload_to_storage
 
 
 # Staff Serializer
@@ -150,21 +150,26 @@ class LaboratoryResultCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         images_data = validated_data.pop('images', [])
         lab_result = LaboratoryResult.objects.create(**validated_data)
-        for img_data in images_data:
-            file_data = {
+        files = [
+            {
                 'file': img_data['image_url'],
                 'name': img_data['image_name'],
                 'type': img_data['image_type'],
                 'size': img_data['image_size'],
             }
-            url = upload_to_storage(file_data, bucket='lab-result-documents', folder='lab-images')
-            LaboratoryResultImg.objects.create(
+            for img_data in images_data
+        ]
+        urls = upload_many(files, bucket='lab-result-documents', folder='lab-images', thumbnail=True)
+        LaboratoryResultImg.objects.bulk_create([
+            LaboratoryResultImg(
                 lab_id=lab_result, 
                 image_url=url, 
                 image_name=img_data['image_name'],
                 image_type=img_data['image_type'],
                 image_size=img_data['image_size'],
             )
+            for img_data, url in zip(images_data, urls)
+        ])
         return lab_result
 
 class Guide4ANCVisitCreateSerializer(serializers.ModelSerializer):
@@ -560,7 +560,7 @@ def create_medicine_request_for_maternal(patient_record, selected_medicines, sta
 
 # ========================================================================================
 
-def create_or_update_lab_results(patient, lab_results_data, prenatal_form=None, upload_image_callback=None):
+def create_or_update_lab_results(patient, lab_results_data, prenatal_form=None, upload_images_callback=None):
     """
     Create or update laboratory results for a patient across all prenatal visits.
     
@@ -573,7 +573,8 @@ def create_or_update_lab_results(patient, lab_results_data, prenatal_form=None,
         patient (Patient): The patient instance
         lab_results_data (list): List of lab data dicts with keys: lab_type, result_date, images, remarks, etc.
         prenatal_form (Prenatal_Form, optional): The prenatal form being created. Used for backwards compatibility.
-        upload_image_callback (callable, optional): Function to handle image upload (self._upload_lab_image)
+        upload_images_callback (callable, optional): Uploads every new image at once, given a list of
+            (img_data, lab_result) pairs (self._upload_lab_images)
     
     Returns:
         list: List of created/updated LaboratoryResult instances
@@ -601,6 +602,7 @@ def create_or_update_lab_results(patient, lab_results_data, prenatal_form=None,
         return []
     
     updated_labs = []
+    pending_images = []
     
     try:
         for lab_data in lab_results_data:
@@ -672,32 +674,26 @@ def create_or_update_lab_results(patient, lab_results_data, prenatal_form=None,
                 logger.info(f"Lab result created: lab_type={lab_type}, lab_id={lab_result.lab_id}")
             
             # STEP 2: Handle images - APPEND new images (don't delete old ones)
-            if images_data and upload_image_callback:
+            if images_data and upload_images_callback:
                 logger.info(f"Processing {len(images_data)} image(s) for lab_type={lab_type}")
                 
+                # Check if these images already exist (by image_name - not image_url, since base64 changes)
+                # We check by image_name because base64 encoding will be different on each submission
+                existing_names = set(
+                    LaboratoryResultImg.objects.filter(lab_id=lab_result).values_list('image_name', flat=True)
+                )
                 for img_data in images_data:
-                    try:
-                        # Check if this image already exists (by image_name - not image_url, since base64 changes)
-                        # We check by image_name because base64 encoding will be different on each submission
-                        existing_img = LaboratoryResultImg.objects.filter(
-                            lab_id=lab_result,
-                            image_name=img_data.get('image_name', '')
-                        ).exists()
-                        
-                        if existing_img:
-                            logger.info(f"Image already exists: {img_data.get('image_name')} - skipping")
-                            continue
-                        
-                        # Use the provided callback to upload image
-                        # This should be self._upload_lab_image from the serializer
-                        upload_image_callback(img_data, lab_result)
-                        logger.info(f"Uploaded image: {img_data.get('image_name')}")
-                    except Exception as e:
-                        logger.error(f"Error uploading image {img_data.get('image_name')}: {str(e)}")
-                        # Continue processing other images even if one fails
+                    if img_data.get('image_name', '') in existing_names:
+                        logger.info(f"Image already exists: {img_data.get('image_name')} - skipping")
+                        continue
+                    pending_images.append((img_data, lab_result))
             
             updated_labs.append(lab_result)
         
+        # Upload the new images of every lab together
+        if pending_images:
+            upload_images_callback(pending_images)
+        
         logger.info(f"Lab result processing complete: {len(updated_labs)} lab(s) updated/created")
         return updated_labs
     
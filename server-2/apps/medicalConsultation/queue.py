@@ -0,0 +1,138 @@
+"""
+Clinical queue: pending child health check-ups and medical consultations in
+one list, oldest first.
+
+Both tables are filtered in the database and merged with UNION ALL over
+(created_at, kind, id) only, so a page costs the same however long the
+backlog is. Pages are read by cursor (keyset) or by page number; only the
+ids on the page are loaded as model instances by the view.
+"""
+from collections import namedtuple
+
+from django.db.models import Count, F, IntegerField, Q, Value
+from django.utils.dateparse import parse_datetime
+
+from apps.childhealthservices.models import ChildHealth_History
+from .models import MedicalConsultation_Record
+
+CHILD_HEALTH, MEDICAL_CONSULTATION = 0, 1
+RECORD_TYPES = {CHILD_HEALTH: 'child-health', MEDICAL_CONSULTATION: 'medical-consultation'}
+
+QueueEntry = namedtuple('QueueEntry', ['created_at', 'kind', 'record_id'])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(entry):
+    return f"{entry.created_at.isoformat()}_{entry.kind}_{entry.record_id}"
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, kind, record_id = cursor.rsplit('_', 2)
+        entry = QueueEntry(parse_datetime(created_at), int(kind), int(record_id))
+    except (AttributeError, TypeError, ValueError):
+        entry = None
+    if entry is None or entry.created_at is None or entry.kind not in RECORD_TYPES:
+        raise InvalidCursor(f"Invalid cursor '{cursor}'")
+    return entry
+
+
+def child_health_queue(assigned_to=None, search_query=''):
+    queryset = ChildHealth_History.objects.all()
+    if assigned_to:
+        queryset = queryset.filter(assigned_doc=assigned_to, status="check-up")
+    if search_query:
+        queryset = queryset.filter(
+            Q(chrec__ufc_no__icontains=search_query) |
+            Q(chrec__family_no__icontains=search_query) |
+            Q(tt_status__icontains=search_query) |
+            Q(chrec__patrec__pat_id__rp_id__per__per_lname__icontains=search_query) |
+            Q(chrec__patrec__pat_id__rp_id__per__per_fname__icontains=search_query) |
+            Q(chrec__patrec__pat_id__trans_id__tran_lname__icontains=search_query) |
+            Q(chrec__patrec__pat_id__trans_id__tran_fname__icontains=search_query)
+        )
+    return queryset
+
+
+def consultation_queue(assigned_to=None, search_query=''):
+    queryset = MedicalConsultation_Record.objects.filter(medrec_status='pending')
+    if assigned_to:
+        queryset = queryset.filter(assigned_to_id=assigned_to)
+    if search_query:
+        queryset = queryset.filter(
+            Q(medrec_chief_complaint__icontains=search_query) |
+            Q(patrec__pat_id__rp_id__per__per_lname__icontains=search_query) |
+            Q(patrec__pat_id__rp_id__per__per_fname__icontains=search_query) |
+            Q(patrec__pat_id__trans_id__tran_lname__icontains=search_query) |
+            Q(patrec__pat_id__trans_id__tran_fname__icontains=search_query)
+        )
+    return queryset
+
+
+class ClinicalQueue:
+    """sources maps kind -> the filtered queryset of that table"""
+    # Lookup path from each table to its Patient
+    PATIENT_PATHS = {
+        CHILD_HEALTH: 'chrec__patrec__pat_id',
+        MEDICAL_CONSULTATION: 'patrec__pat_id',
+    }
+
+    def __init__(self, sources):
+        self.sources = sources
+
+    @classmethod
+    def for_request(cls, assigned_to=None, search_query='', record_type='all'):
+        sources = {}
+        if record_type != 'medical-consultation':
+            sources[CHILD_HEALTH] = child_health_queue(assigned_to, search_query)
+        if record_type != 'child-health':
+            sources[MEDICAL_CONSULTATION] = consultation_queue(assigned_to, search_query)
+        return cls(sources)
+
+    def _after(self, kind, queryset, cursor):
+        """Rows of one table that sort after the cursor on (created_at, kind, id)"""
+        if kind > cursor.kind:
+            return queryset.filter(created_at__gte=cursor.created_at)
+        if kind < cursor.kind:
+            return queryset.filter(created_at__gt=cursor.created_at)
+        return queryset.filter(
+            Q(created_at__gt=cursor.created_at) | Q(created_at=cursor.created_at, pk__gt=cursor.record_id)
+        )
+
+    def entries(self, offset=0, limit=10, after=None):
+        """One page of QueueEntry, oldest first"""
+        parts = []
+        for kind, queryset in self.sources.items():
+            if after is not None:
+                queryset = self._after(kind, queryset, after)
+            parts.append(
+                queryset.order_by()
+                .annotate(kind=Value(kind, output_field=IntegerField()), record_id=F('pk'))
+                .values_list('created_at', 'kind', 'record_id')
+            )
+        if not parts:
+            return []
+        merged = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+        rows = merged.order_by('created_at', 'kind', 'record_id')[offset:offset + limit]
+        return [QueueEntry(*row) for row in rows]
+
+    def totals(self):
+        """Records in the queue and how many belong to resident / transient patients"""
+        totals = {'count': 0, 'residents': 0, 'transients': 0}
+        for kind, queryset in self.sources.items():
+            patient = self.PATIENT_PATHS[kind]
+            counts = queryset.order_by().aggregate(
+                count=Count('pk'),
+                residents=Count('pk', filter=Q(**{
+                    f'{patient}__pat_type': 'Resident', f'{patient}__rp_id__isnull': False,
+                })),
+                transients=Count('pk', filter=Q(**{
+                    f'{patient}__pat_type': 'Transient', f'{patient}__trans_id__isnull': False,
+                })),
+            )
+            for key in totals:
+                totals[key] += counts[key]
+        return totals
@@ -1,6 +1,8 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from apps.medicalConsultation.models import MedicalConsultation_Record, MedConsultAppointment
+from apps.medicalConsultation.models import MedicalConsultation_Record, MedConsultAppointment, DateSlots
+from apps.medicalConsultation.slots import invalidate_availability_calendar
+from apps.servicescheduler.models import ServiceScheduler
 from utils.create_notification import NotificationQueries
 import logging
 import django.db.models as models
@@ -219,3 +221,12 @@ def notify_doctors_on_appointment_confirmation(sender, instance, created, **kwar
     except Exception as e:
         logger.error(f"❌ Error sending appointment notification for Appointment {instance.id}: {e}", exc_info=True)
 
+
+
+@receiver(post_save, sender=DateSlots)
+@receiver(post_delete, sender=DateSlots)
+@receiver(post_save, sender=ServiceScheduler)
+@receiver(post_delete, sender=ServiceScheduler)
+def slot_calendar_changed(sender, **kwargs):
+    """Slot limits or the consultation schedule changed: drop the cached availability calendar"""
+    invalidate_availability_calendar()
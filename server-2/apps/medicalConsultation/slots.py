@@ -0,0 +1,138 @@
+"""
+Medical consultation slot reservations and the availability calendar.
+
+Bookings and cancellations change DateSlots counters with a single conditional
+UPDATE (current = current + 1 WHERE current < max), so concurrent requests can
+neither overbook a session nor lose an increment. The availability calendar is
+cached and dropped whenever a reservation, a cancellation or a schedule change
+commits.
+"""
+import logging
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from apps.servicescheduler.models import Service, ServiceScheduler
+from .models import DateSlots
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SLOTS = 20
+CALENDAR_DAYS = 90
+CALENDAR_TTL_SECONDS = getattr(settings, 'SLOT_CALENDAR_TTL_SECONDS', 300)
+CALENDAR_CACHE_KEY = 'medconsult_slot_calendar'
+
+
+def _booking_fields(meridiem):
+    prefix = 'am' if meridiem == 'AM' else 'pm'
+    return f'{prefix}_current_bookings', f'{prefix}_max_slots'
+
+
+def _take(scheduled_date, meridiem):
+    current, maximum = _booking_fields(meridiem)
+    return DateSlots.objects.filter(
+        date=scheduled_date, **{f'{current}__lt': F(maximum)}
+    ).update(**{current: F(current) + 1})
+
+
+def reserve_slot(scheduled_date, meridiem):
+    """Take one slot of the session; False when it is already full"""
+    reserved = _take(scheduled_date, meridiem)
+    if not reserved:
+        if not DateSlots.objects.filter(date=scheduled_date).exists():
+            # First booking for the date; concurrent first bookings insert it only once
+            DateSlots.objects.bulk_create(
+                [DateSlots(date=scheduled_date, am_max_slots=DEFAULT_MAX_SLOTS, pm_max_slots=DEFAULT_MAX_SLOTS)],
+                ignore_conflicts=True,
+            )
+        # The date may also have been created by another booking since the first attempt
+        reserved = _take(scheduled_date, meridiem)
+    if reserved:
+        invalidate_availability_calendar()
+    return bool(reserved)
+
+
+def release_slot(scheduled_date, meridiem):
+    """Give back one slot of the session; False when there is no booking to release"""
+    current, _ = _booking_fields(meridiem)
+    released = DateSlots.objects.filter(
+        date=scheduled_date, **{f'{current}__gt': 0}
+    ).update(**{current: F(current) - 1})
+    if released:
+        invalidate_availability_calendar()
+    return bool(released)
+
+
+# ===============================================================
+#  AVAILABILITY CALENDAR
+# ===============================================================
+def _calendar_key(today):
+    return f'{CALENDAR_CACHE_KEY}_{today.isoformat()}'
+
+
+def invalidate_availability_calendar():
+    """Drop the cached calendar now and again once the surrounding transaction commits"""
+    key = _calendar_key(date.today())
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def build_availability_calendar(today=None):
+    """Dates in the next CALENDAR_DAYS with at least one bookable AM or PM slot"""
+    today = today or date.today()
+    consultation_service = Service.objects.get(service_name='Medical Consultation')
+
+    # Create a memory map: {'Monday': {'AM': True, 'PM': False}, ...}
+    schedule_map = {}
+    for day_name, meridiem in ServiceScheduler.objects.filter(
+        service_id=consultation_service
+    ).values_list('day_id__day', 'meridiem'):
+        schedule_map.setdefault(day_name, {'AM': False, 'PM': False})[meridiem] = True
+
+    future_date_limit = today + timedelta(days=CALENDAR_DAYS)
+    slots_map = {
+        ds.date: ds for ds in DateSlots.objects.filter(date__range=[today, future_date_limit])
+    }
+
+    calendar = []
+    current_date = today
+    while current_date <= future_date_limit:
+        day_of_week_name = current_date.strftime('%A')
+        is_weekend = current_date.weekday() in [5, 6]  # 5=Sat, 6=Sun
+
+        # Rule: Available if scheduled OR weekend
+        day_sched = schedule_map.get(day_of_week_name, {'AM': False, 'PM': False})
+        am_allowed = day_sched['AM'] or is_weekend
+        pm_allowed = day_sched['PM'] or is_weekend
+
+        date_slot = slots_map.get(current_date)
+        am_avail_count = date_slot.am_available_slots if date_slot else DEFAULT_MAX_SLOTS
+        pm_avail_count = date_slot.pm_available_slots if date_slot else DEFAULT_MAX_SLOTS
+
+        # Only include dates that have at least one available slot
+        if (am_allowed and am_avail_count > 0) or (pm_allowed and pm_avail_count > 0):
+            calendar.append({
+                'date': current_date.isoformat(),
+                'day_name': day_of_week_name,
+                'am_available': bool(am_allowed and am_avail_count > 0),
+                'pm_available': bool(pm_allowed and pm_avail_count > 0),
+                'am_available_count': am_avail_count,
+                'pm_available_count': pm_avail_count,
+            })
+        current_date += timedelta(days=1)
+    return calendar
+
+
+def availability_calendar():
+    """Cached build_availability_calendar for today"""
+    today = date.today()
+    key = _calendar_key(today)
+    calendar = cache.get(key)
+    if calendar is None:
+        calendar = build_availability_calendar(today)
+        cache.set(key, calendar, CALENDAR_TTL_SECONDS)
+        logger.info(f"⚡ Built slot calendar with {len(calendar)} dates")
+    return calendar
@@ -0,0 +1,221 @@
+import threading
+from datetime import date, datetime, timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from apps.childhealthservices.models import ChildHealth_History, ChildHealthrecord
+from apps.healthProfiling.models import Personal, ResidentProfile
+from apps.patientrecords.models import BodyMeasurement, Patient, PatientRecord, Transient, VitalSigns
+from apps.servicescheduler.models import Service
+from .models import DateSlots, MedConsultAppointment, MedicalConsultation_Record
+from .queue import CHILD_HEALTH, MEDICAL_CONSULTATION, ClinicalQueue, encode_cursor
+from .slots import availability_calendar, release_slot, reserve_slot
+from .views import (
+    AvailableMedicalConsultationSlotsView, CancelAppointmentView, CombinedHealthRecordsView,
+    MedicalConsultationBookingView,
+)
+
+
+class ClinicalQueueTest(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.start = timezone.make_aware(datetime(2025, 10, 1, 8, 0))
+        per = Personal.objects.create(
+            per_lname='Santos', per_fname='Mia', per_dob=date(2024, 1, 1),
+            per_sex='FEMALE', per_status='SINGLE', per_religion='CATHOLIC', per_contact='09000000000',
+        )
+        self.resident = Patient.objects.create(
+            pat_type='Resident', rp_id=ResidentProfile.objects.create(rp_id='RQ0001', per=per)
+        )
+        self.transient = Patient.objects.create(pat_type='Transient', trans_id=Transient.objects.create(
+            trans_id='TQ0001', tran_lname='Lim', tran_fname='Jo', tran_dob=date(1990, 1, 1), tran_sex='MALE',
+            tran_status='SINGLE', tran_ed_attainment='College', tran_religion='CATHOLIC', tran_contact='09000000000',
+        ))
+        self.chrec = ChildHealthrecord.objects.create(
+            patrec=PatientRecord.objects.create(patrec_type='Child Health Record', pat_id=self.resident)
+        )
+        self.consult_patrec = PatientRecord.objects.create(patrec_type='Medical Consultation', pat_id=self.transient)
+        self.minutes = 0
+
+    def _at(self, record):
+        # Interleave the two tables, one minute apart; every third record shares the previous timestamp
+        if self.minutes % 3 != 2:
+            self.minutes += 1
+        type(record).objects.filter(pk=record.pk).update(created_at=self.start + timedelta(minutes=self.minutes))
+        return record
+
+    def _child_health(self, status='check-up'):
+        return self._at(ChildHealth_History.objects.create(chrec=self.chrec, status=status))
+
+    def _consultation(self, status='pending'):
+        return self._at(MedicalConsultation_Record.objects.create(
+            patrec=self.consult_patrec, vital=VitalSigns.objects.create(), bm=BodyMeasurement.objects.create(),
+            medrec_status=status, medrec_chief_complaint='Fever',
+        ))
+
+    def _backlog(self, size):
+        for i in range(size):
+            self._child_health() if i % 2 else self._consultation()
+
+    def _get(self, **params):
+        return CombinedHealthRecordsView.as_view()(self.factory.get('/', params))
+
+    def test_entries_are_merged_oldest_first(self):
+        self._backlog(7)
+        self._consultation(status='completed')
+
+        entries = ClinicalQueue.for_request().entries(limit=100)
+
+        self.assertEqual(len(entries), 7)
+        self.assertEqual(entries, sorted(entries))
+        self.assertEqual({entry.kind for entry in entries}, {CHILD_HEALTH, MEDICAL_CONSULTATION})
+        self.assertEqual(
+            [entry.kind for entry in ClinicalQueue.for_request(record_type='child-health').entries(limit=100)],
+            [CHILD_HEALTH] * 3,
+        )
+
+    def test_cursor_pages_match_offset_pages(self):
+        self._backlog(9)
+        queue = ClinicalQueue.for_request()
+        everything = queue.entries(limit=100)
+
+        pages, after = [], None
+        while True:
+            page = queue.entries(limit=4, after=after)
+            if not page:
+                break
+            pages.extend(page)
+            after = page[-1]
+        self.assertEqual(pages, everything)
+        self.assertEqual(queue.entries(offset=4, limit=4), everything[4:8])
+
+    def test_view_pages_and_totals(self):
+        self._backlog(5)
+
+        response = self._get(page=2, page_size=2)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual((response.data['next'], response.data['previous']), (3, 1))
+        self.assertEqual(response.data['totals'], {'residents': 2, 'transients': 3, 'total_patients': 5})
+        self.assertEqual(
+            [row['record_type'] for row in response.data['results']], ['child-health', 'medical-consultation']
+        )
+        details = response.data['results'][1]['data']['patrec_details']['patient_details']
+        self.assertEqual(details['pat_type'], 'Transient')
+
+        first = self._get(page_size=3)
+        following = self._get(page_size=3, cursor=first.data['next_cursor'])
+        self.assertEqual(following.data['results'], self._get(page=2, page_size=3).data['results'])
+        self.assertIsNone(following.data['next_cursor'])
+        self.assertEqual(self._get(cursor='not-a-cursor').status_code, 400)
+
+    def test_queries_do_not_grow_with_backlog(self):
+        self._backlog(4)
+        with CaptureQueriesContext(connection) as small:
+            self._get(page_size=2)
+        self._backlog(20)
+        with CaptureQueriesContext(connection) as large:
+            response = self._get(page_size=2)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(response.data['count'], 24)
+        self.assertEqual(encode_cursor(ClinicalQueue.for_request().entries(limit=2)[-1]), response.data['next_cursor'])
+
+
+def _next_saturday():
+    today = date.today()
+    return today + timedelta(days=(5 - today.weekday()) % 7 or 7)
+
+
+class SlotReservationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.saturday = _next_saturday()
+        Service.objects.create(service_name='Medical Consultation')
+        DateSlots.objects.create(date=self.saturday, am_max_slots=1, pm_max_slots=5)
+        per = Personal.objects.create(
+            per_lname='Cruz', per_fname='Ben', per_dob=date(1990, 1, 1),
+            per_sex='MALE', per_status='SINGLE', per_religion='CATHOLIC', per_contact='09000000000',
+        )
+        self.resident = ResidentProfile.objects.create(rp_id='RS0001', per=per)
+
+    def _book(self, meridiem='AM'):
+        request = self.factory.post('/', {
+            'rp_id': self.resident.rp_id, 'scheduled_date': self.saturday.isoformat(),
+            'meridiem': meridiem, 'chief_complaint': 'Cough',
+        }, format='json')
+        return MedicalConsultationBookingView.as_view()(request)
+
+    def _calendar_day(self):
+        response = AvailableMedicalConsultationSlotsView.as_view()(self.factory.get('/'))
+        return next((day for day in response.data if day['date'] == self.saturday.isoformat()), None)
+
+    def test_booking_stops_at_max_and_cancel_releases(self):
+        self.assertEqual(self._calendar_day()['am_available_count'], 1)
+        self.assertEqual(self._book().status_code, 201)
+        self.assertEqual(self._book().status_code, 400)
+        self.assertFalse(self._calendar_day()['am_available'])
+
+        appointment = MedConsultAppointment.objects.get()
+        request = self.factory.patch('/', {'archive_reason': 'Feeling better'}, format='json')
+        self.assertEqual(CancelAppointmentView.as_view()(request, appointment_id=appointment.id).status_code, 200)
+        self.assertEqual(DateSlots.objects.get(date=self.saturday).am_current_bookings, 0)
+        self.assertEqual(self._calendar_day()['am_available_count'], 1)
+
+    def test_calendar_is_cached(self):
+        availability_calendar()
+        with CaptureQueriesContext(connection) as queries:
+            availability_calendar()
+        self.assertEqual(len(queries), 0)
+
+        DateSlots.objects.filter(date=self.saturday).update(pm_max_slots=9)
+        self.assertEqual(self._calendar_day()['pm_available_count'], 5)
+        reserve_slot(self.saturday, 'PM')
+        self.assertEqual(self._calendar_day()['pm_available_count'], 8)
+        self.assertFalse(release_slot(self.saturday + timedelta(days=1), 'PM'))
+
+
+class ConcurrentSlotReservationTest(TransactionTestCase):
+    THREADS = 12
+
+    def setUp(self):
+        self.day = _next_saturday()
+        DateSlots.objects.create(date=self.day, am_max_slots=5, pm_max_slots=5)
+
+    def _run(self, action):
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+
+        def worker():
+            try:
+                barrier.wait()
+                results.append(action(self.day, 'AM'))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_bookings_never_overbook(self):
+        results = self._run(reserve_slot)
+        self.assertEqual(len(results), self.THREADS)
+        self.assertEqual(results.count(True), 5)
+        self.assertEqual(DateSlots.objects.get(date=self.day).am_current_bookings, 5)
+
+        results = self._run(release_slot)
+        self.assertEqual(results.count(True), 5)
+        self.assertEqual(DateSlots.objects.get(date=self.day).am_current_bookings, 0)
+
+    def test_concurrent_first_bookings_create_one_date_slot(self):
+        self.day += timedelta(days=7)
+        results = self._run(reserve_slot)
+        self.assertEqual(results.count(True), self.THREADS)
+        self.assertEqual(DateSlots.objects.get(date=self.day).am_current_bookings, self.THREADS)
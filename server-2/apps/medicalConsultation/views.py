@@ -29,6 +29,10 @@ from apps.medicineservices.serializers import MedicineRequestItemSerializer
 from utils.create_notification import NotificationQueries
 from .utils import send_appointment_status_notifications
 from .models import *
+from .queue import (
+    CHILD_HEALTH, MEDICAL_CONSULTATION, RECORD_TYPES, ClinicalQueue, InvalidCursor, decode_cursor, encode_cursor,
+)
+from .slots import availability_calendar, release_slot, reserve_slot
 
 class PatientMedConsultationRecordView(generics.ListAPIView):
     serializer_class = PatientMedConsultationRecordSerializer
@@ -55,7 +59,8 @@ class PatientMedConsultationRecordView(generics.ListAPIView):
             patient_records__medical_consultation_record__medrec_status='completed'
         ).select_related(
             'rp_id__per', 
-            'trans_id'
+            'trans_id',
+            'summary'
         ).prefetch_related(
             'rp_id__per__personal_addresses__add__sitio',
             'patient_records__medical_consultation_record'
@@ -144,11 +149,48 @@ class CombinedHealthRecordsView(APIView):
         # Get query parameters
         search_query = request.query_params.get('search', '')
         record_type = request.query_params.get('record_type', 'all')
+        cursor = request.query_params.get('cursor')
         page = int(request.query_params.get('page', 1))
         page_size = int(request.query_params.get('page_size', 10))
         
-        # Prefetch related data for child health records with proper joins
-        child_health_queryset = ChildHealth_History.objects.select_related(
+        queue = ClinicalQueue.for_request(assigned_to, search_query, record_type)
+        
+        # Only the ids and sort keys of the page come back from the merged query
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except InvalidCursor as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            entries = queue.entries(limit=page_size + 1, after=after)
+        else:
+            entries = queue.entries(offset=(page - 1) * page_size, limit=page_size + 1)
+        has_more = len(entries) > page_size
+        entries = entries[:page_size]
+        
+        paginated_data = self._serialize_entries(entries)
+        totals = queue.totals()
+        
+        # Build response
+        response_data = {
+            'count': totals['count'],
+            'next': page + 1 if has_more and not cursor else None,
+            'previous': None if page == 1 or cursor else page - 1,
+            'next_cursor': encode_cursor(entries[-1]) if has_more else None,
+            'results': paginated_data,
+            'totals': {
+                'residents': totals['residents'],
+                'transients': totals['transients'],
+                'total_patients': totals['residents'] + totals['transients']
+            }
+        }
+        
+        return Response(response_data)
+    
+    def _serialize_entries(self, entries):
+        """Load and serialize the records on the page, in queue order"""
+        from apps.patientrecords.utils import get_address
+        
+        child_health_records = ChildHealth_History.objects.select_related(
             'chrec__patrec__pat_id__rp_id__per',
             'chrec__patrec__pat_id__trans_id__tradd_id',
             'assigned_to'
@@ -161,10 +203,9 @@ class CombinedHealthRecordsView(APIView):
             'exclusive_bf_checks',
             'immunization_tracking__vachist',
             'supplements_statuses'
-        )
+        ).in_bulk([entry.record_id for entry in entries if entry.kind == CHILD_HEALTH])
         
-        # Prefetch related data for medical consultation records
-        med_consult_queryset = MedicalConsultation_Record.objects.select_related(
+        med_consult_records = MedicalConsultation_Record.objects.select_related(
             'patrec__pat_id__rp_id__per',
             'patrec__pat_id__trans_id__tradd_id',
             'vital',
@@ -172,138 +213,33 @@ class CombinedHealthRecordsView(APIView):
             'find',
             'staff__rp__per',
             'assigned_to',
-            
-        ).filter(medrec_status='pending')
-        
-        # Apply assigned_to filter
-        if assigned_to:
-            child_health_queryset = child_health_queryset.filter(assigned_doc=assigned_to, status="check-up")
-            med_consult_queryset = med_consult_queryset.filter(assigned_to_id=assigned_to)
+        ).in_bulk([entry.record_id for entry in entries if entry.kind == MEDICAL_CONSULTATION])
         
-        # Apply search filter
-        if search_query:
-            child_health_queryset = child_health_queryset.filter(
-                Q(chrec__ufc_no__icontains=search_query) |
-                Q(chrec__family_no__icontains=search_query) |
-                Q(tt_status__icontains=search_query) |
-                Q(chrec__patrec__pat_id__rp_id__per__per_lname__icontains=search_query) |
-                Q(chrec__patrec__pat_id__rp_id__per__per_fname__icontains=search_query) |
-                Q(chrec__patrec__pat_id__trans_id__tran_lname__icontains=search_query) |
-                Q(chrec__patrec__pat_id__trans_id__tran_fname__icontains=search_query)
-            )
-            
-            med_consult_queryset = med_consult_queryset.filter(
-                Q(medrec_chief_complaint__icontains=search_query) |
-                Q(patrec__pat_id__rp_id__per__per_lname__icontains=search_query) |
-                Q(patrec__pat_id__rp_id__per__per_fname__icontains=search_query) |
-                Q(patrec__pat_id__trans_id__tran_lname__icontains=search_query) |
-                Q(patrec__pat_id__trans_id__tran_fname__icontains=search_query)
-            )
-        
-        # Apply record type filter
-        if record_type != 'all':
-            if record_type == 'child-health':
-                med_consult_queryset = MedicalConsultation_Record.objects.none()
-            elif record_type == 'medical-consultation':
-                child_health_queryset = ChildHealth_History.objects.none()
-        
-        combined_data = []
-        
-        # Process child health records using serializers
-        for record in child_health_queryset:
-            # Use the ChildHealthHistoryFullSerializer to get all related data properly
-            serializer = ChildHealthHistoryFullSerializer(record)
-            serialized_data = serializer.data
-            
-            # Extract patient details using get_address utility
-            chrec = record.chrec
-            patrec = chrec.patrec
-            patient = patrec.pat_id
-            from apps.patientrecords.utils import get_address
-            patient_details = self._get_patient_details(patient)
-            address_details = get_address(patient)
-
-            # Add patient details and address to the serialized data
-            if 'chrec_details' not in serialized_data:
-                serialized_data['chrec_details'] = {}
-            if 'patrec_details' not in serialized_data['chrec_details']:
-                serialized_data['chrec_details']['patrec_details'] = {}
-
-            serialized_data['chrec_details']['patrec_details']['pat_details'] = patient_details
-            serialized_data['chrec_details']['patrec_details']['address'] = address_details
-
-            combined_data.append({
-                'record_type': 'child-health',
-                'data': serialized_data
-            })
-        
-        # Process medical consultation records
-        for record in med_consult_queryset:
-            patrec = record.patrec
-            patient = patrec.pat_id
-            serializer = MedicalConsultationRecordSerializer(record)
-            serialized_data = serializer.data
-            
-            # Get patient details (which includes address from _get_patient_details)
-            patient_details = self._get_patient_details(patient)
-            
-            # CRITICAL FIX: Use ONLY _get_patient_details which already includes address
-            # Don't call get_address separately to avoid redundancy
-            if 'patrec_details' not in serialized_data:
-                serialized_data['patrec_details'] = {}
-            
-            serialized_data['patrec_details']['patient_details'] = patient_details
+        results = []
+        for entry in entries:
+            if entry.kind == CHILD_HEALTH:
+                record = child_health_records[entry.record_id]
+                # Use the ChildHealthHistoryFullSerializer to get all related data properly
+                serialized_data = ChildHealthHistoryFullSerializer(record).data
+                
+                # Add patient details and address to the serialized data
+                patient = record.chrec.patrec.pat_id
+                patrec_details = serialized_data.setdefault('chrec_details', {}).setdefault('patrec_details', {})
+                patrec_details['pat_details'] = self._get_patient_details(patient)
+                patrec_details['address'] = get_address(patient)
+            else:
+                record = med_consult_records[entry.record_id]
+                serialized_data = MedicalConsultationRecordSerializer(record).data
+                
+                # The address is at: patrec_details.patient_details.address
+                patient = record.patrec.pat_id
+                serialized_data.setdefault('patrec_details', {})['patient_details'] = self._get_patient_details(patient)
             
-            # Don't add separate address field since it's already in patient_details
-            # The address is at: patrec_details.patient_details.address
-
-            combined_data.append({
-                'record_type': 'medical-consultation',
+            results.append({
+                'record_type': RECORD_TYPES[entry.kind],
                 'data': serialized_data
             })
-        
-        # Sort by created_at (most recent first)
-        combined_data.sort(key=lambda x: x['data'].get('created_at', ''), reverse=False)
-        
-        # Manual pagination
-        total_count = len(combined_data)
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        paginated_data = combined_data[start_index:end_index]
-        
-        # Calculate totals
-        residents = 0
-        transients = 0
-        
-        for record in combined_data:
-            pat_details = None
-            if record['record_type'] == 'child-health':
-                pat_details = record['data'].get('chrec_details', {}).get('patrec_details', {}).get('pat_details', {})
-            else:
-                # FIXED: Access patient_details correctly
-                pat_details = record['data'].get('patrec_details', {}).get('patient_details', {})
-            
-            if pat_details and pat_details.get('pat_type') == 'Resident':
-                residents += 1
-            elif pat_details:
-                transients += 1
-        
-        total_patients = residents + transients
-        
-        # Build response
-        response_data = {
-            'count': total_count,
-            'next': None if end_index >= total_count else page + 1,
-            'previous': None if page == 1 else page - 1,
-            'results': paginated_data,
-            'totals': {
-                'residents': residents,
-                'transients': transients,
-                'total_patients': total_patients
-            }
-        }
-        
-        return Response(response_data)
+        return results
     
     def _get_patient_details(self, patient):
         """Helper method to extract patient details"""
@@ -1675,81 +1611,9 @@ class FamilyPHIllnessCheckAPIView(APIView):
 class AvailableMedicalConsultationSlotsView(APIView):
     def get(self, request):
         try:
-            print("⚡ Starting optimized slot generation...")
-            # 1. Fetch Service (1 Query)
-            try:
-                consultation_service = Service.objects.get(service_name='Medical Consultation')
-            except Service.DoesNotExist:
-                return Response({'error': 'Service "Medical Consultation" not configured.'}, status=status.HTTP_404_NOT_FOUND)
-            
-            # 2. Bulk Fetch Schedulers (1 Query)
-            # Fetch all schedules for this service at once
-            schedulers = ServiceScheduler.objects.filter(service_id=consultation_service)
-            
-            # Create a memory map: {'Monday': {'AM': True, 'PM': False}, ...}
-            schedule_map = {}
-            for sched in schedulers:
-                day_name = sched.day_id.day 
-                meridiem = sched.meridiem
-                
-                if day_name not in schedule_map:
-                    schedule_map[day_name] = {'AM': False, 'PM': False}
-                schedule_map[day_name][meridiem] = True
-
-            # 3. Bulk Fetch DateSlots for the next 90 days (1 Query)
-            today = date.today()
-            future_date_limit = today + timedelta(days=90)
-            
-            # Fetch all slot overrides/bookings for the date range
-            date_slots = DateSlots.objects.filter(date__range=[today, future_date_limit])
-            
-            # Create a memory map: {date_obj: slot_obj}
-            slots_map = {ds.date: ds for ds in date_slots}
-
-            response_data = []
-            current_date = today
-
-            # 4. In-Memory Loop (Zero DB hits here)
-            while current_date <= future_date_limit:
-                day_of_week_name = current_date.strftime('%A')
-                is_weekend = current_date.weekday() in [5, 6]  # 5=Sat, 6=Sun
-
-                # Get schedule availability from memory map
-                day_sched = schedule_map.get(day_of_week_name, {'AM': False, 'PM': False})
-                is_scheduled_am = day_sched['AM']
-                is_scheduled_pm = day_sched['PM']
-
-                # Rule: Available if scheduled OR weekend
-                am_allowed = is_scheduled_am or is_weekend
-                pm_allowed = is_scheduled_pm or is_weekend
-
-                # Get slot data from memory map (or use defaults)
-                date_slot = slots_map.get(current_date)
-                
-                am_max = date_slot.am_max_slots if date_slot else 20
-                pm_max = date_slot.pm_max_slots if date_slot else 20
-                am_booked = date_slot.am_current_bookings if date_slot else 0
-                pm_booked = date_slot.pm_current_bookings if date_slot else 0
-                
-                am_avail_count = max(0, am_max - am_booked)
-                pm_avail_count = max(0, pm_max - pm_booked)
-
-                # Only include dates that have at least one available slot
-                if (am_allowed and am_avail_count > 0) or (pm_allowed and pm_avail_count > 0):
-                    response_data.append({
-                        'date': current_date.isoformat(),
-                        'day_name': day_of_week_name,
-                        'am_available': bool(am_allowed and am_avail_count > 0),
-                        'pm_available': bool(pm_allowed and pm_avail_count > 0),
-                        'am_available_count': am_avail_count,
-                        'pm_available_count': pm_avail_count,
-                    })
-
-                current_date += timedelta(days=1)
-            
-            print(f"⚡ Generated {len(response_data)} slots successfully.")
-            return Response(response_data, status=status.HTTP_200_OK)
-        
+            return Response(availability_calendar(), status=status.HTTP_200_OK)
+        except Service.DoesNotExist:
+            return Response({'error': 'Service "Medical Consultation" not configured.'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             import traceback
             print("❌ Error generating slots:", str(e))
@@ -1808,90 +1672,65 @@ class MedicalConsultationBookingView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Create or get date slot - REMOVE service_scheduler field
-        date_slot, created = DateSlots.objects.get_or_create(
-            date=scheduled_date,
-            defaults={
-                'am_max_slots': 20,
-                'pm_max_slots': 20,
-                # Remove this line: 'service_scheduler': scheduler
-            }
-        )
-
-        # Check availability and book
-        if meridiem == 'AM':
-            if date_slot.am_available_slots <= 0:
-                return Response({'error': 'No AM slots available.'}, status=400)
-            date_slot.am_current_bookings += 1
-        else:
-            if date_slot.pm_available_slots <= 0:
-                return Response({'error': 'No PM slots available.'}, status=400)
-            date_slot.pm_current_bookings += 1
+        try:
+            resident_profile = ResidentProfile.objects.get(rp_id=rp_id)
+        except ResidentProfile.DoesNotExist:
+            return Response({'error': 'Resident not found.'}, status=400)
 
-        date_slot.save()
+        # Conditional UPDATE: fails instead of overbooking when the session is full
+        if not reserve_slot(scheduled_date, meridiem):
+            return Response({'error': f'No {meridiem} slots available.'}, status=400)
         
         # Create appointment
-        try:
-            resident_profile = ResidentProfile.objects.get(rp_id=rp_id)
-            appointment = MedConsultAppointment.objects.create(
-                rp=resident_profile,
-                chief_complaint=chief_complaint,
-                scheduled_date=scheduled_date,
-                meridiem=meridiem,
-                status='pending'
+        appointment = MedConsultAppointment.objects.create(
+            rp=resident_profile,
+            chief_complaint=chief_complaint,
+            scheduled_date=scheduled_date,
+            meridiem=meridiem,
+            status='pending'
+        )
+        
+        notifier = NotificationQueries()
+        resident_name = self._get_resident_name(resident_profile)
+        formatted_date = scheduled_date.strftime("%B %d, %Y")
+        
+        # resident_success = notifier.create_notification(
+        #     title="Appointment Scheduled",
+        #     message=f"Your medical consultation is scheduled on {formatted_date} ({meridiem}).",
+        #     recipients=[str(resident_profile.rp_id)],
+        #     notif_type="APPOINTMENT_SCHEDULED",
+        #     web_route="/services/medical-consultation/my-appointments",
+        #     web_params={"appointment_id": str(appointment.id)},
+        #     mobile_route="/(health)/medconsultation/my-medappointments",
+        #     mobile_params={},
+        # )
+        
+        # 2. Notify Staff (all active medical staff)
+        medical_staff = Staff.objects.filter(staff_type="HEALTH STAFF",
+                                             pos__pos_title__in=['ADMIN', 'DOCTORS', 'BARANGAY HEALTH WORKERS', 'MIDWIFE']).select_related('rp')
+        print(f"Found {medical_staff.count()} medical staff members")
+
+        staff_recipients = [str(staff.rp.rp_id) for staff in medical_staff if staff.rp and staff.rp.rp_id]
+        print("STAFFS: ",staff_recipients)
+        
+        if staff_recipients:
+            staff_success = notifier.create_notification(
+                title="New Medical Consultation Appointment",
+                message=f"{resident_name} on {formatted_date} ({meridiem}). Complaint: {chief_complaint}",
+                recipients=staff_recipients,
+                notif_type="NEW_MEDICAL_APPOINTMENT",
+                web_route="/services/medical-consultation/appointments/pending",
+                web_params="",
+                mobile_route="/(health)/admin/schedules/all-appointment",
+                mobile_params={},
             )
+        return Response({
+            'success': True,
+            'appointment_id': appointment.id,
+            'scheduled_date': scheduled_date.isoformat(),
+            'meridiem': meridiem,
             
-            
-            notifier = NotificationQueries()
-            resident_name = self._get_resident_name(resident_profile)
-            formatted_date = scheduled_date.strftime("%B %d, %Y")
-            
-            # resident_success = notifier.create_notification(
-            #     title="Appointment Scheduled",
-            #     message=f"Your medical consultation is scheduled on {formatted_date} ({meridiem}).",
-            #     recipients=[str(resident_profile.rp_id)],
-            #     notif_type="APPOINTMENT_SCHEDULED",
-            #     web_route="/services/medical-consultation/my-appointments",
-            #     web_params={"appointment_id": str(appointment.id)},
-            #     mobile_route="/(health)/medconsultation/my-medappointments",
-            #     mobile_params={},
-            # )
-            
-            # 2. Notify Staff (all active medical staff)
-            medical_staff = Staff.objects.filter(staff_type="HEALTH STAFF",
-                                                 pos__pos_title__in=['ADMIN', 'DOCTORS', 'BARANGAY HEALTH WORKERS', 'MIDWIFE']).select_related('rp')
-            print(f"Found {medical_staff.count()} medical staff members")
-    
-            staff_recipients = [str(staff.rp.rp_id) for staff in medical_staff if staff.rp and staff.rp.rp_id]
-            print("STAFFS: ",staff_recipients)
-            
-            if staff_recipients:
-                staff_success = notifier.create_notification(
-                    title="New Medical Consultation Appointment",
-                    message=f"{resident_name} on {formatted_date} ({meridiem}). Complaint: {chief_complaint}",
-                    recipients=staff_recipients,
-                    notif_type="NEW_MEDICAL_APPOINTMENT",
-                    web_route="/services/medical-consultation/appointments/pending",
-                    web_params="",
-                    mobile_route="/(health)/admin/schedules/all-appointment",
-                    mobile_params={},
-                )
-            return Response({
-                'success': True,
-                'appointment_id': appointment.id,
-                'scheduled_date': scheduled_date.isoformat(),
-                'meridiem': meridiem,
-                
-            }, status=201)
-            
-        except ResidentProfile.DoesNotExist:
-            # Rollback
-            if meridiem == 'AM':
-                date_slot.am_current_bookings -= 1
-            else:
-                date_slot.pm_current_bookings -= 1
-            date_slot.save()
-            return Response({'error': 'Resident not found.'}, status=400)
+        }, status=201)
 
     def _get_resident_name(self, resident_profile):
             """Helper to get resident name"""
@@ -1954,6 +1793,11 @@ class CancelAppointmentView(APIView):
 
         try:
             with transaction.atomic():
+                # Lock the appointment so two cancellations cannot both release its slot
+                appointment = MedConsultAppointment.objects.select_for_update().get(id=appointment_id)
+                if appointment.status != 'pending':
+                    return Response({'error': 'Only pending appointments can be cancelled.'}, status=status.HTTP_400_BAD_REQUEST)
+
                 # Update appointment status
                 appointment.status = 'cancelled'
                 appointment.archive_reason = archive_reason
@@ -1961,24 +1805,15 @@ class CancelAppointmentView(APIView):
                 
 
                 # Decrease slot booking count
-                date_slot = DateSlots.objects.get(date=appointment.scheduled_date)
-                if appointment.meridiem == 'AM':
-                    date_slot.am_current_bookings = max(0, date_slot.am_current_bookings - 1)
-                else:
-                    date_slot.pm_current_bookings = max(0, date_slot.pm_current_bookings - 1)
-                date_slot.save()
+                slot_released = release_slot(appointment.scheduled_date, appointment.meridiem)
 
                 send_appointment_status_notifications(appointment,'cancelled')
                 
-                
+            if not slot_released:
+                # If date slot is missing, still allow cancellation but log the issue
+                return Response({'success': True, 'detail': 'Appointment cancelled, but slot update failed.'}, status=status.HTTP_200_OK)
             return Response({'success': True, 'detail': 'Appointment cancelled successfully.'}, status=status.HTTP_200_OK)
 
-        except DateSlots.DoesNotExist:
-            # If date slot is missing, still allow cancellation but log the issue
-            appointment.status = 'cancelled'
-            appointment.archive_reason = archive_reason
-            appointment.save()
-            return Response({'success': True, 'detail': 'Appointment cancelled, but slot update failed.'}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
@@ -22,6 +22,7 @@ from pagination import *
 from django.db.models import Q, Prefetch
 from utils import * 
 from utils.create_notification import NotificationQueries
+from apps.inventory.ledger import InsufficientStock, deduct
 
 
 class CreateMedicineRecordView(generics.CreateAPIView):
@@ -121,24 +122,22 @@ class CreateMedicineRequestView(APIView):
                     minv = alloc['minv']
                     medrec_qty = alloc['medrec_qty']
                     if minv and medrec_qty > 0:
-                        if minv.minv_qty_avail < medrec_qty:
+                        # Deduct inventory and create transaction record
+                        unit = minv.minv_qty_unit or 'pcs'
+                        try:
+                            minv = deduct(
+                                'medicine', minv.minv_id, medrec_qty,
+                                qty_label=f"{medrec_qty} {unit}",
+                                adjust={'temporary_deduction': medrec_qty},
+                                staff=staff_instance,
+                            )
+                        except InsufficientStock as e:
+                            # Undo the allocations already made for this request
+                            transaction.set_rollback(True)
                             return Response(
-                                {"error": f"Insufficient stock for medicine ID {minv.minv_id}. Available: {minv.minv_qty_avail}, Requested: {medrec_qty}"},
+                                {"error": f"Insufficient stock for medicine ID {e.stock_id}. Available: {e.available}, Requested: {medrec_qty}"},
                                 status=status.HTTP_400_BAD_REQUEST
                             )
-                        # Deduct inventory
-                        minv.minv_qty_avail -= medrec_qty
-                        minv.temporary_deduction += medrec_qty
-                        minv.save()
-                        # Create transaction record
-                        unit = minv.minv_qty_unit or 'pcs'
-                        mdt_qty = f"{medrec_qty} {unit}"
-                        MedicineTransactions.objects.create(
-                            mdt_qty=mdt_qty,
-                            mdt_action="Deducted",
-                            staff=staff_instance,
-                            minv_id=minv
-                        )
                         # Create allocation
                         MedicineAllocation.objects.create(
                             medreqitem=medicine_item,
@@ -373,11 +372,6 @@ class CreateMedicineRequestAllocationAPIView(APIView):
 
                 try:
                     medicine_inventory = MedicineInventory.objects.get(minv_id=minv_id)
-                    available_stock = medicine_inventory.minv_qty_avail
-                    if available_stock < medrec_qty:
-                        return Response({
-                            "error": f"Insufficient stock for {medicine_inventory.med_id.med_name}. Available: {available_stock}, Requested: {medrec_qty}"
-                        }, status=status.HTTP_400_BAD_REQUEST)
 
                     # Update MedicineRequestItem: status and completed_by
                     try:
@@ -428,18 +422,20 @@ class CreateMedicineRequestAllocationAPIView(APIView):
                         unit = medicine_inventory.minv_qty_unit or 'pcs'
                         mdt_qty = f"{medrec_qty} {unit}"
 
-                    medicine_transaction = MedicineTransactions.objects.create(
-                        mdt_qty=mdt_qty,
-                        mdt_action="Deducted",
-                        staff=staff_instance,
-                        minv_id=medicine_inventory,
-                    )
-                    medicine_transactions.append(medicine_transaction)
-
-                    # Update inventory
-                    medicine_inventory.minv_qty_avail -= medrec_qty
-                    medicine_inventory.temporary_deduction -= medrec_qty
-                    medicine_inventory.save()
+                    # Update inventory; the pickup releases the hold placed when the request was made
+                    try:
+                        medicine_inventory = deduct(
+                            'medicine', minv_id, medrec_qty,
+                            qty_label=mdt_qty,
+                            adjust={'temporary_deduction': -medrec_qty},
+                            staff=staff_instance,
+                        )
+                    except InsufficientStock as e:
+                        transaction.set_rollback(True)
+                        return Response({
+                            "error": f"Insufficient stock for {medicine_inventory.med_id.med_name}. Available: {e.available}, Requested: {medrec_qty}"
+                        }, status=status.HTTP_400_BAD_REQUEST)
+                    medicine_transactions.append(minv_id)
 
                 except MedicineInventory.DoesNotExist:
                     return Response({
@@ -13,6 +13,9 @@ class PatientrecordsConfig(AppConfig):
     name = 'apps.patientrecords'
     
     def ready(self):
+        # Keep the patient_summary projection in sync with its source tables
+        from . import signals
+
         if getattr(settings, 'SCHEDULER_AUTOSTART', True):
             if os.environ.get('RUN_MAIN') or 'runserver' in sys.argv:
                 self.start_scheduler()
@@ -0,0 +1,425 @@
+"""
+Batch loading of the related rows the patient list serializers read per row.
+
+PatientLookups runs the per-row queries utils.py has always used. PatientBatchLoader
+answers the same lookups for a whole page: each related table is read with one
+__in query (the first time it is needed) and kept in dicts keyed by rp_id /
+pat_id / per_id / pregnancy_id / pf_id. IDs outside the page fall back to the live query.
+
+List views put the loader in the serializer context under 'patient_batch';
+helpers call get_lookups(context) and never need to know which one they got.
+"""
+from functools import cached_property
+from django.db.models import F, OuterRef, Subquery
+from apps.administration.models import Staff
+from apps.familyplanning.models import FP_Record, FP_type
+from apps.healthProfiling.models import (
+    FamilyComposition, HealthRelatedDetails, Household, MotherHealthInfo, PersonalAddress, ResidentProfile,
+)
+from apps.maternal.models import TT_Status, Pregnancy, Prenatal_Form, PrenatalCare, PostpartumRecord
+from .models import Patient, BodyMeasurement, VitalSigns
+
+BATCH_CONTEXT_KEY = 'patient_batch'
+
+CHILD_ROLES = ['DEPENDENT', 'INDEPENDENT', 'Dependent', 'Independent', 'dependent', 'independent']
+COMPOSITION_ORDER = ('-fam_id__fam_date_registered', '-fc_id')
+TT_ORDER = ('-tts_date_given', '-tts_id')
+FP_TYPE_ORDER = ('fpt_client_type', 'fpt_id')
+
+
+def _pk(value):
+    return getattr(value, 'pk', value)
+
+
+def get_lookups(context=None):
+    """Returns the batch loader from a serializer context, or the live per-row lookups"""
+    return (context or {}).get(BATCH_CONTEXT_KEY) or live_lookups
+
+
+# ===============================================================
+#  LIVE (PER-ROW) LOOKUPS
+# ===============================================================
+class PatientLookups:
+    def health_details(self, rp):
+        return HealthRelatedDetails.objects.filter(rp=rp).first()
+
+    def mother_health_info(self, rp):
+        return MotherHealthInfo.objects.filter(rp=rp).first()
+
+    def current_composition(self, rp):
+        return FamilyComposition.objects.filter(rp=rp).order_by(*COMPOSITION_ORDER).first()
+
+    def staff_composition(self, rp):
+        return FamilyComposition.objects.filter(rp=rp).order_by('-fc_id').first()
+
+    def family_members(self, fam_id):
+        return FamilyComposition.objects.filter(fam_id=fam_id).select_related('rp', 'rp__per')
+
+    def family_mother(self, fam_id):
+        return FamilyComposition.objects.filter(
+            fam_id=fam_id, fc_role__iexact='Mother'
+        ).select_related('rp', 'rp__per').first()
+
+    def children_count(self, fam_id):
+        return FamilyComposition.objects.filter(fam_id=fam_id, fc_role__in=CHILD_ROLES).count()
+
+    def patient_for_resident(self, rp):
+        return Patient.objects.filter(rp_id=rp).first()
+
+    def personal_address(self, per):
+        return PersonalAddress.objects.select_related('add', 'add__sitio').filter(per=per).first()
+
+    def household(self, rp):
+        return Household.objects.select_related('add', 'add__sitio').filter(rp=rp).first()
+
+    def households_for_personal(self, per):
+        return Household.objects.filter(rp__per=per).select_related('rp__per', 'staff__rp__per')
+
+    def latest_fp_method(self, pat):
+        latest_fp_record = FP_Record.objects.filter(pat=pat).order_by('-created_at').first()
+        if not latest_fp_record:
+            return None
+        fp_type = FP_type.objects.filter(fprecord=latest_fp_record).order_by(*FP_TYPE_ORDER).first()
+        return fp_type.fpt_method_used if fp_type else None
+
+    def latest_tt_status(self, pat):
+        return TT_Status.objects.filter(pat_id=pat).order_by(*TT_ORDER).first()
+
+    def latest_tt_status_for_resident(self, rp):
+        return TT_Status.objects.filter(pat_id__rp_id=rp).order_by(*TT_ORDER).first()
+
+    def latest_pregnancy(self, pat, status=None):
+        pregnancies = Pregnancy.objects.filter(pat_id=pat)
+        if status:
+            pregnancies = pregnancies.filter(status=status)
+        return pregnancies.order_by('-pregnancy_id').first()
+
+    def latest_prenatal_form(self, pregnancy):
+        return Prenatal_Form.objects.filter(pregnancy_id=pregnancy).order_by('-created_at').first()
+
+    def latest_postpartum_record(self, pregnancy):
+        return PostpartumRecord.objects.filter(pregnancy_id=pregnancy).order_by('-created_at').first()
+
+    def latest_prenatal_care(self, prenatal_form):
+        return PrenatalCare.objects.filter(
+            pf_id=prenatal_form, pfpc_aog_wks__isnull=False
+        ).order_by('-pfpc_date', '-created_at').first()
+
+    def latest_body_measurement(self, pat):
+        return BodyMeasurement.objects.filter(
+            pat_id=pat, height__gt=0, weight__gt=0
+        ).order_by('-created_at').first()
+
+    def latest_vital_signs(self, pat):
+        return VitalSigns.objects.filter(patrec__pat_id=pat).order_by('-created_at').first()
+
+
+live_lookups = PatientLookups()
+
+
+# ===============================================================
+#  BATCH LOOKUPS
+# ===============================================================
+def _first_per_group(queryset, group_by, ordering, ids):
+    """
+    One query returning {group value: first row by ordering} for the given ids,
+    matching what queryset.filter(group_by=id).order_by(*ordering).first() returns per id.
+    """
+    if not ids:
+        return {}
+    pk_name = queryset.model._meta.pk.name
+    first = queryset.filter(**{group_by: OuterRef(group_by)}).order_by(*ordering).values(pk_name)[:1]
+    rows = queryset.filter(**{f'{group_by}__in': ids}).annotate(
+        batch_key=F(group_by)
+    ).filter(pk=Subquery(first))
+    return {row.batch_key: row for row in rows}
+
+
+class PatientBatchLoader(PatientLookups):
+    """Lookups for one page of Patient and/or ResidentProfile rows"""
+
+    def __init__(self, patients=(), residents=()):
+        patients = list(patients)
+        self.pat_ids = {patient.pat_id for patient in patients}
+        self.staff_ids = {patient.registered_by_id for patient in patients if patient.registered_by_id}
+        self.rp_ids = {patient.rp_id_id for patient in patients if patient.rp_id_id}
+        self.rp_ids |= {resident.rp_id for resident in residents}
+
+    # --- residents on the page ---
+    @cached_property
+    def _health_details(self):
+        return _first_per_group(HealthRelatedDetails.objects.all(), 'rp', ('pk',), self.rp_ids)
+
+    @cached_property
+    def _mother_health_info(self):
+        return _first_per_group(MotherHealthInfo.objects.all(), 'rp', ('pk',), self.rp_ids)
+
+    @cached_property
+    def _compositions(self):
+        return _first_per_group(FamilyComposition.objects.all(), 'rp', COMPOSITION_ORDER, self.rp_ids)
+
+    # --- their families ---
+    @cached_property
+    def _members(self):
+        fam_ids = {composition.fam_id for composition in self._compositions.values()}
+        members = {fam_id: [] for fam_id in fam_ids}
+        for member in FamilyComposition.objects.filter(
+            fam_id__in=fam_ids
+        ).select_related('rp', 'rp__per').order_by('fc_id'):
+            members[member.fam_id].append(member)
+        return members
+
+    @cached_property
+    def _member_rp_ids(self):
+        return self.rp_ids | {
+            member.rp_id for members in self._members.values() for member in members
+        }
+
+    @cached_property
+    def _patients_by_resident(self):
+        return _first_per_group(Patient.objects.all(), 'rp_id', ('pk',), self._member_rp_ids)
+
+    @cached_property
+    def _family_pat_ids(self):
+        return self.pat_ids | {patient.pat_id for patient in self._patients_by_resident.values()}
+
+    @cached_property
+    def _per_ids(self):
+        return set(
+            ResidentProfile.objects.filter(rp_id__in=self._member_rp_ids).values_list('per_id', flat=True)
+        )
+
+    @cached_property
+    def _personal_addresses(self):
+        return _first_per_group(
+            PersonalAddress.objects.select_related('add', 'add__sitio'), 'per', ('pk',), self._per_ids
+        )
+
+    @cached_property
+    def _households(self):
+        return _first_per_group(
+            Household.objects.select_related('add', 'add__sitio'), 'rp', ('pk',), self._member_rp_ids
+        )
+
+    @cached_property
+    def _households_by_personal(self):
+        households = {per_id: [] for per_id in self._per_ids}
+        for household in Household.objects.filter(
+            rp__per__in=self._per_ids
+        ).select_related('rp__per', 'staff__rp__per').order_by('pk'):
+            households[household.rp.per_id].append(household)
+        return households
+
+    # --- staff who registered the page ---
+    @cached_property
+    def _staff_rp_ids(self):
+        return set(Staff.objects.filter(staff_id__in=self.staff_ids).values_list('rp_id', flat=True))
+
+    @cached_property
+    def _staff_compositions(self):
+        return _first_per_group(FamilyComposition.objects.all(), 'rp', ('-fc_id',), self._staff_rp_ids)
+
+    # --- family planning ---
+    @cached_property
+    def _fp_records(self):
+        return _first_per_group(FP_Record.objects.all(), 'pat', ('-created_at',), self._family_pat_ids)
+
+    @cached_property
+    def _fp_types(self):
+        return _first_per_group(
+            FP_type.objects.all(), 'fprecord', FP_TYPE_ORDER, {record.pk for record in self._fp_records.values()}
+        )
+
+    # --- maternal ---
+    @cached_property
+    def _tt_status(self):
+        return _first_per_group(TT_Status.objects.all(), 'pat_id', TT_ORDER, self.pat_ids)
+
+    @cached_property
+    def _tt_status_by_resident(self):
+        return _first_per_group(TT_Status.objects.all(), 'pat_id__rp_id', TT_ORDER, self._member_rp_ids)
+
+    @cached_property
+    def _pregnancies(self):
+        return _first_per_group(Pregnancy.objects.all(), 'pat_id', ('-pregnancy_id',), self.pat_ids)
+
+    @cached_property
+    def _completed_pregnancies(self):
+        return _first_per_group(
+            Pregnancy.objects.filter(status='completed'), 'pat_id', ('-pregnancy_id',), self._family_pat_ids
+        )
+
+    @cached_property
+    def _pregnancy_ids(self):
+        return {
+            pregnancy.pregnancy_id
+            for pregnancy in [*self._pregnancies.values(), *self._completed_pregnancies.values()]
+        }
+
+    @cached_property
+    def _prenatal_forms(self):
+        return _first_per_group(Prenatal_Form.objects.all(), 'pregnancy_id', ('-created_at',), self._pregnancy_ids)
+
+    @cached_property
+    def _postpartum_records(self):
+        return _first_per_group(PostpartumRecord.objects.all(), 'pregnancy_id', ('-created_at',), self._pregnancy_ids)
+
+    @cached_property
+    def _prenatal_care(self):
+        return _first_per_group(
+            PrenatalCare.objects.filter(pfpc_aog_wks__isnull=False),
+            'pf_id', ('-pfpc_date', '-created_at'),
+            {prenatal_form.pf_id for prenatal_form in self._prenatal_forms.values()},
+        )
+
+    # --- measurements ---
+    @cached_property
+    def _body_measurements(self):
+        return _first_per_group(
+            BodyMeasurement.objects.filter(height__gt=0, weight__gt=0), 'pat', ('-created_at',), self.pat_ids
+        )
+
+    @cached_property
+    def _vital_signs(self):
+        return _first_per_group(VitalSigns.objects.all(), 'patrec__pat_id', ('-created_at',), self.pat_ids)
+
+    # --- lookups ---
+    def health_details(self, rp):
+        rp = _pk(rp)
+        if rp not in self.rp_ids:
+            return super().health_details(rp)
+        return self._health_details.get(rp)
+
+    def mother_health_info(self, rp):
+        rp = _pk(rp)
+        if rp not in self.rp_ids:
+            return super().mother_health_info(rp)
+        return self._mother_health_info.get(rp)
+
+    def current_composition(self, rp):
+        rp = _pk(rp)
+        if rp not in self.rp_ids:
+            return super().current_composition(rp)
+        return self._compositions.get(rp)
+
+    def staff_composition(self, rp):
+        rp = _pk(rp)
+        if rp not in self._staff_rp_ids:
+            return super().staff_composition(rp)
+        return self._staff_compositions.get(rp)
+
+    def family_members(self, fam_id):
+        fam_id = _pk(fam_id)
+        if fam_id not in self._members:
+            return super().family_members(fam_id)
+        return self._members[fam_id]
+
+    def family_mother(self, fam_id):
+        fam_id = _pk(fam_id)
+        if fam_id not in self._members:
+            return super().family_mother(fam_id)
+        return next(
+            (member for member in self._members[fam_id] if (member.fc_role or '').lower() == 'mother'), None
+        )
+
+    def children_count(self, fam_id):
+        fam_id = _pk(fam_id)
+        if fam_id not in self._members:
+            return super().children_count(fam_id)
+        return sum(1 for member in self._members[fam_id] if member.fc_role in CHILD_ROLES)
+
+    def patient_for_resident(self, rp):
+        rp = _pk(rp)
+        if rp not in self._member_rp_ids:
+            return super().patient_for_resident(rp)
+        return self._patients_by_resident.get(rp)
+
+    def personal_address(self, per):
+        per = _pk(per)
+        if per not in self._per_ids:
+            return super().personal_address(per)
+        return self._personal_addresses.get(per)
+
+    def household(self, rp):
+        rp = _pk(rp)
+        if rp not in self._member_rp_ids:
+            return super().household(rp)
+        return self._households.get(rp)
+
+    def households_for_personal(self, per):
+        per = _pk(per)
+        if per not in self._per_ids:
+            return super().households_for_personal(per)
+        return self._households_by_personal[per]
+
+    def latest_fp_method(self, pat):
+        pat = _pk(pat)
+        if pat not in self._family_pat_ids:
+            return super().latest_fp_method(pat)
+        latest_fp_record = self._fp_records.get(pat)
+        fp_type = self._fp_types.get(latest_fp_record.pk) if latest_fp_record else None
+        return fp_type.fpt_method_used if fp_type else None
+
+    def latest_tt_status(self, pat):
+        pat = _pk(pat)
+        if pat not in self.pat_ids:
+            return super().latest_tt_status(pat)
+        return self._tt_status.get(pat)
+
+    def latest_tt_status_for_resident(self, rp):
+        rp = _pk(rp)
+        if rp not in self._member_rp_ids:
+            return super().latest_tt_status_for_resident(rp)
+        return self._tt_status_by_resident.get(rp)
+
+    def latest_pregnancy(self, pat, status=None):
+        pat = _pk(pat)
+        if status is None and pat in self.pat_ids:
+            return self._pregnancies.get(pat)
+        if status == 'completed' and pat in self._family_pat_ids:
+            return self._completed_pregnancies.get(pat)
+        return super().latest_pregnancy(pat, status)
+
+    def latest_prenatal_form(self, pregnancy):
+        pregnancy = _pk(pregnancy)
+        if pregnancy not in self._pregnancy_ids:
+            return super().latest_prenatal_form(pregnancy)
+        return self._prenatal_forms.get(pregnancy)
+
+    def latest_postpartum_record(self, pregnancy):
+        pregnancy = _pk(pregnancy)
+        if pregnancy not in self._pregnancy_ids:
+            return super().latest_postpartum_record(pregnancy)
+        return self._postpartum_records.get(pregnancy)
+
+    def latest_prenatal_care(self, prenatal_form):
+        prenatal_form = _pk(prenatal_form)
+        if prenatal_form not in {form.pf_id for form in self._prenatal_forms.values()}:
+            return super().latest_prenatal_care(prenatal_form)
+        return self._prenatal_care.get(prenatal_form)
+
+    def latest_body_measurement(self, pat):
+        pat = _pk(pat)
+        if pat not in self.pat_ids:
+            return super().latest_body_measurement(pat)
+        return self._body_measurements.get(pat)
+
+    def latest_vital_signs(self, pat):
+        pat = _pk(pat)
+        if pat not in self.pat_ids:
+            return super().latest_vital_signs(pat)
+        return self._vital_signs.get(pat)
+
+
+class PatientBatchContextMixin:
+    """
+    For list views of Patient rows: the page being serialized is handed to a
+    PatientBatchLoader, which the serializers find in their context.
+    """
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many') and args:
+            page = list(args[0])
+            context = kwargs.pop('context', None) or self.get_serializer_context()
+            context[BATCH_CONTEXT_KEY] = PatientBatchLoader(patients=page)
+            return super().get_serializer(page, *args[1:], context=context, **kwargs)
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from apps.patientrecords.models import Patient, PatientSummary
+from apps.patientrecords.summary import refresh_patient_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the patient_summary projection from its source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--pat-id', action='append', dest='pat_ids', help='Only rebuild these patients (repeatable)')
+        parser.add_argument('--missing', action='store_true', help='Only build summaries for patients without one')
+
+    def handle(self, *args, **options):
+        patients = Patient.objects.all()
+        if options['pat_ids']:
+            patients = patients.filter(pat_id__in=options['pat_ids'])
+        if options['missing']:
+            patients = patients.exclude(pat_id__in=PatientSummary.objects.values('pat_id'))
+
+        pat_ids = list(patients.order_by('pat_id').values_list('pat_id', flat=True))
+        self.stdout.write(f"Rebuilding {len(pat_ids)} patient summaries...")
+
+        batch_size = options['batch_size']
+        done = 0
+        for start in range(0, len(pat_ids), batch_size):
+            done += refresh_patient_summaries(pat_ids[start:start + batch_size], batch_size=batch_size)
+            self.stdout.write(f"  {done}/{len(pat_ids)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {done} patient summaries."))
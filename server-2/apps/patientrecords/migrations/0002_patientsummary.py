@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 15:45
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patientrecords', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientSummary',
+            fields=[
+                ('pat', models.OneToOneField(db_column='pat_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='patientrecords.patient')),
+                ('ps_philhealth_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('ps_fam_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('ps_fc_role', models.CharField(blank=True, max_length=50, null=True)),
+                ('ps_family_head_info', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('ps_mother_tt_status', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('ps_latest_pregnancy', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('ps_child_dependents', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('ps_additional_info', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('ps_address', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('ps_updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'patient_summary',
+                'indexes': [models.Index(fields=['ps_fam_id'], name='patient_sum_ps_fam__ce6816_idx')],
+            },
+        ),
+    ]
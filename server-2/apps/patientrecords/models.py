@@ -1,5 +1,6 @@
 from django.db import models, transaction
 from django.db.models import Max
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from decimal import Decimal
 from apps.healthProfiling.models import ResidentProfile
@@ -180,6 +181,31 @@ class Patient(models.Model):
         db_table = 'patient'
         ordering = ['-created_at']
 
+
+class PatientSummary(models.Model):
+    """
+    Denormalized read model for patient list endpoints. One row per patient,
+    kept current by the signals in patientrecords/summary.py and rebuilt in full
+    by the rebuild_patient_summary command.
+    """
+    pat = models.OneToOneField(Patient, on_delete=models.CASCADE, primary_key=True, related_name='summary', db_column='pat_id')
+    ps_philhealth_id = models.CharField(max_length=100, null=True, blank=True)
+    ps_fam_id = models.CharField(max_length=50, null=True, blank=True)
+    ps_fc_role = models.CharField(max_length=50, null=True, blank=True)
+    ps_family_head_info = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    ps_mother_tt_status = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    ps_latest_pregnancy = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    ps_child_dependents = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    ps_additional_info = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    ps_address = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    ps_updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'patient_summary'
+        indexes = [
+            models.Index(fields=['ps_fam_id']),
+        ]
+
  
 class PatientRecord(models.Model):
     patrec_id = models.BigAutoField(primary_key=True)
@@ -40,6 +40,8 @@ from ..utils import (
     get_spouse_info,
     get_child_dependents_for_mother
 )
+from ..summary import get_patient_summary, summary_additional_info
+from ..loaders import get_lookups
 
 class PartialUpdateMixin:  
     def to_internal_value(self, data):
@@ -65,11 +67,11 @@ class ResidentProfileSerializer(serializers.ModelSerializer):
             (f" {info.per_mname[0]}." if info.per_mname else "")
     
     def get_per_add_philhealth_id(self, obj):
-        detail = HealthRelatedDetails.objects.filter(rp=obj).first()
+        detail = get_lookups(self.context).health_details(obj)
         return detail.per_add_philhealth_id if detail else None
 
     def get_mhi_immun_status(self, obj):
-        mhi = MotherHealthInfo.objects.filter(rp=obj).first()
+        mhi = get_lookups(self.context).mother_health_info(obj)
         return mhi.mhi_immun_status if mhi else None
     
 class TransientAddressSerializer(serializers.ModelSerializer):
@@ -102,6 +104,7 @@ class PatientMiniMalSerializer(serializers.ModelSerializer):
 
 
 class PatientMiniMalSerializerWithAddtionalInfo(serializers.ModelSerializer):
+    """Reads address and additional info from the patient_summary projection (select_related('summary'))"""
     personal_info = serializers.SerializerMethodField()
     address = serializers.SerializerMethodField()
     additional_info = serializers.SerializerMethodField()
@@ -111,10 +114,12 @@ class PatientMiniMalSerializerWithAddtionalInfo(serializers.ModelSerializer):
         return extract_personal_info(obj)
 
     def get_address(self, obj):
-        return get_address(obj)
+        summary = get_patient_summary(obj)
+        return summary.ps_address if summary else get_address(obj)
     
     def get_additional_info(self, obj):
-        return get_additional_info(obj)
+        summary = get_patient_summary(obj)
+        return summary_additional_info(summary) if summary else get_additional_info(obj, context=self.context)
     
     class Meta:
         model = Patient
@@ -122,6 +127,7 @@ class PatientMiniMalSerializerWithAddtionalInfo(serializers.ModelSerializer):
 
 
 class PatientMChildreniniMalSerializer(serializers.ModelSerializer):
+    """Reads address, family heads and additional info from the patient_summary projection"""
     personal_info = serializers.SerializerMethodField()
     address = serializers.SerializerMethodField()
     family_head_info = serializers.SerializerMethodField()
@@ -131,13 +137,16 @@ class PatientMChildreniniMalSerializer(serializers.ModelSerializer):
         return extract_personal_info(obj)
 
     def get_address(self, obj):
-        return get_address(obj)
+        summary = get_patient_summary(obj)
+        return summary.ps_address if summary else get_address(obj)
     
     def get_family_head_info(self, obj):
-        return get_family_head_info(obj, context=self.context)
+        summary = get_patient_summary(obj)
+        return summary.ps_family_head_info if summary else get_family_head_info(obj, context=self.context)
     
     def get_additional_info(self, obj):
-        return get_additional_info(obj)
+        summary = get_patient_summary(obj)
+        return summary_additional_info(summary) if summary else get_additional_info(obj, context=self.context)
     
     class Meta:
         model = Patient
@@ -165,7 +174,7 @@ class PatientSerializer(serializers.ModelSerializer):
 
     def get_family_planning_method(self, obj):
         """Use utility function from utils.py"""
-        return get_family_planning_method(obj)
+        return get_family_planning_method(obj, context=self.context)
     
     def get_registered_by(self, obj):
         """Format registered_by info similar to ResidentProfile"""
@@ -179,19 +188,16 @@ class PatientSerializer(serializers.ModelSerializer):
             
             # Get family composition ID if staff is a resident
             fam_id = ""
-            try:
-                fc = FamilyComposition.objects.filter(rp=staff.rp).order_by('-fc_id').first()
-                if fc:
-                    fam_id = fc.fam_id.fam_id if fc.fam_id else ""
-            except (AttributeError, FamilyComposition.DoesNotExist):
-                pass
+            fc = get_lookups(self.context).staff_composition(staff.rp_id)
+            if fc:
+                fam_id = fc.fam_id or ""
             
             return f"{staff.staff_id}-{staff_name}-{staff_type}-{fam_id}"
         return None
 
     def get_family_planning_method(self, obj):
         """Use utility function from utils.py"""
-        return get_family_planning_method(obj)
+        return get_family_planning_method(obj, context=self.context)
     
     def get_personal_info(self, obj):
         return get_personal_info(obj, context=self.context)
@@ -199,16 +205,13 @@ class PatientSerializer(serializers.ModelSerializer):
     def get_family_compositions(self, obj):
         if obj.pat_type == 'Resident' and obj.rp_id:
             try:
-                current_compositions = FamilyComposition.objects.filter(
-                    rp=obj.rp_id
-                ).order_by('-fam_id__fam_date_registered', '-fc_id').first()
+                lookups = get_lookups(self.context)
+                current_compositions = lookups.current_composition(obj.rp_id)
 
                 if not current_compositions:
                     return []
 
-                all_fam_composition = FamilyComposition.objects.filter(
-                    fam_id=current_compositions.fam_id
-                ).select_related('rp', 'rp__per')
+                all_fam_composition = lookups.family_members(current_compositions.fam_id)
                 return FCWithProfileDataSerializer(all_fam_composition, many=True, context=self.context).data
             except Exception as e:
                 print(f'Error fetching family compositions for resident {obj.rp_id.rp_id}: {str(e)}')
@@ -218,7 +221,7 @@ class PatientSerializer(serializers.ModelSerializer):
 
     def get_family(self, obj):
         """Use utility function from utils.py"""
-        return get_family(obj)
+        return get_family(obj, context=self.context)
 
     def get_family_head_info(self, obj):
         """Use utility function from utils.py"""
@@ -226,14 +229,13 @@ class PatientSerializer(serializers.ModelSerializer):
 
     def get_households(self, obj):
         if obj.pat_type == 'Resident' and obj.rp_id and hasattr(obj.rp_id, 'per'):
-            rp_ids = obj.rp_id.per.personal_information.all()
-            households = Household.objects.filter(rp__in=rp_ids)
+            households = get_lookups(self.context).households_for_personal(obj.rp_id.per_id)
             return HouseholdMinimalSerializer(households, many=True, context=self.context).data
         return []
 
     def get_address(self, obj):
         """Use utility function from utils.py"""
-        return get_address(obj)
+        return get_address(obj, context=self.context)
 
     def get_spouse_info(self, obj):
         """Use utility function from utils.py"""
@@ -241,7 +243,7 @@ class PatientSerializer(serializers.ModelSerializer):
         
     def get_additional_info(self, obj):
         """Use utility function from utils.py"""
-        return get_additional_info(obj)
+        return get_additional_info(obj, context=self.context)
 
 
 class PatientRecordChildrenSerializer(serializers.ModelSerializer):
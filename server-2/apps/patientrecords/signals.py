@@ -0,0 +1,88 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+import logging
+
+from apps.healthProfiling.models import (
+    FamilyComposition, HealthRelatedDetails, Household, Personal, PersonalAddress
+)
+from apps.childhealthservices.models import ChildHealthrecord
+from apps.maternal.models import TT_Status, Pregnancy, Prenatal_Form, PrenatalCare, PostpartumRecord
+from .models import Patient, PatientRecord, Transient
+from .summary import mark_changed
+
+logger = logging.getLogger(__name__)
+
+
+# ===============================================================
+#  PATIENT SUMMARY PROJECTION
+# ===============================================================
+@receiver([post_save, post_delete], sender=Patient)
+def patient_summary_patient_changed(sender, instance, **kwargs):
+    mark_changed(pat_ids=instance.pat_id, rp_ids=instance.rp_id_id)
+
+
+@receiver(post_save, sender=Transient)
+def patient_summary_transient_changed(sender, instance, **kwargs):
+    mark_changed(trans_ids=instance.trans_id)
+
+
+@receiver([post_save, post_delete], sender=Personal)
+def patient_summary_personal_changed(sender, instance, **kwargs):
+    mark_changed(per_ids=instance.per_id)
+
+
+@receiver([post_save, post_delete], sender=PersonalAddress)
+def patient_summary_address_changed(sender, instance, **kwargs):
+    mark_changed(per_ids=instance.per_id)
+
+
+@receiver([post_save, post_delete], sender=Household)
+def patient_summary_household_changed(sender, instance, **kwargs):
+    mark_changed(rp_ids=instance.rp_id)
+
+
+@receiver([post_save, post_delete], sender=HealthRelatedDetails)
+def patient_summary_health_details_changed(sender, instance, **kwargs):
+    mark_changed(rp_ids=instance.rp_id)
+
+
+@receiver([post_save, post_delete], sender=FamilyComposition)
+def patient_summary_family_changed(sender, instance, **kwargs):
+    # The family is marked too so members left behind by a removal are refreshed
+    mark_changed(rp_ids=instance.rp_id, fam_ids=instance.fam_id)
+
+
+@receiver([post_save, post_delete], sender=TT_Status)
+def patient_summary_tt_status_changed(sender, instance, **kwargs):
+    mark_changed(pat_ids=instance.pat_id_id)
+
+
+@receiver([post_save, post_delete], sender=Pregnancy)
+def patient_summary_pregnancy_changed(sender, instance, **kwargs):
+    mark_changed(pat_ids=instance.pat_id_id)
+
+
+@receiver([post_save, post_delete], sender=Prenatal_Form)
+def patient_summary_prenatal_changed(sender, instance, **kwargs):
+    mark_changed(pregnancy_ids=instance.pregnancy_id_id)
+
+
+@receiver([post_save, post_delete], sender=PrenatalCare)
+def patient_summary_prenatal_care_changed(sender, instance, **kwargs):
+    mark_changed(pf_ids=instance.pf_id_id)
+
+
+@receiver([post_save, post_delete], sender=PostpartumRecord)
+def patient_summary_postpartum_changed(sender, instance, **kwargs):
+    mark_changed(pregnancy_ids=instance.pregnancy_id_id)
+
+
+@receiver([post_save, post_delete], sender=PatientRecord)
+def patient_summary_patient_record_changed(sender, instance, **kwargs):
+    mark_changed(pat_ids=instance.pat_id_id)
+
+
+@receiver([post_save, post_delete], sender=ChildHealthrecord)
+def patient_summary_child_record_changed(sender, instance, **kwargs):
+    # The child's patient and its family, and the pregnancy the child was born of
+    mark_changed(patrec_ids=instance.patrec_id, pregnancy_ids=instance.pregnancy_id)
@@ -0,0 +1,190 @@
+"""
+Maintains the patient_summary projection.
+
+List serializers read philhealth ID, family head, mother TT status, latest
+pregnancy/AOG, child dependents and address from PatientSummary (one LEFT JOIN
+via select_related('summary')) instead of running the utils.py lookups per row.
+Signals record which residents/families/pregnancies/child records changed;
+the affected patients are recomputed once, after the transaction commits.
+Ages depend on the day they are read, so they are not stored: the serializers
+read the payload through summary_additional_info(), which computes them.
+"""
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Q
+from apps.healthProfiling.models import FamilyComposition
+from apps.maternal.models import Pregnancy, Prenatal_Form
+from .loaders import BATCH_CONTEXT_KEY, PatientBatchLoader
+from .models import Patient, PatientRecord, PatientSummary
+from .utils import get_additional_info, get_address, get_family, get_family_head_info
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = [
+    'ps_philhealth_id', 'ps_fam_id', 'ps_fc_role', 'ps_family_head_info', 'ps_mother_tt_status',
+    'ps_latest_pregnancy', 'ps_child_dependents', 'ps_additional_info', 'ps_address',
+]
+
+# Family head personal info is only serialized when a context is passed
+SUMMARY_CONTEXT = {'patient_summary': True}
+
+# Age keys of child dependents and the birth date each is computed from
+AGE_FIELDS = {'child_age': 'child_dob', 'age': 'dob'}
+
+_local = threading.local()
+
+
+def get_patient_summary(obj):
+    """Returns the projection row for a Patient, or None if it has not been built yet"""
+    try:
+        return obj.summary
+    except PatientSummary.DoesNotExist:
+        return None
+
+
+def age_on(dob, today):
+    if isinstance(dob, str):
+        dob = date.fromisoformat(dob[:10])
+    return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+
+def _with_ages(dependents, today=None):
+    """Copies of the dependents with their age keys computed as of today (None: not stored)"""
+    if not dependents:
+        return dependents
+    result = []
+    for dependent in dependents:
+        dependent = dict(dependent)
+        for age_key, dob_key in AGE_FIELDS.items():
+            if age_key not in dependent:
+                continue
+            dob = dependent.get(dob_key)
+            dependent[age_key] = age_on(dob, today) if dob and today else None
+        result.append(dependent)
+    return result
+
+
+def summary_additional_info(summary, today=None):
+    """The stored additional_info payload with the ages of child dependents as of today"""
+    info = summary.ps_additional_info
+    if not info or not info.get('child_dependents'):
+        return info
+    return {**info, 'child_dependents': _with_ages(info['child_dependents'], today or date.today())}
+
+
+# ===============================================================
+#  BUILD
+# ===============================================================
+def build_patient_summary(patient, context=SUMMARY_CONTEXT):
+    additional_info = get_additional_info(patient, context=context) or {}
+    if additional_info.get('child_dependents'):
+        # Ages are computed when read (summary_additional_info)
+        additional_info['child_dependents'] = _with_ages(additional_info['child_dependents'])
+    family = get_family(patient) or {}
+    latest_pregnancy = additional_info.get('latest_pregnancy') or additional_info.get('mother_latest_pregnancy')
+
+    return PatientSummary(
+        pat=patient,
+        ps_philhealth_id=additional_info.get('philhealth_id'),
+        ps_fam_id=family.get('fam_id'),
+        ps_fc_role=family.get('fc_role'),
+        ps_family_head_info=get_family_head_info(patient, context=context),
+        ps_mother_tt_status=additional_info.get('mother_tt_status'),
+        ps_latest_pregnancy=latest_pregnancy,
+        ps_child_dependents=additional_info.get('child_dependents'),
+        ps_additional_info=additional_info or None,
+        ps_address=get_address(patient),
+    )
+
+
+def refresh_patient_summaries(pat_ids, batch_size=200):
+    """Recomputes and upserts the summaries of the given patients"""
+    pat_ids = list(pat_ids)
+    refreshed = 0
+    for start in range(0, len(pat_ids), batch_size):
+        patients = Patient.objects.filter(
+            pat_id__in=pat_ids[start:start + batch_size]
+        ).select_related('rp_id__per', 'trans_id__tradd_id')
+
+        patients = list(patients)
+        context = {**SUMMARY_CONTEXT, BATCH_CONTEXT_KEY: PatientBatchLoader(patients=patients)}
+        summaries = [build_patient_summary(patient, context=context) for patient in patients]
+        PatientSummary.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['pat'],
+            update_fields=SUMMARY_FIELDS + ['ps_updated_at'],
+        )
+        refreshed += len(summaries)
+    return refreshed
+
+
+# ===============================================================
+#  INCREMENTAL MAINTENANCE
+# ===============================================================
+def affected_patient_ids(pat_ids=(), rp_ids=(), fam_ids=(), per_ids=(), trans_ids=(), pregnancy_ids=(), pf_ids=(),
+                         patrec_ids=()):
+    """
+    Resolves changed source rows to the patients whose summary depends on them.
+    Family-level data (mother TT status and pregnancy, child dependents, family
+    heads, address fallback) is shared, so every patient in the family is refreshed.
+    """
+    pat_ids = set(pat_ids)
+    rp_ids = set(rp_ids)
+    fam_ids = set(fam_ids)
+
+    if pf_ids:
+        pregnancy_ids = set(pregnancy_ids) | set(
+            Prenatal_Form.objects.filter(pf_id__in=pf_ids, pregnancy_id__isnull=False).values_list('pregnancy_id', flat=True)
+        )
+    if pregnancy_ids:
+        pat_ids |= set(Pregnancy.objects.filter(pregnancy_id__in=pregnancy_ids).values_list('pat_id', flat=True))
+    if patrec_ids:
+        # Child health records: the child's family (its mother) is refreshed below
+        pat_ids |= set(PatientRecord.objects.filter(patrec_id__in=patrec_ids).values_list('pat_id', flat=True))
+    if trans_ids:
+        pat_ids |= set(Patient.objects.filter(trans_id__in=trans_ids).values_list('pat_id', flat=True))
+    if per_ids:
+        rp_ids |= set(Patient.objects.filter(rp_id__per__in=per_ids).values_list('rp_id', flat=True))
+    if pat_ids:
+        rp_ids |= set(Patient.objects.filter(pat_id__in=pat_ids, rp_id__isnull=False).values_list('rp_id', flat=True))
+
+    rp_ids.discard(None)
+    if rp_ids:
+        fam_ids |= set(FamilyComposition.objects.filter(rp__in=rp_ids).values_list('fam_id', flat=True))
+
+    members = FamilyComposition.objects.filter(fam_id__in=fam_ids).values('rp_id')
+    pat_ids |= set(
+        Patient.objects.filter(Q(rp_id__in=rp_ids) | Q(rp_id__in=members)).values_list('pat_id', flat=True)
+    )
+    return pat_ids
+
+
+def mark_changed(**ids):
+    """
+    Called from signal handlers with the IDs of changed source rows. Refreshes
+    run once per transaction, after commit, for everything marked inside it.
+    """
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        pending = _local.pending = {}
+    for key, value in ids.items():
+        if value is not None:
+            pending.setdefault(key, set()).add(value)
+    transaction.on_commit(flush_pending)
+
+
+def flush_pending():
+    pending = getattr(_local, 'pending', None)
+    if not pending:
+        return
+    _local.pending = {}
+    try:
+        pat_ids = affected_patient_ids(**pending)
+        if pat_ids:
+            refresh_patient_summaries(pat_ids)
+    except Exception as e:
+        logger.error(f"❌ Failed to refresh patient summaries: {str(e)}")
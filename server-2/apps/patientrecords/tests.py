@@ -1,3 +1,188 @@
+from datetime import date
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.childhealthservices.models import ChildHealthrecord
+from rest_framework.test import APIRequestFactory
+
+from apps.administration.models import Position, Staff
+from apps.healthProfiling.models import (
+    Address, Family, FamilyComposition, HealthRelatedDetails, Household, Personal, PersonalAddress,
+    ResidentProfile, Sitio,
+)
+from .loaders import BATCH_CONTEXT_KEY, PatientBatchLoader
+from .models import Patient, PatientRecord, PatientSummary, BodyMeasurement
+from .serializers.patients_serializers import PatientMiniMalSerializerWithAddtionalInfo, ResidentProfileSerializer
+from .summary import summary_additional_info
+from .utils import get_additional_info, get_latest_height_weight
+from .views.patient_views import PatientListView
+
+
+class PatientSummaryTest(TestCase):
+    def _resident_patient(self, i, philhealth_id=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            per = Personal.objects.create(
+                per_lname=f'Dela Cruz {i}', per_fname='Juan', per_dob=date(1990, 1, 1),
+                per_sex='MALE', per_status='SINGLE', per_religion='CATHOLIC', per_contact='09000000000',
+            )
+            rp = ResidentProfile.objects.create(rp_id=f'RP{i:04d}', per=per)
+            if philhealth_id:
+                HealthRelatedDetails.objects.create(rp=rp, per_add_philhealth_id=philhealth_id)
+            return Patient.objects.create(pat_type='Resident', rp_id=rp)
+
+    def test_summary_maintained_by_signals(self):
+        patient = self._resident_patient(1, philhealth_id='PH-1')
+        self.assertEqual(PatientSummary.objects.get(pat=patient).ps_philhealth_id, 'PH-1')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            details = HealthRelatedDetails.objects.get(rp=patient.rp_id)
+            details.per_add_philhealth_id = 'PH-2'
+            details.save()
+
+        summary = PatientSummary.objects.get(pat=patient)
+        self.assertEqual(summary.ps_philhealth_id, 'PH-2')
+        self.assertEqual(summary.ps_additional_info['philhealth_id'], 'PH-2')
+
+    def test_child_health_record_refreshes_summary(self):
+        patient = self._resident_patient(1, philhealth_id='PH-1')
+        with self.captureOnCommitCallbacks(execute=True):
+            patrec = PatientRecord.objects.create(patrec_type='Child Health Record', pat_id=patient)
+        # Stale row: only the child record's signal can bring it back
+        PatientSummary.objects.filter(pat=patient).update(ps_philhealth_id=None)
+        with self.captureOnCommitCallbacks(execute=True):
+            ChildHealthrecord.objects.create(patrec=patrec)
+
+        self.assertEqual(PatientSummary.objects.get(pat=patient).ps_philhealth_id, 'PH-1')
+
+    def test_child_ages_computed_when_read(self):
+        summary = PatientSummary(ps_additional_info={'child_dependents': [
+            {'chrec_id': 1, 'child_dob': '2020-05-01', 'child_age': None},
+            {'fc_id': 2, 'dob': None, 'age': None},
+        ]})
+
+        dependents = summary_additional_info(summary, today=date(2025, 4, 30))['child_dependents']
+        self.assertEqual([d.get('child_age', d.get('age')) for d in dependents], [4, None])
+        self.assertEqual(summary_additional_info(summary, today=date(2025, 5, 1))['child_dependents'][0]['child_age'], 5)
+
+    def test_list_serializer_reads_projection_with_constant_queries(self):
+        for i in range(5):
+            self._resident_patient(i, philhealth_id=f'PH-{i}')
+
+        with CaptureQueriesContext(connection) as queries:
+            data = PatientMiniMalSerializerWithAddtionalInfo(
+                Patient.objects.select_related('rp_id__per', 'trans_id', 'summary'), many=True
+            ).data
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(sorted(row['additional_info']['philhealth_id'] for row in data), [f'PH-{i}' for i in range(5)])
+
+
+class PatientBatchLoaderTest(TestCase):
+    def setUp(self):
+        self.patients = []
+        for i in range(6):
+            per = Personal.objects.create(
+                per_lname=f'Santos {i}', per_fname='Maria', per_dob=date(1995, 1, 1),
+                per_sex='FEMALE', per_status='MARRIED', per_religion='CATHOLIC', per_contact='09000000000',
+            )
+            rp = ResidentProfile.objects.create(rp_id=f'RB{i:04d}', per=per)
+            HealthRelatedDetails.objects.create(rp=rp, per_add_philhealth_id=f'PH-{i}')
+            patient = Patient.objects.create(pat_type='Resident', rp_id=rp)
+            BodyMeasurement.objects.create(pat=patient, height=150 + i, weight=50)
+            BodyMeasurement.objects.create(pat=patient, height=0, weight=0)
+            self.patients.append(patient)
+
+    def _serialize_page(self, size):
+        page = list(Patient.objects.select_related('rp_id__per').order_by('pat_id')[:size])
+        with CaptureQueriesContext(connection) as queries:
+            context = {BATCH_CONTEXT_KEY: PatientBatchLoader(patients=page)}
+            rows = [
+                (get_additional_info(patient, context=context), get_latest_height_weight(patient.pat_id, context=context))
+                for patient in page
+            ]
+        return len(queries), rows
+
+    def test_patient_page_queries_do_not_grow_with_page_size(self):
+        small_count, _ = self._serialize_page(2)
+        large_count, rows = self._serialize_page(6)
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual([info['philhealth_id'] for info, _ in rows], [f'PH-{i}' for i in range(6)])
+        # The zero-height record is newer but not a valid measurement
+        self.assertEqual([measurement['height'] for _, measurement in rows], [150.0 + i for i in range(6)])
+
+    def test_batch_matches_live_lookups(self):
+        _, rows = self._serialize_page(6)
+        live = [(get_additional_info(patient), get_latest_height_weight(patient.pat_id)) for patient in self.patients]
+        self.assertEqual(rows, live)
+
+    def test_resident_profile_list_queries_do_not_grow_with_page_size(self):
+        counts = []
+        for size in (2, 6):
+            residents = list(
+                ResidentProfile.objects.select_related('per')
+                .prefetch_related('per__personal_addresses__add__sitio').order_by('rp_id')[:size]
+            )
+            with CaptureQueriesContext(connection) as queries:
+                data = ResidentProfileSerializer(
+                    residents, many=True, context={BATCH_CONTEXT_KEY: PatientBatchLoader(residents=residents)}
+                ).data
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual([row['per_add_philhealth_id'] for row in data], [f'PH-{i}' for i in range(6)])
+
+
+class PatientListQueriesTest(TestCase):
+    def setUp(self):
+        self.staff = Staff.objects.create(
+            staff_id='ST0001', rp=self._resident('ST', 'Reyes'),
+            pos=Position.objects.create(pos_title='Midwife', pos_category='HEALTH'),
+        )
+        self.address = Address.objects.create(
+            add_province='Cebu', add_city='Cebu City', add_barangay='San Roque', add_street='Mabini',
+            sitio=Sitio.objects.create(sitio_name='Proper'),
+        )
+        self._family('FAMST', self.staff.rp)
+        self.count = 0
+
+    def _resident(self, rp_id, lname, sex='FEMALE'):
+        per = Personal.objects.create(
+            per_lname=lname, per_fname='Maria', per_dob=date(1995, 1, 1),
+            per_sex=sex, per_status='MARRIED', per_religion='CATHOLIC', per_contact='09000000000',
+        )
+        PersonalAddress.objects.create(per=per, add=getattr(self, 'address', None) or Address.objects.create(
+            add_province='Cebu', add_city='Cebu City', add_barangay='San Roque', add_street='Rizal',
+        ))
+        return ResidentProfile.objects.create(rp_id=rp_id, per=per)
+
+    def _family(self, fam_id, head):
+        household = Household.objects.create(hh_id=f'HH{fam_id}', hh_nhts='NO', add=self.address, rp=head, staff=self.staff)
+        family = Family.objects.create(fam_id=fam_id, fam_indigenous='NO', fam_building='OWNER', hh=household, staff=self.staff)
+        FamilyComposition.objects.create(fam=family, rp=head, fc_role='MOTHER')
+        return family
+
+    def _add_patients(self, count):
+        for _ in range(count):
+            self.count += 1
+            mother = self._resident(f'RM{self.count:04d}', f'Santos {self.count}')
+            family = self._family(f'FAM{self.count:04d}', mother)
+            child = self._resident(f'RC{self.count:04d}', f'Santos {self.count}', sex='MALE')
+            FamilyComposition.objects.create(fam=family, rp=child, fc_role='DEPENDENT')
+            Patient.objects.create(pat_type='Resident', rp_id=mother, registered_by=self.staff)
+
+    def _list(self):
+        request = APIRequestFactory().get('/patientrecords/patients/')
+        return PatientListView.as_view()(request).render().data
 
-# Create your tests here.
+    def test_patient_list_queries_do_not_grow_with_rows(self):
+        self._add_patients(2)
+        with CaptureQueriesContext(connection) as small:
+            self._list()
+        self._add_patients(4)
+        with self.assertNumQueries(len(small)):
+            data = self._list()
+        self.assertEqual(len(data), 6)
+        self.assertTrue(all(row['registered_by'].startswith('ST0001-') for row in data))
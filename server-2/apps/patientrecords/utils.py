@@ -3,6 +3,7 @@ from apps.healthProfiling.models import *
 from apps.healthProfiling.serializers.base import PersonalSerializer
 from apps.maternal.models import *
 from django.utils import timezone
+from .loaders import get_lookups
 import logging
 
 
@@ -175,39 +176,17 @@ def get_pending_followup_visits(pat_id):
         return FollowUpVisit.objects.none()  # Return empty queryset on error
 
 
-def get_latest_height_weight(pat_id):
+def get_latest_height_weight(pat_id, context=None):
     try:
-        # Get all records ordered by most recent first
-        all_records = BodyMeasurement.objects.filter(
-            pat_id=pat_id
-        ).order_by('-created_at')
-       
-        # Iterate through records to find the first one with valid height/weight
-        for record in all_records:
-            # Check if this record has valid height/weight
-            if record and record.height is not None and record.weight is not None:
-                # Try to convert to float to validate they're numbers
-                try:
-                    height_val = float(record.height)
-                    weight_val = float(record.weight)
-                   
-                    # Optional: Check if values are reasonable (positive numbers)
-                    if height_val > 0 and weight_val > 0:
-                        return {
-                            'height': height_val,
-                            'weight': weight_val,
-                            'created_at': record.created_at
-                        }
-                    else:
-                        print(f"Warning: Non-positive values for record ID {record.id}")
-                        continue  # Continue searching if values are not positive
-                       
-                except (TypeError, ValueError):
-                    # Handle the case where height/weight can't be converted to float
-                    print(f"Error: Invalid height or weight value for record ID {record.id}")
-                    continue  # Continue searching for valid record
-           
-        # If no valid record found after checking all
+        # Most recent record with positive height and weight
+        record = get_lookups(context).latest_body_measurement(pat_id)
+        if record:
+            return {
+                'height': float(record.height),
+                'weight': float(record.weight),
+                'created_at': record.created_at
+            }
+
         print(f"No valid height/weight records found for patient {pat_id}")
         return None
        
@@ -218,11 +197,9 @@ def get_latest_height_weight(pat_id):
 
 
 
-def get_latest_vital_signs(pat_id):
+def get_latest_vital_signs(pat_id, context=None):
     try:
-        latest = VitalSigns.objects.filter(
-            patrec__pat_id=pat_id
-        ).order_by('-created_at').first()
+        latest = get_lookups(context).latest_vital_signs(pat_id)
 
 
         if latest:
@@ -359,15 +336,16 @@ def get_personal_info(obj, context=None):
     return None
 
 
-def get_address(obj):
+def get_address(obj, context=None):
     """
     Get address information for Resident and Transient patients.
     Falls back to mother or father's address if no personal or household address found.
     """
     try:
         if getattr(obj, 'pat_type', None) == 'Resident' and getattr(obj, 'rp_id', None):
+            lookups = get_lookups(context)
             # Try personal address first
-            personal_address = PersonalAddress.objects.select_related('add', 'add__sitio').filter(per=obj.rp_id.per).first()
+            personal_address = lookups.personal_address(obj.rp_id.per)
             if personal_address and personal_address.add:
                 address = personal_address.add
                 sitio = address.sitio.sitio_name if address.sitio else address.add_external_sitio
@@ -388,7 +366,7 @@ def get_address(obj):
                 }
 
             # Try household address
-            household = Household.objects.select_related('add', 'add__sitio').filter(rp=obj.rp_id).first()
+            household = lookups.household(obj.rp_id)
             if household and household.add:
                 address = household.add
                 sitio = address.sitio.sitio_name if address.sitio else address.add_external_sitio
@@ -410,15 +388,15 @@ def get_address(obj):
             
             # Fallback to mother or father's address
             try:
-                current_composition = FamilyComposition.objects.filter(rp=obj.rp_id).order_by('-fam_id__fam_date_registered', '-fc_id').first()
+                current_composition = lookups.current_composition(obj.rp_id)
                 if current_composition:
                     fam_id = current_composition.fam_id
-                    family_compositions = FamilyComposition.objects.filter(fam_id=fam_id).select_related('rp', 'rp__per')
+                    family_compositions = list(lookups.family_members(fam_id))
                     
                     # Try mother's address first
-                    mother_comp = family_compositions.filter(fc_role__iexact='Mother').first()
+                    mother_comp = next((fc for fc in family_compositions if (fc.fc_role or '').lower() == 'mother'), None)
                     if mother_comp and mother_comp.rp:
-                        mother_personal_address = PersonalAddress.objects.select_related('add', 'add__sitio').filter(per=mother_comp.rp.per).first()
+                        mother_personal_address = lookups.personal_address(mother_comp.rp.per)
                         if mother_personal_address and mother_personal_address.add:
                             address = mother_personal_address.add
                             sitio = address.sitio.sitio_name if address.sitio else address.add_external_sitio
@@ -439,9 +417,9 @@ def get_address(obj):
                             }
                     
                     # Try father's address
-                    father_comp = family_compositions.filter(fc_role__iexact='Father').first()
+                    father_comp = next((fc for fc in family_compositions if (fc.fc_role or '').lower() == 'father'), None)
                     if father_comp and father_comp.rp:
-                        father_personal_address = PersonalAddress.objects.select_related('add', 'add__sitio').filter(per=father_comp.rp.per).first()
+                        father_personal_address = lookups.personal_address(father_comp.rp.per)
                         if father_personal_address and father_personal_address.add:
                             address = father_personal_address.add
                             sitio = address.sitio.sitio_name if address.sitio else address.add_external_sitio
@@ -494,7 +472,8 @@ def get_family_head_info(obj, context=None):
     family_heads = {}
     if getattr(obj, 'pat_type', None) == 'Resident' and getattr(obj, 'rp_id', None):
         try:
-            current_composition = FamilyComposition.objects.filter(rp=obj.rp_id).order_by('-fam_id__fam_date_registered', '-fc_id').first()
+            lookups = get_lookups(context)
+            current_composition = lookups.current_composition(obj.rp_id)
             if not current_composition:
                 return None
 
@@ -502,22 +481,15 @@ def get_family_head_info(obj, context=None):
             fam_id = current_composition.fam_id
 
 
-            family_compositions = FamilyComposition.objects.filter(
-                fam_id=fam_id
-            ).select_related('rp', 'rp__per')
+            family_compositions = lookups.family_members(fam_id)
 
 
             for composition in family_compositions:
                 role = composition.fc_role.lower()
                 if role in ['mother', 'father'] and composition.rp and hasattr(composition.rp, 'per'):
                     personal = composition.rp.per
-                    patient = Patient.objects.filter(rp_id=composition.rp).first()
-                    family_planning_method = None
-                    if patient:
-                        latest_fp_record = patient.fp_records.order_by('-created_at').first()
-                        if latest_fp_record:
-                            fp_type = latest_fp_record.fp_type_set.first()
-                            family_planning_method = fp_type.fpt_method_used if fp_type else None
+                    patient = lookups.patient_for_resident(composition.rp)
+                    family_planning_method = lookups.latest_fp_method(patient) if patient else None
 
 
                     # Get address information for this family head
@@ -525,7 +497,7 @@ def get_family_head_info(obj, context=None):
                     if hasattr(obj, '_get_family_head_address'):
                         address_info = obj._get_family_head_address(composition.rp)
                     else:
-                        address_info = get_family_head_address(composition.rp)
+                        address_info = get_family_head_address(composition.rp, context=context)
 
 
                     family_heads[role] = {
@@ -597,69 +569,24 @@ def get_family_head_info(obj, context=None):
 
 
 
-def get_family(obj):
+def get_family(obj, context=None):
     """
     Returns the family composition info for a Resident patient.
     """
     if getattr(obj, 'pat_type', None) == 'Resident' and getattr(obj, 'rp_id', None):
         try:
-            current_composition = FamilyComposition.objects.filter(
-                rp=obj.rp_id
-            ).order_by('-fam_id__fam_date_registered', '-fc_id').first()
+            current_composition = get_lookups(context).current_composition(obj.rp_id)
            
             if not current_composition:
                 print(f'No family composition found for resident {obj.rp_id.rp_id}')
                 return None
 
 
-            fam_id = current_composition.fam_id
-
-
-            all_compositions = FamilyComposition.objects.filter(
-                fam_id=fam_id
-            ).select_related('rp', 'rp__per')
-
-
-            current_role = FamilyComposition.objects.filter(rp=obj.rp_id).order_by('-fam_id__fam_date_registered', '-fc_id').first()
-            if current_role:
-                return {
-                    'fam_id': str(current_role.fam_id),
-                    'fc_role': current_role.fc_role,
-                    'fc_id': current_role.fc_id
-                }
-
-
-            mother_composition = all_compositions.filter(fc_role__iexact='Mother').first()
-            if mother_composition:
-                return {
-                    'fam_id': str(mother_composition.fam_id),
-                    'fc_role': 'Mother',
-                    'fc_id': mother_composition.fc_id
-                }
-           
-            father_composition = all_compositions.filter(fc_role__iexact='Father').first()
-            if father_composition:
-                return {
-                    'fam_id': str(father_composition.fam_id),
-                    'fc_role': 'Father',
-                    'fc_id': father_composition.fc_id
-                }
-           
-            other_composition = all_compositions.exclude(
-                fc_role__iexact='Mother'
-            ).exclude(
-                fc_role__iexact='Father'
-            ).first()
-
-
-            if other_composition:
-                return {
-                    'fam_id': str(other_composition.fam_id),
-                    'fc_role': other_composition.fc_role,
-                    'fc_id': other_composition.fc_id
-                }
-           
-            return None
+            return {
+                'fam_id': str(current_composition.fam_id),
+                'fc_role': current_composition.fc_role,
+                'fc_id': current_composition.fc_id
+            }
        
         except Exception as e:
             print(f'Error fetching fam_id for resident {obj.rp_id.rp_id}: {str(e)}')
@@ -673,45 +600,35 @@ def get_family(obj):
 
 # utils/patient_additional_info.py
 
-def get_family_planning_method(obj):
+def get_family_planning_method(obj, context=None):
     """
     Returns the latest family planning method used (from FP_type.fpt_method_used).
     Fetches the most recent FP_Record, then its associated FP_type.
     Returns None if no records exist.
     """
-    from apps.familyplanning.models import FP_Record
-    
     try:
-        latest_fp_record = obj.fp_records.order_by('-created_at').first()
-        
-        if latest_fp_record:
-            fp_type = latest_fp_record.fp_type_set.first()
-            if fp_type:
-                return fp_type.fpt_method_used
-        
-        return None
+        return get_lookups(context).latest_fp_method(obj)
     except Exception as e:
         print(f"Error fetching family planning method: {str(e)}")
         return None
 
 
-def get_mother_tt_status(mother_rp):
+def get_mother_tt_status(mother_rp, context=None):
     """
     Method to retrieve a mother's TT Status from ResidentProfile.
     
     Args:
         mother_rp: ResidentProfile object of the mother
+        context: serializer context, may carry a PatientBatchLoader
         
     Returns:
         str: TT status string or error message
     """
     try:
-        tt_qs = TT_Status.objects.filter(
-            pat_id__rp_id=mother_rp
-        ).order_by('-tts_date_given', '-tts_id')
+        tt_status = get_lookups(context).latest_tt_status_for_resident(mother_rp)
 
-        if tt_qs.exists():
-            return tt_qs.first().tts_status
+        if tt_status:
+            return tt_status.tts_status
         return 'No TT Status found'
     
     except Exception as e:
@@ -719,20 +636,22 @@ def get_mother_tt_status(mother_rp):
         return f'TT Status not found - {str(e)}'
 
 
-def get_family_head_address(rp):
+def get_family_head_address(rp, context=None):
     """
     Helper function to get address information for a family head (resident profile).
     Similar to the main get_address function but for family head members.
     
     Args:
         rp: ResidentProfile object
+        context: serializer context, may carry a PatientBatchLoader
         
     Returns:
         dict: Address information or None
     """
     try:
+        lookups = get_lookups(context)
         # First try to get personal address
-        personal_address = PersonalAddress.objects.select_related('add', 'add__sitio').filter(per=rp.per).first()
+        personal_address = lookups.personal_address(rp.per)
         if personal_address and personal_address.add:
             address = personal_address.add
             sitio = address.sitio.sitio_name if address.sitio else address.add_external_sitio
@@ -753,7 +672,7 @@ def get_family_head_address(rp):
             }
 
         # Fallback to household address
-        household = Household.objects.select_related('add', 'add__sitio').filter(rp=rp).first()
+        household = lookups.household(rp)
         if household and household.add:
             address = household.add
             sitio = address.sitio.sitio_name if address.sitio else address.add_external_sitio
@@ -862,7 +781,7 @@ def get_spouse_info(obj, context=None):
     try:
         if obj.pat_type == 'Resident' and obj.rp_id:
             family_heads_info = get_family_head_info(obj, context=context)
-            current_family_info = get_family(obj)
+            current_family_info = get_family(obj, context=context)
             
             if not family_heads_info or not current_family_info:
                 medical_spouse = check_medical_records_for_spouse(obj, context=context)
@@ -1028,24 +947,26 @@ def get_child_dependents_for_mother(patient_obj, mother_composition):
         return None
 
 
-def get_additional_info(obj):
+def get_additional_info(obj, context=None):
     """
     Reusable function to get additional patient information for both Resident and Transient patients.
+    Related rows come from the PatientBatchLoader in context when there is one.
     """
     try:
         additional_info = {}
+        lookups = get_lookups(context)
 
 
         # Case 1: Resident patient with rp_id
         if getattr(obj, 'pat_id', None) and getattr(obj, 'rp_id', None):
             # Philhealth from HealthRelatedDetails (resident)
-            per_ph_id = HealthRelatedDetails.objects.filter(rp=obj.rp_id).first()
+            per_ph_id = lookups.health_details(obj.rp_id)
             if per_ph_id:
                 additional_info['philhealth_id'] = per_ph_id.per_add_philhealth_id
 
 
             # Try to find latest family composition for this resident
-            current_composition = FamilyComposition.objects.filter(rp=obj.rp_id).order_by('-fam_id__fam_date_registered','-fc_id').first()
+            current_composition = lookups.current_composition(obj.rp_id)
             if current_composition:
                 try:
                     current_role = (current_composition.fc_role or '').strip().lower()
@@ -1055,10 +976,7 @@ def get_additional_info(obj):
 
                 # Get total children count (DEPENDENT + INDEPENDENT)
                 fam_id = current_composition.fam_id
-                total_children = FamilyComposition.objects.filter(
-                    fam_id=fam_id,
-                    fc_role__in=['DEPENDENT', 'INDEPENDENT', 'Dependent', 'Independent', 'dependent', 'independent']
-                ).count()
+                total_children = lookups.children_count(fam_id)
                
                 if total_children > 0:
                     additional_info['total_children'] = total_children
@@ -1073,13 +991,10 @@ def get_additional_info(obj):
 
                 # If not father role, fetch mother TT status
                 if current_role != 'father':
-                    all_compositions = FamilyComposition.objects.filter(fam_id=fam_id).select_related('rp', 'rp__per')
-                    mother_comp = all_compositions.filter(fc_role__iexact='Mother').first()
+                    mother_comp = lookups.family_mother(fam_id)
                     if mother_comp:
                         try:
-                            tt_status = TT_Status.objects.filter(
-                                pat_id__rp_id=mother_comp.rp.rp_id
-                            ).order_by('-tts_date_given', '-tts_id').first()
+                            tt_status = lookups.latest_tt_status_for_resident(mother_comp.rp.rp_id)
                             if tt_status:
                                 additional_info['mother_tt_status'] = {
                                     'status': tt_status.tts_status,
@@ -1094,14 +1009,10 @@ def get_additional_info(obj):
             # Check for latest pregnancy and AOG data
             try:
                 # Get latest pregnancy regardless of status (active, completed, pregnancy loss, etc.)
-                latest_pregnancy = Pregnancy.objects.filter(
-                    pat_id=obj
-                ).order_by('-pregnancy_id').first()
+                latest_pregnancy = lookups.latest_pregnancy(obj)
                
                 if latest_pregnancy:
-                    latest_prenatal = Prenatal_Form.objects.filter(
-                        pregnancy_id=latest_pregnancy
-                    ).order_by('-created_at').first()
+                    latest_prenatal = lookups.latest_prenatal_form(latest_pregnancy)
 
 
                     if latest_prenatal:
@@ -1113,48 +1024,37 @@ def get_additional_info(obj):
                         }
                        
                         # Fetch ppr_id from PostpartumRecord if exists
-                        postpartum_record = PostpartumRecord.objects.filter(
-                            pregnancy_id=latest_pregnancy
-                        ).order_by('-created_at').first()
+                        postpartum_record = lookups.latest_postpartum_record(latest_pregnancy)
                         if postpartum_record:
                             pregnancy_data['ppr_id'] = postpartum_record.ppr_id
                        
                         additional_info['latest_pregnancy'] = pregnancy_data
                        
-                        latest_prenatal_care = PrenatalCare.objects.filter(
-                            pf_id=latest_prenatal,
-                            pfpc_aog_wks__isnull=False
-                        ).order_by('-pfpc_date', '-created_at').first()
+                        latest_prenatal_care = lookups.latest_prenatal_care(latest_prenatal)
                        
                         if latest_prenatal_care:
                             additional_info['latest_aog_weeks'] = latest_prenatal_care.pfpc_aog_wks
                             additional_info['latest_aog_days'] = latest_prenatal_care.pfpc_aog_days
                 else:
                     # Get mother's AOG data if current patient is a child
-                    current_composition = FamilyComposition.objects.filter(rp=obj.rp_id).order_by('-fam_id__fam_date_registered', '-fc_id').first()
+                    current_composition = lookups.current_composition(obj.rp_id)
                     if current_composition:
                         current_role = (current_composition.fc_role or '').strip().lower()
                         print(f"🔍 Patient {obj.pat_id} role: {current_role}")
                         if current_role not in ['mother', 'father']:
                             fam_id = current_composition.fam_id
-                            all_compositions = FamilyComposition.objects.filter(fam_id=fam_id).select_related('rp', 'rp__per')
-                            mother_comp = all_compositions.filter(fc_role__iexact='Mother').first()
+                            mother_comp = lookups.family_mother(fam_id)
                             print(f"🔍 Found mother composition: {mother_comp}")
                            
                             if mother_comp and mother_comp.rp:
-                                mother_patient = Patient.objects.filter(rp_id=mother_comp.rp).first()
+                                mother_patient = lookups.patient_for_resident(mother_comp.rp)
                                 print(f"🔍 Found mother patient: {mother_patient}")
                                 if mother_patient:
-                                    mother_pregnancy = Pregnancy.objects.filter(
-                                        pat_id=mother_patient,
-                                        status='completed'
-                                    ).order_by('-pregnancy_id').first()
+                                    mother_pregnancy = lookups.latest_pregnancy(mother_patient, status='completed')
                                     print(f"🔍 Found mother pregnancy: {mother_pregnancy}")
                                    
                                     if mother_pregnancy:
-                                        mother_prenatal = Prenatal_Form.objects.filter(
-                                            pregnancy_id=mother_pregnancy
-                                        ).order_by('-created_at').first()
+                                        mother_prenatal = lookups.latest_prenatal_form(mother_pregnancy)
                                         print(f"🔍 Found mother prenatal: {mother_prenatal}")
                                        
                                         if mother_prenatal:
@@ -1165,9 +1065,7 @@ def get_additional_info(obj):
                                             }
                                            
                                             # fetch ppr_id from PostpartumRecord if exists
-                                            postpartum_record = PostpartumRecord.objects.filter(
-                                                pregnancy_id=mother_pregnancy
-                                            ).order_by('-created_at').first()
+                                            postpartum_record = lookups.latest_postpartum_record(mother_pregnancy)
                                             if postpartum_record:
                                                 pregnancy_data['ppr_id'] = postpartum_record.ppr_id
                                            
@@ -1176,10 +1074,7 @@ def get_additional_info(obj):
 
 
                                            
-                                            mother_prenatal_care = PrenatalCare.objects.filter(
-                                                pf_id=mother_prenatal,
-                                                pfpc_aog_wks__isnull=False
-                                            ).order_by('-pfpc_date', '-created_at').first()
+                                            mother_prenatal_care = lookups.latest_prenatal_care(mother_prenatal)
                                            
                                             if mother_prenatal_care:
                                                 additional_info['mother_latest_aog_weeks'] = mother_prenatal_care.pfpc_aog_wks
@@ -1212,11 +1107,8 @@ def get_additional_info(obj):
 
 
             try:
-                tt_qs = TT_Status.objects.filter(
-                    pat_id=obj
-                ).select_related('pat_id').order_by('-tts_date_given', '-tts_id')
-                if tt_qs.exists():
-                    latest_tt_status = tt_qs.first()
+                latest_tt_status = lookups.latest_tt_status(obj)
+                if latest_tt_status:
                     additional_info['mother_tt_status'] = {
                         'status': latest_tt_status.tts_status,
                         'date_given': latest_tt_status.tts_date_given
@@ -1232,16 +1124,12 @@ def get_additional_info(obj):
                 print(f"🔍 Checking pregnancy for transient patient: {obj.pat_id}")
                 
                 # Get latest pregnancy regardless of status (active, completed, pregnancy loss, etc.)
-                latest_pregnancy = Pregnancy.objects.filter(
-                    pat_id=obj
-                ).order_by('-pregnancy_id').first()
+                latest_pregnancy = lookups.latest_pregnancy(obj)
                 
                 print(f"🔍 Found pregnancy: {latest_pregnancy}")
                
                 if latest_pregnancy:
-                    latest_prenatal = Prenatal_Form.objects.filter(
-                        pregnancy_id=latest_pregnancy
-                    ).order_by('-created_at').first()
+                    latest_prenatal = lookups.latest_prenatal_form(latest_pregnancy)
                     
                     print(f"🔍 Found prenatal form: {latest_prenatal}")
 
@@ -1254,18 +1142,13 @@ def get_additional_info(obj):
                         }
                        
                         # fetch ppr_id from PostpartumRecord if exists
-                        postpartum_record = PostpartumRecord.objects.filter(
-                            pregnancy_id=latest_pregnancy
-                        ).order_by('-created_at').first()
+                        postpartum_record = lookups.latest_postpartum_record(latest_pregnancy)
                         if postpartum_record:
                             pregnancy_data['ppr_id'] = postpartum_record.ppr_id
                        
                         additional_info['latest_pregnancy'] = pregnancy_data
                        
-                        latest_prenatal_care = PrenatalCare.objects.filter(
-                            pf_id=latest_prenatal,
-                            pfpc_aog_wks__isnull=False
-                        ).order_by('-pfpc_date', '-created_at').first()
+                        latest_prenatal_care = lookups.latest_prenatal_care(latest_prenatal)
                        
                         if latest_prenatal_care:
                             additional_info['latest_aog_weeks'] = latest_prenatal_care.pfpc_aog_wks
@@ -15,6 +15,8 @@ from ..serializers.patients_serializers import *
 from ..serializers.followvisits_serializers import *
 from ..models import   Patient, PatientRecord, Transient, TransientAddress
 from ...pagination import StandardResultsPagination
+from apps.reports.dashboard import patient_counts
+from ..loaders import BATCH_CONTEXT_KEY, PatientBatchLoader, PatientBatchContextMixin
 from apps.medicalConsultation.models import *
 from apps.medicalConsultation.serializers import *
 from apps.maternal.models import *
@@ -30,7 +32,10 @@ def get_resident_profile_list(request):
         'per__personal_addresses__add__sitio'
     )
 
-    serializer = ResidentProfileSerializer(residents, many=True)
+    residents = list(residents)
+    serializer = ResidentProfileSerializer(
+        residents, many=True, context={BATCH_CONTEXT_KEY: PatientBatchLoader(residents=residents)}
+    )
     return Response(serializer.data)
 
 class TransientAddressView(generics.ListAPIView):
@@ -44,10 +49,8 @@ class PatientCountView(APIView):
     def get(self, request):
         pat_type = request.query_params.get('pat_type')
 
-        total = Patient.objects.filter(pat_status='Active').count()
-        resident = Patient.objects.filter(rp_id__isnull=False, pat_status='Active').count()
-        transient = Patient.objects.filter(rp_id__isnull=True, pat_status='Active').count()
-        tor = Patient.objects.filter(pat_status='Transfer of Residency').count()
+        counts = patient_counts()
+        total, resident, transient, tor = counts['total'], counts['resident'], counts['transient'], counts['tor']
 
         if pat_type == 'Resident':
             return Response({
@@ -75,22 +78,16 @@ class PatientCountView(APIView):
         }, status=status.HTTP_200_OK)
 
 # for displaying patients in comobox
-class PatientListView(generics.ListAPIView):
+class PatientListView(PatientBatchContextMixin, generics.ListAPIView):
     serializer_class = PatientSerializer
     queryset = Patient.objects.all()
 
     def get_queryset(self):
         return Patient.objects.select_related(
-            'rp_id__per',
-        ).prefetch_related(
-            Prefetch(
-                'rp_id__per__personal_addresses',
-                queryset=PersonalAddress.objects.select_related('add', 'add__sitio')
-            ),
-            'rp_id__household_set',
+            'rp_id__per', 'registered_by__rp__per',
         ).filter(pat_status='Active')
 
-class PatientView(generics.ListCreateAPIView):
+class PatientView(PatientBatchContextMixin, generics.ListCreateAPIView):
     serializer_class = PatientSerializer
     pagination_class = StandardResultsPagination
     queryset = Patient.objects.all()
@@ -179,16 +176,11 @@ class PatientView(generics.ListCreateAPIView):
             )
 
     def get_queryset(self):
-        # Base queryset: include resident and transient address relations to avoid extra queries
+        # Base queryset: resident addresses and families come from the page's PatientBatchLoader
         queryset = Patient.objects.select_related(
             'rp_id__per',
             'trans_id__tradd_id',
-        ).prefetch_related(
-            Prefetch(
-                'rp_id__per__personal_addresses',
-                queryset=PersonalAddress.objects.select_related('add', 'add__sitio')
-            ),
-            'rp_id__household_set',
+            'registered_by__rp__per',
         )
 
         params = self.request.query_params
@@ -1164,7 +1156,7 @@ class AllAppointmentsView(generics.ListAPIView):
         age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
         return age
 
-class ChildPatientsWithoutRecordsView(generics.ListAPIView):
+class ChildPatientsWithoutRecordsView(PatientBatchContextMixin, generics.ListAPIView):
     serializer_class = PatientSerializer
     
     def get_queryset(self):
@@ -4,3 +4,6 @@ class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reports'
 
+    def ready(self):
+        # Keep monthly_fact and the dashboard counters in sync with the tables they count
+        from . import signals
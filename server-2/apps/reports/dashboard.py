@@ -0,0 +1,126 @@
+"""
+Counters of the health dashboard (ReportsCount) and the patient count cards.
+
+Each group is computed with a single query (see utils.counters) and cached for
+a short TTL, per doctor for the dashboard. Saving or deleting a row of a
+counted model drops the cached counters of its group; bulk .update() calls do
+not send signals, so those show up once the TTL runs out.
+"""
+from django.db.models import Count, Q
+
+from apps.animalbites.models import AnimalBite_Referral
+from apps.childhealthservices.models import ChildHealth_History, ChildHealthrecord
+from apps.familyplanning.models import FP_Record
+from apps.firstaid.models import FirstAidRecord
+from apps.inventory.models import (
+    CommodityInventory, CommodityList, FirstAidInventory, FirstAidList, ImmunizationStock,
+    ImmunizationSupplies, Inventory, MedicineInventory, Medicinelist, VaccineList, VaccineStock,
+)
+from apps.maternal.models import Pregnancy
+from apps.medicalConsultation.models import MedConsultAppointment, MedicalConsultation_Record
+from apps.medicineservices.models import MedicineRequestItem
+from apps.patientrecords.models import Patient
+from apps.vaccination.models import VaccinationHistory
+from utils.counters import cached_counts, count_all
+
+DASHBOARD_COUNTS = 'reports_dashboard'
+PATIENT_COUNTS = 'patient_counts'
+
+# Saving or deleting one of these invalidates the group's cached counters
+DASHBOARD_MODELS = [
+    Medicinelist, CommodityList, FirstAidList, VaccineList, ImmunizationSupplies, Inventory,
+    MedicineInventory, VaccineStock, ImmunizationStock, FirstAidInventory, CommodityInventory,
+    ChildHealthrecord, ChildHealth_History, MedicineRequestItem, FirstAidRecord,
+    MedicalConsultation_Record, VaccinationHistory, Pregnancy, FP_Record, AnimalBite_Referral,
+    MedConsultAppointment,
+]
+PATIENT_MODELS = [Patient]
+
+
+# ===============================================================
+#  DASHBOARD
+# ===============================================================
+def dashboard_querysets(doctor_id=None):
+    querysets = {
+        'medicine_count': Medicinelist.objects.all(),
+        'commodity_count': CommodityList.objects.all(),
+        'firstaid_count': FirstAidList.objects.all(),
+        'vaccine_count': VaccineList.objects.all(),
+        'immunization_count': ImmunizationSupplies.objects.all(),
+        'child_count': ChildHealthrecord.objects.all(),
+        'medicine_records_count': MedicineRequestItem.objects.filter(
+            status='completed'
+        ).values('medreq_id', 'med_id').distinct(),
+        'firstaid_records_count': FirstAidRecord.objects.all(),
+        'medicalconsultation_records_count': MedicalConsultation_Record.objects.filter(medrec_status='completed'),
+        'vaccination_records_count': VaccinationHistory.objects.filter(vachist_status='completed'),
+        'inv_medicine_count': MedicineInventory.objects.filter(inv_id__is_Archived=False),
+        'inv_vaccination': VaccineStock.objects.filter(inv_id__is_Archived=False),
+        'inv_immunization': ImmunizationStock.objects.filter(inv_id__is_Archived=False),
+        'inv_firstaid_count': FirstAidInventory.objects.filter(inv_id__is_Archived=False),
+        'inv_commodity_count': CommodityInventory.objects.filter(inv_id__is_Archived=False),
+        'pregnancy_count': Pregnancy.objects.all(),
+        'family_planning_count': FP_Record.objects.filter(
+            patrec__patrec_type='Family Planning'
+        ).values('pat').distinct(),
+        'animal_bites_count': AnimalBite_Referral.objects.all(),
+        'medrequest_count': MedicineRequestItem.objects.filter(status='confirmed').values('medreq_id').distinct(),
+        'apprequest_count': MedicineRequestItem.objects.filter(status='pending').values('medreq_id').distinct(),
+        'pending_appointments_count': MedConsultAppointment.objects.filter(status='pending'),
+        'confirmed_appointments_count': MedConsultAppointment.objects.filter(status='confirmed'),
+    }
+    if doctor_id:
+        querysets['completed_consultations_by_doctor'] = MedicalConsultation_Record.objects.filter(
+            medrec_status='completed', assigned_to_id=doctor_id
+        )
+        querysets['completed_childconsultations_by_doctor'] = ChildHealth_History.objects.filter(
+            assigned_doc=doctor_id
+        )
+    return querysets
+
+
+def build_dashboard_counts(doctor_id=None):
+    counts = count_all(dashboard_querysets(doctor_id))
+    counts.setdefault('completed_consultations_by_doctor', None)
+    counts.setdefault('completed_childconsultations_by_doctor', None)
+
+    # Totals derived from the counters above
+    counts['antigen_count'] = counts['vaccine_count'] + counts['immunization_count']
+    counts['inv_antigen_count'] = counts.pop('inv_vaccination') + counts.pop('inv_immunization')
+    counts['total_medicine_requests'] = counts['medrequest_count'] + counts['apprequest_count']
+    counts['total_appointments_count'] = (
+        counts['pending_appointments_count'] + counts['confirmed_appointments_count']
+    )
+
+    # Names kept for existing dashboard clients
+    counts['vaccnerecord_count'] = counts['vaccination_records_count']
+    counts['medinelist_count'] = counts['medicine_count']
+    counts['commoditylist_count'] = counts['commodity_count']
+    counts['firstaidlist_count'] = counts['firstaid_count']
+    counts['antigenlist_count'] = counts['antigen_count']
+    return counts
+
+
+def dashboard_counts(doctor_id=None):
+    """Cached build_dashboard_counts, per doctor"""
+    return cached_counts(
+        DASHBOARD_COUNTS, lambda: build_dashboard_counts(doctor_id), scope=doctor_id or ''
+    )
+
+
+# ===============================================================
+#  PATIENTS
+# ===============================================================
+def build_patient_counts():
+    active = Q(pat_status='Active')
+    return Patient.objects.aggregate(
+        total=Count('pk', filter=active),
+        resident=Count('pk', filter=active & Q(rp_id__isnull=False)),
+        transient=Count('pk', filter=active & Q(rp_id__isnull=True)),
+        tor=Count('pk', filter=Q(pat_status='Transfer of Residency')),
+    )
+
+
+def patient_counts():
+    """Cached build_patient_counts"""
+    return cached_counts(PATIENT_COUNTS, build_patient_counts)
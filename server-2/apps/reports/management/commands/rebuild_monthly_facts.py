@@ -0,0 +1,38 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.reports.rollups import METRICS, month_start, rebuild_metric
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the monthly_fact rollups from their source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--metric', action='append', dest='metrics', help=f"Only rebuild these metrics (repeatable): {', '.join(METRICS)}")
+        parser.add_argument('--since', help='Only rebuild months from YYYY-MM onwards')
+        parser.add_argument('--recent', type=int, help='Only rebuild the last N months (e.g. 2 for a nightly run)')
+
+    def handle(self, *args, **options):
+        metrics = options['metrics'] or list(METRICS)
+        unknown = set(metrics) - set(METRICS)
+        if unknown:
+            raise CommandError(f"Unknown metric(s): {', '.join(sorted(unknown))}")
+
+        since = None
+        if options['since']:
+            try:
+                year, month = map(int, options['since'].split('-'))
+                since = date(year, month, 1)
+            except ValueError:
+                raise CommandError('--since must be YYYY-MM')
+        elif options['recent']:
+            since = month_start(date.today())
+            for _ in range(options['recent'] - 1):
+                since = month_start(since - timedelta(days=1))
+
+        for metric in metrics:
+            written = rebuild_metric(metric, since)
+            self.stdout.write(f"  {metric}: {written} facts")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(metrics)} monthly fact metric(s)."))
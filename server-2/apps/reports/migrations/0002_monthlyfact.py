@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyFact',
+            fields=[
+                ('mf_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('mf_metric', models.CharField(max_length=50)),
+                ('mf_month', models.DateField()),
+                ('mf_sitio', models.CharField(blank=True, default='', max_length=100)),
+                ('mf_sex', models.CharField(blank=True, default='', max_length=1)),
+                ('mf_age_band', models.CharField(blank=True, default='', max_length=20)),
+                ('mf_subject', models.CharField(blank=True, default='', max_length=255)),
+                ('mf_value', models.PositiveIntegerField(default=0)),
+                ('mf_updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'monthly_fact',
+                'constraints': [models.UniqueConstraint(fields=('mf_metric', 'mf_month', 'mf_sitio', 'mf_sex', 'mf_age_band', 'mf_subject'), name='monthly_fact_cell')],
+            },
+        ),
+    ]
@@ -91,4 +91,29 @@ class BHWAttendanceRecord(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        db_table = 'bhw_attendance_record'
\ No newline at end of file
+        db_table = 'bhw_attendance_record'
+
+class MonthlyFact(models.Model):
+    """
+    Precomputed monthly counts for the report endpoints, one row per
+    (metric, month, sitio, sex, age band, subject). Maintained by
+    apps/reports/rollups.py and rebuilt in full by the rebuild_monthly_facts command.
+    """
+    mf_id = models.BigAutoField(primary_key=True)
+    mf_metric = models.CharField(max_length=50)
+    mf_month = models.DateField()  # First day of the month
+    mf_sitio = models.CharField(max_length=100, blank=True, default='')
+    mf_sex = models.CharField(max_length=1, blank=True, default='')  # 'M', 'F' or '' when unknown
+    mf_age_band = models.CharField(max_length=20, blank=True, default='')
+    mf_subject = models.CharField(max_length=255, blank=True, default='')  # e.g. illness ID or vaccine name
+    mf_value = models.PositiveIntegerField(default=0)
+    mf_updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'monthly_fact'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['mf_metric', 'mf_month', 'mf_sitio', 'mf_sex', 'mf_age_band', 'mf_subject'],
+                name='monthly_fact_cell',
+            ),
+        ]
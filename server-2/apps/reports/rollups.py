@@ -0,0 +1,339 @@
+"""
+Monthly rollups for the report endpoints.
+
+monthly_fact holds one row per (metric, month, sitio, sex, age band, subject)
+with the count for that cell. A month of a metric is rebuilt from its source
+table with one query: after commit when a source row of that month is saved or
+deleted (and the month it was in before an edit moved it), or by the
+rebuild_monthly_facts command. Report views then read any
+range of months with a single indexed query, and past months are never
+aggregated again on a request.
+
+Counts of distinct entities (patients, vaccination records) add up across
+cells because each entity is put in exactly one cell per month and subject,
+the one for its first record of the month. Sitio, sex and age band are those
+of the patient when the month was built.
+"""
+from collections import Counter
+from datetime import date, datetime
+import threading
+import logging
+
+from django.db import transaction
+from django.db.models import CharField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Substr
+from django.utils import timezone
+
+from apps.healthProfiling.models import PersonalAddress
+from apps.patientrecords.models import BodyMeasurement, MedicalHistory
+from apps.vaccination.models import VaccinationHistory
+from .models import MonthlyFact
+
+logger = logging.getLogger(__name__)
+
+# ICD-10 age groups used by the FHIS morbidity report: (min days, max days or None, label)
+AGE_BANDS = [
+    (0, 6, "0-6 days"),
+    (7, 28, "7-28 days"),
+    (29, 364, "29 days - 11 mos"),
+    (365, 365 * 4, "1-4 yrs"),
+    (365 * 5, 365 * 9, "5-9 yrs"),
+    (365 * 10, 365 * 14, "10-14"),
+    (365 * 15, 365 * 19, "15-19"),
+    (365 * 20, 365 * 24, "20-24"),
+    (365 * 25, 365 * 29, "25-29"),
+    (365 * 30, 365 * 34, "30-34"),
+    (365 * 35, 365 * 39, "35-39"),
+    (365 * 40, 365 * 44, "40-44"),
+    (365 * 45, 365 * 49, "45-49"),
+    (365 * 50, 365 * 54, "50-54"),
+    (365 * 55, 365 * 59, "55-59"),
+    (365 * 60, 365 * 64, "60-64"),
+    (365 * 65, 365 * 69, "65-69"),
+    (365 * 70, None, "70+"),
+]
+
+SITIO_LENGTH = MonthlyFact._meta.get_field('mf_sitio').max_length
+SUBJECT_LENGTH = MonthlyFact._meta.get_field('mf_subject').max_length
+
+MALE_VALUES = {'M', 'MALE'}
+FEMALE_VALUES = {'F', 'FEMALE'}
+
+_local = threading.local()
+_built = set()  # Metrics known to have been built in this process
+
+
+def month_start(value):
+    """First day of the month of a date or (aware) datetime, in local time"""
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return value.replace(day=1)
+
+
+def next_month(month):
+    return date(month.year + 1, 1, 1) if month.month == 12 else date(month.year, month.month + 1, 1)
+
+
+def normalize_sex(sex):
+    sex = (sex or '').strip().upper()
+    if sex in MALE_VALUES:
+        return 'M'
+    if sex in FEMALE_VALUES:
+        return 'F'
+    return ''
+
+
+def age_band(dob, on_date):
+    """Label of the AGE_BANDS entry for the age on on_date ('' when unknown)"""
+    if not dob:
+        return ''
+    age_days = (on_date - dob).days
+    for min_days, max_days, label in AGE_BANDS:
+        if age_days >= min_days and (max_days is None or age_days <= max_days):
+            return label
+    return ''
+
+
+# ===============================================================
+#  METRICS
+# ===============================================================
+class Metric:
+    """
+    A count over a source table.
+      patient  lookup path from the source row to its Patient
+      entity   what is counted; rows sharing an entity count once per month and subject
+      subject  expression for the extra breakdown (illness, vaccine); None for none
+    """
+
+    def __init__(self, name, queryset, date_field, patient, entity='pk', subject=None):
+        self.name = name
+        self.queryset = queryset
+        self.date_field = date_field
+        self.patient = patient
+        self.entity = entity
+        self.subject = subject
+
+    @property
+    def model(self):
+        return self.queryset.model
+
+    @property
+    def is_datetime(self):
+        return self.model._meta.get_field(self.date_field).get_internal_type() == 'DateTimeField'
+
+    def bound(self, day):
+        """day as a value of date_field: local midnight for datetime fields"""
+        if self.is_datetime:
+            return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        return day
+
+    def _range_filter(self, start, end):
+        return {f'{self.date_field}__gte': self.bound(start), f'{self.date_field}__lt': self.bound(end)}
+
+    def rows(self, start, end):
+        """
+        (entity, date, sex, dob, sitio, subject) of every source row in [start, end).
+        Sitio and subject come cut to the MonthlyFact column lengths, so rows are
+        grouped into cells by the values that are stored.
+        """
+        patient = self.patient
+        resident_sitio = PersonalAddress.objects.filter(
+            per=OuterRef(f'{patient}__rp_id__per')
+        ).order_by('pa_id').annotate(
+            sitio_name=Coalesce('add__sitio__sitio_name', 'add__add_external_sitio')
+        ).values('sitio_name')[:1]
+
+        return self.queryset.filter(**self._range_filter(start, end)).order_by().annotate(
+            _entity=F(self.entity),
+            _date=F(self.date_field),
+            _sex=Coalesce(f'{patient}__rp_id__per__per_sex', f'{patient}__trans_id__tran_sex'),
+            _dob=Coalesce(f'{patient}__rp_id__per__per_dob', f'{patient}__trans_id__tran_dob'),
+            _sitio=Substr(Coalesce(
+                Subquery(resident_sitio, output_field=CharField()),
+                f'{patient}__trans_id__tradd_id__tradd_sitio',
+                Value(''),
+            ), 1, SITIO_LENGTH),
+            _subject=(
+                Substr(Cast(self.subject, CharField()), 1, SUBJECT_LENGTH)
+                if self.subject is not None else Value('')
+            ),
+        ).values_list('_entity', '_date', '_sex', '_dob', '_sitio', '_subject')
+
+
+METRICS = {metric.name: metric for metric in [
+    # Surveillance medical histories, by illness
+    Metric(
+        'morbidity_cases',
+        MedicalHistory.objects.filter(is_for_surveillance=True),
+        'created_at', 'patrec__pat_id', subject=F('ill_id'),
+    ),
+    # Distinct patients per surveillance illness
+    Metric(
+        'morbidity_patients',
+        MedicalHistory.objects.filter(is_for_surveillance=True, ill__isnull=False),
+        'created_at', 'patrec__pat_id', entity='patrec__pat_id', subject=F('ill_id'),
+    ),
+    # OPT body measurements
+    Metric(
+        'opt_measurements',
+        BodyMeasurement.objects.filter(is_opt=True),
+        'created_at', 'pat',
+    ),
+    # Distinct vaccination records per vaccine
+    Metric(
+        'vaccination_records',
+        VaccinationHistory.objects.all(),
+        'date_administered', 'vacrec__patrec_id__pat_id', entity='vacrec',
+        subject=Coalesce('vacStck_id__vac_id__vac_name', 'vac__vac_name', Value('Unknown Vaccine')),
+    ),
+]}
+
+
+def metrics_for_model(model):
+    return [metric for metric in METRICS.values() if metric.model is model]
+
+
+# ===============================================================
+#  BUILD
+# ===============================================================
+def build_month(metric, month):
+    """Unsaved MonthlyFact rows of one metric for one month"""
+    first_seen = {}
+    for entity, when, sex, dob, sitio, subject in metric.rows(month, next_month(month)):
+        on_date = timezone.localtime(when).date() if isinstance(when, datetime) else when
+        key = (subject or '', entity)
+        if key not in first_seen or on_date < first_seen[key][0]:
+            first_seen[key] = (on_date, sex, dob, sitio)
+
+    cells = Counter()
+    for (subject, _), (on_date, sex, dob, sitio) in first_seen.items():
+        cells[(sitio or '', normalize_sex(sex), age_band(dob, on_date), subject)] += 1
+
+    return [
+        MonthlyFact(
+            mf_metric=metric.name, mf_month=month, mf_sitio=sitio, mf_sex=sex,
+            mf_age_band=band, mf_subject=subject, mf_value=value,
+        )
+        for (sitio, sex, band, subject), value in cells.items()
+    ]
+
+
+def refresh_months(metric_name, months):
+    """Rebuilds the facts of the given months of one metric; returns the number of rows written"""
+    metric = METRICS[metric_name]
+    written = 0
+    for month in sorted({month_start(month) for month in months}):
+        facts = build_month(metric, month)
+        with transaction.atomic():
+            MonthlyFact.objects.filter(mf_metric=metric.name, mf_month=month).delete()
+            MonthlyFact.objects.bulk_create(
+                facts,
+                update_conflicts=True,
+                unique_fields=['mf_metric', 'mf_month', 'mf_sitio', 'mf_sex', 'mf_age_band', 'mf_subject'],
+                update_fields=['mf_value', 'mf_updated_at'],
+            )
+        written += len(facts)
+    return written
+
+
+def source_months(metric_name, since=None):
+    """Months that have at least one source row (from since, a date, onwards)"""
+    metric = METRICS[metric_name]
+    queryset = metric.queryset
+    if since:
+        queryset = queryset.filter(**{f'{metric.date_field}__gte': metric.bound(month_start(since))})
+    if metric.is_datetime:
+        dates = queryset.datetimes(metric.date_field, 'month', tzinfo=timezone.get_current_timezone())
+    else:
+        dates = queryset.dates(metric.date_field, 'month')
+    return [month_start(value) for value in dates]
+
+
+def rebuild_metric(metric_name, since=None):
+    """Rebuilds every month of a metric (from since onwards) and drops facts of months left empty"""
+    months = source_months(metric_name, since)
+    stale = MonthlyFact.objects.filter(mf_metric=metric_name).exclude(mf_month__in=months)
+    if since:
+        stale = stale.filter(mf_month__gte=month_start(since))
+    stale.delete()
+    return refresh_months(metric_name, months)
+
+
+def ensure_built(metric_name):
+    """First read after deploy: builds the metric if it has never been built"""
+    if metric_name in _built:
+        return
+    if not MonthlyFact.objects.filter(mf_metric=metric_name).exists():
+        logger.info(f"⚡ Building monthly facts for {metric_name}")
+        rebuild_metric(metric_name)
+    _built.add(metric_name)
+
+
+# ===============================================================
+#  READ
+# ===============================================================
+def monthly_facts(metric_name, *dimensions, start=None, end=None):
+    """
+    Values rows {'mf_month', *dimensions, 'total'} of one metric, newest month
+    first. start and end are dates; end is exclusive.
+    """
+    ensure_built(metric_name)
+    queryset = MonthlyFact.objects.filter(mf_metric=metric_name)
+    if start:
+        queryset = queryset.filter(mf_month__gte=month_start(start))
+    if end:
+        queryset = queryset.filter(mf_month__lt=end)
+    return queryset.values('mf_month', *dimensions).annotate(total=Sum('mf_value')).order_by('-mf_month', *dimensions)
+
+
+# ===============================================================
+#  INCREMENTAL MAINTENANCE
+# ===============================================================
+def remember_months(model, instance):
+    """
+    Called before a source row is saved: keeps the months its stored row is in,
+    so that moving it to another month also rebuilds the month it left.
+    """
+    metrics = metrics_for_model(model)
+    if not metrics or instance._state.adding or instance.pk is None:
+        return
+    date_fields = sorted({metric.date_field for metric in metrics})
+    stored = model.objects.filter(pk=instance.pk).values(*date_fields).first()
+    if stored:
+        instance._rollup_previous = stored
+
+
+def mark_changed(model, instance):
+    """
+    Called from signal handlers for a saved or deleted source row. The months
+    touched inside a transaction (the row's current month and, after an edit,
+    its previous one) are rebuilt once, after it commits.
+    """
+    metrics = metrics_for_model(model)
+    if not metrics:
+        return
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        pending = _local.pending = set()
+    previous = instance.__dict__.pop('_rollup_previous', {})
+    for metric in metrics:
+        for when in (getattr(instance, metric.date_field, None), previous.get(metric.date_field)):
+            if when:
+                pending.add((metric.name, month_start(when)))
+    transaction.on_commit(flush_pending)
+
+
+def flush_pending():
+    pending = getattr(_local, 'pending', None)
+    if not pending:
+        return
+    _local.pending = set()
+    by_metric = {}
+    for metric_name, month in pending:
+        by_metric.setdefault(metric_name, set()).add(month)
+    for metric_name, months in by_metric.items():
+        try:
+            ensure_built(metric_name)
+            refresh_months(metric_name, months)
+        except Exception as e:
+            logger.error(f"❌ Failed to refresh monthly facts for {metric_name}: {str(e)}")
@@ -0,0 +1,48 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+import logging
+
+from apps.patientrecords.models import BodyMeasurement, MedicalHistory
+from apps.vaccination.models import VaccinationHistory
+from utils.counters import invalidate_counts
+from .dashboard import DASHBOARD_COUNTS, DASHBOARD_MODELS, PATIENT_COUNTS, PATIENT_MODELS
+from .rollups import mark_changed, remember_months
+
+logger = logging.getLogger(__name__)
+
+
+# ===============================================================
+#  MONTHLY FACTS
+# ===============================================================
+@receiver([post_save, post_delete], sender=MedicalHistory)
+@receiver([post_save, post_delete], sender=BodyMeasurement)
+@receiver([post_save, post_delete], sender=VaccinationHistory)
+def monthly_facts_source_changed(sender, instance, **kwargs):
+    mark_changed(sender, instance)
+
+
+@receiver(pre_save, sender=MedicalHistory)
+@receiver(pre_save, sender=BodyMeasurement)
+@receiver(pre_save, sender=VaccinationHistory)
+def monthly_facts_source_saving(sender, instance, **kwargs):
+    remember_months(sender, instance)
+
+
+# ===============================================================
+#  DASHBOARD COUNTERS
+# ===============================================================
+def dashboard_counts_changed(sender, **kwargs):
+    invalidate_counts(DASHBOARD_COUNTS)
+
+
+def patient_counts_changed(sender, **kwargs):
+    invalidate_counts(PATIENT_COUNTS)
+
+
+for model in DASHBOARD_MODELS:
+    post_save.connect(dashboard_counts_changed, sender=model)
+    post_delete.connect(dashboard_counts_changed, sender=model)
+
+for model in PATIENT_MODELS:
+    post_save.connect(patient_counts_changed, sender=model)
+    post_delete.connect(patient_counts_changed, sender=model)
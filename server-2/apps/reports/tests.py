@@ -1,3 +1,237 @@
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from apps.healthProfiling.models import Address, Personal, PersonalAddress, ResidentProfile, Sitio
+from apps.inventory.models import Category, Inventory, MedicineInventory, MedicineTransactions, Medicinelist
+from apps.patientrecords.models import BodyMeasurement, Illness, MedicalHistory, Patient, PatientRecord, Transient, TransientAddress
+from utils.cache import _version_key
+from . import rollups
+from .dashboard import DASHBOARD_COUNTS
+from .models import MonthlyFact
+from apps.patientrecords.views.patient_views import PatientCountView
+from .views.choptmonthly_summary_views import OPTSummaryAllMonths
+from .views.counts import ReportsCount
+from .views.inv_medicine_views import MonthlyMedicineRecordsDetailAPIView
+from .views.monthly_illnesschart import MedicalHistoryMonthlyChart
+from .views.morbidity_report import MonthlyMorbiditySummaryAPIView
+
+
+class MedicineInventoryReportTest(TestCase):
+    def setUp(self):
+        self.cat = Category.objects.create(cat_type='Medicine', cat_name='Analgesic')
+        self.month = timezone.localdate().strftime('%Y-%m')
+
+    def _stock(self, name, unit='pcs', pcs=0):
+        medicine = Medicinelist.objects.create(med_name=name, med_dsg=500, med_dsg_unit='mg', med_form='Tablet', cat=self.cat)
+        return MedicineInventory.objects.create(
+            inv_id=Inventory.objects.create(inv_type='Medicine', expiry_date=timezone.now().date() + timedelta(days=365)),
+            med_id=medicine, minv_qty_unit=unit, minv_pcs=pcs,
+        )
+
+    def _report(self):
+        request = APIRequestFactory().get('/')
+        return MonthlyMedicineRecordsDetailAPIView.as_view()(request, month=self.month).data['data']
+
+    def test_monthly_records_sum_transactions_in_sql(self):
+        boxes = self._stock('Paracetamol', unit='boxes', pcs=10)
+        MedicineTransactions.objects.create(mdt_qty='3 boxes (30 pcs)', mdt_action='Added', minv_id=boxes)
+        MedicineTransactions.objects.create(mdt_qty='4 pc/s', mdt_action='Deducted', minv_id=boxes)
+        MedicineTransactions.objects.create(mdt_qty='1 pc/s', mdt_action='Wasted', minv_id=boxes)
+        MedicineTransactions.objects.create(mdt_qty='2 pc/s', mdt_action='Archived', minv_id=boxes)
+
+        with CaptureQueriesContext(connection) as small:
+            self._report()
+
+        for i in range(5):
+            stock = self._stock(f'Medicine {i}')
+            MedicineTransactions.objects.create(mdt_qty='10 pc/s', mdt_action='Added', minv_id=stock)
+        with CaptureQueriesContext(connection) as large:
+            data = self._report()
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(data['total_items'], 6)
+        row = next(item for item in data['inventory_summary'] if item['med_name'].startswith('Paracetamol'))
+        self.assertEqual(
+            (row['opening'], row['received'], row['dispensed'], row['closing']), (30, 30, 5, 25)
+        )
+
+
+class MonthlyFactTest(TestCase):
+    def setUp(self):
+        rollups._built.clear()
+        self.factory = APIRequestFactory()
+        self.flu = Illness.objects.create(illname='Influenza', ill_code='J11')
+        self.dengue = Illness.objects.create(illname='Dengue', ill_code='A90')
+        self.today = timezone.localdate()
+        self.month = self.today.replace(day=1)
+
+        per = Personal.objects.create(
+            per_lname='Reyes', per_fname='Ana', per_dob=self.today - timedelta(days=365 * 30 + 10),
+            per_sex='FEMALE', per_status='SINGLE', per_religion='CATHOLIC', per_contact='09000000000',
+        )
+        address = Address.objects.create(
+            add_province='Cebu', add_city='Cebu City', add_barangay='San Roque', add_street='Main',
+            sitio=Sitio.objects.create(sitio_name='Lower'),
+        )
+        PersonalAddress.objects.create(per=per, add=address)
+        self.resident = Patient.objects.create(pat_type='Resident', rp_id=ResidentProfile.objects.create(rp_id='RF0001', per=per))
+        transient = Transient.objects.create(
+            trans_id='TF0001', tran_lname='Cruz', tran_fname='Leo', tran_dob=self.today - timedelta(days=400),
+            tran_sex='Male', tran_status='Single', tran_ed_attainment='None', tran_religion='Catholic', tran_contact='0',
+            tradd_id=TransientAddress.objects.create(
+                tradd_province='Cebu', tradd_city='Cebu City', tradd_barangay='Other', tradd_street='Side', tradd_sitio='Upper',
+            ),
+        )
+        self.transient = Patient.objects.create(pat_type='Transient', trans_id=transient)
+
+    def _case(self, patient, illness):
+        with self.captureOnCommitCallbacks(execute=True):
+            return MedicalHistory.objects.create(
+                patrec=PatientRecord.objects.create(patrec_type='Medical Consultation', pat_id=patient),
+                ill=illness, is_for_surveillance=True,
+            )
+
+    def _summary(self):
+        response = MonthlyMorbiditySummaryAPIView.as_view()(self.factory.get('/'))
+        return response.data['results']['data']
+
+    def test_cells_by_sitio_sex_age_band_and_illness(self):
+        self._case(self.resident, self.flu)
+        self._case(self.resident, self.flu)
+        self._case(self.transient, self.dengue)
+
+        cells = set(MonthlyFact.objects.filter(mf_metric='morbidity_cases').values_list(
+            'mf_month', 'mf_sitio', 'mf_sex', 'mf_age_band', 'mf_subject', 'mf_value'
+        ))
+        self.assertEqual(cells, {
+            (self.month, 'LOWER', 'F', '30-34', str(self.flu.ill_id), 2),
+            (self.month, 'UPPER', 'M', '1-4 yrs', str(self.dengue.ill_id), 1),
+        })
+        # The patient metric counts the resident once
+        self.assertEqual(
+            sum(MonthlyFact.objects.filter(mf_metric='morbidity_patients').values_list('mf_value', flat=True)), 2
+        )
+
+    def test_summary_reads_facts_and_follows_writes(self):
+        self._case(self.resident, self.flu)
+        case = self._case(self.transient, self.flu)
+        self._case(self.transient, self.dengue)
+
+        with CaptureQueriesContext(connection) as queries:
+            month = self._summary()[0]
+        self.assertEqual(len(queries), 2)  # Facts and illness names
+        self.assertEqual(
+            (month['total_cases'], month['male_cases'], month['female_cases'], month['total_illnesses']), (3, 2, 1, 2)
+        )
+        self.assertEqual(month['top_illnesses'][0], {'ill__illname': 'Influenza', 'ill__ill_code': 'J11', 'count': 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            case.delete()
+        self.assertEqual(self._summary()[0]['male_cases'], 1)
+
+        request = self.factory.get('/')
+        chart = MedicalHistoryMonthlyChart.as_view()(request, month=self.month.strftime('%Y-%m')).data
+        self.assertEqual(chart['illness_counts'], {'Influenza': 1, 'Dengue': 1})
+
+    def test_moving_a_case_to_another_month_rebuilds_both_months(self):
+        case = self._case(self.resident, self.flu)
+        previous_month = (self.month - timedelta(days=1)).replace(day=1)
+
+        case.created_at = timezone.make_aware(datetime.combine(previous_month, time(12)))
+        with self.captureOnCommitCallbacks(execute=True):
+            case.save()
+
+        months = set(MonthlyFact.objects.filter(mf_metric='morbidity_cases').values_list('mf_month', 'mf_value'))
+        self.assertEqual(months, {(previous_month, 1)})
+
+    def test_first_read_and_rebuild_command_build_from_sources(self):
+        self._case(self.resident, self.flu)
+        MonthlyFact.objects.all().delete()
+        rollups._built.clear()
+
+        self.assertEqual(self._summary()[0]['total_cases'], 1)
+
+        MonthlyFact.objects.filter(mf_metric='morbidity_cases').update(mf_value=99)
+        MonthlyFact.objects.create(mf_metric='morbidity_cases', mf_month=date(2001, 1, 1), mf_value=5)
+        call_command('rebuild_monthly_facts', metric=['morbidity_cases'], stdout=StringIO())
+        self.assertEqual([row['total_cases'] for row in self._summary()], [1])
+
+    def test_opt_summary_counts_residents_and_transients_by_sex(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for patient in (self.resident, self.transient, self.transient):
+                BodyMeasurement.objects.create(pat=patient, is_opt=True)
+            BodyMeasurement.objects.create(pat=self.resident)
+
+        response = OPTSummaryAllMonths.as_view()(self.factory.get('/', {'year': str(self.today.year)}))
+        self.assertEqual(response.data['data'][0]['record_count'], 3)
+        self.assertEqual(response.data['overall_totals'], {'Male': 2, 'Female': 1})
+        response = OPTSummaryAllMonths.as_view()(self.factory.get('/', {'year': '2001'}))
+        self.assertEqual(response.data['data'], [])
+
+
+class DashboardCountsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.cat = Category.objects.create(cat_type='Medicine', cat_name='Analgesic')
+        Medicinelist.objects.create(med_name='Paracetamol', med_dsg=500, med_dsg_unit='mg', med_form='Tablet', cat=self.cat)
+
+    def _dashboard(self, doctor_id=None):
+        params = {'doctor_id': doctor_id} if doctor_id else {}
+        response = ReportsCount.as_view()(self.factory.get('/', params))
+        self.assertEqual(response.status_code, 200)
+        return response.data['data']
+
+    def test_dashboard_counts_in_one_query_and_caches_per_doctor(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self._dashboard()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual((data['medicine_count'], data['medinelist_count'], data['firstaidlist_count']), (1, 1, 0))
+        self.assertIsNone(data['completed_childconsultations_by_doctor'])
+
+        with CaptureQueriesContext(connection) as queries:
+            self._dashboard()
+        self.assertEqual(len(queries), 0)
+
+        data = self._dashboard(doctor_id='1')
+        self.assertEqual((data['completed_consultations_by_doctor'], data['completed_childconsultations_by_doctor']), (0, 0))
+
+    def test_writes_to_counted_models_invalidate_every_doctor(self):
+        self._dashboard()
+        self._dashboard(doctor_id='1')
+        with self.captureOnCommitCallbacks(execute=True):
+            Medicinelist.objects.create(med_name='Ibuprofen', med_dsg=200, med_dsg_unit='mg', med_form='Tablet', cat=self.cat)
+
+        self.assertEqual(self._dashboard()['medicine_count'], 2)
+        self.assertEqual(self._dashboard(doctor_id='1')['medicine_count'], 2)
+
+    def test_evicted_version_does_not_bring_back_old_counts(self):
+        self._dashboard()
+        with self.captureOnCommitCallbacks(execute=True):
+            Medicinelist.objects.create(med_name='Ibuprofen', med_dsg=200, med_dsg_unit='mg', med_form='Tablet', cat=self.cat)
+        self.assertEqual(self._dashboard()['medicine_count'], 2)
+
+        cache.delete(_version_key(f'counts:{DASHBOARD_COUNTS}'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Medicinelist.objects.create(med_name='Aspirin', med_dsg=80, med_dsg_unit='mg', med_form='Tablet', cat=self.cat)
+        self.assertEqual(self._dashboard()['medicine_count'], 3)
+
+    def test_patient_counts(self):
+        Patient.objects.create(pat_type='Transient', pat_status='Active')
+        Patient.objects.create(pat_type='Transient', pat_status='Transfer of Residency')
+        with CaptureQueriesContext(connection) as queries:
+            data = PatientCountView.as_view()(self.factory.get('/')).data
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(data, {'total': 1, 'resident': 0, 'transient': 1, 'tor': 1})
 
-# Create your tests here.
+        with self.captureOnCommitCallbacks(execute=True):
+            Patient.objects.create(pat_type='Transient', pat_status='Active')
+        self.assertEqual(PatientCountView.as_view()(self.factory.get('/')).data['transient'], 2)
@@ -1,5 +1,5 @@
 # Standard library imports
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 # Django imports
 from django.db.models import (
@@ -22,6 +22,7 @@ from apps.patientrecords.serializers.bodymesurement_serializers import BodyMeasu
 from apps.healthProfiling.models import *
 from pagination import *
 from apps.inventory.models import * 
+from ..rollups import monthly_facts, next_month
 
 
 
@@ -29,55 +30,41 @@ from apps.inventory.models import *
 class OPTSummaryAllMonths(APIView):
     def get(self, request):
         try:
-            # Base queryset with all necessary relations - now including both residents and transients
-            queryset = BodyMeasurement.objects.filter(is_opt=True).select_related(
-                 'pat',
-                'pat__rp_id', 'pat__rp_id__per', 'pat__trans_id'
-            ).annotate(
-                # Use Case/When to get gender from both resident and transient
-                sex=Case(
-                    When(pat__pat_type='Resident', then=F('pat__rp_id__per__per_sex')),
-                    When(pat__pat_type='Transient', then=F('pat__trans_id__tran_sex')),
-                    default=Value('Unknown'),
-                    output_field=CharField()
-                )
-            ).order_by('-created_at')
-
             # Search query (month name or year)
             search_query = request.GET.get('search', '').strip()
 
             # Filter by year or year-month
+            start = end = None
             year_param = request.GET.get('year', 'all')
             if year_param and year_param != 'all':
                 try:
                     if '-' in year_param:
                         year, month = map(int, year_param.split('-'))
-                        queryset = queryset.filter(
-                            created_at__year=year,
-                            created_at__month=month
-                        )
+                        start = date(year, month, 1)
+                        end = next_month(start)
                     else:
                         year = int(year_param)
-                        queryset = queryset.filter(created_at__year=year)
+                        start, end = date(year, 1, 1), date(year + 1, 1, 1)
                 except ValueError:
                     return Response({
                         'success': False,
                         'error': 'Invalid format for year. Use YYYY or YYYY-MM.'
                     }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Annotate and count records per month with gender breakdown
-            monthly_data = queryset.annotate(
-                month=TruncMonth('created_at')
-            ).values('month').annotate(
-                record_count=Count('bm_id'),
-                male_count=Count('bm_id', filter=Q(sex='Male')),
-                female_count=Count('bm_id', filter=Q(sex='Female'))
-            ).order_by('-month')
+            # Records per month with gender breakdown, precomputed in monthly_fact
+            monthly_data = {}
+            for row in monthly_facts('opt_measurements', 'mf_sex', start=start, end=end):
+                item = monthly_data.setdefault(row['mf_month'], {'record_count': 0, 'male_count': 0, 'female_count': 0})
+                item['record_count'] += row['total']
+                if row['mf_sex'] == 'M':
+                    item['male_count'] += row['total']
+                elif row['mf_sex'] == 'F':
+                    item['female_count'] += row['total']
 
             formatted_data = []
-            for item in monthly_data:
-                month_str = item['month'].strftime('%Y-%m')
-                month_name = item['month'].strftime('%B %Y')
+            for month_date, item in monthly_data.items():
+                month_str = month_date.strftime('%Y-%m')
+                month_name = month_date.strftime('%B %Y')
 
                 # Apply search filter if provided
                 if search_query and search_query.lower() not in month_name.lower():
@@ -95,8 +82,8 @@ class OPTSummaryAllMonths(APIView):
 
             # Calculate overall totals
             overall_totals = {
-                'Male': sum(item['male_count'] for item in monthly_data),
-                'Female': sum(item['female_count'] for item in monthly_data)
+                'Male': sum(item['male_count'] for item in monthly_data.values()),
+                'Female': sum(item['female_count'] for item in monthly_data.values())
             }
 
             return Response({
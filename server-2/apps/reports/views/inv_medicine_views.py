@@ -10,11 +10,34 @@ from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from django.db.models.functions import TruncMonth
 from pagination import *
-import re
 from calendar import monthrange
+from apps.inventory.quantities import active_stock_counts, stock_movements
 from apps.medicineservices.models import MedicineInventory, MedicineTransactions, MedicineRequest, MedicineRequestItem, MedicineAllocation
 from apps.medicineservices.serializers import MedicineInventorySerializer
 from pagination import StandardResultsPagination
+
+
+DEDUCTED_ACTIONS = ('deduct',)
+DISPENSED_ACTIONS = ('deducted', 'wasted')
+
+
+def medicine_stock_movements(start_date, end_date, out_actions=DISPENSED_ACTIONS):
+    """stock_movements() for medicine stocks; returns (rows, {minv_id: MedicineInventory})"""
+    rows = stock_movements(
+        MedicineTransactions.objects.all(), 'minv_id', 'mdt', start_date, end_date, out_actions
+    )
+    stocks = MedicineInventory.objects.select_related('med_id', 'inv_id').in_bulk(
+        [row['stock_id'] for row in rows]
+    )
+    return rows, stocks
+
+
+def _is_boxes(minv):
+    return bool(minv.minv_qty_unit) and minv.minv_qty_unit.lower() == "boxes"
+
+
+def _medicine_display_name(medicine):
+    return f"{medicine.med_name} {medicine.med_dsg}{medicine.med_dsg_unit} {medicine.med_form}"
     
             
 # ==================MEDICINE REPORT=======================
@@ -24,47 +47,21 @@ class MedicineSummaryMonthsAPIView(APIView):
 
     def get(self, request):
         try:
-            queryset = MedicineTransactions.objects.all()
-
             search_query = request.GET.get('search', '').strip().lower()
 
-            # Get distinct months in queryset, sorted descending
-            distinct_months = queryset.dates('created_at', 'month', order='DESC')
+            # Distinct medicine stocks per month, sorted descending - EXCLUDE items
+            # that expired BEFORE the month
+            months = active_stock_counts(MedicineTransactions.objects.all(), 'minv_id')
 
             formatted_months = []
 
-            for month_date in distinct_months:
-                year = month_date.year
-                month = month_date.month
-                month_str = f"{year}-{month:02d}"  # Format as YYYY-MM
+            for month_date, total_items in months.items():
+                month_str = f"{month_date.year}-{month_date.month:02d}"  # Format as YYYY-MM
                 month_name = month_date.strftime("%B %Y")  # Format as "November 2025"
 
                 if search_query and search_query not in month_str.lower() and search_query not in month_name.lower():
                     continue
 
-                # Get the date range for this month
-                start_date = datetime(year, month, 1).date()
-                # Get the last day of the month
-                if month == 12:
-                    end_date = datetime(year, month, 31).date()
-                else:
-                    end_date = datetime(year, month + 1, 1).date() - timedelta(days=1)
-
-                # Filter transactions for this month - EXCLUDE expired items
-                month_transactions = queryset.filter(
-                    created_at__date__gte=start_date,
-                    created_at__date__lte=end_date
-                ).exclude(
-                    # Exclude items that expired BEFORE this month
-                    minv_id__inv_id__expiry_date__lt=start_date
-                )
-
-                # Count distinct medicine+inventory combos
-                total_items = month_transactions.values(
-                    "minv_id__med_id",
-                    "minv_id__inv_id"
-                ).distinct().count()
-
                 formatted_months.append({
                     'month': month_str,  # "YYYY-MM"
                     'month_name': month_name,  # "November 2025"
@@ -92,163 +89,31 @@ class MedicineSummaryMonthsAPIView(APIView):
                 'error': str(e),
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            
-class MonthlyMedicineRecordsDetailAPIView(generics.ListAPIView):
-    serializer_class = MedicineInventorySerializer
-    pagination_class = StandardResultsPagination
-
-    def list(self, request, *args, **kwargs):
-        year_str = self.kwargs['month']  # Format: YYYY (kept param name for compatibility)
-        try:
-            year = int(year_str)
-        except ValueError:
-            return Response({"error": "Invalid year format"}, status=400)
-
-        start_date = datetime(year, 1, 1).date()
-        end_date = datetime(year, 12, 31).date()
 
-        inventory_summary = []
-
-        # Get unique medicine + expiry_date + inv_id combos to avoid duplicates
-        med_expiry_inv_pairs = MedicineTransactions.objects.filter(
-            created_at__date__lte=end_date
-        ).values_list(
-            "minv_id__med_id",
-            "minv_id__inv_id__expiry_date",
-            "minv_id__inv_id"
-        ).distinct()
-
-        # Track unique combinations to avoid duplicates
-        seen_combinations = set()
-
-        for med_id, expiry_date, inv_id in med_expiry_inv_pairs:
-            # Skip if expiry date is before the current year (already expired)
-            if expiry_date and expiry_date < start_date:
-                continue
-                
-            # Create a unique key for this combination
-            combo_key = (med_id, expiry_date, inv_id)
-            
-            # Skip if we've already processed this combination
-            if combo_key in seen_combinations:
-                continue
-                
-            seen_combinations.add(combo_key)
-
-            transactions = MedicineTransactions.objects.filter(
-                minv_id__med_id=med_id,
-                minv_id__inv_id__expiry_date=expiry_date,
-                minv_id__inv_id=inv_id
-            ).order_by("created_at")
-
-            first_tx = transactions.select_related("minv_id__med_id", "minv_id__inv_id").first()
-            if not first_tx:
-                continue
-
-            unit = first_tx.minv_id.minv_qty_unit
-            pcs_per_box = first_tx.minv_id.minv_pcs if unit and unit.lower() == "boxes" else 1
-
-            # Opening stock before start_date
-            opening_in = transactions.filter(
-                created_at__date__lt=start_date,
-                mdt_action__icontains="added"
-            )
-            opening_out = transactions.filter(
-                created_at__date__lt=start_date
-            ).filter(
-                Q(mdt_action__icontains="deducted") | Q(mdt_action__icontains="wasted")
-            )
-            opening_qty = (sum(self._parse_qty(t) for t in opening_in) -
-                           sum(self._parse_qty(t) for t in opening_out))
-
-            if unit and unit.lower() == "boxes":
-                opening_qty *= pcs_per_box
-
-            # Received during the month
-            monthly_transactions = transactions.filter(
-                created_at__date__gte=start_date,
-                created_at__date__lte=end_date,
-                mdt_action__icontains="added"
-            )
-            received_qty = sum(self._parse_qty(t) for t in monthly_transactions)
-            if unit and unit.lower() == "boxes":
-                received_qty *= pcs_per_box
-
-            # Dispensed during the month
-            dispensed_qty = sum(
-                self._parse_qty(t) for t in transactions.filter(
-                    created_at__date__gte=start_date,
-                    created_at__date__lte=end_date
-                ).filter(
-                Q(mdt_action__icontains="deducted") | Q(mdt_action__icontains="wasted")
-                )
-            )
-
-            # Opening displayed includes received
-            display_opening = opening_qty + received_qty
-            closing_qty = display_opening - dispensed_qty
-
-            # Check if expired this year
-            expired_this_year = (first_tx.minv_id.inv_id.expiry_date and 
-                                start_date <= first_tx.minv_id.inv_id.expiry_date <= end_date)
-            
-            # REMOVED: Don't set closing to 0 for expired items
-            # if expired_this_year:
-            #     closing_qty = 0
-            
-            # Skip if there's no stock and it's not expiring this year
-            # Also include items that expired this year even if closing_qty <= 0
-            if (closing_qty <= 0 and 
-                (not expiry_date or expiry_date < start_date) and 
-                not expired_this_year and
-                not monthly_transactions.exists() and
-                not transactions.filter(created_at__date__gte=start_date, created_at__date__lte=end_date).exists()):
-                continue
+#======================== EXPIRED AND OUT OF STOCK REPORT=========================
+def _stock_problem(row, minv, start_date, end_date, pcs_per_box):
+    """
+    Closing stock and flags for one row of medicine_stock_movements(). Added
+    quantities are counted in boxes for box stocks; deductions are already in pieces.
+    """
+    opening_qty = row['opening_in'] * pcs_per_box - row['opening_out']
+    received_qty = row['received'] * pcs_per_box
+    closing_qty = opening_qty + received_qty - row['dispensed']
+    expiry_date = minv.inv_id.expiry_date
+    near_expiry_threshold = end_date + timedelta(days=30)
+    return {
+        'opening_qty': opening_qty,
+        'received_qty': received_qty,
+        'closing_qty': closing_qty,
+        'is_expired': start_date <= expiry_date <= end_date,
+        'is_out_of_stock': closing_qty <= 0,
+        'is_near_expiry': (end_date < expiry_date <= near_expiry_threshold) and closing_qty > 0,
+    }
 
-            inventory_summary.append({
-                'med_name': f"{first_tx.minv_id.med_id.med_name} {first_tx.minv_id.minv_dsg}{first_tx.minv_id.minv_dsg_unit} {first_tx.minv_id.minv_form}",
-                'opening': display_opening,
-                'received': received_qty,
-                'dispensed': dispensed_qty,
-                'closing': closing_qty,
-                'unit': "pcs",
-                'expiry': first_tx.minv_id.inv_id.expiry_date,
-                'expired_this_year': expired_this_year,
-            })
 
-        return Response({
-            'success': True,
-            'data': {
-                'year': year_str,
-                'inventory_summary': inventory_summary,
-                'total_items': len(inventory_summary)
-            }
-        })
-
-    def _parse_qty(self, transaction):
-        """Extract numeric value from mdt_qty."""
-        match = re.search(r'\d+', str(transaction.mdt_qty))
-        return int(match.group()) if match else 0   
-    
-    
-    
-#======================== EXPIRED AND OUT OF STOCK REPORT=========================
 class MedicineExpiredOutOfStockSummaryAPIView(APIView):
     pagination_class = StandardResultsPagination
 
-    def _parse_qty(self, transaction, multiply_boxes=False):
-        """Extract numeric value from mdt_qty and convert boxes to pieces if needed."""
-        match = re.search(r'\d+', str(transaction.mdt_qty))
-        qty_num = int(match.group()) if match else 0
-        
-        if (multiply_boxes and 
-            transaction.minv_id.minv_qty_unit and 
-            transaction.minv_id.minv_qty_unit.lower() == "boxes"):
-            pcs_per_box = transaction.minv_id.minv_pcs or 1
-            qty_num *= pcs_per_box
-            
-        return qty_num
-
     def get(self, request):
         try:
             # Get distinct years from medicine transactions
@@ -263,71 +128,29 @@ class MedicineExpiredOutOfStockSummaryAPIView(APIView):
                 # Get the date range for this year
                 start_date = datetime(year, 1, 1).date()
                 end_date = datetime(year, 12, 31).date()
-                near_expiry_threshold = end_date + timedelta(days=30)
-
-                # Get all medicine inventory items that were active up to this year
-                med_expiry_inv_pairs = MedicineTransactions.objects.filter(
-                    created_at__date__lte=end_date
-                ).values_list(
-                    "minv_id__med_id",
-                    "minv_id__inv_id__expiry_date",
-                    "minv_id__inv_id"
-                ).distinct()
 
                 expired_count = 0
                 out_of_stock_count = 0
                 expired_out_of_stock_count = 0
                 near_expiry_count = 0
 
-                seen_combinations = set()
-
-                for med_id, expiry_date, inv_id in med_expiry_inv_pairs:
-                    # Create a unique key for this combination
-                    combo_key = (med_id, expiry_date, inv_id)
-                    if combo_key in seen_combinations:
-                        continue
-                    seen_combinations.add(combo_key)
-
+                rows, stocks = medicine_stock_movements(start_date, end_date, out_actions=DEDUCTED_ACTIONS)
+                for row in rows:
+                    minv = stocks[row['stock_id']]
                     # Skip if no expiry date (can't be expired or near expiry)
-                    if not expiry_date:
-                        continue
-
-                    # Skip if expired BEFORE current year
-                    if expiry_date < start_date:
+                    if not minv.inv_id.expiry_date:
                         continue
 
-                    transactions = MedicineTransactions.objects.filter(
-                        minv_id__med_id=med_id,
-                        minv_id__inv_id__expiry_date=expiry_date,
-                        minv_id__inv_id=inv_id
-                    ).order_by("created_at")
-
-                    # Calculate stock levels
-                    opening_in = transactions.filter(created_at__date__lt=start_date, mdt_action__icontains="added")
-                    opening_out = transactions.filter(created_at__date__lt=start_date, mdt_action__icontains="deduct")
-                    opening_qty = sum(self._parse_qty(t, multiply_boxes=True) for t in opening_in) - sum(self._parse_qty(t, multiply_boxes=False) for t in opening_out)
-
-                    yearly_transactions = transactions.filter(
-                        created_at__date__gte=start_date,
-                        created_at__date__lte=end_date
-                    )
-                    received_qty = sum(self._parse_qty(t, multiply_boxes=True) for t in yearly_transactions.filter(mdt_action__icontains="added"))
-                    dispensed_qty = sum(self._parse_qty(t, multiply_boxes=False) for t in yearly_transactions.filter(mdt_action__icontains="deduct"))
+                    pcs_per_box = (minv.minv_pcs or 1) if _is_boxes(minv) else 1
+                    problem = _stock_problem(row, minv, start_date, end_date, pcs_per_box)
 
-                    closing_qty = opening_qty + received_qty - dispensed_qty
-
-                    # Check conditions
-                    is_expired = start_date <= expiry_date <= end_date
-                    is_out_of_stock = closing_qty <= 0
-                    is_near_expiry = (end_date < expiry_date <= near_expiry_threshold) and closing_qty > 0
-
-                    if is_expired and is_out_of_stock:
+                    if problem['is_expired'] and problem['is_out_of_stock']:
                         expired_out_of_stock_count += 1
-                    elif is_expired:
+                    elif problem['is_expired']:
                         expired_count += 1
-                    elif is_out_of_stock:
+                    elif problem['is_out_of_stock']:
                         out_of_stock_count += 1
-                    elif is_near_expiry:
+                    elif problem['is_near_expiry']:
                         near_expiry_count += 1
 
                 total_problems = expired_count + out_of_stock_count + expired_out_of_stock_count + near_expiry_count
@@ -367,20 +190,6 @@ class MedicineExpiredOutOfStockSummaryAPIView(APIView):
 class MonthlyMedicineExpiredOutOfStockDetailAPIView(APIView):
     pagination_class = StandardResultsPagination
 
-    def _parse_qty(self, transaction, multiply_boxes=False):
-        """Extract numeric value from mdt_qty and convert boxes to pieces if needed."""
-        match = re.search(r'\d+', str(transaction.mdt_qty))
-        qty_num = int(match.group()) if match else 0
-        
-        # If it's a box unit AND we need to multiply, convert to pieces
-        if (multiply_boxes and 
-            transaction.minv_id.minv_qty_unit and 
-            transaction.minv_id.minv_qty_unit.lower() == "boxes"):
-            pcs_per_box = transaction.minv_id.minv_pcs or 1
-            qty_num *= pcs_per_box
-            
-        return qty_num
-
     def get(self, request, *args, **kwargs):
         month_str = self.kwargs['month']  # Format: YYYY-MM
         
@@ -403,95 +212,31 @@ class MonthlyMedicineExpiredOutOfStockDetailAPIView(APIView):
         except ValueError as e:
             return Response({"error": f"Invalid date: {str(e)}"}, status=400)
 
-        near_expiry_threshold = end_date + timedelta(days=30)  # 1 month after end of current month
-
         expired_items = []
         out_of_stock_items = []
         expired_out_of_stock_items = []
         near_expiry_items = []
 
-        # Get all medicine inventory items that were active up to this month
-        med_expiry_inv_pairs = MedicineTransactions.objects.filter(
-            created_at__date__lte=end_date
-        ).values_list(
-            "minv_id__med_id",
-            "minv_id__inv_id__expiry_date",
-            "minv_id__inv_id"
-        ).distinct()
-
-        seen_combinations = set()
-
-        for med_id, expiry_date, inv_id in med_expiry_inv_pairs:
-            # Create a unique key for this combination
-            combo_key = (med_id, expiry_date, inv_id)
-            if combo_key in seen_combinations:
-                continue
-            seen_combinations.add(combo_key)
+        # All medicine inventory items that were active up to this month
+        rows, stocks = medicine_stock_movements(start_date, end_date)
+        for row in rows:
+            minv = stocks[row['stock_id']]
+            expiry_date = minv.inv_id.expiry_date
 
             # Skip if no expiry date
             if not expiry_date:
                 continue
 
-            # Skip if expired BEFORE current month
-            if expiry_date < start_date:
-                continue
-
-            try:
-                minv = MedicineInventory.objects.get(
-                    med_id=med_id,
-                    inv_id__expiry_date=expiry_date,
-                    inv_id=inv_id
-                )
-            except MedicineInventory.DoesNotExist:
-                continue
-
-            transactions = MedicineTransactions.objects.filter(
-                minv_id__med_id=med_id,
-                minv_id__inv_id__expiry_date=expiry_date,
-                minv_id__inv_id=inv_id
-            ).order_by("created_at")
-
-            # Get unit information
-            unit = minv.minv_qty_unit
-            pcs_per_box = minv.minv_pcs if unit and unit.lower() == "boxes" else 1
-
-            # Calculate stock levels - multiply boxes for added quantities
-            opening_in = transactions.filter(created_at__date__lt=start_date, mdt_action__icontains="added")
-            opening_out = transactions.filter(
-                created_at__date__lt=start_date
-            ).filter(
-                Q(mdt_action__icontains="deducted") | Q(mdt_action__icontains="wasted")
-            )
-            opening_qty = sum(self._parse_qty(t, multiply_boxes=True) for t in opening_in) - sum(self._parse_qty(t, multiply_boxes=False) for t in opening_out)
-
-            monthly_transactions = transactions.filter(
-                created_at__date__gte=start_date,
-                created_at__date__lte=end_date
-            )
-            # Multiply boxes for received items
-            received_qty = sum(self._parse_qty(t, multiply_boxes=True) for t in monthly_transactions.filter(mdt_action__icontains="added"))
-            # Don't multiply boxes for dispensed items (they're already in pieces)
-            dispensed_qty = sum(
-                self._parse_qty(t, multiply_boxes=False)
-                for t in monthly_transactions.filter(
-                    Q(mdt_action__icontains="deducted") | Q(mdt_action__icontains="wasted")
-                )
-            )
+            # Multiply boxes for received items; dispensed items are already in pieces
+            pcs_per_box = (minv.minv_pcs or 1) if _is_boxes(minv) else 1
+            problem = _stock_problem(row, minv, start_date, end_date, pcs_per_box)
+            closing_qty = problem['closing_qty']
 
-            closing_qty = opening_qty + received_qty - dispensed_qty
-
-            # Check conditions
-            is_expired = start_date <= expiry_date <= end_date
-            is_out_of_stock = closing_qty <= 0
-            is_near_expiry = (end_date < expiry_date <= near_expiry_threshold) and closing_qty > 0
-
-            # Get medicine details from Medicinelist model
-            medicine = minv.med_id
-            if is_expired:
+            if problem['is_expired']:
                 status_str = 'Expired'
-            elif is_out_of_stock:
+            elif problem['is_out_of_stock']:
                 status_str = 'Out of Stock'
-            elif is_near_expiry:
+            elif problem['is_near_expiry']:
                 status_str = 'Near Expiry'
             elif closing_qty <= 20:
                 status_str = 'Low Stock'
@@ -499,28 +244,27 @@ class MonthlyMedicineExpiredOutOfStockDetailAPIView(APIView):
                 status_str = 'Active'
 
             item_data = {
-                'med_name': f"{medicine.med_name} {medicine.med_dsg}{medicine.med_dsg_unit} {medicine.med_form}",
+                'med_name': _medicine_display_name(minv.med_id),
                 'expiry_date': expiry_date.strftime('%Y-%m-%d') if expiry_date else 'No expiry',
-                'opening_stock': opening_qty,
+                'opening_stock': problem['opening_qty'],
                 'pcs': minv.minv_pcs,
                 'unit': minv.minv_qty_unit,
-                'received': received_qty,
-                'dispensed': dispensed_qty,
+                'received': problem['received_qty'],
+                'dispensed': row['dispensed'],
                 'wasted': minv.wasted,
                 'closing_stock': closing_qty,
                 'date_received': minv.created_at,
-                'unit': minv.minv_qty_unit,
                 'status': status_str,
                 'is_low_stock': closing_qty <= 20
             }
 
-            if is_expired and is_out_of_stock:
+            if problem['is_expired'] and problem['is_out_of_stock']:
                 expired_out_of_stock_items.append(item_data)
-            elif is_expired:
+            elif problem['is_expired']:
                 expired_items.append(item_data)
-            elif is_out_of_stock:
+            elif problem['is_out_of_stock']:
                 out_of_stock_items.append(item_data)
-            elif is_near_expiry:
+            elif problem['is_near_expiry']:
                 near_expiry_items.append(item_data)
 
         # Combine all items (including near expiry in problem items)
@@ -641,110 +385,39 @@ class MonthlyMedicineRecordsDetailAPIView(generics.ListAPIView):
 
         inventory_summary = []
 
-        # Get unique medicine + expiry_date + inv_id combos to avoid duplicates
-        med_expiry_inv_pairs = MedicineTransactions.objects.filter(
-            created_at__date__lte=end_date
-        ).values_list(
-            "minv_id__med_id",
-            "minv_id__inv_id__expiry_date",
-            "minv_id__inv_id"
-        ).distinct()
-
-        # Track unique combinations to avoid duplicates
-        seen_combinations = set()
-
-        for med_id, expiry_date, inv_id in med_expiry_inv_pairs:
-            # Skip if expiry date is before the current month (already expired)
-            if expiry_date and expiry_date < start_date:
-                continue
-                
-            # Create a unique key for this combination
-            combo_key = (med_id, expiry_date, inv_id)
-            
-            # Skip if we've already processed this combination
-            if combo_key in seen_combinations:
-                continue
-                
-            seen_combinations.add(combo_key)
-
-            transactions = MedicineTransactions.objects.filter(
-                minv_id__med_id=med_id,
-                minv_id__inv_id__expiry_date=expiry_date,
-                minv_id__inv_id=inv_id
-            ).order_by("created_at")
-
-            first_tx = transactions.select_related("minv_id__med_id", "minv_id__inv_id").first()
-            if not first_tx:
-                continue
+        rows, stocks = medicine_stock_movements(start_date, end_date)
+        for row in rows:
+            minv = stocks[row['stock_id']]
+            expiry_date = minv.inv_id.expiry_date
+            pcs_per_box = minv.minv_pcs if _is_boxes(minv) else 1
 
-            unit = first_tx.minv_id.minv_qty_unit
-            pcs_per_box = first_tx.minv_id.minv_pcs if unit and unit.lower() == "boxes" else 1
-
-            # Opening stock before start_date (before the month)
-            opening_in = transactions.filter(
-                created_at__date__lt=start_date,
-                mdt_action__icontains="added"
-            )
-            opening_out = transactions.filter(
-                Q(mdt_action__icontains="deducted") | Q(mdt_action__icontains="wasted"),
-                created_at__date__lt=start_date,
-            )
-            opening_qty = (sum(self._parse_qty(t) for t in opening_in) -
-                           sum(self._parse_qty(t) for t in opening_out))
-
-            if unit and unit.lower() == "boxes":
-                opening_qty *= pcs_per_box
-
-            # Received during the month
-            monthly_transactions = transactions.filter(
-                created_at__date__gte=start_date,
-                created_at__date__lte=end_date,
-                mdt_action__icontains="added"
-            )
-            received_qty = sum(self._parse_qty(t) for t in monthly_transactions)
-            if unit and unit.lower() == "boxes":
-                received_qty *= pcs_per_box
-
-            # Dispensed during the month
-            dispensed_qty = sum(
-                self._parse_qty(t) for t in transactions.filter(
-                    Q(mdt_action__icontains="deducted") | Q(mdt_action__icontains="wasted")
-                ).filter(
-                    created_at__date__gte=start_date,
-                    created_at__date__lte=end_date,
-                )
-            )
+            # Opening stock before the month, and received during the month
+            opening_qty = (row['opening_in'] - row['opening_out']) * pcs_per_box
+            received_qty = row['received'] * pcs_per_box
+            dispensed_qty = row['dispensed']
 
             # Opening displayed includes received
             display_opening = opening_qty + received_qty
             closing_qty = display_opening - dispensed_qty
 
             # Check if expired this month
-            expired_this_month = (first_tx.minv_id.inv_id.expiry_date and 
-                                start_date <= first_tx.minv_id.inv_id.expiry_date <= end_date)
+            expired_this_month = bool(expiry_date and start_date <= expiry_date <= end_date)
             
-            # Skip if there's no stock and it's not expiring this month
-            # Also include items that expired this month even if closing_qty <= 0
-            if (closing_qty <= 0 and 
-                (not expiry_date or expiry_date < start_date) and 
-                not expired_this_month and
-                not monthly_transactions.exists() and
-                not transactions.filter(created_at__date__gte=start_date, created_at__date__lte=end_date).exists()):
+            # Skip if there's no stock, no expiry date and no activity this month
+            if closing_qty <= 0 and not expiry_date and not row['period_transactions']:
                 continue
 
-            # Get medicine details from Medicinelist model
-            medicine = first_tx.minv_id.med_id
             inventory_summary.append({
-                'med_name': f"{medicine.med_name} {medicine.med_dsg}{medicine.med_dsg_unit} {medicine.med_form}",
-                'date_received': first_tx.created_at.date(),
+                'med_name': _medicine_display_name(minv.med_id),
+                'date_received': row['first_transaction_at'].date(),
                 'opening': display_opening,
-                'wasted': first_tx.minv_id.wasted,
-                'pcs':first_tx.minv_id.minv_pcs,
+                'wasted': minv.wasted,
+                'pcs': minv.minv_pcs,
                 'received': received_qty,
                 'dispensed': dispensed_qty,
                 'closing': closing_qty,
-                'unit': first_tx.minv_id.minv_qty_unit,
-                'expiry': first_tx.minv_id.inv_id.expiry_date,
+                'unit': minv.minv_qty_unit,
+                'expiry': expiry_date,
                 'expired_this_month': expired_this_month,
             })
 
@@ -756,8 +429,3 @@ class MonthlyMedicineRecordsDetailAPIView(generics.ListAPIView):
                 'total_items': len(inventory_summary)
             }
         })
-
-    def _parse_qty(self, transaction):
-        """Extract numeric value from mdt_qty."""
-        match = re.search(r'\d+', str(transaction.mdt_qty))
-        return int(match.group()) if match else 0
\ No newline at end of file
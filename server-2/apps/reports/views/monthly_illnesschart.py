@@ -7,6 +7,8 @@ from rest_framework import status
 from apps.patientrecords.models import *
 from django.db.models import Count
 from django.db.models import Q
+from datetime import date
+from ..rollups import monthly_facts, next_month
 
 
 class MedicalHistoryMonthlyChart(APIView):
@@ -20,25 +22,19 @@ class MedicalHistoryMonthlyChart(APIView):
             if month_num < 1 or month_num > 12:
                 raise ValueError("Month must be between 1 and 12.")
             
-            # Query to count distinct surveillance illnesses per distinct patient
-            surveillance_counts = (
-                MedicalHistory.objects
-                .filter(
-                    created_at__year=year,
-                    created_at__month=month_num,
-                    ill__isnull=False,
-                    is_for_surveillance=True
-                )
-                .values('ill__illname')
-                .annotate(count=Count('patrec__pat_id', distinct=True))
-                .order_by('-count')
-            )
-            
-            # Format the illness data
-            illness_data = {
-                item['ill__illname']: item['count']
-                for item in surveillance_counts
+            # Distinct patients per surveillance illness, precomputed in monthly_fact
+            start = date(year, month_num, 1)
+            patient_counts = {
+                item['mf_subject']: item['total']
+                for item in monthly_facts('morbidity_patients', 'mf_subject', start=start, end=next_month(start))
             }
+            names = dict(Illness.objects.filter(ill_id__in=patient_counts).values_list('ill_id', 'illname'))
+
+            # Format the illness data
+            illness_data = {}
+            for ill_id, count in sorted(patient_counts.items(), key=lambda item: -item[1]):
+                name = names.get(int(ill_id))
+                illness_data[name] = illness_data.get(name, 0) + count
             
             # Construct the response
             return Response(
@@ -46,7 +42,7 @@ class MedicalHistoryMonthlyChart(APIView):
                     'success': True,
                     'month': month,
                     'month_name': f"{month_num:02d}/{year}",
-                    'total_records': surveillance_counts.count(),
+                    'total_records': len(illness_data),
                     'illness_counts': illness_data,
                 },
                 status=status.HTTP_200_OK,
@@ -11,6 +11,8 @@ from rest_framework import serializers
 from ..models import *
 from ..serializers import *
 from apps.healthProfiling.models import ResidentProfile
+from collections import Counter
+from ..rollups import monthly_facts
 
 
 
@@ -26,25 +28,24 @@ class MonthlyMorbiditySummaryAPIView(APIView):
             # Get search query if provided
             search_query = request.GET.get('search', '').strip().lower()
             
-            # Query to get monthly counts for surveillance cases only
-            queryset = MedicalHistory.objects.filter(is_for_surveillance=True)
-            
-            # Get basic monthly counts
-            monthly_counts = (
-                queryset
-                .annotate(month=TruncMonth('created_at'))
-                .values('month')
-                .annotate(
-                    total_cases=Count('medhist_id'),
-                    illness_count=Count('ill_id', distinct=True)
-                )
-                .order_by('-month')
-            )
+            # Monthly counts per sex and illness come precomputed from monthly_fact
+            months = {}
+            for row in monthly_facts('morbidity_cases', 'mf_sex', 'mf_subject'):
+                month = months.setdefault(row['mf_month'], {'total': 0, 'M': 0, 'F': 0, 'illnesses': Counter()})
+                month['total'] += row['total']
+                if row['mf_sex'] in ('M', 'F'):
+                    month[row['mf_sex']] += row['total']
+                month['illnesses'][row['mf_subject']] += row['total']
+
+            illness_ids = {ill_id for month in months.values() for ill_id in month['illnesses'] if ill_id}
+            illnesses = {
+                str(ill['ill_id']): ill
+                for ill in Illness.objects.filter(ill_id__in=illness_ids).values('ill_id', 'illname', 'ill_code')
+            }
             
             # Format the response with additional statistics
             formatted_data = []
-            for item in monthly_counts:
-                month_date = item['month']
+            for month_date, month in months.items():
                 year_month = month_date.strftime('%Y-%m')
                 month_name = month_date.strftime('%B %Y')
                 short_month_name = month_date.strftime('%b %Y')
@@ -63,41 +64,27 @@ class MonthlyMorbiditySummaryAPIView(APIView):
                     if not matches_search:
                         continue
 
-                # Get gender breakdown for this month
-                month_histories = queryset.filter(
-                    created_at__year=month_date.year,
-                    created_at__month=month_date.month
-                )
-                
-                male_count = month_histories.filter(
-                    Q(patrec__pat_id__rp_id__per__per_sex__in=['M', 'MALE']) |
-                    Q(patrec__pat_id__trans_id__tran_sex__in=['M', 'MALE'])
-                ).count()
-                
-                female_count = month_histories.filter(
-                    Q(patrec__pat_id__rp_id__per__per_sex__in=['F', 'FEMALE']) |
-                    Q(patrec__pat_id__trans_id__tran_sex__in=['F', 'FEMALE'])
-                ).count()
-                
-                # Get top illnesses for this month
-                top_illnesses = (
-                    month_histories
-                    .values('ill__illname', 'ill__ill_code')
-                    .annotate(count=Count('medhist_id'))
-                    .order_by('-count')[:5]  # Top 5 illnesses
-                )
+                # Top 5 illnesses for this month
+                top_illnesses = []
+                for ill_id, count in sorted(month['illnesses'].items(), key=lambda item: (-item[1], item[0]))[:5]:
+                    illness = illnesses.get(ill_id, {})
+                    top_illnesses.append({
+                        'ill__illname': illness.get('illname'),
+                        'ill__ill_code': illness.get('ill_code'),
+                        'count': count,
+                    })
                 
                 formatted_data.append({
                     'year': month_date.year,
                     'month': month_date.month,
                     'month_name': month_name,
                     'year_month': year_month,
-                    'total_cases': item['total_cases'],
-                    'male_cases': male_count,
-                    'female_cases': female_count,
-                    'both_cases': male_count + female_count,
-                    'total_illnesses': item['illness_count'],
-                    'top_illnesses': list(top_illnesses)
+                    'total_cases': month['total'],
+                    'male_cases': month['M'],
+                    'female_cases': month['F'],
+                    'both_cases': month['M'] + month['F'],
+                    'total_illnesses': sum(1 for ill_id in month['illnesses'] if ill_id),
+                    'top_illnesses': top_illnesses
                 })
             
             # Apply pagination
@@ -6,6 +6,8 @@ from rest_framework import status
 from django.db.models import Count, Sum
 from django.db.models.functions import ExtractMonth
 from django.utils import timezone
+from datetime import date
+from ..rollups import monthly_facts, next_month
 
 
 class MonthlyVaccinationChart(APIView):
@@ -22,33 +24,14 @@ class MonthlyVaccinationChart(APIView):
                     'error': 'Invalid month format. Use YYYY-MM.'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Get vaccination counts for the specified month using vacrec (vaccination records)
-            queryset = VaccinationHistory.objects.filter(
-                date_administered__year=year,
-                date_administered__month=month_num
-            ).values(
-                'vacrec__patrec_id',  # Group by unique vaccination records
-                'vacStck_id__vac_id__vac_name',  # Also get vaccine name
-                'vac__vac_name'  # Get vaccine name from direct vac relationship
-            ).annotate(
-                count=Count('vacrec', distinct=True)  # Count unique vaccination records
-            ).order_by('-count')
-
-            # Convert to dictionary format {vaccine_name: count}
+            # Distinct vaccination records per vaccine, precomputed in monthly_fact
+            start = date(year, month_num, 1)
             vaccine_counts = {}
-            
-            for item in queryset:
-                # Get vaccine name from either vacStck_id or direct vac relationship
-                vaccine_name = (
-                    item.get('vacStck_id__vac_id__vac_name') or 
-                    item.get('vac__vac_name') or 
-                    'Unknown Vaccine'
-                )
-                
-                if vaccine_name in vaccine_counts:
-                    vaccine_counts[vaccine_name] += item['count']
-                else:
-                    vaccine_counts[vaccine_name] = item['count']
+            for item in sorted(
+                monthly_facts('vaccination_records', 'mf_subject', start=start, end=next_month(start)),
+                key=lambda item: -item['total']
+            ):
+                vaccine_counts[item['mf_subject']] = item['total']
 
             return Response({
                 'success': True,
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class VaccinationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.vaccination'
+
+    def ready(self):
+        try:
+            from . import signals
+            logger.info("✅ Vaccination signals registered")
+        except Exception as e:
+            logger.exception(f"❌ Failed to import vaccination signals: {e}")
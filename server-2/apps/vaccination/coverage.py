@@ -0,0 +1,220 @@
+"""
+Resident x vaccine coverage matrix for the unvaccinated-residents endpoints.
+
+Residents, their active patient records and the completed VaccinationHistory
+doses are each read once. Completed doses land in a (resident, vaccine) count
+matrix next to a matching required-doses matrix, so the status of every
+resident for every vaccine (and the counts per vaccine and age group) comes
+from NumPy array operations instead of one history query per resident.
+"""
+from datetime import date
+
+import numpy as np
+from django.db.models import Count, Min
+
+from apps.healthProfiling.demographics import age_in_months
+from apps.healthProfiling.models import ResidentProfile
+from apps.inventory.models import VaccineList
+from apps.patientrecords.models import Patient
+from .models import VaccinationHistory, VaccinationRecord
+
+UNVACCINATED, PARTIALLY_VACCINATED, FULLY_VACCINATED = 0, 1, 2
+STATUS_NAMES = ('unvaccinated', 'partially_vaccinated', 'fully_vaccinated')
+
+
+def is_conditional_vaccine(vaccine):
+    return vaccine.vac_type_choices.lower() == 'conditional' if vaccine.vac_type_choices else False
+
+
+def routine_required_doses(vaccine):
+    return vaccine.no_of_doses or 1
+
+
+def _positions(keys, values):
+    """Index of each value in keys, or -1 where it is missing"""
+    if not len(keys) or not len(values):
+        return np.full(len(values), -1, dtype=np.intp)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    found = np.minimum(np.searchsorted(sorted_keys, values), len(keys) - 1)
+    return np.where(sorted_keys[found] == values, order[found], -1)
+
+
+def _columns(rows, width):
+    return [[row[i] for row in rows] for i in range(width)]
+
+
+def _id_array(ids):
+    return np.array([-1 if value is None else value for value in ids], dtype=np.int64)
+
+
+class CoverageMatrix:
+    """
+    rp_ids / dobs / pat_ids are parallel per-resident sequences (dob and pat_id
+    may be None). dose_counts and conditional_doses are (pat_ids, vac_ids, values)
+    columns: completed doses, and the vacrec_totaldose a patient's record sets
+    for a conditional vaccine.
+    """
+
+    def __init__(self, rp_ids, dobs, pat_ids, vaccines, dose_counts=None, conditional_doses=None, reference_date=None):
+        self.rp_ids = list(rp_ids)
+        self.pat_ids = list(pat_ids)
+        self.vaccines = list(vaccines)
+        self.reference_date = reference_date or date.today()
+        self._rows = {rp_id: i for i, rp_id in enumerate(self.rp_ids)}
+        self._columns = {vaccine.vac_id: j for j, vaccine in enumerate(self.vaccines)}
+        self._pat_keys = np.array([pat_id or '' for pat_id in self.pat_ids], dtype=str)
+        self._vac_keys = np.array([vaccine.vac_id for vaccine in self.vaccines], dtype=np.int64)
+
+        self.has_patient = self._pat_keys != ''
+        self.has_dob = np.array([dob is not None for dob in dobs], dtype=bool)
+        self.dobs = np.array(
+            [dob if dob is not None else self.reference_date for dob in dobs], dtype='datetime64[D]'
+        )
+
+        shape = (len(self.rp_ids), len(self.vaccines))
+        self.doses = self._scatter(shape, dose_counts)
+        self.conditional = np.array([is_conditional_vaccine(vaccine) for vaccine in self.vaccines], dtype=bool)
+        routine = np.array(
+            [0 if conditional else routine_required_doses(vaccine)
+             for conditional, vaccine in zip(self.conditional, self.vaccines)],
+            dtype=np.int32,
+        )
+        self.required = np.broadcast_to(routine, shape) + self._scatter(shape, conditional_doses)
+
+        fully = (self.required > 0) & (self.doses >= self.required)
+        self.status = np.where(
+            self.doses == 0, UNVACCINATED, np.where(fully, FULLY_VACCINATED, PARTIALLY_VACCINATED)
+        ).astype(np.int8)
+        self._ages = {}
+
+    def _scatter(self, shape, columns):
+        """(pat_ids, vac_ids, values) columns summed into a resident x vaccine matrix"""
+        matrix = np.zeros(shape, dtype=np.int32)
+        if columns is None:
+            return matrix
+        pat_ids, vac_ids, values = columns
+        rows = _positions(self._pat_keys, np.asarray(pat_ids, dtype=str))
+        vaccine_columns = _positions(self._vac_keys, _id_array(vac_ids))
+        keep = (rows >= 0) & (vaccine_columns >= 0)
+        np.add.at(matrix, (rows[keep], vaccine_columns[keep]), np.asarray(values, dtype=np.int32)[keep])
+        return matrix
+
+    @classmethod
+    def load(cls, vaccines=None, residents=None, reference_date=None):
+        """Build from the database: one query each for residents, patients, doses and conditional records"""
+        if vaccines is None:
+            vaccines = VaccineList.objects.select_related('ageGroup')
+        vaccines = list(vaccines)
+        residents = ResidentProfile.objects.all() if residents is None else residents
+        rp_ids, dobs = _columns(list(residents.values_list('rp_id', 'per__per_dob')), 2)
+
+        # Same choice as the old rp_id -> patient dict: the last active resident patient wins
+        patients = dict(
+            Patient.objects.filter(pat_type="Resident", pat_status="Active", rp_id__isnull=False)
+            .values_list('rp_id', 'pat_id')
+        )
+
+        pat_ids, stock_vac_ids, direct_vac_ids, doses = _columns(list(
+            VaccinationHistory.objects.filter(vachist_status="completed")
+            .values_list('vacrec__patrec_id__pat_id', 'vacStck_id__vac_id', 'vac_id')
+            .order_by()
+            .annotate(doses=Count('pk'))
+        ), 4)
+        pat_ids = np.asarray(pat_ids, dtype=str)
+        stock_vac_ids, direct_vac_ids = _id_array(stock_vac_ids), _id_array(direct_vac_ids)
+        doses = np.asarray(doses, dtype=np.int32)
+        # A dose counts once for each vaccine it is linked to, through the stock or directly
+        via_stock = stock_vac_ids >= 0
+        also_direct = (direct_vac_ids >= 0) & (direct_vac_ids != stock_vac_ids)
+        dose_counts = (
+            np.concatenate([pat_ids[via_stock], pat_ids[also_direct]]),
+            np.concatenate([stock_vac_ids[via_stock], direct_vac_ids[also_direct]]),
+            np.concatenate([doses[via_stock], doses[also_direct]]),
+        )
+
+        conditional_ids = [vaccine.vac_id for vaccine in vaccines if is_conditional_vaccine(vaccine)]
+        conditional_doses = None
+        if conditional_ids:
+            # The patient's first vaccination record (by id) for the vaccine sets the dose count
+            first_pat_ids, first_vac_ids, first_vacrec_ids = _columns(list(
+                VaccinationHistory.objects.filter(vacStck_id__vac_id__in=conditional_ids)
+                .values_list('vacrec__patrec_id__pat_id', 'vacStck_id__vac_id')
+                .order_by()
+                .annotate(first_vacrec=Min('vacrec_id'))
+            ), 3)
+            totals = dict(
+                VaccinationRecord.objects.filter(pk__in=set(first_vacrec_ids)).values_list('pk', 'vacrec_totaldose')
+            )
+            conditional_doses = (
+                first_pat_ids, first_vac_ids, [totals.get(vacrec_id) or 0 for vacrec_id in first_vacrec_ids]
+            )
+
+        return cls(
+            rp_ids, dobs, [patients.get(rp_id) for rp_id in rp_ids], vaccines,
+            dose_counts, conditional_doses, reference_date=reference_date,
+        )
+
+    # --- ages ---
+    def _age(self, unit):
+        if unit not in self._ages:
+            if unit in ('days', 'weeks'):
+                days = (np.datetime64(self.reference_date, 'D') - self.dobs).astype(np.int64)
+                self._ages[unit] = days if unit == 'days' else days // 7
+            else:
+                months = age_in_months(self.dobs, self.reference_date)
+                self._ages[unit] = months if unit == 'months' else months // 12
+        return self._ages[unit]
+
+    def age_in_unit(self, time_unit):
+        """Age of every resident in the age group's unit; anything but days/weeks/months is years"""
+        unit = (time_unit or '').lower()
+        return self._age(unit if unit in ('days', 'weeks', 'months') else 'years')
+
+    def age_group_mask(self, age_group=None):
+        """Residents inside the age group (those without a birth date never are); everyone when None"""
+        if not age_group:
+            return np.ones(len(self.rp_ids), dtype=bool)
+        age = self.age_in_unit(age_group.time_unit)
+        return self.has_dob & (age >= age_group.min_age) & (age <= age_group.max_age)
+
+    # --- lookups ---
+    def column(self, vaccine):
+        return self._columns[getattr(vaccine, 'vac_id', vaccine)]
+
+    def row(self, rp_id):
+        return self._rows[rp_id]
+
+    def counts(self, vaccine, age_group=None):
+        """Unvaccinated / partially / fully vaccinated residents for one vaccine"""
+        statuses = self.status[self.age_group_mask(age_group), self.column(vaccine)]
+        unvaccinated, partially, fully = (int(count) for count in np.bincount(statuses, minlength=3))
+        return {
+            'unvaccinated_count': unvaccinated,
+            'partially_vaccinated_count': partially,
+            'fully_vaccinated_count': fully,
+            'total_count': unvaccinated + partially + fully,
+        }
+
+    def unvaccinated_rows(self, vaccine):
+        """Row indexes of residents with no completed dose of the vaccine"""
+        return np.flatnonzero(self.status[:, self.column(vaccine)] == UNVACCINATED)
+
+    def vaccination_status(self, row, vaccine):
+        """Per-resident status dict, as the resident details endpoint has always returned it"""
+        column = self.column(vaccine)
+        vaccine = self.vaccines[column]
+        conditional = bool(self.conditional[column])
+        if self.has_patient[row]:
+            required = int(self.required[row, column])
+            completed = int(self.doses[row, column])
+        else:
+            # Without a patient record there is no vaccination record to set a conditional dose count
+            required, completed = routine_required_doses(vaccine), 0
+        return {
+            'status': STATUS_NAMES[self.status[row, column]],
+            'completed_doses': completed,
+            'total_required_doses': required,
+            'is_conditional': conditional,
+            'has_dose_requirement': not conditional or required > 0,
+        }
@@ -0,0 +1,206 @@
+"""
+Due vaccines for many patients at once.
+
+get_due_vaccines(pat_ids) answers "which vaccines does each patient still
+need" with a fixed number of queries: patient birth dates in one query, the
+latest completed dose per patient and vaccine in one grouped query, and the
+vaccine catalogue (age groups, intervals, routine frequencies) from a
+per-process memo that the signals in signals.py clear whenever it changes.
+"""
+import threading
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db.models import Max
+
+from apps.inventory.models import VaccineList
+from apps.patientrecords.models import Patient
+from .models import VaccinationHistory
+
+# Other worker processes do not receive this process's signals, so the memo also expires
+CATALOGUE_TTL_SECONDS = getattr(settings, 'VACCINE_CATALOGUE_TTL_SECONDS', 300)
+SIX_YEARS_IN_DAYS = 6 * 365
+
+CatalogueEntry = namedtuple('CatalogueEntry', ['vaccine', 'routine_frequency'])
+
+
+class DueVaccine(namedtuple('DueVaccine', ['vaccine', 'last_administered', 'next_due_date'])):
+    """
+    A vaccine the patient still needs. next_due_date is set for routine
+    vaccines that were given before and are due again (overdue boosters).
+    """
+    __slots__ = ()
+
+    @property
+    def is_overdue(self):
+        return self.next_due_date is not None
+
+
+# ===============================================================
+#  VACCINE CATALOGUE
+# ===============================================================
+_catalogue = None
+_catalogue_loaded_at = 0.0
+_catalogue_lock = threading.Lock()
+
+
+def vaccine_catalogue():
+    """Every vaccine with its age group, intervals and routine frequency, in VaccineList order"""
+    global _catalogue, _catalogue_loaded_at
+    with _catalogue_lock:
+        if _catalogue is None or time.monotonic() - _catalogue_loaded_at > CATALOGUE_TTL_SECONDS:
+            vaccines = VaccineList.objects.select_related('ageGroup', 'routine_frequency').prefetch_related('intervals')
+            _catalogue = [
+                CatalogueEntry(vaccine, getattr(vaccine, 'routine_frequency', None)) for vaccine in vaccines
+            ]
+            _catalogue_loaded_at = time.monotonic()
+        return _catalogue
+
+
+def invalidate_vaccine_catalogue():
+    global _catalogue
+    with _catalogue_lock:
+        _catalogue = None
+
+
+# ===============================================================
+#  RULES
+# ===============================================================
+def convert_age_to_days(value, unit):
+    """Convert an age value expressed in various units into days."""
+    if value is None or unit is None:
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+
+    normalized = unit.strip().lower()
+    if "day" in normalized:
+        return value
+    if "week" in normalized:
+        return value * 7
+    if "month" in normalized:
+        return value * 30  # Approximate months to 30 days for comparisons
+    if "year" in normalized:
+        return value * 365  # Approximate years to 365 days for comparisons
+    return None
+
+
+def is_vaccine_for_age(patient_age_days, vaccine):
+    """Determine if a vaccine should be presented based on the patient's age."""
+    if patient_age_days is None:
+        return True
+
+    age_group = getattr(vaccine, "ageGroup", None)
+    if not age_group:
+        return True
+
+    # If time_unit is "NA" or no valid age restrictions, include the vaccine
+    time_unit = getattr(age_group, "time_unit", None)
+    min_age = getattr(age_group, "min_age", None)
+    max_age = getattr(age_group, "max_age", None)
+    if time_unit == "NA" or min_age is None or max_age is None:
+        return True
+
+    min_age_days = convert_age_to_days(min_age, time_unit)
+    max_age_days = convert_age_to_days(max_age, time_unit)
+    if min_age_days is None or max_age_days is None:
+        return True
+
+    # Children within 0-6 years see every vaccine they have reached the minimum age for,
+    # as long as it ends within 6 years or they are still inside its range (catch-up)
+    if patient_age_days <= SIX_YEARS_IN_DAYS:
+        if patient_age_days >= min_age_days:
+            if max_age_days <= SIX_YEARS_IN_DAYS:
+                return True
+            return patient_age_days <= max_age_days
+        return False
+
+    # For patients older than 6 years, only show vaccines they are currently eligible for
+    return min_age_days <= patient_age_days <= max_age_days
+
+
+def next_due_date(last_administered, routine_frequency):
+    """Date a routine vaccine is due again after the dose given on last_administered"""
+    interval = routine_frequency.interval
+    if routine_frequency.time_unit == 'weeks':
+        return last_administered + timedelta(weeks=interval)
+    if routine_frequency.time_unit == 'months':
+        # Approximate months as 30 days
+        return last_administered + timedelta(days=interval * 30)
+    if routine_frequency.time_unit == 'years':
+        # Approximate years as 365 days
+        return last_administered + timedelta(days=interval * 365)
+    # Days, and the default for unknown units
+    return last_administered + timedelta(days=interval)
+
+
+def due_vaccine(entry, last_administered, today):
+    """
+    DueVaccine when the patient still needs the vaccine, else None. Vaccines
+    are needed until a dose is completed; routine vaccines with a frequency
+    are needed again once the next due date is reached.
+    """
+    if last_administered is None:
+        return DueVaccine(entry.vaccine, None, None)
+    if entry.vaccine.vac_type_choices == 'routine' and entry.routine_frequency:
+        due_on = next_due_date(last_administered, entry.routine_frequency)
+        if today >= due_on:
+            return DueVaccine(entry.vaccine, last_administered, due_on)
+    return None
+
+
+# ===============================================================
+#  BATCH QUERIES
+# ===============================================================
+def patient_ages_in_days(pat_ids, today=None):
+    """{pat_id: age in days, or None without a date of birth}; unknown patients are left out"""
+    today = today or date.today()
+    ages = {}
+    rows = Patient.objects.filter(pat_id__in=pat_ids).values_list(
+        'pat_id', 'pat_type', 'rp_id__per__per_dob', 'trans_id__tran_dob'
+    )
+    for pat_id, pat_type, resident_dob, transient_dob in rows:
+        dob = resident_dob if pat_type == "Resident" else transient_dob if pat_type == "Transient" else None
+        ages[pat_id] = (today - dob).days if dob else None
+    return ages
+
+
+def latest_completed_doses(pat_ids):
+    """{pat_id: {vac_id: latest date_administered}} over completed doses, linked by stock or directly"""
+    latest = {pat_id: {} for pat_id in pat_ids}
+    rows = (
+        VaccinationHistory.objects.filter(vacrec__patrec_id__pat_id__in=pat_ids, vachist_status="completed")
+        .values_list('vacrec__patrec_id__pat_id', 'vacStck_id__vac_id', 'vac_id')
+        .order_by()
+        .annotate(last_administered=Max('date_administered'))
+    )
+    for pat_id, stock_vac_id, vac_id, last_administered in rows:
+        doses = latest[pat_id]
+        for linked in {stock_vac_id, vac_id} - {None}:
+            if linked not in doses or last_administered > doses[linked]:
+                doses[linked] = last_administered
+    return latest
+
+
+def get_due_vaccines(pat_ids, today=None):
+    """{pat_id: [DueVaccine, ...]} in catalogue order, for vaccines suited to each patient's age"""
+    today = today or date.today()
+    pat_ids = list(dict.fromkeys(pat_ids))
+    catalogue = vaccine_catalogue()
+    ages = patient_ages_in_days(pat_ids, today)
+    latest = latest_completed_doses(pat_ids)
+
+    due = {pat_id: [] for pat_id in pat_ids}
+    for pat_id in pat_ids:
+        age_days, doses = ages.get(pat_id), latest[pat_id]
+        for entry in catalogue:
+            if not is_vaccine_for_age(age_days, entry.vaccine):
+                continue
+            needed = due_vaccine(entry, doses.get(entry.vaccine.vac_id), today)
+            if needed:
+                due[pat_id].append(needed)
+    return due
@@ -0,0 +1,120 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.healthProfiling.models import Personal, ResidentProfile
+from apps.inventory.models import Agegroup, VaccineList
+from apps.patientrecords.models import Patient, PatientRecord
+from apps.vaccination.coverage import CoverageMatrix
+from apps.vaccination.models import VaccinationHistory, VaccinationRecord
+
+
+class Command(BaseCommand):
+    help = 'Seeds synthetic residents and vaccinations (rolled back afterwards) and times the coverage matrix'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--residents', type=int, default=20000)
+        parser.add_argument('--vaccines', type=int, default=30)
+        parser.add_argument('--coverage', type=float, default=0.5, help='Chance a patient has started a given vaccine')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['residents']} residents x {options['vaccines']} vaccines...")
+            started = time.perf_counter()
+            vaccines = self._seed_vaccines(options['vaccines'], rng)
+            histories = self._seed(options['residents'], vaccines, options['coverage'], options['batch_size'], rng)
+            self.stdout.write(f"Seeded {histories} completed doses in {time.perf_counter() - started:.2f}s")
+
+            residents = ResidentProfile.objects.filter(rp_id__startswith='BENCH-')
+            vaccines = VaccineList.objects.select_related('ageGroup').filter(pk__in=[v.pk for v in vaccines])
+
+            started = time.perf_counter()
+            coverage = CoverageMatrix.load(vaccines=vaccines, residents=residents)
+            loaded = time.perf_counter() - started
+
+            started = time.perf_counter()
+            unvaccinated = sum(
+                coverage.counts(vaccine, vaccine.ageGroup)['unvaccinated_count'] for vaccine in coverage.vaccines
+            )
+            counted = time.perf_counter() - started
+
+            self.stdout.write(self.style.SUCCESS(
+                f"Load: {loaded * 1000:.1f}ms, counts for every vaccine and age group: {counted * 1000:.1f}ms "
+                f"({len(coverage.rp_ids)} residents, {unvaccinated} unvaccinated resident-vaccine pairs)"
+            ))
+
+            # Never keep benchmark data
+            transaction.set_rollback(True)
+
+        self.stdout.write("Synthetic data rolled back.")
+
+    def _seed_vaccines(self, total, rng):
+        age_groups = [
+            Agegroup.objects.create(agegroup_name='BENCH infants', min_age=0, max_age=11, time_unit='months'),
+            Agegroup.objects.create(agegroup_name='BENCH children', min_age=1, max_age=12, time_unit='years'),
+            None,
+        ]
+        return VaccineList.objects.bulk_create([
+            VaccineList(
+                vac_name=f'Bench Vaccine {i}',
+                vac_type_choices='conditional' if i % 10 == 0 else 'routine',
+                no_of_doses=rng.randint(1, 3),
+                ageGroup=rng.choice(age_groups),
+            )
+            for i in range(total)
+        ])
+
+    def _seed(self, total, vaccines, coverage, batch_size, rng):
+        today = date.today()
+        histories = 0
+        for offset in range(0, total, batch_size):
+            count = min(batch_size, total - offset)
+            personals = Personal.objects.bulk_create([
+                Personal(
+                    per_lname='BENCH',
+                    per_fname=f'RESIDENT {offset + i}',
+                    per_dob=today - timedelta(days=rng.randint(0, 20 * 365)),
+                    per_sex=rng.choice(['MALE', 'FEMALE']),
+                    per_status='SINGLE',
+                    per_religion='N/A',
+                    per_contact='09000000000',
+                )
+                for i in range(count)
+            ])
+            residents = ResidentProfile.objects.bulk_create([
+                ResidentProfile(rp_id=f'BENCH-{offset + i}', per=personal)
+                for i, personal in enumerate(personals)
+            ])
+            # About a quarter of residents have never been seen at the health center
+            patients = Patient.objects.bulk_create([
+                Patient(pat_id=f'PBENCH{offset + i}', pat_type='Resident', rp_id=resident)
+                for i, resident in enumerate(residents)
+                if rng.random() < 0.75
+            ])
+            records = VaccinationRecord.objects.bulk_create([
+                VaccinationRecord(patrec_id=patient_record)
+                for patient_record in PatientRecord.objects.bulk_create([
+                    PatientRecord(patrec_type='Vaccination Record', pat_id=patient) for patient in patients
+                ])
+            ])
+
+            doses = [
+                VaccinationHistory(
+                    vacrec=record, vac=vaccine, vachist_status='completed',
+                    vachist_doseNo=dose + 1, date_administered=today,
+                )
+                for record in records
+                for vaccine in vaccines
+                if rng.random() < coverage
+                for dose in range(rng.randint(1, vaccine.no_of_doses))
+            ]
+            VaccinationHistory.objects.bulk_create(doses, batch_size=batch_size)
+            histories += len(doses)
+        return histories
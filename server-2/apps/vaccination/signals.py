@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.inventory.models import Agegroup, RoutineFrequency, VaccineInterval, VaccineList
+from .due import invalidate_vaccine_catalogue
+
+
+@receiver([post_save, post_delete], sender=VaccineList)
+@receiver([post_save, post_delete], sender=RoutineFrequency)
+@receiver([post_save, post_delete], sender=VaccineInterval)
+@receiver([post_save, post_delete], sender=Agegroup)
+def vaccine_catalogue_changed(sender, **kwargs):
+    # Clear now for this request, and again once committed in case it was reloaded mid-transaction
+    invalidate_vaccine_catalogue()
+    transaction.on_commit(invalidate_vaccine_catalogue)
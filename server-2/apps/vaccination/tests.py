@@ -1,3 +1,209 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from apps.healthProfiling.models import Personal, ResidentProfile
+from apps.inventory.models import Agegroup, Inventory, RoutineFrequency, VaccineList, VaccineStock
+from apps.patientrecords.models import Patient, PatientRecord
+from .coverage import CoverageMatrix
+from .due import get_due_vaccines, invalidate_vaccine_catalogue
+from .models import VaccinationHistory, VaccinationRecord
+from .utils import check_routine_vaccine_status, get_all_residents_not_vaccinated, get_unvaccinated_vaccines_for_patient
+from .views import UnvaccinatedVaccinesDetailsView, UnvaccinatedVaccinesSummaryView
+
+
+def _vaccine(vac_id, doses=1, conditional=False):
+    return SimpleNamespace(vac_id=vac_id, no_of_doses=doses, vac_type_choices='conditional' if conditional else 'routine')
+
+
+class CoverageMatrixTest(SimpleTestCase):
+    def setUp(self):
+        self.today = date(2025, 10, 18)
+        self.coverage = CoverageMatrix(
+            rp_ids=['R1', 'R2', 'R3', 'R4'],
+            dobs=[date(2025, 4, 1), date(2020, 1, 1), None, date(1990, 6, 30)],
+            pat_ids=['P1', 'P2', 'P3', None],
+            vaccines=[_vaccine(1, doses=2), _vaccine(2, conditional=True)],
+            dose_counts=(['P1', 'P2', 'P1', 'P3', 'GONE'], [1, 1, 2, 2, 1], [1, 2, 1, 1, 1]),
+            conditional_doses=(['P1'], [2], [1]),
+            reference_date=self.today,
+        )
+
+    def test_statuses(self):
+        self.assertEqual(self.coverage.counts(1), {
+            'unvaccinated_count': 2, 'partially_vaccinated_count': 1,
+            'fully_vaccinated_count': 1, 'total_count': 4,
+        })
+        # Conditional: P1's record sets one dose, P3 has a dose but no dose requirement
+        self.assertEqual(self.coverage.vaccination_status(0, 2)['status'], 'fully_vaccinated')
+        self.assertEqual(self.coverage.vaccination_status(2, 2), {
+            'status': 'partially_vaccinated', 'completed_doses': 1, 'total_required_doses': 0,
+            'is_conditional': True, 'has_dose_requirement': False,
+        })
+        self.assertEqual(self.coverage.vaccination_status(3, 2)['total_required_doses'], 1)
+        self.assertEqual(list(self.coverage.unvaccinated_rows(1)), [2, 3])
+
+    def test_age_groups(self):
+        infants = SimpleNamespace(min_age=0, max_age=11, time_unit='months')
+        adults = SimpleNamespace(min_age=18, max_age=99, time_unit='N/A')
+        weeks = SimpleNamespace(min_age=20, max_age=40, time_unit='Weeks')
+
+        self.assertEqual(list(self.coverage.age_group_mask(infants)), [True, False, False, False])
+        self.assertEqual(list(self.coverage.age_group_mask(adults)), [False, False, False, True])
+        self.assertEqual(list(self.coverage.age_group_mask(weeks)), [True, False, False, False])
+        self.assertEqual(self.coverage.counts(1, infants)['partially_vaccinated_count'], 1)
+
+
+class UnvaccinatedResidentsTest(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        children = Agegroup.objects.create(agegroup_name='Children', min_age=0, max_age=10, time_unit='years')
+        self.routine = VaccineList.objects.create(vac_type_choices='routine', vac_name='Measles', no_of_doses=2, ageGroup=children)
+        self.other = VaccineList.objects.create(vac_type_choices='routine', vac_name='Polio', no_of_doses=1)
+        stock = VaccineStock.objects.create(
+            inv_id=Inventory.objects.create(inv_type='Antigen', expiry_date=date(2030, 1, 1)),
+            vac_id=self.routine, solvent='doses',
+        )
+        self.patients = []
+        for i in range(3):
+            self._resident(i, doses=i, stock=stock)
+
+    def _resident(self, i, doses=0, stock=None, with_patient=True):
+        per = Personal.objects.create(
+            per_lname=f'Reyes {i}', per_fname='Ana', per_dob=date(2020, 1, 1),
+            per_sex='FEMALE', per_status='SINGLE', per_religion='CATHOLIC', per_contact='09000000000',
+        )
+        rp = ResidentProfile.objects.create(rp_id=f'RV{i:04d}', per=per)
+        if not with_patient:
+            return rp
+        patient = Patient.objects.create(pat_type='Resident', rp_id=rp)
+        record = VaccinationRecord.objects.create(
+            patrec_id=PatientRecord.objects.create(patrec_type='Vaccination', pat_id=patient)
+        )
+        for _ in range(doses):
+            VaccinationHistory.objects.create(
+                vacrec=record, vacStck_id=stock, vachist_status='completed', date_administered=date(2024, 1, 1)
+            )
+        self.patients.append(patient)
+        return rp
+
+    def _summary(self):
+        response = UnvaccinatedVaccinesSummaryView.as_view()(self.factory.get('/'))
+        self.assertTrue(response.data['success'])
+        return {row['vac_name']: row for row in response.data['results']}
+
+    def test_summary_counts(self):
+        measles = self._summary()['Measles']
+        self.assertEqual(
+            (measles['total_unvaccinated'], measles['total_partially_vaccinated'], measles['total_fully_vaccinated']), (1, 1, 1)
+        )
+        self.assertEqual(measles['age_groups'][0]['total_residents_count'], 3)
+
+    def test_summary_queries_do_not_grow_with_residents(self):
+        with CaptureQueriesContext(connection) as small:
+            self._summary()
+        for i in range(3, 8):
+            self._resident(i)
+        with CaptureQueriesContext(connection) as large:
+            rows = self._summary()
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(rows['Polio']['total_unvaccinated'], 8)
+
+    def test_details_filter_and_search(self):
+        self._resident(9, with_patient=False)
+        request = self.factory.get('/', {'vaccination_status': 'unvaccinated'})
+        response = UnvaccinatedVaccinesDetailsView.as_view()(request, vac_id=self.routine.vac_id)
+
+        self.assertEqual(response.data['vaccination_counts'], {
+            'unvaccinated': 2, 'partially_vaccinated': 0, 'fully_vaccinated': 0, 'total': 2,
+        })
+        by_rp = {row['rp_id']: row for row in response.data['results']}
+        self.assertEqual(by_rp['RV0009']['status'], 'no_patient_record')
+        self.assertEqual(by_rp['RV0009']['personal_info']['per_lname'], 'REYES 9')
+        self.assertEqual(by_rp['RV0000']['vaccination_status']['total_required_doses'], 2)
+        self.assertEqual(by_rp['RV0000']['age_info']['age_group_range'], '0-10 years')
+
+        request = self.factory.get('/', {'search': 'reyes 1'})
+        response = UnvaccinatedVaccinesDetailsView.as_view()(request, vac_id=self.routine.vac_id)
+        self.assertEqual([row['rp_id'] for row in response.data['results']], ['RV0001'])
+        self.assertEqual(response.data['results'][0]['vaccination_status']['status'], 'partially_vaccinated')
+
+    def test_residents_not_vaccinated(self):
+        result = get_all_residents_not_vaccinated()
+        self.assertEqual([row['rp_id'] for row in result['Measles']], [self.patients[0].rp_id_id])
+        self.assertEqual(len(result['Polio']), 3)
+        self.assertEqual(result['Polio'][0]['vaccine_not_received']['vac_name'], 'Polio')
+
+
+class DueVaccinesTest(TestCase):
+    def setUp(self):
+        invalidate_vaccine_catalogue()
+        self.today = date.today()
+        infants = Agegroup.objects.create(agegroup_name='Infants', min_age=0, max_age=12, time_unit='months')
+        self.infant_vaccine = VaccineList.objects.create(vac_type_choices='routine', vac_name='Rota', ageGroup=infants)
+        self.booster = VaccineList.objects.create(vac_type_choices='routine', vac_name='Flu')
+        RoutineFrequency.objects.create(vac_id=self.booster, interval=1, time_unit='years')
+        self.conditional = VaccineList.objects.create(vac_type_choices='conditional', vac_name='Rabies')
+        self.patients = [self._patient(i, dob=date(1990, 1, 1)) for i in range(2)]
+
+    def _patient(self, i, dob):
+        per = Personal.objects.create(
+            per_lname=f'Cruz {i}', per_fname='Leo', per_dob=dob,
+            per_sex='MALE', per_status='SINGLE', per_religion='CATHOLIC', per_contact='09000000000',
+        )
+        patient = Patient.objects.create(pat_type='Resident', rp_id=ResidentProfile.objects.create(rp_id=f'RD{i:04d}', per=per))
+        VaccinationRecord.objects.create(
+            patrec_id=PatientRecord.objects.create(patrec_type='Vaccination', pat_id=patient)
+        )
+        return patient
+
+    def _dose(self, patient, vaccine, days_ago):
+        VaccinationHistory.objects.create(
+            vacrec=VaccinationRecord.objects.get(patrec_id__pat_id=patient), vac=vaccine,
+            vachist_status='completed', date_administered=self.today - timedelta(days=days_ago),
+        )
+
+    def _names(self, due):
+        return sorted(item.vaccine.vac_name for item in due)
+
+    def test_due_and_overdue(self):
+        old, recent = self.patients
+        self._dose(old, self.booster, days_ago=400)
+        self._dose(old, self.conditional, days_ago=400)
+        self._dose(recent, self.booster, days_ago=30)
+
+        due = get_due_vaccines([old.pat_id, recent.pat_id])
+
+        # Adults are past the infant age group; the conditional vaccine needs only one dose
+        self.assertEqual(self._names(due[old.pat_id]), ['Flu'])
+        self.assertTrue(due[old.pat_id][0].is_overdue)
+        self.assertEqual(due[old.pat_id][0].next_due_date, self.today - timedelta(days=35))
+        self.assertEqual(self._names(due[recent.pat_id]), ['Rabies'])
+        self.assertFalse(due[recent.pat_id][0].is_overdue)
+
+        self.assertEqual([vaccine.vac_name for vaccine in get_unvaccinated_vaccines_for_patient(old.pat_id)], ['Flu'])
+        self.assertTrue(check_routine_vaccine_status(old.pat_id, self.booster))
+        self.assertFalse(check_routine_vaccine_status(recent.pat_id, self.booster))
+
+    def test_queries_do_not_grow_with_patients(self):
+        infant = self._patient(9, dob=self.today - timedelta(days=60))
+        get_due_vaccines([infant.pat_id])  # loads the catalogue
+
+        counts = []
+        for pat_ids in ([infant.pat_id], [infant.pat_id] + [patient.pat_id for patient in self.patients]):
+            with CaptureQueriesContext(connection) as queries:
+                due = get_due_vaccines(pat_ids)
+            counts.append(len(queries))
+
+        self.assertEqual(counts, [2, 2])
+        self.assertEqual(self._names(due[infant.pat_id]), ['Flu', 'Rabies', 'Rota'])
+
+    def test_catalogue_refreshed_when_vaccines_change(self):
+        pat_id = self.patients[0].pat_id
+        self.assertEqual(len(get_due_vaccines([pat_id])[pat_id]), 2)
+        VaccineList.objects.create(vac_type_choices='routine', vac_name='Tetanus')
+        self.assertEqual(self._names(get_due_vaccines([pat_id])[pat_id]), ['Flu', 'Rabies', 'Tetanus'])
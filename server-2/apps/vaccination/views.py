@@ -12,6 +12,7 @@ from apps.patientrecords.serializers.patients_serializers import PatientSerializ
 from apps.patientrecords.models import VitalSigns
 from rest_framework.views import APIView
 from .utils import *
+from .coverage import CoverageMatrix, STATUS_NAMES, is_conditional_vaccine
 from apps.childhealthservices.models import ChildHealthImmunizationHistory
 from apps.childhealthservices.serializers import ChildHealthImmunizationHistorySerializer
 from rest_framework.decorators import api_view
@@ -23,6 +24,7 @@ from apps.inventory.models import AntigenTransaction,VaccineStock, VaccineList,
 from django.utils import timezone
 from django.db import transaction
 import logging
+import numpy as np
 from collections import defaultdict
 from pagination import *
 from apps.healthProfiling.models import ResidentProfile, PersonalAddress
@@ -221,33 +223,42 @@ class UnvaccinatedVaccinesDetailsView(APIView):
             
             # Get the vaccine
             try:
-                vaccine = VaccineList.objects.get(vac_id=vac_id)
+                vaccine = VaccineList.objects.select_related('ageGroup').get(vac_id=vac_id)
             except VaccineList.DoesNotExist:
                 return Response({'error': 'Vaccine not found'}, status=status.HTTP_404_NOT_FOUND)
             
-            # Get ALL residents for this vaccine (including fully vaccinated) with counts
-            all_residents_data, vaccination_counts = self.get_all_residents_for_vaccine_with_counts(
-                vaccine, age_group_id, search, vaccination_status_filter
+            age_group = self.get_age_group(vaccine, age_group_id)
+            coverage = CoverageMatrix.load(
+                vaccines=[vaccine], residents=ResidentProfile.objects.filter(per__per_dob__isnull=False)
             )
             
+            # Every matching resident (including fully vaccinated) with counts; only the page is serialized
+            rows, vaccination_counts = self.get_resident_rows_with_counts(
+                coverage, vaccine, age_group, search, vaccination_status_filter
+            )
+            
+            vaccine_info = {
+                'vac_id': vaccine.vac_id,
+                'vac_name': vaccine.vac_name,
+                'vac_description': getattr(vaccine, 'vac_description', ''),
+                'no_of_doses': vaccine.no_of_doses or 1,  # Default dose count for routine vaccines
+                'is_conditional': is_conditional_vaccine(vaccine),
+            }
+            
             # Apply pagination
             paginator = self.pagination_class()
             page_size = int(request.GET.get('page_size', paginator.page_size))
             paginator.page_size = page_size
             
-            page_data = paginator.paginate_queryset(all_residents_data, request)
+            page_rows = paginator.paginate_queryset(rows, request)
             
-            if page_data is not None:
-                response = paginator.get_paginated_response(page_data)
+            if page_rows is not None:
+                response = paginator.get_paginated_response(
+                    self.serialize_rows(coverage, vaccine, age_group, page_rows)
+                )
                 return Response({
                     'success': True,
-                    'vaccine_info': {
-                        'vac_id': vaccine.vac_id,
-                        'vac_name': vaccine.vac_name,
-                        'vac_description': getattr(vaccine, 'vac_description', ''),
-                        'no_of_doses': vaccine.no_of_doses or 1,  # Default dose count for routine vaccines
-                        'is_conditional': self.is_conditional_vaccine(vaccine),
-                    },
+                    'vaccine_info': vaccine_info,
                     'vaccination_counts': vaccination_counts,
                     'results': response.data['results'],
                     'count': response.data['count'],
@@ -257,16 +268,10 @@ class UnvaccinatedVaccinesDetailsView(APIView):
             
             return Response({
                 'success': True,
-                'vaccine_info': {
-                    'vac_id': vaccine.vac_id,
-                    'vac_name': vaccine.vac_name,
-                    'vac_description': getattr(vaccine, 'vac_description', ''),
-                    'no_of_doses': vaccine.no_of_doses or 1,
-                    'is_conditional': self.is_conditional_vaccine(vaccine),
-                },
+                'vaccine_info': vaccine_info,
                 'vaccination_counts': vaccination_counts,
-                'results': all_residents_data,
-                'count': len(all_residents_data)
+                'results': self.serialize_rows(coverage, vaccine, age_group, rows),
+                'count': len(rows)
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -275,282 +280,121 @@ class UnvaccinatedVaccinesDetailsView(APIView):
                 'error': f'Error fetching residents: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def is_conditional_vaccine(self, vaccine):
-        """
-        Determine if a vaccine is conditional based on vac_type_choices
-        """
-        return vaccine.vac_type_choices.lower() == 'conditional' if vaccine.vac_type_choices else False
-
-    def get_total_required_doses(self, vaccine, patient_id=None):
-        """
-        Get total required doses for a vaccine and patient
-        For conditional vaccines: Get from patient's vaccination record (vacrec_totaldose)
-        For routine vaccines: Always use vaccine's no_of_doses
-        """
-        is_conditional = self.is_conditional_vaccine(vaccine)
-        
-        if is_conditional and patient_id:
-            # For conditional vaccines with patient, get from patient's vaccination record
-            patient_vacrec = VaccinationRecord.objects.filter(
-                patrec_id__pat_id=patient_id,
-                vaccination_histories__vacStck_id__vac_id=vaccine.vac_id
-            ).first()
-            
-            if patient_vacrec and patient_vacrec.vacrec_totaldose and patient_vacrec.vacrec_totaldose > 0:
-                return patient_vacrec.vacrec_totaldose
-            else:
-                # If no individual record found, return 0 (no dose requirement set yet)
-                return 0
-        else:
-            # For routine vaccines OR conditional vaccines without patient record, use fixed no_of_doses
-            return vaccine.no_of_doses or 1
-
-    def calculate_age_in_time_unit(self, birth_date, time_unit):
-        """Calculate age in the specified time unit"""
-        if not birth_date:
-            return None
-            
-        today = date.today()
-        
-        if time_unit.lower() == 'days':
-            return (today - birth_date).days
-        elif time_unit.lower() == 'weeks':
-            return (today - birth_date).days // 7
-        elif time_unit.lower() == 'months':
-            return relativedelta(today, birth_date).months + (relativedelta(today, birth_date).years * 12)
-        elif time_unit.lower() == 'years':
-            return relativedelta(today, birth_date).years
-        else:
-            # Default to years
-            return relativedelta(today, birth_date).years
+    def get_age_group(self, vaccine, age_group_id=None):
+        if age_group_id and age_group_id != 'null':
+            try:
+                return Agegroup.objects.get(agegrp_id=age_group_id)
+            except Agegroup.DoesNotExist:
+                return None
+        # Use the vaccine's default age group if no specific age group is provided
+        return vaccine.ageGroup
 
-    def is_resident_in_age_group(self, resident, age_group):
-        """Check if resident falls within the specified age group"""
-        if not age_group:
-            return True
-            
-        # Get birth date from personal info
-        birth_date = getattr(resident.per, 'per_dob', None) if hasattr(resident, 'per') and resident.per else None
-        
-        if not birth_date:
-            return False  # Skip residents without birth date
-            
-        # Calculate age in the time unit specified by the age group
-        age = self.calculate_age_in_time_unit(birth_date, age_group.time_unit)
+    def get_resident_rows_with_counts(self, coverage, vaccine, age_group=None, search='', vaccination_status_filter=None):
+        """Coverage rows of the residents to list, in resident order, and their status counts"""
+        column = coverage.column(vaccine)
         
-        if age is None:
-            return False
-            
-        # Check if age falls within the range
-        return age_group.min_age <= age <= age_group.max_age
-
-    def get_vaccination_status(self, patient_id, vaccine):
-        """
-        Get detailed vaccination status for a patient
-        Returns: {
-            'status': 'unvaccinated' | 'partially_vaccinated' | 'fully_vaccinated'
-            'completed_doses': int,
-            'total_required_doses': int,
-            'is_conditional': bool,
-            'has_dose_requirement': bool
-        }
-        """
-        # Get total required doses
-        total_required_doses = self.get_total_required_doses(vaccine, patient_id)
-        is_conditional = self.is_conditional_vaccine(vaccine)
+        # Apply age group filter first (most restrictive)
+        included = coverage.age_group_mask(age_group)
         
-        # For conditional vaccines, check if dose requirement is set
-        has_dose_requirement = not is_conditional or (is_conditional and total_required_doses > 0)
+        # Apply vaccination status filter if provided
+        if vaccination_status_filter and vaccination_status_filter != 'all':
+            if vaccination_status_filter in STATUS_NAMES:
+                included &= coverage.status[:, column] == STATUS_NAMES.index(vaccination_status_filter)
+            else:
+                included[:] = False
         
-        # Count completed doses for this patient and vaccine
-        completed_doses = 0
-        if patient_id:
-            completed_doses = VaccinationHistory.objects.filter(
-                Q(vacStck_id__vac_id=vaccine.vac_id) | Q(vac__vac_id=vaccine.vac_id),
-                vacrec__patrec_id__pat_id=patient_id,
-                vachist_status="completed"
-            ).count()
+        rows = [int(row) for row in np.flatnonzero(included)]
         
-        # Determine vaccination status
-        if completed_doses == 0:
-            status = 'unvaccinated'
-        elif has_dose_requirement and completed_doses >= total_required_doses:
-            status = 'fully_vaccinated'
-        elif has_dose_requirement and completed_doses > 0:
-            status = 'partially_vaccinated'
-        else:
-            # For conditional vaccines without dose requirement but with some doses
-            status = 'partially_vaccinated' if completed_doses > 0 else 'unvaccinated'
+        # Apply search filter if provided
+        if search:
+            searchable = self.get_searchable_text(coverage, column, rows)
+            search_lower = search.lower()
+            rows = [row for row in rows if search_lower in searchable[row]]
         
-        return {
-            'status': status,
-            'completed_doses': completed_doses,
-            'total_required_doses': total_required_doses,
-            'is_conditional': is_conditional,
-            'has_dose_requirement': has_dose_requirement
+        unvaccinated, partially, fully = (
+            int(count) for count in np.bincount(coverage.status[rows, column], minlength=3)
+        )
+        vaccination_counts = {
+            'unvaccinated': unvaccinated,
+            'partially_vaccinated': partially,
+            'fully_vaccinated': fully,
+            'total': unvaccinated + partially + fully
         }
+        return rows, vaccination_counts
 
-    def get_all_residents_for_vaccine_with_counts(self, vaccine, age_group_id=None, search='', vaccination_status_filter=None):
-        # Get age group if specified
-        age_group = None
-        
-        if age_group_id and age_group_id != 'null':
-            try:
-                age_group = Agegroup.objects.get(agegrp_id=age_group_id)
-            except Agegroup.DoesNotExist:
-                pass
-        elif vaccine.ageGroup:
-            # Use the vaccine's default age group if no specific age group is provided
-            age_group = vaccine.ageGroup
-        
-        # Get all residents with related data for better performance
-        all_residents = ResidentProfile.objects.select_related('per').prefetch_related(
+    def get_searchable_text(self, coverage, column, rows):
+        """{row: lowercased text the search box matches against}"""
+        residents = ResidentProfile.objects.filter(
+            rp_id__in=[coverage.rp_ids[row] for row in rows]
+        ).select_related('per').prefetch_related(
             Prefetch(
                 'per__personal_addresses',
                 queryset=PersonalAddress.objects.select_related('add', 'add__sitio'),
                 to_attr='prefetched_personal_addresses'
             )
-        ).filter(per__per_dob__isnull=False)
-        
-        # Get all resident-type, active patients
-        patients = Patient.objects.filter(
-            pat_type="Resident", 
-            pat_status="Active"
-        ).select_related('rp_id', 'rp_id__per')
-        
-        # Map rp_id -> patient
-        patient_map = {p.rp_id.rp_id: p for p in patients if p.rp_id}
-        
-        all_residents_data = []
+        ).in_bulk()
+        
+        searchable = {}
+        for row in rows:
+            resident = residents[coverage.rp_ids[row]]
+            status_name = STATUS_NAMES[coverage.status[row, column]]
+            searchable_fields = [
+                str(coverage.pat_ids[row]),
+                str(coverage.rp_ids[row]),
+                resident.per.per_fname or '',
+                resident.per.per_lname or '',
+                resident.per.per_mname or '',
+                resident.per.per_sex or '',
+                status_name if coverage.has_patient[row] else 'no_patient_record',
+                status_name,  # Include vaccination status in search
+            ]
+            
+            # Add address fields using the correct relationship
+            for addr in resident.per.prefetched_personal_addresses:
+                if addr.add:
+                    searchable_fields.extend([
+                        addr.add.add_external_sitio or '',
+                        addr.add.add_street or '',
+                        addr.add.add_barangay or '',
+                        addr.add.add_city or '',
+                        addr.add.add_province or '',
+                    ])
+                    if addr.add.sitio:
+                        searchable_fields.append(addr.add.sitio.sitio_name or '')
+            
+            searchable[row] = ' '.join(filter(None, searchable_fields)).lower()
+        return searchable
+
+    def serialize_rows(self, coverage, vaccine, age_group, rows):
+        personal_info = serialize_residents([coverage.rp_ids[row] for row in rows])
         vaccine_data = VacccinationListSerializer(vaccine).data
         
-        # Initialize counts
-        vaccination_counts = {
-            'unvaccinated': 0,
-            'partially_vaccinated': 0,
-            'fully_vaccinated': 0,
-            'total': 0
-        }
-        
-        for resident in all_residents:
-            rp_id = resident.rp_id
-            # Use the serializer to get personal info with addresses
-            personal_info = ResidentPersonalInfoSerializer(resident).data
-            patient = patient_map.get(rp_id)
-            
-            # Apply age group filter first (most restrictive)
-            if age_group and not self.is_resident_in_age_group(resident, age_group):
-                continue
-            
-            vaccination_status = None
-            resident_data = None
-            
-            if patient:
-                # Check vaccination status for patients with patient records
-                vaccination_status = self.get_vaccination_status(patient.pat_id, vaccine)
-                
-                resident_data = {
-                    "status": vaccination_status['status'],
-                    "pat_id": patient.pat_id,
-                    "rp_id": rp_id,
-                    "personal_info": personal_info,
-                    "vaccine_info": vaccine_data,
-                    "vaccination_status": vaccination_status,
-                    "age_info": self.get_age_info(resident, age_group) if age_group else None
-                }
-            else:
-                # No patient record - use vaccine's no_of_doses for routine vaccines
-                is_conditional = self.is_conditional_vaccine(vaccine)
-                total_required_doses = self.get_total_required_doses(vaccine)  # This will return no_of_doses for routine vaccines
-                
-                vaccination_status = {
-                    'status': 'unvaccinated',
-                    'completed_doses': 0,
-                    'total_required_doses': total_required_doses,
-                    'is_conditional': is_conditional,
-                    'has_dose_requirement': not is_conditional or (is_conditional and total_required_doses > 0)
-                }
-                resident_data = {
-                    "status": "no_patient_record",
-                    "pat_id": None,
-                    "rp_id": rp_id,
-                    "personal_info": personal_info,
-                    "vaccine_info": vaccine_data,
-                    "vaccination_status": vaccination_status,
-                    "age_info": self.get_age_info(resident, age_group) if age_group else None
-                }
-            
-            if resident_data:
-                # Apply vaccination status filter if provided
-                if vaccination_status_filter and vaccination_status_filter != 'all':
-                    if resident_data['vaccination_status']['status'] != vaccination_status_filter:
-                        continue
-                
-                # Apply search filter if provided
-                search_match = True
-                if search:
-                    search_lower = search.lower()
-                    searchable_fields = [
-                        str(resident_data.get('pat_id', '')),
-                        str(resident_data.get('rp_id', '')),
-                        personal_info.get('per_fname', ''),
-                        personal_info.get('per_lname', ''),
-                        personal_info.get('per_mname', ''),
-                        personal_info.get('per_sex', ''),
-                        resident_data.get('status', ''),
-                        resident_data['vaccination_status']['status'],  # Include vaccination status in search
-                    ]
-                    
-                    # Add address fields using the correct relationship
-                    if hasattr(resident.per, 'prefetched_personal_addresses'):
-                        for addr in resident.per.prefetched_personal_addresses:
-                            if addr.add:
-                                searchable_fields.extend([
-                                    addr.add.add_external_sitio or '',
-                                    addr.add.add_street or '',
-                                    addr.add.add_barangay or '',
-                                    addr.add.add_city or '',
-                                    addr.add.add_province or '',
-                                ])
-                                if addr.add.sitio:
-                                    searchable_fields.append(addr.add.sitio.sitio_name or '')
-                    
-                    # Create searchable text
-                    searchable_text = ' '.join(filter(None, searchable_fields)).lower()
-                    
-                    if search_lower not in searchable_text:
-                        search_match = False
-                
-                # If search matches or no search, include the resident
-                if not search or search_match:
-                    # Update counts based on vaccination status
-                    status = resident_data['vaccination_status']['status']
-                    vaccination_counts[status] += 1
-                    vaccination_counts['total'] += 1
-                    
-                    # Add to results list
-                    all_residents_data.append(resident_data)
-        
-        return all_residents_data, vaccination_counts
+        results = []
+        for row in rows:
+            rp_id = coverage.rp_ids[row]
+            vaccination_status = coverage.vaccination_status(row, vaccine)
+            results.append({
+                "status": vaccination_status['status'] if coverage.has_patient[row] else "no_patient_record",
+                "pat_id": coverage.pat_ids[row],
+                "rp_id": rp_id,
+                "personal_info": personal_info[rp_id],
+                "vaccine_info": vaccine_data,
+                "vaccination_status": vaccination_status,
+                "age_info": self.get_age_info(coverage, row, age_group) if age_group else None
+            })
+        return results
 
-    def get_age_info(self, resident, age_group):
+    def get_age_info(self, coverage, row, age_group):
         """Get age information for the resident"""
-        if not age_group:
-            return None
-            
-        birth_date = getattr(resident.per, 'per_dob', None) if hasattr(resident, 'per') and resident.per else None
-        
-        if not birth_date:
+        if not coverage.has_dob[row]:
             return {"error": "No birth date available"}
             
-        age = self.calculate_age_in_time_unit(birth_date, age_group.time_unit)
-        
         return {
-            "birth_date": birth_date.isoformat(),
-            "age": age,
+            "birth_date": str(coverage.dobs[row]),
+            "age": int(coverage.age_in_unit(age_group.time_unit)[row]),
             "time_unit": age_group.time_unit,
             "age_group_range": f"{age_group.min_age}-{age_group.max_age} {age_group.time_unit}",
-            "is_in_age_group": self.is_resident_in_age_group(resident, age_group)
+            "is_in_age_group": bool(coverage.age_group_mask(age_group)[row])
         }
 
 
@@ -563,15 +407,18 @@ class UnvaccinatedVaccinesSummaryView(APIView):
     def get(self, request):
         try:
             # Get all vaccines
-            vaccines = VaccineList.objects.select_related('ageGroup').all()
+            vaccines = list(VaccineList.objects.select_related('ageGroup').all())
             result = []
             
+            # Every resident's status for every vaccine, loaded once
+            coverage = CoverageMatrix.load(vaccines=vaccines)
+            
             # Get total count of all residents
-            total_residents_count = self.get_total_residents_count()
+            total_residents_count = len(coverage.rp_ids)
             
             for vaccine in vaccines:
                 # Get age groups for this vaccine first
-                age_groups = self.get_age_groups_for_vaccine(vaccine)
+                age_groups = self.get_age_groups_for_vaccine(coverage, vaccine)
                 
                 # Calculate total counts as sum of all age groups
                 total_unvaccinated = sum(age_group['unvaccinated_count'] for age_group in age_groups)
@@ -588,7 +435,7 @@ class UnvaccinatedVaccinesSummaryView(APIView):
                     'total_residents': total_unvaccinated + total_partially_vaccinated + total_fully_vaccinated,
                     'age_groups': age_groups,
                     'total_residents_count': total_residents_count,
-                    'is_conditional': self.is_conditional_vaccine(vaccine),
+                    'is_conditional': is_conditional_vaccine(vaccine),
                 }
                 result.append(vaccine_data)
             
@@ -623,180 +470,15 @@ class UnvaccinatedVaccinesSummaryView(APIView):
                 'error': f'Error fetching vaccines: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def is_conditional_vaccine(self, vaccine):
-        """
-        Determine if a vaccine is conditional based on vac_type_choices
-        """
-        return vaccine.vac_type_choices.lower() == 'conditional' if vaccine.vac_type_choices else False
-
-    def get_patient_total_doses(self, patient_id, vaccine):
-        """
-        Get total required doses for a specific patient and vaccine
-        """
-        is_conditional = self.is_conditional_vaccine(vaccine)
-        
-        if is_conditional:
-            # For conditional vaccines, get from patient's vaccination record
-            patient_vacrec = VaccinationRecord.objects.filter(
-                patrec_id__pat_id=patient_id,
-                vaccination_histories__vacStck_id__vac_id=vaccine.vac_id
-            ).first()
-            
-            if patient_vacrec and patient_vacrec.vacrec_totaldose and patient_vacrec.vacrec_totaldose > 0:
-                return patient_vacrec.vacrec_totaldose
-            else:
-                return 0
-        else:
-            # For routine vaccines, use fixed no_of_doses
-            return vaccine.no_of_doses or 1
-
-    def get_vaccination_status_for_patient(self, patient_id, vaccine):
-        """
-        Get vaccination status for a specific patient
-        Returns: 'unvaccinated', 'partially_vaccinated', or 'fully_vaccinated'
-        """
-        # Get patient-specific total required doses
-        total_required_doses = self.get_patient_total_doses(patient_id, vaccine)
-        is_conditional = self.is_conditional_vaccine(vaccine)
-        
-        # For conditional vaccines, check if dose requirement is set
-        has_dose_requirement = not is_conditional or (is_conditional and total_required_doses > 0)
-        
-        # Count completed doses for this patient and vaccine
-        completed_doses = VaccinationHistory.objects.filter(
-            Q(vacStck_id__vac_id=vaccine.vac_id) | Q(vac__vac_id=vaccine.vac_id),
-            vacrec__patrec_id__pat_id=patient_id,
-            vachist_status="completed"
-        ).count()
-        
-        # Determine vaccination status
-        if completed_doses == 0:
-            return 'unvaccinated'
-        elif has_dose_requirement and completed_doses >= total_required_doses:
-            return 'fully_vaccinated'
-        elif has_dose_requirement and completed_doses > 0:
-            return 'partially_vaccinated'
-        else:
-            # For conditional vaccines without dose requirement but with some doses
-            return 'partially_vaccinated' if completed_doses > 0 else 'unvaccinated'
-
-    def get_total_residents_count(self):
-        """Get total count of all residents"""
-        return ResidentProfile.objects.count()
-
-    def get_residents_count_for_age_group(self, age_group=None):
-        """Get total count of residents in a specific age group"""
-        all_residents = ResidentProfile.objects.select_related('per').all()
-        
-        if not age_group:
-            return len(all_residents)
-            
-        count = 0
-        for resident in all_residents:
-            if self.is_resident_in_age_group(resident, age_group):
-                count += 1
-                
-        return count
-
-    def calculate_age_in_time_unit(self, birth_date, time_unit):
-        """Calculate age in the specified time unit"""
-        if not birth_date:
-            return None
-            
-        today = date.today()
-        
-        if time_unit.lower() == 'days':
-            return (today - birth_date).days
-        elif time_unit.lower() == 'weeks':
-            return (today - birth_date).days // 7
-        elif time_unit.lower() == 'months':
-            return relativedelta(today, birth_date).months + (relativedelta(today, birth_date).years * 12)
-        elif time_unit.lower() == 'years':
-            return relativedelta(today, birth_date).years
-        else:
-            # Default to years
-            return relativedelta(today, birth_date).years
-
-    def get_vaccination_counts_for_vaccine(self, vac_id, age_group=None):
-        """
-        Get counts of unvaccinated, partially vaccinated, and fully vaccinated residents for a vaccine
-        """
-        vaccine = VaccineList.objects.get(vac_id=vac_id)
-        
-        # Get all residents
-        all_residents = ResidentProfile.objects.select_related('per').all()
-        
-        # Get all resident-type, active patients
-        patients = Patient.objects.filter(
-            pat_type="Resident", 
-            pat_status="Active"
-        ).select_related('rp_id', 'rp_id__per')
-        
-        # Map rp_id -> patient
-        patient_map = {p.rp_id.rp_id: p for p in patients if p.rp_id}
-        
-        unvaccinated_count = 0
-        partially_vaccinated_count = 0
-        fully_vaccinated_count = 0
-        
-        for resident in all_residents:
-            # Apply age group filter if specified
-            if age_group and not self.is_resident_in_age_group(resident, age_group):
-                continue
-                
-            patient = patient_map.get(resident.rp_id)
-            
-            if patient:
-                # Has patient — check vaccination status
-                status = self.get_vaccination_status_for_patient(patient.pat_id, vaccine)
-                if status == 'unvaccinated':
-                    unvaccinated_count += 1
-                elif status == 'partially_vaccinated':
-                    partially_vaccinated_count += 1
-                elif status == 'fully_vaccinated':
-                    fully_vaccinated_count += 1
-            else:
-                # No patient — definitely not vaccinated
-                unvaccinated_count += 1
-        
-        return {
-            'unvaccinated_count': unvaccinated_count,
-            'partially_vaccinated_count': partially_vaccinated_count,
-            'fully_vaccinated_count': fully_vaccinated_count,
-            'total_count': unvaccinated_count + partially_vaccinated_count + fully_vaccinated_count
-        }
-
-    def is_resident_in_age_group(self, resident, age_group):
-        """Check if resident falls within the specified age group"""
-        if not age_group:
-            return True
-            
-        # Get birth date from personal info
-        birth_date = getattr(resident.per, 'per_dob', None) if hasattr(resident, 'per') and resident.per else None
-        
-        if not birth_date:
-            return False  # Skip residents without birth date
-            
-        # Calculate age in the time unit specified by the age group
-        age = self.calculate_age_in_time_unit(birth_date, age_group.time_unit)
-        
-        if age is None:
-            return False
-            
-        # Check if age falls within the range
-        return age_group.min_age <= age <= age_group.max_age
-
-    def get_age_groups_for_vaccine(self, vaccine):
+    def get_age_groups_for_vaccine(self, coverage, vaccine):
         """Get age groups associated with this vaccine"""
-        age_groups = []
+        age_group = vaccine.ageGroup
+        vaccination_counts = coverage.counts(vaccine, age_group)
+        total_residents_count = int(coverage.age_group_mask(age_group).sum())
         
-        if vaccine.ageGroup:
+        if age_group:
             # Single age group associated with vaccine
-            age_group = vaccine.ageGroup
-            vaccination_counts = self.get_vaccination_counts_for_vaccine(vaccine.vac_id, age_group)
-            total_residents_count = self.get_residents_count_for_age_group(age_group)
-            
-            age_groups.append({
+            return [{
                 'age_group_id': age_group.agegrp_id,
                 'age_group_name': age_group.agegroup_name,
                 'min_age': age_group.min_age,
@@ -807,26 +489,21 @@ class UnvaccinatedVaccinesSummaryView(APIView):
                 'partially_vaccinated_count': vaccination_counts['partially_vaccinated_count'],
                 'fully_vaccinated_count': vaccination_counts['fully_vaccinated_count'],
                 'total_residents_count': total_residents_count
-            })
-        else:
-            # No specific age group - show all ages
-            vaccination_counts = self.get_vaccination_counts_for_vaccine(vaccine.vac_id)
-            all_ages_total_residents_count = self.get_residents_count_for_age_group()
-            
-            age_groups.append({
-                'age_group_id': None,
-                'age_group_name': 'All Ages',
-                'min_age': 0,
-                'max_age': 999,
-                'time_unit': 'years',
-                'age_range_display': 'All Ages',
-                'unvaccinated_count': vaccination_counts['unvaccinated_count'],
-                'partially_vaccinated_count': vaccination_counts['partially_vaccinated_count'],
-                'fully_vaccinated_count': vaccination_counts['fully_vaccinated_count'],
-                'total_residents_count': all_ages_total_residents_count
-            })
-        
-        return age_groups
+            }]
+        
+        # No specific age group - show all ages
+        return [{
+            'age_group_id': None,
+            'age_group_name': 'All Ages',
+            'min_age': 0,
+            'max_age': 999,
+            'time_unit': 'years',
+            'age_range_display': 'All Ages',
+            'unvaccinated_count': vaccination_counts['unvaccinated_count'],
+            'partially_vaccinated_count': vaccination_counts['partially_vaccinated_count'],
+            'fully_vaccinated_count': vaccination_counts['fully_vaccinated_count'],
+            'total_residents_count': total_residents_count
+        }]
 class CheckVaccineExistsView(APIView):
     def get(self, request, pat_id, vac_id):
         exists = has_existing_vaccine_history(pat_id, vac_id)
@@ -138,6 +138,35 @@ DATABASES = {
     }
 }
 
+# ========================
+# CACHE
+# ========================
+# One cache shared by every worker: Redis when REDIS_URL is set, otherwise a
+# file cache in the instance's temp dir (or the django_cache table with
+# CACHE_BACKEND=db, after createcachetable). The file cache is only shared by
+# the workers of one host: run more than one instance against Redis. locmem is
+# per process and only suits local development.
+REDIS_URL = config('REDIS_URL', default='')
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis' if REDIS_URL else 'file')
+CACHE_BACKENDS = {
+    'redis': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL},
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_DIR', default='/tmp/ciudad_server2_cache'),
+    },
+    'db': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache'},
+    'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'KEY_PREFIX': 'server2',
+        'TIMEOUT': 300,
+    }
+}
+CACHE_DEFAULT_TTL_SECONDS = config('CACHE_DEFAULT_TTL_SECONDS', default=300, cast=int)
+DASHBOARD_COUNTS_TTL_SECONDS = config('DASHBOARD_COUNTS_TTL_SECONDS', default=60, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -262,3 +291,14 @@ LOGGING = {
         'level': 'INFO',
     },
 }
+
+# ========================
+# PEER SERVER CLIENT
+# ========================
+PEER_TIMEOUT = config('PEER_TIMEOUT', default=10, cast=float)
+PEER_CONNECT_TIMEOUT = config('PEER_CONNECT_TIMEOUT', default=3, cast=float)
+PEER_MAX_RETRIES = config('PEER_MAX_RETRIES', default=2, cast=int)
+PEER_RETRY_BACKOFF = config('PEER_RETRY_BACKOFF', default=0.2, cast=float)
+PEER_MAX_CONNECTIONS = config('PEER_MAX_CONNECTIONS', default=20, cast=int)
+PEER_OUTBOX_BATCH_SIZE = config('PEER_OUTBOX_BATCH_SIZE', default=50, cast=int)
+PEER_OUTBOX_MAXSIZE = config('PEER_OUTBOX_MAXSIZE', default=10000, cast=int)
@@ -0,0 +1,53 @@
+"""
+Dashboard counters.
+
+count_all() returns the sizes of several querysets from one SELECT of scalar
+COUNT(*) subqueries, instead of one round trip per counter. cached_counts()
+keeps a group of counters for a short TTL per scope (e.g. per doctor), and
+invalidate_counts() drops every scope of a group at once (see utils.cache),
+so writes to a counted model show up on the next load.
+"""
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+
+from utils.cache import get_or_build, invalidate
+
+COUNTS_TTL_SECONDS = getattr(settings, 'DASHBOARD_COUNTS_TTL_SECONDS', 60)
+
+
+def _count_sql(queryset):
+    queryset = queryset.order_by()
+    if not queryset.query.values_select:
+        # Only the key is needed to count rows; values()/distinct() querysets count their rows as given
+        queryset = queryset.values('pk')
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return '0', ()
+    return f"(SELECT COUNT(*) FROM ({sql}) AS counted)", params
+
+
+def count_all(querysets, using='default'):
+    """{name: queryset.count()} for a dict of querysets, in a single query"""
+    if not querysets:
+        return {}
+    selects, params = [], []
+    for queryset in querysets.values():
+        sql, query_params = _count_sql(queryset)
+        selects.append(sql)
+        params.extend(query_params)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(selects)}", params)
+        row = cursor.fetchone()
+    return dict(zip(querysets, row))
+
+
+def cached_counts(group, build, scope=''):
+    """build() for this group and scope, cached for COUNTS_TTL_SECONDS"""
+    return get_or_build(f'counts:{group}', scope, build, COUNTS_TTL_SECONDS)
+
+
+def invalidate_counts(group):
+    """Drop the cached counters of every scope now and again once the surrounding transaction commits"""
+    invalidate(f'counts:{group}')
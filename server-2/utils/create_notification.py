@@ -1,10 +1,18 @@
-import requests
-from decouple import config
 from datetime import datetime
+from utils.peer_client import peer_outbox
+import logging
+
+logger = logging.getLogger(__name__)
+
 
 class NotificationQueries:
+    """
+    Notifications are not critical to the calling request, so they are queued on
+    the peer outbox and sent to Server-1 in the background (after the current
+    transaction commits), coalesced into batch requests.
+    """
     def __init__(self):
-        self.client = config("CLIENT", default="http://localhost:8000")
+        self.outbox = peer_outbox
 
     def create_notification(
         self,
@@ -29,16 +37,14 @@ class NotificationQueries:
         }
 
         try:
-            response = requests.post(
-                f"{self.client}/notification/create/",
-                json=payload,
-                timeout=5
+            self.outbox.enqueue(
+                "/notification/create/",
+                payload,
+                batch_path="/notification/create/batch/",
             )
-            response.raise_for_status()
-            print(f"Notification successfully sent to Server-1: {response.json()}")
             return True
-        except requests.RequestException as e:
-            print(f"Error creating notification: {e}")
+        except Exception as e:
+            logger.error(f"Error queueing notification: {e}")
             return None
 
     def reminder_notification(
@@ -61,7 +67,7 @@ class NotificationQueries:
             "message": message,
             "recipients": recipients or [],
             "notif_type": notif_type,
-            "remind_at": remind_at_iso,
+            "send_at": remind_at_iso,
             "web_route": web_route,
             "web_params": web_params or {},
             "mobile_route": mobile_route,
@@ -69,14 +75,8 @@ class NotificationQueries:
         }
 
         try:
-            response = requests.post(
-                f"{self.client}/notification/create-reminder/",
-                json=payload,
-                timeout=5
-            )
-            response.raise_for_status()
-            print(f"Reminder notification successfully sent to Server-1: {response.json()}")
+            self.outbox.enqueue("/notification/create-reminder/", payload)
             return True
-        except requests.RequestException as e:
-            print(f"Error creating reminder notification: {e}")
+        except Exception as e:
+            logger.error(f"Error queueing reminder notification: {e}")
             return None
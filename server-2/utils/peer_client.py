@@ -0,0 +1,202 @@
+"""
+Pooled HTTP client for calls between server-1 and server-2.
+
+All double queries share one keep-alive connection pool with bounded timeouts
+and retry with exponential backoff. Non-critical calls (notifications) go
+through PeerOutbox instead: they are queued after the surrounding transaction
+commits and sent from a background thread, coalesced into batch requests.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+import httpx
+from decouple import config
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+RETRY_STATUSES = {502, 503, 504}
+
+
+class PeerResponse:
+    """Wraps httpx.Response and keeps the requests-style `ok` flag callers check"""
+
+    def __init__(self, response):
+        self._response = response
+
+    @property
+    def ok(self):
+        return self._response.is_success
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+class PeerClient:
+    def __init__(self, base_url=None, timeout=None, connect_timeout=None,
+                 max_retries=None, backoff=None, max_connections=None):
+        self.base_url = base_url or config("CLIENT", default="http://localhost:8000")
+        self.timeout = timeout or getattr(settings, 'PEER_TIMEOUT', 10)
+        self.connect_timeout = connect_timeout or getattr(settings, 'PEER_CONNECT_TIMEOUT', 3)
+        self.max_retries = getattr(settings, 'PEER_MAX_RETRIES', 2) if max_retries is None else max_retries
+        self.backoff = getattr(settings, 'PEER_RETRY_BACKOFF', 0.2) if backoff is None else backoff
+        self.max_connections = max_connections or getattr(settings, 'PEER_MAX_CONNECTIONS', 20)
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        base_url=self.base_url,
+                        timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                        limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_connections,
+                            keepalive_expiry=30,
+                        ),
+                    )
+        return self._client
+
+    def request(self, method, path, json=None, retries=None, **kwargs):
+        """
+        Sends a request through the shared pool. Connection failures are always
+        retried (nothing reached the peer); timeouts and 502/503/504 responses are
+        only retried for idempotent methods so a create is never applied twice.
+        """
+        method = method.upper()
+        retries = self.max_retries if retries is None else retries
+        idempotent = method in IDEMPOTENT_METHODS
+
+        for attempt in range(retries + 1):
+            last = attempt == retries
+            try:
+                response = self.client.request(method, path, json=json, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                if last:
+                    raise
+            except httpx.TransportError:
+                if last or not idempotent:
+                    raise
+            else:
+                if last or not idempotent or response.status_code not in RETRY_STATUSES:
+                    return PeerResponse(response)
+
+            delay = self.backoff * (2 ** attempt)
+            logger.warning(f"Retrying {method} {path} in {delay:.1f}s (attempt {attempt + 2}/{retries + 1})")
+            time.sleep(delay)
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, json=None, **kwargs):
+        return self.request('POST', path, json=json, **kwargs)
+
+    def put(self, path, json=None, **kwargs):
+        return self.request('PUT', path, json=json, **kwargs)
+
+    def patch(self, path, json=None, **kwargs):
+        return self.request('PATCH', path, json=json, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request('DELETE', path, **kwargs)
+
+    def batch(self, path, items, **kwargs):
+        """Sends several payloads to a batch endpoint in one request"""
+        return self.post(path, json={"items": list(items)}, **kwargs)
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+class PeerOutbox:
+    """
+    Fire-and-forget queue for non-critical peer calls. Items are queued when the
+    current transaction commits (immediately outside one) and a daemon thread
+    sends them; items that share a batch_path are coalesced into one request.
+    """
+
+    def __init__(self, client, max_batch=None, maxsize=None):
+        self.client = client
+        self.max_batch = max_batch or getattr(settings, 'PEER_OUTBOX_BATCH_SIZE', 50)
+        self._queue = queue.Queue(maxsize=maxsize or getattr(settings, 'PEER_OUTBOX_MAXSIZE', 10000))
+        self._worker = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def enqueue(self, path, payload, batch_path=None, method='POST'):
+        item = (method, path, payload, batch_path)
+        transaction.on_commit(lambda: self._put(item))
+
+    def _put(self, item):
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            logger.error(f"Peer outbox full, dropping {item[0]} {item[1]}")
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='peer-outbox', daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.max_batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._send(items)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def _send(self, items):
+        batches = {}
+        singles = []
+        for item in items:
+            if item[3] and item[0] == 'POST':
+                batches.setdefault(item[3], []).append(item)
+            else:
+                singles.append(item)
+
+        for batch_path, group in batches.items():
+            if len(group) == 1:
+                singles.extend(group)
+                continue
+            self._call('POST', batch_path, {"items": [item[2] for item in group]})
+
+        for method, path, payload, _ in singles:
+            self._call(method, path, payload)
+
+    def _call(self, method, path, payload):
+        try:
+            response = self.client.request(method, path, json=payload)
+            if not response.ok:
+                logger.error(f"Peer outbox {method} {path} failed: {response.status_code} {response.text[:200]}")
+        except Exception as e:
+            logger.error(f"Peer outbox {method} {path} failed: {str(e)}")
+
+    def flush(self, timeout=10):
+        """Waits (up to timeout seconds) for queued items to be sent"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+
+peer_client = PeerClient()
+peer_outbox = PeerOutbox(peer_client)
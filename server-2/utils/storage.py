@@ -0,0 +1,283 @@
+"""
+File upload pipeline used by every serializer and view that stores files.
+
+Files arrive as multipart parts, which Django already streams to temporary
+files, or, from older clients, as base64 strings in the JSON body. Base64 is
+decoded in fixed-size chunks into a buffer that moves to disk for large
+files, so a file is not held as a stripped string, a padded string and a
+bytes copy all at once. Images are downscaled (and optionally thumbnailed)
+with Pillow before they are stored, and upload_many sends a form's files
+through a bounded worker pool instead of one after another.
+
+Files go to Supabase Storage unless FILE_STORAGE_BACKEND = 'local', which
+keeps them under LOCAL_STORAGE_ROOT (tests and offline development).
+"""
+import base64
+import logging
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_WORKERS = getattr(settings, 'UPLOAD_WORKERS', 4)
+MAX_IMAGE_DIMENSION = getattr(settings, 'UPLOAD_MAX_IMAGE_DIMENSION', 2048)
+THUMBNAIL_DIMENSION = getattr(settings, 'UPLOAD_THUMBNAIL_DIMENSION', 320)
+SPOOL_MAX_BYTES = 1024 * 1024  # Decoded files above this are written to a temporary file
+DECODE_CHUNK = 64 * 1024  # Base64 characters read per step
+RESIZABLE_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+
+
+class Upload:
+    """A file ready to store. path is set when its bytes are already on disk."""
+
+    def __init__(self, name, content_type, file, path=None):
+        self.name = name
+        self.content_type = content_type or 'application/octet-stream'
+        self.file = file
+        self.path = path
+
+    def close(self):
+        self.file.close()
+
+
+# ===============================================================
+#  DECODING
+# ===============================================================
+def decode_base64(b64_string):
+    """Decode a (data URL or bare) base64 string into a binary file positioned at 0"""
+    start = b64_string.index(',') + 1 if b64_string.startswith('data:') else 0
+    if (len(b64_string) - start) * 3 // 4 > SPOOL_MAX_BYTES:
+        file = tempfile.NamedTemporaryFile()
+    else:
+        file = BytesIO()
+    rest = ''
+    for offset in range(start, len(b64_string), DECODE_CHUNK):
+        # Line breaks would shift the 4-character groups, so they are dropped before
+        # splitting; characters past the last whole group wait for the next chunk
+        chunk = rest + ''.join(b64_string[offset:offset + DECODE_CHUNK].split())
+        whole = len(chunk) - len(chunk) % 4
+        file.write(base64.b64decode(chunk[:whole]))
+        rest = chunk[whole:]
+    if rest:
+        # Unpadded tail
+        file.write(base64.b64decode(rest + '=' * (4 - len(rest))))
+    file.seek(0)
+    return file
+
+
+def open_upload(file_data):
+    """Upload from a {'name', 'type', 'file'} dict whose file is base64 text or an uploaded file"""
+    content = file_data['file']
+    if isinstance(content, str):
+        file = decode_base64(content)
+        path = file.name if isinstance(getattr(file, 'name', None), str) else None
+    else:
+        file = content
+        file.seek(0)
+        path = content.temporary_file_path() if hasattr(content, 'temporary_file_path') else None
+    return Upload(file_data['name'], file_data.get('type'), file, path)
+
+
+def request_files(request, key='files'):
+    """Files sent as multipart parts under key, else the base64 dicts from the JSON body"""
+    if request is None:
+        return []
+    parts = request.FILES.getlist(key)
+    if parts:
+        return [{'name': part.name, 'type': part.content_type, 'file': part} for part in parts]
+    return request.data.get(key, [])
+
+
+# ===============================================================
+#  IMAGES
+# ===============================================================
+def thumbnail_path(path):
+    """Where the thumbnail of the file stored at path is kept"""
+    folder, _, name = path.rpartition('/')
+    return f"{folder}/thumbs/{name}" if folder else f"thumbs/{name}"
+
+
+def _encode_image(image, image_format):
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    file = BytesIO()
+    image.save(file, format=image_format, quality=85, optimize=True)
+    file.seek(0)
+    return file
+
+
+def prepare_image(upload, thumbnail=False):
+    """
+    (upload, thumbnail or None). Images larger than MAX_IMAGE_DIMENSION come
+    back downscaled; anything that is not a resizable image comes back as is.
+    """
+    if not upload.content_type.startswith('image/'):
+        return upload, None
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return upload, None
+
+    try:
+        image = Image.open(upload.file)
+        image_format = image.format
+        if image_format not in RESIZABLE_FORMATS:
+            upload.file.seek(0)
+            return upload, None
+        if image_format == 'JPEG':
+            # Let the decoder skip detail that would be thrown away anyway
+            image.draft('RGB', (MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION))
+        image = ImageOps.exif_transpose(image)
+
+        prepared = upload
+        if max(image.size) > MAX_IMAGE_DIMENSION:
+            image.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION))
+            prepared = Upload(upload.name, upload.content_type, _encode_image(image, image_format))
+        else:
+            upload.file.seek(0)
+
+        thumb = None
+        if thumbnail:
+            small = image.copy()
+            small.thumbnail((THUMBNAIL_DIMENSION, THUMBNAIL_DIMENSION))
+            thumb = Upload(upload.name, upload.content_type, _encode_image(small, image_format))
+        return prepared, thumb
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f"Storing {upload.name} without resizing: {str(e)}")
+        upload.file.seek(0)
+        return upload, None
+
+
+# ===============================================================
+#  BACKENDS
+# ===============================================================
+class SupabaseStorage:
+    def __init__(self, client):
+        self.client = client
+
+    def save(self, bucket, path, upload):
+        options = {
+            'content-type': upload.content_type,
+            'cacheControl': '3600',
+            'upsert': False,
+            'x-client-info': 'react-native-upload'
+        }
+        if upload.path:
+            # Streamed from disk by the storage client
+            with open(upload.path, 'rb') as body:
+                self.client.storage.from_(bucket).upload(path, body, options)
+        else:
+            self.client.storage.from_(bucket).upload(path, upload.file.read(), options)
+
+    def public_url(self, bucket, path):
+        return self.client.storage.from_(bucket).get_public_url(path)
+
+    def remove(self, bucket, path):
+        self.client.storage.from_(bucket).remove([path])
+
+
+class LocalStorage:
+    """Stands in for Supabase: <root>/<bucket>/<path>, served under base_url"""
+
+    def __init__(self, root, base_url):
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip('/')
+
+    def _file(self, bucket, path):
+        bucket_root = self.root / bucket
+        target = (bucket_root / path).resolve()
+        if bucket_root not in target.parents:
+            raise ValueError(f"Invalid storage path {bucket}/{path}")
+        return target
+
+    def save(self, bucket, path, upload):
+        target = self._file(bucket, path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Like the Supabase uploads (upsert off), never replace an existing file
+        with open(target, 'xb') as out:
+            if upload.path:
+                with open(upload.path, 'rb') as source:
+                    shutil.copyfileobj(source, out)
+            else:
+                shutil.copyfileobj(upload.file, out)
+
+    def public_url(self, bucket, path):
+        return f"{self.base_url}/{bucket}/{path}"
+
+    def remove(self, bucket, path):
+        self._file(bucket, path).unlink(missing_ok=True)
+
+
+def get_storage():
+    if getattr(settings, 'FILE_STORAGE_BACKEND', 'supabase') == 'local':
+        return LocalStorage(
+            getattr(settings, 'LOCAL_STORAGE_ROOT', Path(settings.BASE_DIR) / 'local_storage'),
+            getattr(settings, 'LOCAL_STORAGE_URL', '/local-storage/'),
+        )
+    from .supabase_client import supabase
+    return SupabaseStorage(supabase)
+
+
+# ===============================================================
+#  UPLOADS
+# ===============================================================
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _upload_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='upload')
+        return _executor
+
+
+def store_file(file_data, bucket, folder=None, thumbnail=False):
+    """Store one file and return its public URL; raises when the upload fails"""
+    upload = open_upload(file_data)
+    prepared, thumb = upload, None
+    try:
+        prepared, thumb = prepare_image(upload, thumbnail)
+        upload_path = f"{folder}/{prepared.name}" if folder else f"{prepared.name}"
+        storage = get_storage()
+        storage.save(bucket, upload_path, prepared)
+        if thumb:
+            storage.save(bucket, thumbnail_path(upload_path), thumb)
+        return storage.public_url(bucket, upload_path)
+    finally:
+        for opened in {id(item): item for item in (upload, prepared, thumb) if item}.values():
+            opened.close()
+
+
+def upload_to_storage(file_data, bucket, folder=None, thumbnail=False):
+    """Public URL of the stored file, or None when the upload failed"""
+    url = None
+    try:
+        url = store_file(file_data, bucket, folder, thumbnail)
+    except Exception as e:
+        logger.error(f"Failed to upload file {file_data['name']}: {str(e)}")
+    return url
+
+
+def upload_many(files, bucket, folder=None, thumbnail=False):
+    """upload_to_storage for every file, UPLOAD_WORKERS at a time; URLs in input order"""
+    if len(files) < 2:
+        return [upload_to_storage(file_data, bucket, folder, thumbnail) for file_data in files]
+    return list(_upload_executor().map(
+        lambda file_data: upload_to_storage(file_data, bucket, folder, thumbnail), files
+    ))
+
+
+def remove_from_storage(bucket, file_path):
+    try:
+        get_storage().remove(bucket, file_path)
+    except Exception as e:
+        logger.error(f"Failed to delete file {file_path} from bucket {bucket}: {str(e)}")
+    return
@@ -4,7 +4,7 @@ import { Badge } from "@/components/ui/badge";
 import { Popover, PopoverTrigger, PopoverContent } from "@/components/ui/popover";
 import { Bell, MoreHorizontal, Eye, CheckCheck, ExternalLink, Settings, FileText, Info, Clock, AlertTriangle  } from "lucide-react";
 import DropdownLayout from "@/components/ui/dropdown/dropdown-layout";
-import { fetchNotification } from "../../queries/fetchNotificationQueries";
+import { fetchNotification, useNotificationSocket } from "../../queries/fetchNotificationQueries";
 import { listenForMessages } from "@/firebase";
 import { showErrorToast, showNotificationToast } from "@/components/ui/toast";
 import { useUpdateBulkNotification, useUpdateNotification } from "../../queries/updateNotificationQueries";
@@ -83,14 +83,8 @@ export const NotificationBell: React.FC = () => {
   const [open, setOpen] = useState(false);
   const { data, isLoading, isError, refetch } = fetchNotification();
   
-  // Auto-refetch notifications every 30 seconds as fallback
-  useEffect(() => {
-    const interval = setInterval(() => {
-      refetch();
-    }, 30000); // 30 seconds
-    
-    return () => clearInterval(interval);
-  }, [refetch]);
+  // Live updates over the websocket (new notifications, unread count)
+  useNotificationSocket();
   
   useEffect(() => {
     if (data) {
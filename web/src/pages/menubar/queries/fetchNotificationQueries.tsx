@@ -1,5 +1,7 @@
+import { useEffect } from "react";
 import { api } from "@/api/api";
-import { useQuery } from "@tanstack/react-query";
+import { store } from "@/redux/store";
+import { useQuery, useQueryClient } from "@tanstack/react-query";
 
 export const fetchNotification = () => {
   return useQuery({
@@ -22,4 +24,75 @@ export const fetchNotification = () => {
     refetchOnWindowFocus: true, // Refetch when user returns to tab
     retry: 2, // Retry failed requests twice
   })
-};
\ No newline at end of file
+};
+
+const socketUrl = () => {
+  const base = (import.meta.env.VITE_API_URL || window.location.origin).replace(/^http/, "ws").replace(/\/$/, "");
+  return `${base}/ws/notifications/`;
+};
+
+// Keeps ['notifications'] current over the server's websocket instead of polling.
+// On reconnect the newest notif_id we have is sent so missed ones are replayed.
+export const useNotificationSocket = () => {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    let socket: WebSocket | null = null;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+    let attempts = 0;
+    let closed = false;
+
+    const cached = () =>
+      queryClient.getQueryData<{ notif_id: number | string; is_read: boolean }[]>(['notifications']) || [];
+
+    const lastId = () => {
+      const ids = cached().map((n) => Number(n.notif_id)).filter((id) => !isNaN(id));
+      return ids.length ? Math.max(...ids) : null;
+    };
+
+    const isStale = (message: any) => {
+      switch (message.type) {
+        case "notification":
+          return true;
+        case "resume":
+          return message.notifications.length > 0;
+        case "unread":
+          return message.unread !== cached().filter((n) => !n.is_read).length;
+        default:
+          return false;
+      }
+    };
+
+    const connect = () => {
+      const token = store.getState().auth.accessToken;
+      if (!token || closed) return;
+
+      const params = new URLSearchParams({ token });
+      const last = lastId();
+      if (last !== null && attempts > 0) params.set("last_id", String(last));
+      socket = new WebSocket(`${socketUrl()}?${params}`);
+
+      socket.onopen = () => {
+        attempts = 0;
+      };
+      socket.onmessage = (event) => {
+        if (isStale(JSON.parse(event.data))) {
+          queryClient.invalidateQueries({ queryKey: ['notifications'] });
+        }
+      };
+      socket.onclose = () => {
+        if (closed) return;
+        // Back off up to 30 seconds; the access token may have been refreshed meanwhile
+        attempts += 1;
+        retry = setTimeout(connect, Math.min(30000, 1000 * 2 ** attempts));
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      socket?.close();
+    };
+  }, [queryClient]);
+};